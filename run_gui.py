@@ -47,4 +47,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序中启动解码工作进程（spawn）需要
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
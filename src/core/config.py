@@ -24,6 +24,8 @@ from functools import wraps
 
 T = TypeVar('T')
 
+MIN_IMAGE_CACHE_BYTES = 1024 * 1024  # 图像缓存字节预算下限，小于该值的旧 cache_size 视为条目数
+
 
 @dataclass
 class DatabaseConfig:
@@ -47,7 +49,39 @@ class ImageConfig:
     min_zoom_level: float = 0.1
     grid_color: str = "#FF0000"
     grid_width: int = 2
-    cache_size: int = 100  # 缓存图像数量
+    cache_bytes: int = 512 * 1024 * 1024  # 图像缓存字节预算（512MB），旧配置键 cache_size 为缓存条目数
+    prefetch_depth: int = 3  # 导航时向后预取的切片数量，0表示禁用
+    prefetch_workers: int = 2  # 预取线程数
+    progressive_render: bool = True  # 导航时先快速重采样显示，停止导航后空闲时再用LANCZOS重绘
+    refine_delay_ms: int = 80  # 停止导航后等待多久进行高质量重绘（毫秒）
+    disk_cache_enabled: bool = True  # 是否在全景图目录下持久化显示用派生图像
+    disk_cache_dir: str = ".annotation_cache"  # 磁盘缓存目录名（位于全景图目录下）
+    state_dir: str = ".annotation_state"  # 持久状态目录名（位于全景图目录下，存放隔离清单等，清理缓存时不删除）
+    disk_cache_max_size: int = 2 * 1024 * 1024 * 1024  # 磁盘缓存清理上限（2GB）
+    enhance_workers: int = 0  # 批量切片增强进程数，0表示使用CPU核数
+    atlas_workers: int = 0  # 缩略图图集生成进程数，0表示使用CPU核数
+    decode_workers: int = 2  # 全景图后台解码进程数，0表示在调用线程中解码
+    decode_backend: str = "auto"  # 图像解码后端：auto（按扩展名测速选择）、pil、opencv、memmap（仅BMP）
+    decode_backend_profile: str = "~/.annotation_tool/decode_backends.json"  # 自动选择结果的持久化文件
+    scan_workers: int = 8  # 并行扫描全景图子目录的线程数
+    virtual_slices: bool = True  # 切片PNG不存在时直接从全景图裁剪孔位（PNG存在时优先使用）
+    packed_slices: bool = True  # 切片子目录下存在 slices.npy 打包文件时从中读取切片（优先于PNG）
+    perceptual_hash_on_scan: bool = True  # 加载目录后在后台计算切片感知哈希并持久化（用于重复切片检测）
+    duplicate_max_distance: int = 4  # 感知哈希汉明距离不超过该值视为近似重复切片（0-15）
+    slice_embeddings_on_scan: bool = True  # 加载目录后在后台计算切片外观嵌入并持久化（用于查找相似孔位）
+    similar_slices_top_k: int = 20  # 查找相似孔位时返回的切片数
+    bmp_memmap: bool = True  # 未压缩BMP全景图以内存映射方式读取像素数组
+    enhance_method: str = 'clahe'  # 切片增强方法：clahe（逐切片）或 plate（整板光照归一化，找不到全景图时使用clahe）
+    report_width: int = 1024  # 整板报告图的输出宽度（像素）
+    report_workers: int = 0  # 整板报告渲染进程数，0表示使用CPU核数
+    image_metadata_on_scan: bool = True  # 扫描目录时只读取图像文件头建立尺寸/模式索引并持久化（查询尺寸不再解码）
+    verify_workers: int = 0  # 图像完整性校验进程数，0表示使用CPU核数
+    skip_quarantined: bool = True  # 加载目录时跳过隔离清单中解码失败的切片和全景图
+    watch_directory: bool = True  # 加载目录后监视新写入的全景图和cfg文件并增量纳入（不重置当前位置）
+    transcode_workers: int = 0  # BMP全景图无损转码进程数，0表示使用CPU核数
+    transcode_format: str = 'png'  # 转码输出格式：png 或 tiff（deflate）
+    transcode_compress_level: int = 6  # PNG压缩级别（0-9），越高文件越小、转码越慢
+    watch_interval_ms: int = 1000  # 目录监视轮询间隔（毫秒），写入中的文件在相邻两次轮询不变后才纳入
 
 
 @dataclass
@@ -296,7 +330,7 @@ class ConfigManager:
             self._update_dataclass(self._config.database, data['database'])
         
         if 'image' in data:
-            self._update_dataclass(self._config.image, data['image'])
+            self._update_dataclass(self._config.image, self._migrate_image_config(data['image']))
         
         if 'annotation' in data:
             self._update_dataclass(self._config.annotation, data['annotation'])
@@ -312,6 +346,23 @@ class ConfigManager:
             if hasattr(self._config, key) and key not in ['database', 'image', 'annotation', 'ui', 'logging']:
                 setattr(self._config, key, value)
     
+    def _migrate_image_config(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        兼容旧的 image.cache_size（缓存条目数，如100）：改为字节预算 cache_bytes
+        旧值不小于1MB时视为字节数迁移，否则忽略并使用默认预算
+        """
+        if 'cache_size' not in data or 'cache_bytes' in data:
+            return data
+        data = dict(data)
+        legacy = data.pop('cache_size')
+        if isinstance(legacy, int) and legacy >= MIN_IMAGE_CACHE_BYTES:
+            data['cache_bytes'] = legacy
+            print(f"Warning: image.cache_size is deprecated, using it as image.cache_bytes = {legacy}")
+        else:
+            print(f"Warning: ignoring legacy image.cache_size = {legacy} (an item count); "
+                  f"image.cache_bytes is now a byte budget, using default {self._config.image.cache_bytes}")
+        return data
+    
     def _update_dataclass(self, obj: Any, data: Dict[str, Any]) -> None:
         """更新数据类对象"""
         for key, value in data.items():
@@ -378,9 +429,36 @@ class ConfigManager:
             if self._config.image.max_image_size <= 0:
                 errors.append("最大图像大小必须大于0")
             
+            if self._config.image.cache_bytes < MIN_IMAGE_CACHE_BYTES:
+                errors.append("图像缓存字节预算不能小于1MB")
+            
             if not self._config.image.supported_formats:
                 errors.append("必须支持至少一种图像格式")
-            
+
+            if self._config.image.decode_backend not in ['auto', 'pil', 'opencv', 'memmap']:
+                errors.append("图像解码后端无效")
+
+            if self._config.image.enhance_method not in ['plate', 'clahe']:
+                errors.append("切片增强方法无效")
+
+            if not (0 <= self._config.image.duplicate_max_distance <= 15):
+                errors.append("重复切片汉明距离必须在0-15之间")
+
+            if self._config.image.similar_slices_top_k <= 0:
+                errors.append("相似孔位数量必须大于0")
+
+            if self._config.image.report_width <= 0:
+                errors.append("报告图宽度必须大于0")
+
+            if self._config.image.transcode_format not in ['png', 'tiff']:
+                errors.append("转码输出格式无效")
+
+            if not (0 <= self._config.image.transcode_compress_level <= 9):
+                errors.append("PNG压缩级别必须在0-9之间")
+
+            if self._config.image.watch_interval_ms <= 0:
+                errors.append("目录监视轮询间隔必须大于0")
+
             # 验证标注配置
             if self._config.annotation.auto_save_interval <= 0:
                 errors.append("自动保存间隔必须大于0")
@@ -0,0 +1,126 @@
+"""
+BMP内存映射读取
+解析未压缩BMP文件头，把像素区映射为 numpy.memmap，并通过视图处理自底向上的行序和BGR通道顺序，
+裁剪、统计和缩小只会读取实际访问到的页面；其他格式或不支持的BMP回退到PIL解码
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+# 支持内存映射的压缩方式：BI_RGB(0)、BI_BITFIELDS(3，仅限标准BGRX掩码)
+_BI_RGB = 0
+_BI_BITFIELDS = 3
+_STANDARD_MASKS = (0x00FF0000, 0x0000FF00, 0x000000FF)
+
+
+@dataclass(frozen=True)
+class BmpInfo:
+    """BMP像素布局信息"""
+    width: int
+    height: int
+    bits_per_pixel: int
+    pixel_offset: int
+    row_stride: int
+    top_down: bool
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        return self.bits_per_pixel // 8
+
+
+def read_bmp_info(image_path: str) -> Optional[BmpInfo]:
+    """
+    解析BMP文件头
+
+    Returns:
+        可以内存映射的24/32位未压缩BMP返回布局信息，其他情况（非BMP、调色板、RLE压缩、文件截断）返回None
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            header = f.read(14 + 124)
+            file_size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+
+    if len(header) < 26 or header[:2] != b'BM':
+        return None
+
+    pixel_offset, dib_size = struct.unpack_from('<II', header, 10)
+    if dib_size == 12:
+        # BITMAPCOREHEADER
+        width, height, _, bits_per_pixel = struct.unpack_from('<HHHH', header, 18)
+        compression = _BI_RGB
+    elif dib_size >= 40 and len(header) >= 14 + 40:
+        width, height, _, bits_per_pixel, compression = struct.unpack_from('<iiHHI', header, 18)
+    else:
+        return None
+
+    if bits_per_pixel not in (24, 32) or width <= 0 or height == 0:
+        return None
+    if compression == _BI_BITFIELDS:
+        # 掩码紧跟在40字节信息头之后，V4/V5信息头中位于相同偏移
+        if bits_per_pixel != 32 or len(header) < 14 + 40 + 12:
+            return None
+        if struct.unpack_from('<III', header, 14 + 40) != _STANDARD_MASKS:
+            return None
+    elif compression != _BI_RGB:
+        return None
+
+    row_stride = (width * bits_per_pixel // 8 + 3) // 4 * 4
+    if pixel_offset + row_stride * abs(height) > file_size:
+        return None
+
+    return BmpInfo(width=width, height=abs(height), bits_per_pixel=bits_per_pixel,
+                   pixel_offset=pixel_offset, row_stride=row_stride, top_down=height < 0)
+
+
+def _map_rows(image_path: str, info: BmpInfo) -> np.memmap:
+    """按文件中的行顺序映射像素区，形状为 (行数, 行字节数)"""
+    return np.memmap(image_path, dtype=np.uint8, mode='r', offset=info.pixel_offset,
+                     shape=(info.height, info.row_stride))
+
+
+def open_bmp_array(image_path: str, info: Optional[BmpInfo] = None) -> Optional[np.ndarray]:
+    """
+    以内存映射方式打开BMP像素
+
+    Returns:
+        (H, W, 3) RGB只读视图（不复制像素，行序和通道顺序通过负步长处理），不支持时返回None
+    """
+    info = info or read_bmp_info(image_path)
+    if info is None:
+        return None
+
+    rows = _map_rows(image_path, info)
+    pixels = rows[:, :info.width * info.bytes_per_pixel].reshape(
+        info.height, info.width, info.bytes_per_pixel)
+    if not info.top_down:
+        pixels = pixels[::-1]
+    # BGR / BGRX -> RGB
+    return pixels[:, :, 2::-1]
+
+
+def open_bmp_image(image_path: str, info: Optional[BmpInfo] = None) -> Optional[Image.Image]:
+    """
+    从内存映射的像素区直接构建PIL图像（一次解包，无需先读入文件缓冲区再转换）
+
+    Returns:
+        RGB图像，不支持时返回None
+    """
+    info = info or read_bmp_info(image_path)
+    if info is None:
+        return None
+
+    rows = _map_rows(image_path, info)
+    rawmode = 'BGR' if info.bits_per_pixel == 24 else 'BGRX'
+    orientation = 1 if info.top_down else -1
+    image = Image.frombuffer('RGB', (info.width, info.height), rows, 'raw',
+                             rawmode, info.row_stride, orientation)
+    # frombuffer 对RGB模式会复制像素，这里再显式加载一次确保不再引用映射
+    image.load()
+    return image
@@ -0,0 +1,313 @@
+"""
+图像解码后端
+统一 PIL、OpenCV 和 BMP内存映射 三种解码方式的接口，输出一致的 RGB 像素 (H, W, 3) / PIL图像；
+启动时可按扩展名对各后端做微基准测试，选出当前机器上最快且像素一致的后端并持久化选择结果
+"""
+
+import json
+import os
+import platform
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import cv2
+import numpy as np
+import PIL
+from PIL import Image
+
+from src.services.bmp_reader import open_bmp_array, open_bmp_image
+
+# 日志导入
+try:
+    from src.utils.logger import log_debug, log_error
+except ImportError:
+    # 如果日志模块不可用，使用print作为后备
+    def log_debug(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+    def log_error(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+
+
+class DecodeBackend:
+    """
+    解码后端基类
+    子类实现 decode_array 或 decode_image 之一，另一个由基类转换得到
+    """
+
+    name = ''
+    extensions: frozenset = frozenset()
+
+    def supports(self, image_path: str) -> bool:
+        """是否支持该文件扩展名"""
+        return Path(image_path).suffix.lower() in self.extensions
+
+    def decode_array(self, image_path: str) -> np.ndarray:
+        """解码为 RGB uint8 数组 (H, W, 3)"""
+        return np.asarray(self.decode_image(image_path))
+
+    def decode_image(self, image_path: str) -> Image.Image:
+        """解码为已加载的 RGB PIL图像（不再引用文件）"""
+        return Image.fromarray(self.decode_array(image_path))
+
+
+class PilBackend(DecodeBackend):
+    """PIL解码（默认后端，支持全部格式）"""
+
+    name = 'pil'
+    extensions = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif'})
+
+    def decode_image(self, image_path: str) -> Image.Image:
+        with Image.open(image_path) as image:
+            return image.convert('RGB') if image.mode != 'RGB' else image.copy()
+
+
+class OpenCVBackend(DecodeBackend):
+    """
+    OpenCV解码
+    通过 np.fromfile + imdecode 读取（Windows下支持中文路径），忽略EXIF方向以与PIL保持一致
+    """
+
+    name = 'opencv'
+    extensions = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif'})
+
+    def decode_array(self, image_path: str) -> np.ndarray:
+        data = np.fromfile(image_path, dtype=np.uint8)
+        bgr = cv2.imdecode(data, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if bgr is None:
+            raise ValueError(f"OpenCV无法解码图像: {image_path}")
+        return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+
+
+class MemmapBmpBackend(DecodeBackend):
+    """
+    BMP内存映射解码（见 bmp_reader），不支持的BMP（调色板、RLE压缩等）回退到PIL
+    decode_array 返回只读的内存映射视图，不复制像素
+    """
+
+    name = 'memmap'
+    extensions = frozenset({'.bmp'})
+
+    def decode_array(self, image_path: str) -> np.ndarray:
+        pixels = open_bmp_array(image_path)
+        if pixels is None:
+            return BACKENDS['pil'].decode_array(image_path)
+        return pixels
+
+    def decode_image(self, image_path: str) -> Image.Image:
+        image = open_bmp_image(image_path)
+        if image is None:
+            return BACKENDS['pil'].decode_image(image_path)
+        return image
+
+
+# 已注册的解码后端：名称 -> 实例
+BACKENDS: Dict[str, DecodeBackend] = {
+    backend.name: backend for backend in (PilBackend(), OpenCVBackend(), MemmapBmpBackend())
+}
+
+DEFAULT_BACKEND = 'pil'
+
+
+def get_backend(name: str) -> DecodeBackend:
+    """按名称获取解码后端"""
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知的解码后端: {name}") from None
+
+
+class ImageDecoder:
+    """
+    按扩展名分派到解码后端
+    只保存 扩展名 -> 后端名称 的映射，可以直接传给工作进程
+    """
+
+    def __init__(self, choices: Optional[Dict[str, str]] = None):
+        self.choices: Dict[str, str] = {}
+        for extension, name in (choices or {}).items():
+            backend = get_backend(name)
+            extension = extension.lower()
+            if extension not in backend.extensions:
+                raise ValueError(f"解码后端 {name} 不支持 {extension}")
+            self.choices[extension] = name
+
+    @classmethod
+    def forced(cls, name: str, extensions: Iterable[str]) -> 'ImageDecoder':
+        """所有支持的扩展名都使用指定后端，其余使用默认后端"""
+        backend = get_backend(name)
+        return cls({extension: name for extension in extensions if extension in backend.extensions})
+
+    def backend_for(self, image_path: str) -> DecodeBackend:
+        """获取文件对应的解码后端"""
+        return BACKENDS[self.choices.get(Path(image_path).suffix.lower(), DEFAULT_BACKEND)]
+
+    def decode_array(self, image_path: str) -> np.ndarray:
+        """解码为 RGB uint8 数组 (H, W, 3)"""
+        return self.backend_for(image_path).decode_array(image_path)
+
+    def decode_image(self, image_path: str) -> Image.Image:
+        """解码为已加载的 RGB PIL图像"""
+        return self.backend_for(image_path).decode_image(image_path)
+
+
+# === 自动选择 ===
+
+# 基准测试使用的样本格式：扩展名 -> (PIL保存格式, 是否无损)
+_SAMPLE_FORMATS = {
+    '.bmp': ('BMP', True),
+    '.png': ('PNG', True),
+    '.jpg': ('JPEG', False),
+    '.jpeg': ('JPEG', False),
+    '.tif': ('TIFF', True),
+    '.tiff': ('TIFF', True),
+}
+
+# 有损格式允许的平均像素误差（不同libjpeg实现的IDCT舍入略有差异）
+_LOSSY_TOLERANCE = 1.0
+
+
+def machine_signature() -> Dict[str, Any]:
+    """当前机器和解码库版本，任一变化时需要重新测速"""
+    return {
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def make_sample_pixels(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """生成接近显微图像的样本：平滑渐变叠加少量噪声（压缩率与真实图像相近）"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width]
+    base = ((xx + yy) % 256).astype(np.uint8)
+    pixels = np.dstack([base, base[::-1], base // 2])
+    return pixels + rng.integers(0, 8, size=pixels.shape, dtype=np.uint8)
+
+
+def _matches(pixels: np.ndarray, reference: np.ndarray, lossless: bool) -> bool:
+    if pixels.shape != reference.shape:
+        return False
+    if lossless:
+        return np.array_equal(pixels, reference)
+    return float(np.abs(pixels.astype(np.int16) - reference).mean()) <= _LOSSY_TOLERANCE
+
+
+def benchmark_backends(extensions: Iterable[str], sample_size=(1024, 768),
+                       repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    对每种扩展名的各后端做解码微基准测试
+
+    Args:
+        extensions: 需要测试的扩展名
+        sample_size: 样本图像尺寸 (宽, 高)
+        repeat: 每个后端的解码次数，取最小耗时
+
+    Returns:
+        扩展名 -> {后端名称: 最小解码耗时ms}；与PIL解码结果不一致的后端不包含在内
+    """
+    pixels = make_sample_pixels(*sample_size)
+    timings: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for extension in sorted({extension.lower() for extension in extensions}):
+            if extension not in _SAMPLE_FORMATS:
+                continue
+            sample_format, lossless = _SAMPLE_FORMATS[extension]
+            sample_path = os.path.join(tmp, f"sample{extension}")
+            Image.fromarray(pixels).save(sample_path, format=sample_format)
+            reference = BACKENDS[DEFAULT_BACKEND].decode_array(sample_path)
+
+            results = {}
+            for name, backend in BACKENDS.items():
+                if not backend.supports(sample_path):
+                    continue
+                try:
+                    if not _matches(np.asarray(backend.decode_image(sample_path)), reference, lossless):
+                        log_debug(f"解码后端 {name} 的 {extension} 输出与PIL不一致，跳过", "DECODE_BACKEND")
+                        continue
+                    elapsed = []
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        backend.decode_image(sample_path)
+                        elapsed.append((time.perf_counter() - start) * 1000)
+                except Exception as e:
+                    log_debug(f"解码后端 {name} 无法解码 {extension}: {e}", "DECODE_BACKEND")
+                    continue
+                results[name] = min(elapsed)
+            timings[extension] = results
+    return timings
+
+
+def choose_backends(timings: Dict[str, Dict[str, float]]) -> Dict[str, str]:
+    """每种扩展名选择耗时最短的后端"""
+    return {extension: min(results, key=results.get)
+            for extension, results in timings.items() if results}
+
+
+def load_backend_profile(profile_path: str) -> Optional[Dict[str, str]]:
+    """
+    读取持久化的后端选择
+
+    Returns:
+        扩展名 -> 后端名称；文件不存在、损坏或机器签名不一致时返回None
+    """
+    try:
+        with open(profile_path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+        if profile.get('signature') != machine_signature():
+            return None
+        choices = dict(profile['choices'])
+        ImageDecoder(choices)  # 校验后端名称
+        return choices
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_backend_profile(profile_path: str, choices: Dict[str, str],
+                         timings: Dict[str, Dict[str, float]]) -> None:
+    """保存后端选择（先写临时文件再原子替换）"""
+    path = Path(profile_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profile = {
+        'signature': machine_signature(),
+        'choices': choices,
+        'timings_ms': {extension: {name: round(ms, 3) for name, ms in results.items()}
+                       for extension, results in timings.items()},
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    temp_path = path.with_name(path.name + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+
+def select_backends(profile_path: Optional[str], extensions: Iterable[str]) -> Dict[str, str]:
+    """
+    获取各扩展名的解码后端：优先读取持久化结果，没有（或机器签名变化）时测速选择并保存
+
+    Args:
+        profile_path: 持久化文件路径，为空时只测速不保存
+        extensions: 需要选择后端的扩展名
+    """
+    extensions: List[str] = sorted({extension.lower() for extension in extensions})
+    if profile_path:
+        choices = load_backend_profile(profile_path)
+        if choices is not None and all(extension in choices for extension in extensions
+                                       if extension in _SAMPLE_FORMATS):
+            return choices
+
+    start = time.perf_counter()
+    timings = benchmark_backends(extensions)
+    choices = choose_backends(timings)
+    log_debug(f"解码后端测速完成 ({(time.perf_counter() - start) * 1000:.0f}ms): {choices}", "DECODE_BACKEND")
+    if profile_path:
+        try:
+            save_backend_profile(profile_path, choices, timings)
+        except OSError as e:
+            log_error(f"保存解码后端选择失败 {profile_path}: {e}", "DECODE_BACKEND")
+    return choices
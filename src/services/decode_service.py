@@ -0,0 +1,310 @@
+"""
+图像解码进程池
+在独立进程中解码图像并构建缩小层级，像素通过 multiprocessing.shared_memory 交给主进程，
+主进程直接在共享内存上包装 numpy 数组，不经过 pickle 复制像素，Tk 主线程只负责显示
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.services.decode_backends import ImageDecoder
+
+# 日志导入
+try:
+    from src.utils.logger import log_debug, log_error
+except ImportError:
+    # 如果日志模块不可用，使用print作为后备
+    def log_debug(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+    def log_error(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+
+
+# === 工作进程 ===
+
+def _warm_up() -> int:
+    """预热工作进程：加载PIL格式插件"""
+    Image.init()
+    return multiprocessing.current_process().pid
+
+
+def _build_levels(image_path: str, factors: Sequence[int],
+                  decoder: Optional[ImageDecoder] = None) -> Tuple[Image.Image, List[Image.Image]]:
+    """解码图像，返回 (原图, 各缩小层级)；每层由上一层做盒式缩小得到"""
+    full = (decoder or ImageDecoder()).decode_image(image_path)
+    current, current_factor = full, 1
+    levels = []
+    for factor in factors:
+        step = factor // current_factor
+        if step > 1:
+            if current.width < step or current.height < step:
+                break
+            current = current.reduce(step)
+            current_factor = factor
+        levels.append(current)
+    return full, levels
+
+
+def decode_levels(image_path: str, factors: Sequence[int] = (1,),
+                  decoder: Optional[ImageDecoder] = None) -> List[np.ndarray]:
+    """
+    解码图像并按缩小倍数生成各层级像素 (H, W, 3)
+    与 PanoramicImageService.build_image_pyramid 的层级一致
+    """
+    return [np.asarray(level) for level in _build_levels(image_path, factors, decoder)[1]]
+
+
+def render_display_image(full: Image.Image, levels: Sequence[Image.Image],
+                         display_size: Tuple[int, int]) -> Image.Image:
+    """
+    生成 'fit' 模式的显示图像：从不小于目标尺寸的最小层级做LANCZOS缩放，
+    与 PanoramicImageService.render_panoramic_overlay 的显示底图一致
+    """
+    def fit_size(image: Image.Image) -> Tuple[int, int]:
+        scale_ratio = min(max_width / image.width, max_height / image.height)
+        if scale_ratio >= 1.0:
+            return image.size
+        return int(image.width * scale_ratio), int(image.height * scale_ratio)
+
+    max_width, max_height = display_size
+    target = fit_size(full)
+    selected = full
+    for level in levels:
+        if level.width >= target[0] and level.height >= target[1]:
+            selected = level
+        else:
+            break
+    size = fit_size(selected)
+    if size == selected.size:
+        return selected
+    return selected.resize(size, Image.Resampling.LANCZOS)
+
+
+def _decode_to_shared(task: Tuple) -> Tuple[List[Tuple[str, Tuple[int, ...]]], float, Optional[str]]:
+    """
+    在工作进程中解码图像，把各层级像素（以及可选的显示图像，放在最后）写入新建的共享内存段
+
+    Args:
+        task: (图像路径, 缩小倍数, 显示尺寸或None, 解码器或None)
+
+    Returns:
+        ([(共享内存名, 形状)], 解码耗时ms, 错误信息)
+    """
+    image_path, factors, display_size, decoder = task
+    start = time.perf_counter()
+    segments = []
+    try:
+        full, levels = _build_levels(image_path, factors, decoder)
+        outputs = list(levels)
+        if display_size is not None:
+            outputs.append(render_display_image(full, [level for level in levels if level is not full],
+                                                display_size))
+        for output in outputs:
+            array = np.asarray(output)
+            segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            segments.append((segment, array.shape))
+            np.ndarray(array.shape, dtype=np.uint8, buffer=segment.buf)[...] = array
+        # 工作进程只关闭自己的映射，共享内存段由主进程接管并负责释放
+        for segment, _ in segments:
+            segment.close()
+        return [(segment.name, shape) for segment, shape in segments], \
+            (time.perf_counter() - start) * 1000, None
+    except Exception as e:
+        for segment, _ in segments:
+            segment.close()
+            segment.unlink()
+        return [], 0.0, str(e)
+
+
+# === 主进程 ===
+
+class DecodedImage:
+    """
+    共享内存中的解码结果
+    levels / display 为直接映射共享内存的只读数组；共享内存段在接管时已经 unlink，
+    最后一个引用释放（或调用 close）后内存归还系统，不会残留在 /dev/shm
+    """
+
+    def __init__(self, image_path: str, factors: Sequence[int],
+                 segments: List[Tuple[shared_memory.SharedMemory, Tuple[int, ...]]],
+                 decode_ms: float, has_display: bool = False):
+        self.image_path = image_path
+        self.decode_ms = decode_ms
+        self._segments = [segment for segment, _ in segments]
+        arrays = []
+        for segment, shape in segments:
+            array = np.ndarray(shape, dtype=np.uint8, buffer=segment.buf)
+            array.flags.writeable = False
+            arrays.append(array)
+        self.display: Optional[np.ndarray] = arrays.pop() if has_display else None
+        self.levels: List[np.ndarray] = arrays
+        self.factors = tuple(factors[:len(arrays)])
+
+    def to_images(self) -> List[Image.Image]:
+        """复制各层级为PIL图像（可以在关闭共享内存后继续使用）"""
+        return [Image.fromarray(level) for level in self.levels]
+
+    def close(self) -> None:
+        """释放共享内存映射，之后 levels / display 不可再使用"""
+        self.levels = []
+        self.display = None
+        for segment in self._segments:
+            try:
+                segment.close()
+            except BufferError:
+                # 外部仍持有数组视图，随其释放
+                pass
+        self._segments = []
+
+    def __enter__(self) -> 'DecodedImage':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class DecodeService:
+    """
+    解码进程池
+
+    - 使用 spawn 方式启动工作进程，避免在已初始化Tk的进程中fork
+    - warm_up() 提前启动全部工作进程，首次导航不承担进程启动开销
+    - 工作进程崩溃（BrokenProcessPool）时重建进程池并重试一次
+    - shutdown() 在程序退出时关闭进程池
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context('spawn')
+
+        # 统计信息
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'restarts': 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=self._context)
+            return self._executor
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """重建已损坏的进程池（多个任务同时失败时只重建一次）"""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = None
+            self.stats['restarts'] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        log_error("解码进程异常退出，已重建进程池", "DECODE_SERVICE")
+
+    def warm_up(self, wait: bool = False) -> None:
+        """启动全部工作进程"""
+        executor = self._get_executor()
+        futures = [executor.submit(_warm_up) for _ in range(self.max_workers)]
+        if wait:
+            for future in futures:
+                future.result()
+
+    def submit(self, image_path: str, factors: Sequence[int] = (1,),
+               display_size: Optional[Tuple[int, int]] = None,
+               decoder: Optional[ImageDecoder] = None) -> 'Future[DecodedImage]':
+        """
+        提交解码任务
+
+        Args:
+            image_path: 图像路径
+            factors: 需要的缩小倍数层级（1为原图），例如 (2, 4, 8)
+            display_size: 同时生成 'fit' 到该尺寸的显示图像（见 render_display_image）
+            decoder: 解码后端选择，为空时使用默认后端
+
+        Returns:
+            完成时得到 DecodedImage 的 Future；解码失败时 Future 带有异常
+        """
+        result: Future = Future()
+        self.stats['submitted'] += 1
+        task = (image_path, tuple(factors), tuple(display_size) if display_size else None, decoder)
+        self._dispatch(result, task, attempt=0)
+        return result
+
+    def _dispatch(self, result: Future, task: Tuple, attempt: int) -> None:
+        executor = self._get_executor()
+        try:
+            inner = executor.submit(_decode_to_shared, task)
+        except (BrokenProcessPool, RuntimeError) as e:
+            if attempt == 0:
+                self._restart(executor)
+                self._dispatch(result, task, attempt + 1)
+            else:
+                self._fail(result, e)
+            return
+        inner.add_done_callback(lambda future: self._complete(future, result, executor, task, attempt))
+
+    def _complete(self, inner: Future, result: Future, executor: ProcessPoolExecutor,
+                  task: Tuple, attempt: int) -> None:
+        """工作进程返回后接管共享内存段（在进程池的结果线程中执行）"""
+        if inner.cancelled():
+            result.cancel()
+            return
+        error = inner.exception()
+        if isinstance(error, BrokenProcessPool) and attempt == 0:
+            self._restart(executor)
+            self._dispatch(result, task, attempt + 1)
+            return
+        if error is not None:
+            self._fail(result, error)
+            return
+
+        image_path, factors, display_size, _ = task
+        names, decode_ms, message = inner.result()
+        if message is not None:
+            self._fail(result, RuntimeError(f"解码失败 {image_path}: {message}"))
+            return
+
+        segments = []
+        for name, shape in names:
+            segment = shared_memory.SharedMemory(name=name)
+            # 立即unlink：名称随即释放，映射在关闭前仍然有效
+            segment.unlink()
+            segments.append((segment, shape))
+        decoded = DecodedImage(image_path, factors, segments, decode_ms, display_size is not None)
+        if not result.set_running_or_notify_cancel():
+            decoded.close()
+            return
+        self.stats['completed'] += 1
+        result.set_result(decoded)
+
+    def _fail(self, result: Future, error: BaseException) -> None:
+        self.stats['failed'] += 1
+        log_debug(f"解码任务失败: {error}", "DECODE_SERVICE")
+        if result.set_running_or_notify_cancel():
+            result.set_exception(error)
+
+    def decode(self, image_path: str, factors: Sequence[int] = (1,),
+               display_size: Optional[Tuple[int, int]] = None,
+               timeout: Optional[float] = None,
+               decoder: Optional[ImageDecoder] = None) -> DecodedImage:
+        """同步解码（阻塞等待结果）"""
+        return self.submit(image_path, factors, display_size, decoder).result(timeout=timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭进程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        stats = dict(self.stats)
+        stats['max_workers'] = self.max_workers
+        return stats
@@ -0,0 +1,307 @@
+"""
+全景图目录监视器
+仪器全天持续向全景图目录写入新的全景图、<全景ID>/hole_<N>.png 子目录和 .cfg 配置文件。
+监视器在后台线程中轮询根目录（只用标准库），发现新增、变化或删除的全景图目录和配置文件，
+条目在相邻两次轮询之间不再变化（仪器写完）后通过回调通知；安装了 inotify_simple 时
+由 inotify 事件提前唤醒轮询，仍以轮询结果为准
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+# inotify 为可选依赖（仅Linux），不可用时按固定间隔轮询
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+    inotify_flags = None
+
+# 日志导入
+try:
+    from src.utils.logger import log_debug, log_error
+except ImportError:
+    # 如果日志模块不可用，使用print作为后备
+    def log_debug(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+    def log_error(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+
+
+CONFIG_FORMATS = ('.cfg', '.txt', '.config')  # 与 ConfigFileService.find_config_file 查找的扩展名一致
+STOP_CHECK_INTERVAL = 0.2  # 等待 inotify 事件时检查停止请求的间隔（秒）
+
+
+class DirectoryChanges:
+    """一次轮询得到的已稳定变化（按全景ID分组）"""
+
+    def __init__(self, panoramas: Iterable[str] = (), configs: Iterable[str] = (),
+                 removed: Iterable[str] = (), first_seen: Optional[float] = None):
+        self.panoramas: Set[str] = set(panoramas)  # 新增或变化的全景图文件/切片子目录
+        self.configs: Set[str] = set(configs)  # 新增或变化的配置文件
+        self.removed: Set[str] = set(removed)  # 全景图文件和切片子目录都已删除
+        self.first_seen = first_seen  # 最早发现其中变化的时间（time.monotonic）
+
+    def __bool__(self) -> bool:
+        return bool(self.panoramas or self.configs or self.removed)
+
+    def __repr__(self) -> str:
+        return (f"DirectoryChanges(panoramas={sorted(self.panoramas)}, configs={sorted(self.configs)}, "
+                f"removed={sorted(self.removed)})")
+
+
+class DirectoryWatcher:
+    """
+    轮询式目录监视器
+
+    根目录下每个条目记录一个签名：文件为 (mtime_ns, 字节数)，子目录为其mtime
+    （子目录中增删文件时变化）。签名变化的条目进入待定状态，待定期间每次轮询读取完整签名
+    （子目录还包括其中各文件的字节数和mtime），相邻两次轮询完整签名一致时才视为写入完成。
+    以 '.' 开头的条目（如 .annotation_cache）不监视。
+    """
+
+    def __init__(self, root: str, panoramic_formats: Iterable[str], interval: float = 1.0,
+                 on_change: Optional[Callable[[DirectoryChanges], None]] = None,
+                 use_inotify: bool = True):
+        """
+        Args:
+            root: 全景图目录
+            panoramic_formats: 全景图扩展名（小写，含'.'）
+            interval: 轮询间隔（秒）
+            on_change: 变化回调，在监视线程中调用
+            use_inotify: inotify_simple 可用时用 inotify 事件唤醒轮询
+        """
+        self.root = os.path.abspath(root)
+        self.panoramic_formats = {ext.lower() for ext in panoramic_formats} - set(CONFIG_FORMATS)
+        self.interval = max(0.01, interval)
+        self.on_change = on_change
+        self.use_inotify = use_inotify
+        self._has_baseline = False
+        self._known: Dict[str, Tuple] = {}  # 条目名 -> 已通知的签名
+        self._pending: Dict[str, Tuple[Tuple, float]] = {}  # 条目名 -> (完整签名, 首次发现时间)
+        self._inotify = None
+        self._watched_dirs: Set[str] = set()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.stats = {'polls': 0, 'notifications': 0, 'panoramas': 0, 'configs': 0, 'removed': 0}
+
+    @property
+    def inotify_enabled(self) -> bool:
+        return self._inotify is not None
+
+    def _classify(self, name: str, is_dir: bool) -> Optional[Tuple[str, str]]:
+        """条目对应的 (类别, 全景ID)，与监视无关的条目返回None"""
+        if is_dir:
+            return 'panorama', name
+        stem, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext in self.panoramic_formats:
+            return 'panorama', stem
+        if ext in CONFIG_FORMATS:
+            return 'config', stem
+        return None
+
+    def _list_root(self) -> Dict[str, Tuple]:
+        """根目录下需要监视的条目及其轻量签名"""
+        entries = {}
+        with os.scandir(self.root) as iterator:
+            for entry in iterator:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                    if self._classify(entry.name, is_dir) is None:
+                        continue
+                    stat_result = entry.stat()
+                except OSError:
+                    continue
+                entries[entry.name] = ((stat_result.st_mtime_ns,) if is_dir
+                                       else (stat_result.st_mtime_ns, stat_result.st_size))
+        return entries
+
+    def _full_signature(self, name: str, signature: Tuple) -> Tuple:
+        """待定条目的完整签名：子目录加上其中各文件的 (文件名, 字节数, mtime_ns)"""
+        if len(signature) != 1:
+            return signature
+        files = []
+        try:
+            with os.scandir(os.path.join(self.root, name)) as iterator:
+                for entry in iterator:
+                    try:
+                        stat_result = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((entry.name, stat_result.st_size, stat_result.st_mtime_ns))
+        except OSError:
+            return signature
+        return signature + tuple(sorted(files))
+
+    def capture_baseline(self) -> None:
+        """
+        记录当前目录状态作为基线，之后的变化才会通知
+        在扫描目录之前调用，扫描期间写入的全景图也会被通知（重复纳入不影响结果）
+        """
+        with self._lock:
+            try:
+                self._known = self._list_root()
+            except OSError as e:
+                log_error(f"读取监视目录失败 {self.root}: {e}", "DIR_WATCHER")
+                self._known = {}
+            self._pending = {}
+            self._has_baseline = True
+
+    def poll(self) -> DirectoryChanges:
+        """
+        轮询一次，返回本次稳定下来的变化（同时调用 on_change）
+        新出现的条目至少需要两次轮询才会通知
+        """
+        with self._lock:
+            self.stats['polls'] += 1
+            try:
+                current = self._list_root()
+            except OSError as e:
+                log_error(f"读取监视目录失败 {self.root}: {e}", "DIR_WATCHER")
+                return DirectoryChanges()
+
+            now = time.monotonic()
+            changes = DirectoryChanges()
+            for name in set(self._pending) - set(current):
+                del self._pending[name]
+            for name in set(self._known) - set(current):
+                category, panoramic_id = self._classify(name, len(self._known.pop(name)) == 1)
+                (changes.configs if category == 'config' else changes.removed).add(panoramic_id)
+                changes.first_seen = now
+
+            for name, signature in current.items():
+                if name not in self._pending and self._known.get(name) == signature:
+                    continue
+                full_signature = self._full_signature(name, signature)
+                pending = self._pending.get(name)
+                if pending is None or pending[0] != full_signature:
+                    self._pending[name] = (full_signature, pending[1] if pending else now)
+                    continue
+                # 相邻两次轮询签名一致，视为写入完成
+                first_seen = self._pending.pop(name)[1]
+                self._known[name] = signature
+                category, panoramic_id = self._classify(name, len(signature) == 1)
+                (changes.configs if category == 'config' else changes.panoramas).add(panoramic_id)
+                changes.first_seen = min(first_seen, changes.first_seen or first_seen)
+
+            # 删除的全景图在文件或子目录之一仍存在时按变化处理
+            present = {self._classify(name, len(signature) == 1) for name, signature in current.items()}
+            present = {panoramic_id for category, panoramic_id in present if category == 'panorama'}
+            stale = changes.removed & present
+            changes.removed -= stale
+            changes.panoramas |= stale
+
+            if self._inotify is not None:
+                self._watch_subdirs(current)
+
+        if changes:
+            self.stats['notifications'] += 1
+            self.stats['panoramas'] += len(changes.panoramas)
+            self.stats['configs'] += len(changes.configs)
+            self.stats['removed'] += len(changes.removed)
+            log_debug(f"监视目录发现变化: {changes}", "DIR_WATCHER")
+            if self.on_change and not self._stop_event.is_set():
+                try:
+                    self.on_change(changes)
+                except Exception as e:
+                    log_error(f"目录变化回调失败: {e}", "DIR_WATCHER")
+        return changes
+
+    def _watch_subdirs(self, current: Dict[str, Tuple]) -> None:
+        """为新出现的切片子目录添加 inotify 监视"""
+        for name, signature in current.items():
+            if len(signature) != 1 or name in self._watched_dirs:
+                continue
+            try:
+                self._inotify.add_watch(os.path.join(self.root, name), self._inotify_mask())
+                self._watched_dirs.add(name)
+            except OSError:
+                continue
+
+    @staticmethod
+    def _inotify_mask() -> int:
+        return (inotify_flags.CREATE | inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+                | inotify_flags.MOVED_FROM | inotify_flags.DELETE)
+
+    def _open_inotify(self) -> None:
+        try:
+            self._inotify = INotify()
+            self._inotify.add_watch(self.root, self._inotify_mask())
+            self._watched_dirs = set()
+        except OSError as e:
+            log_debug(f"inotify 不可用，使用轮询: {e}", "DIR_WATCHER")
+            self._inotify = None
+
+    def _wait(self) -> None:
+        """等待下一次轮询：有 inotify 时事件到达即返回"""
+        if self._inotify is None:
+            self._stop_event.wait(self.interval)
+            return
+        # 有待定条目时仍按间隔轮询，确认其写入完成；分段等待以便及时响应停止请求
+        deadline = time.monotonic() + (self.interval if self._pending else self.interval * 5)
+        while not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = min(remaining, STOP_CHECK_INTERVAL)
+            if self._inotify.read(timeout=max(1, int(timeout * 1000))):
+                break
+        if self._pending:
+            # 事件到达后等一个轮询间隔，避免在写入过程中反复读取
+            self._stop_event.wait(self.interval)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wait()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.poll()
+            except Exception as e:
+                log_error(f"监视目录轮询失败: {e}", "DIR_WATCHER")
+        if self._thread is None:
+            # stop() 未等到线程退出时由线程自己关闭 inotify
+            self._close_inotify()
+
+    def start(self) -> None:
+        """启动后台监视线程（尚未调用 capture_baseline 时以当前状态为基线）"""
+        if self._thread is not None:
+            return
+        if not self._has_baseline:
+            self.capture_baseline()
+        if self.use_inotify and INotify is not None:
+            self._open_inotify()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="directory-watcher", daemon=True)
+        self._thread.start()
+        log_debug(f"开始监视目录 {self.root}（{'inotify' if self._inotify else '轮询'}，"
+                  f"间隔 {self.interval * 1000:.0f}ms）", "DIR_WATCHER")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        停止监视线程，最多等待 timeout 秒（默认一个停止检查间隔加一次轮询的余量）
+        线程未能及时退出时不再等待（守护线程，停止后不再调用回调，退出时自行关闭 inotify）
+        """
+        self._stop_event.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout if timeout is not None else STOP_CHECK_INTERVAL + 1)
+            if thread.is_alive():
+                log_debug("监视线程未及时退出，不再等待", "DIR_WATCHER")
+                return
+        self._close_inotify()
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None:
+            try:
+                self._inotify.close()
+            except OSError:
+                pass
+            self._inotify = None
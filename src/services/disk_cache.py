@@ -0,0 +1,220 @@
+"""
+磁盘图像缓存
+在全景图目录下持久化显示用的派生图像（全景图缩小层级、增强后的切片），
+新会话可直接读取，无需重新解码原图和重新增强
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+# 日志导入
+try:
+    from src.utils.logger import log_debug, log_error
+except ImportError:
+    # 如果日志模块不可用，使用print作为后备
+    def log_debug(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+    def log_error(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+
+
+class DiskImageCache:
+    """
+    磁盘图像缓存
+
+    缓存键由 (源文件路径, 文件大小, mtime, 派生参数) 计算，源文件变化后旧条目自然失效，
+    由 prune() 按最近使用时间清理。写入在后台线程中进行，先写临时文件再原子替换。
+    """
+
+    def __init__(self, cache_dir: str, png_compress_level: int = 1):
+        self.cache_dir = Path(cache_dir)
+        self.png_compress_level = png_compress_level
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: List[Future] = []
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.write_errors = 0
+
+    def _entry_path(self, kind: str, source_path: str, params: Optional[Dict[str, Any]] = None) -> Path:
+        """计算缓存条目路径"""
+        stat = os.stat(source_path)
+        key = json.dumps({
+            'path': os.path.abspath(source_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime_ns,
+            'params': params or {}
+        }, sort_keys=True)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.cache_dir / kind / digest[:2] / f"{digest}.png"
+
+    def get(self, kind: str, source_path: str, params: Optional[Dict[str, Any]] = None) -> Optional[Image.Image]:
+        """
+        读取缓存条目
+
+        Returns:
+            命中时返回已加载的RGB图像，否则返回None
+        """
+        try:
+            entry_path = self._entry_path(kind, source_path, params)
+        except OSError:
+            return None
+
+        if not entry_path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            with Image.open(entry_path) as cached:
+                image = cached.convert('RGB') if cached.mode != 'RGB' else cached.copy()
+            # 更新mtime用于按最近使用时间清理
+            os.utime(entry_path, None)
+            self.hits += 1
+            return image
+        except Exception as e:
+            # 损坏的缓存文件直接删除
+            log_error(f"读取磁盘缓存失败 {entry_path}: {e}", "DISK_CACHE")
+            try:
+                entry_path.unlink()
+            except OSError:
+                pass
+            self.misses += 1
+            return None
+
+    def contains(self, kind: str, source_path: str, params: Optional[Dict[str, Any]] = None) -> bool:
+        """检查缓存条目是否存在（不读取图像）"""
+        try:
+            return self._entry_path(kind, source_path, params).exists()
+        except OSError:
+            return False
+
+    def put_async(self, kind: str, source_path: str, image: Image.Image,
+                  params: Optional[Dict[str, Any]] = None) -> None:
+        """在后台线程中写入缓存条目"""
+        try:
+            entry_path = self._entry_path(kind, source_path, params)
+        except OSError:
+            return
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='disk_cache')
+            self._pending = [future for future in self._pending if not future.done()]
+            self._pending.append(self._executor.submit(self._write, entry_path, image))
+
+    def _write(self, entry_path: Path, image: Image.Image) -> None:
+        """写入临时文件后原子替换，避免读到不完整的缓存文件"""
+        temp_path = entry_path.with_name(f"{entry_path.stem}.{threading.get_ident()}.tmp")
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            image.save(temp_path, format='PNG', compress_level=self.png_compress_level)
+            os.replace(temp_path, entry_path)
+            self.writes += 1
+        except Exception as e:
+            self.write_errors += 1
+            log_error(f"写入磁盘缓存失败 {entry_path}: {e}", "DISK_CACHE")
+            try:
+                temp_path.unlink()
+            except OSError:
+                pass
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """等待所有后台写入完成"""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+        for future in pending:
+            future.result(timeout=timeout)
+
+    def shutdown(self) -> None:
+        """完成剩余写入并关闭后台线程"""
+        self.flush()
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _list_entries(self) -> List[Tuple[Path, os.stat_result]]:
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.png'):
+                    path = Path(root) / name
+                    try:
+                        entries.append((path, path.stat()))
+                    except OSError:
+                        continue
+        return entries
+
+    def get_size(self) -> int:
+        """获取缓存目录总字节数"""
+        return sum(stat.st_size for _, stat in self._list_entries())
+
+    def prune(self, max_bytes: int) -> Tuple[int, int]:
+        """
+        按最近使用时间清理缓存，直到总大小不超过 max_bytes
+
+        Returns:
+            (删除的文件数, 释放的字节数)
+        """
+        entries = self._list_entries()
+        total = sum(stat.st_size for _, stat in entries)
+        removed = 0
+        freed = 0
+
+        # 最久未使用的条目优先删除
+        for path, stat in sorted(entries, key=lambda item: item[1].st_mtime):
+            if total <= max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= stat.st_size
+            freed += stat.st_size
+            removed += 1
+
+        self._remove_empty_dirs()
+        log_debug(f"磁盘缓存清理完成: 删除 {removed} 个文件, 释放 {freed} 字节", "DISK_CACHE")
+        return removed, freed
+
+    def clear(self) -> Tuple[int, int]:
+        """
+        删除全部派生图像条目，缓存目录下的其他文件（扫描状态、索引文件）保留
+
+        Returns:
+            (删除的文件数, 释放的字节数)
+        """
+        self.flush()
+        return self.prune(0)
+
+    def _remove_empty_dirs(self) -> None:
+        """清理条目删除后留下的空目录"""
+        for root, dirs, files in os.walk(self.cache_dir, topdown=False):
+            if root != str(self.cache_dir) and not os.listdir(root):
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取磁盘缓存统计信息"""
+        return {
+            'cache_dir': str(self.cache_dir),
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'write_errors': self.write_errors
+        }
@@ -0,0 +1,295 @@
+"""
+切片增强服务
+提供与 PanoramicImageService.enhance_slice_image 相同的CLAHE增强算法，
+中间结果写入按形状复用的缓冲区，支持在进程池中批量增强整张全景图的切片，每个工作进程复用一个CLAHE实例
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from src.services.decode_backends import ImageDecoder
+
+
+def create_clahe(params: Dict[str, Any]):
+    """根据增强参数创建CLAHE实例"""
+    return cv2.createCLAHE(clipLimit=params['clip_limit'],
+                           tileGridSize=tuple(params['tile_grid_size']))
+
+
+class EnhanceBuffers:
+    """单一形状的增强中间缓冲区（LAB图像、亮度通道、CLAHE结果、RGB图像、输出）"""
+
+    def __init__(self, shape: Tuple[int, ...]):
+        height, width = shape[:2]
+        self.shape = tuple(shape)
+        if len(shape) == 3:
+            self.lab = np.empty((height, width, 3), dtype=np.uint8)
+            self.luminance = np.empty((height, width), dtype=np.uint8)
+            self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self.equalized = np.empty((height, width), dtype=np.uint8)
+        self.output = np.empty(shape, dtype=np.uint8)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buffer.nbytes for buffer in vars(self).values() if isinstance(buffer, np.ndarray))
+
+
+class EnhanceBufferPool:
+    """
+    按图像形状复用增强中间缓冲区
+    切片尺寸基本一致（边缘孔位裁剪后略小），按最近使用保留少量形状
+    """
+
+    def __init__(self, max_shapes: int = 8):
+        self.max_shapes = max_shapes
+        self._buffers: 'OrderedDict[Tuple[int, ...], EnhanceBuffers]' = OrderedDict()
+
+    def get(self, shape: Tuple[int, ...]) -> EnhanceBuffers:
+        """获取指定形状的缓冲区（不存在时创建，超过形状数上限时淘汰最久未用的）"""
+        shape = tuple(shape)
+        buffers = self._buffers.get(shape)
+        if buffers is None:
+            buffers = EnhanceBuffers(shape)
+            self._buffers[shape] = buffers
+            while len(self._buffers) > self.max_shapes:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(shape)
+        return buffers
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buffers.nbytes for buffers in self._buffers.values())
+
+
+def enhance_array(img_array: np.ndarray, clahe, params: Dict[str, Any],
+                  pool: Optional[EnhanceBufferPool] = None) -> np.ndarray:
+    """
+    增强切片像素数组
+    彩色图像在LAB色彩空间对亮度通道做CLAHE，之后轻微高斯滤波去噪
+
+    每一步都通过 dst= 写入按形状复用的缓冲区，亮度通道原地写回LAB图像。
+    指定 pool 时返回池中的输出缓冲区，下一次使用同一个池增强同形状图像时会被覆盖，
+    需要保留结果的调用方应自行复制（例如 Image.fromarray 或 ndarray.copy）；
+    不指定时使用临时缓冲区，返回的数组归调用方所有
+    """
+    buffers = (pool or EnhanceBufferPool(max_shapes=1)).get(img_array.shape)
+    if len(img_array.shape) == 3:
+        # 彩色图像，转换为LAB色彩空间
+        cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB, dst=buffers.lab)
+        cv2.extractChannel(buffers.lab, 0, dst=buffers.luminance)
+        clahe.apply(buffers.luminance, dst=buffers.equalized)
+        cv2.insertChannel(buffers.equalized, buffers.lab, 0)
+        cv2.cvtColor(buffers.lab, cv2.COLOR_LAB2RGB, dst=buffers.rgb)
+        enhanced = buffers.rgb
+    else:
+        # 灰度图像
+        clahe.apply(img_array, dst=buffers.equalized)
+        enhanced = buffers.equalized
+
+    # 轻微高斯滤波去噪
+    cv2.GaussianBlur(enhanced, tuple(params['blur_kernel']), params['blur_sigma'], dst=buffers.output)
+    return buffers.output
+
+
+# 线程本地的CLAHE实例和缓冲区池，供GUI线程和预取线程复用
+_thread_local = threading.local()
+
+
+def get_thread_clahe(params: Dict[str, Any]):
+    """获取当前线程复用的CLAHE实例，参数变化时重新创建"""
+    key = (params['clip_limit'], tuple(params['tile_grid_size']))
+    if getattr(_thread_local, 'clahe_key', None) != key:
+        _thread_local.clahe = create_clahe(params)
+        _thread_local.clahe_key = key
+    return _thread_local.clahe
+
+
+def get_thread_buffer_pool() -> EnhanceBufferPool:
+    """获取当前线程复用的增强缓冲区池"""
+    pool = getattr(_thread_local, 'buffer_pool', None)
+    if pool is None:
+        pool = _thread_local.buffer_pool = EnhanceBufferPool()
+    return pool
+
+
+# === 工作进程 ===
+
+_worker_clahe = None
+_worker_params: Optional[Dict[str, Any]] = None
+_worker_decoder: Optional[ImageDecoder] = None
+_worker_pool: Optional[EnhanceBufferPool] = None
+
+
+def _init_worker(params: Dict[str, Any], decoder: Optional[ImageDecoder] = None) -> None:
+    """工作进程初始化：每个进程只创建一次CLAHE实例"""
+    global _worker_clahe, _worker_params, _worker_decoder, _worker_pool
+    cv2.setNumThreads(1)
+    _worker_params = params
+    _worker_clahe = create_clahe(params)
+    _worker_decoder = decoder or ImageDecoder()
+    _worker_pool = EnhanceBufferPool()
+
+
+def _decode_and_enhance(image_path: str, clahe, params: Dict[str, Any], decoder: ImageDecoder,
+                        pool: EnhanceBufferPool) -> Tuple[np.ndarray, float, float]:
+    """解码并增强单个切片，返回 (增强后像素数组, 解码耗时ms, 增强耗时ms)"""
+    start = time.perf_counter()
+    # 直接解码为数组，不经过PIL图像中转（内存映射的BMP视图需转为连续数组供OpenCV使用）
+    img_array = np.ascontiguousarray(decoder.decode_array(image_path))
+    decoded = time.perf_counter()
+    # 中间结果复用缓冲区，只为需要返回的结果复制一次
+    enhanced = enhance_array(img_array, clahe, params, pool).copy()
+    return enhanced, (decoded - start) * 1000, (time.perf_counter() - decoded) * 1000
+
+
+def _enhance_file(image_path: str) -> Tuple[str, Optional[np.ndarray], float, float, Optional[str]]:
+    """
+    在工作进程中解码并增强单个切片
+
+    Returns:
+        (路径, 增强后像素数组, 解码耗时ms, 增强耗时ms, 错误信息)
+    """
+    try:
+        enhanced, decode_ms, enhance_ms = _decode_and_enhance(image_path, _worker_clahe, _worker_params,
+                                                                 _worker_decoder, _worker_pool)
+        return image_path, enhanced, decode_ms, enhance_ms, None
+    except Exception as e:
+        return image_path, None, 0.0, 0.0, str(e)
+
+
+class EnhancementTimings:
+    """
+    切片处理耗时统计
+    分别记录每个切片的解码和增强耗时，便于对比两者开销
+    """
+
+    def __init__(self):
+        self.decode_ms: List[float] = []
+        self.enhance_ms: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(self, decode_ms: float, enhance_ms: float) -> None:
+        with self._lock:
+            self.decode_ms.append(decode_ms)
+            self.enhance_ms.append(enhance_ms)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.decode_ms.clear()
+            self.enhance_ms.clear()
+
+    def histogram(self, bins: Sequence[float] = (0, 0.5, 1, 2, 5, 10, 20, 50, float('inf'))) -> Dict[str, Any]:
+        """
+        按耗时区间统计切片数量
+
+        Returns:
+            {'bins': 区间边界(ms), 'decode': 各区间解码计数, 'enhance': 各区间增强计数}
+        """
+        with self._lock:
+            decode_counts, _ = np.histogram(self.decode_ms, bins=bins)
+            enhance_counts, _ = np.histogram(self.enhance_ms, bins=bins)
+        return {
+            'bins': list(bins),
+            'decode': decode_counts.tolist(),
+            'enhance': enhance_counts.tolist()
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """获取耗时汇总（中位数、p95、总计）"""
+        with self._lock:
+            result = {'count': len(self.enhance_ms)}
+            for name, values in (('decode', self.decode_ms), ('enhance', self.enhance_ms)):
+                if values:
+                    result[f'{name}_median_ms'] = float(np.median(values))
+                    result[f'{name}_p95_ms'] = float(np.percentile(values, 95))
+                    result[f'{name}_total_ms'] = float(np.sum(values))
+        return result
+
+    def format_histogram(self) -> str:
+        """生成文本直方图"""
+        hist = self.histogram()
+        bins = hist['bins']
+        lines = [f"{'耗时区间(ms)':<16}{'解码':>8}{'增强':>8}"]
+        for index, (decode_count, enhance_count) in enumerate(zip(hist['decode'], hist['enhance'])):
+            label = f"{bins[index]:g}-{bins[index + 1]:g}"
+            lines.append(f"{label:<16}{decode_count:>8}{enhance_count:>8}")
+        return "\n".join(lines)
+
+
+class BatchEnhancer:
+    """
+    批量切片增强器
+    在进程池中增强一批切片，每个工作进程复用一个CLAHE实例
+    """
+
+    def __init__(self, params: Dict[str, Any], max_workers: Optional[int] = None,
+                 timings: Optional[EnhancementTimings] = None,
+                 decoder: Optional[ImageDecoder] = None):
+        """
+        Args:
+            params: 增强参数，见 PanoramicImageService.ENHANCE_PARAMS
+            max_workers: 工作进程数，为空或0时使用CPU核数，1表示在当前进程中执行
+            timings: 耗时统计对象，为空时新建
+            decoder: 切片解码器，为空时使用默认后端
+        """
+        self.params = dict(params)
+        self.decoder = decoder or ImageDecoder()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timings = timings if timings is not None else EnhancementTimings()
+        self.errors: Dict[str, str] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 initializer=_init_worker,
+                                                 initargs=(self.params, self.decoder))
+        return self._executor
+
+    def enhance_files(self, image_paths: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        批量增强切片文件，失败的文件记录在 errors 中并跳过
+
+        Returns:
+            路径 -> 增强后像素数组
+        """
+        results: Dict[str, np.ndarray] = {}
+        if not image_paths:
+            return results
+
+        if self.max_workers <= 1:
+            # 单进程模式：在当前进程中复用线程本地的CLAHE实例和缓冲区池
+            clahe = get_thread_clahe(self.params)
+            pool = get_thread_buffer_pool()
+            outcomes = []
+            for image_path in image_paths:
+                try:
+                    outcomes.append((image_path,) + _decode_and_enhance(image_path, clahe, self.params,
+                                                                           self.decoder, pool) + (None,))
+                except Exception as e:
+                    outcomes.append((image_path, None, 0.0, 0.0, str(e)))
+        else:
+            chunksize = max(1, len(image_paths) // (self.max_workers * 4))
+            outcomes = self._get_executor().map(_enhance_file, image_paths, chunksize=chunksize)
+
+        for image_path, enhanced, decode_ms, enhance_ms, error in outcomes:
+            if error is not None:
+                self.errors[image_path] = error
+                continue
+            results[image_path] = enhanced
+            self.timings.record(decode_ms, enhance_ms)
+        return results
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,159 @@
+"""
+孔位特征提取
+按孔位布局一次性预计算全部孔位的圆形掩膜和像素索引，
+在一次NumPy批量运算中得到整板 (孔位数, K) 特征矩阵：各通道均值/标准差、浊度指数、边缘密度
+"""
+
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+# 特征矩阵的列
+FEATURE_NAMES = ('mean_r', 'mean_g', 'mean_b', 'std_r', 'std_g', 'std_b', 'turbidity', 'edge_density')
+
+# 亮度权重（ITU-R BT.601）
+_LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114])
+
+
+class HoleFeatureExtractor:
+    """
+    孔位特征提取器
+
+    孔位区域取 HoleManager 给出的方形区域的内切圆，超出图像边界的像素不参与计算。
+    掩膜和索引按 (图像尺寸, 孔位布局) 缓存，同一布局下的多张全景图只构建一次。
+
+    特征定义：
+    - mean_*/std_*: 孔内各通道像素均值和标准差
+    - turbidity: 浊度指数，1 - 孔内平均亮度/255（0为完全透亮，越接近1越浑浊）
+    - edge_density: 孔内亮度梯度幅值超过阈值的像素比例
+    """
+
+    def __init__(self, hole_manager, edge_threshold: float = 24.0):
+        """
+        Args:
+            hole_manager: 孔位管理器，提供孔位坐标
+            edge_threshold: 判定为边缘的亮度梯度阈值（中心差分，0-255灰度）
+        """
+        self.hole_manager = hole_manager
+        self.edge_threshold = edge_threshold
+        self._geometry_key: Optional[Hashable] = None
+        self._size = 0
+        self._origins: Optional[np.ndarray] = None
+        self._inside: Optional[np.ndarray] = None
+        self._rows: Optional[np.ndarray] = None
+        self._cols: Optional[np.ndarray] = None
+        self._weights: Optional[np.ndarray] = None
+        self._weights_u32: Optional[np.ndarray] = None
+        self._counts: Optional[np.ndarray] = None
+        self._interior: Optional[np.ndarray] = None
+        self._interior_counts: Optional[np.ndarray] = None
+
+    @property
+    def feature_names(self) -> Tuple[str, ...]:
+        return FEATURE_NAMES
+
+    def _prepare(self, height: int, width: int, layout=None) -> None:
+        """构建全部孔位的起点坐标、圆形权重 (N, d*d) 和梯度计算用的内部权重"""
+        layout = layout or self.hole_manager
+        key = (height, width, layout.get_layout_key())
+        if key == self._geometry_key:
+            return
+
+        total_holes = layout.total_holes
+        coordinates = np.array([layout.get_hole_coordinates(hole_number)
+                                for hole_number in range(1, total_holes + 1)])
+        size = int(coordinates[:, 2:].max())
+        offsets = np.arange(size)
+        rows = coordinates[:, 1:2] + offsets
+        cols = coordinates[:, 0:1] + offsets
+
+        # 内切圆掩膜（所有孔位共用），再去掉超出孔位区域和图像边界的像素
+        center = (size - 1) / 2.0
+        radius = size / 2.0
+        yy, xx = np.mgrid[0:size, 0:size]
+        disk = (yy - center) ** 2 + (xx - center) ** 2 <= radius ** 2
+        row_valid = (offsets < coordinates[:, 3:4]) & (rows >= 0) & (rows < height)
+        col_valid = (offsets < coordinates[:, 2:3]) & (cols >= 0) & (cols < width)
+        weights = disk[None] & row_valid[:, :, None] & col_valid[:, None, :]
+
+        # 中心差分只在上下左右邻居都在孔内的像素上计入边缘密度
+        interior = np.zeros_like(weights)
+        interior[:, 1:-1, 1:-1] = (weights[:, 1:-1, 1:-1] & weights[:, 1:-1, 2:] & weights[:, 1:-1, :-2]
+                                   & weights[:, 2:, 1:-1] & weights[:, :-2, 1:-1])
+
+        self._size = size
+        self._origins = coordinates[:, :2]
+        self._inside = row_valid.all(axis=1) & col_valid.all(axis=1)
+        self._rows = np.clip(rows, 0, height - 1)
+        self._cols = np.clip(cols, 0, width - 1)
+        self._weights = weights.reshape(total_holes, 1, -1).astype(np.float32)
+        self._weights_u32 = self._weights.astype(np.uint32)
+        self._counts = weights.sum(axis=(1, 2)).astype(np.float64)
+        self._interior = interior
+        self._interior_counts = interior.sum(axis=(1, 2))
+        self._geometry_key = key
+
+    def gather(self, pixels: np.ndarray, layout=None) -> np.ndarray:
+        """
+        取出全部孔位区域，形状 (N, d, d, 3)
+        完全在图像内的孔位直接切片复制，被边界裁掉的孔位用索引数组补齐（补齐的像素权重为0）；
+        内存映射的全景图只会读取孔位所在的行
+        """
+        self._prepare(pixels.shape[0], pixels.shape[1], layout)
+        size = self._size
+        holes = np.empty((len(self._origins), size, size, 3), dtype=pixels.dtype)
+        for index, (x, y) in enumerate(self._origins):
+            if self._inside[index]:
+                holes[index] = pixels[y:y + size, x:x + size]
+            else:
+                holes[index] = pixels[self._rows[index][:, None], self._cols[index][None, :]]
+        return holes
+
+    def extract(self, pixels: np.ndarray, layout=None) -> np.ndarray:
+        """
+        提取整板特征
+
+        Args:
+            pixels: 全景图像素数组 (H, W, 3)，可以是只读的内存映射视图
+            layout: 该全景图的孔位布局（HoleManager），默认使用构造时传入的孔位管理器
+
+        Returns:
+            (孔位数, len(FEATURE_NAMES)) float32 特征矩阵，第 i 行对应孔位 i+1；
+            完全超出图像的孔位均值、标准差和浊度为 NaN
+        """
+        if pixels.ndim == 2:
+            pixels = np.repeat(pixels[:, :, None], 3, axis=2)
+        raw = self.gather(pixels[:, :, :3], layout)
+        total_holes, size = raw.shape[0], self._size
+        raw = raw.reshape(total_holes, size * size, 3)
+        flat = raw.astype(np.float32)
+        counts = self._counts[:, None]
+        # 完全超出图像的孔位像素数为0，0/0 得到 NaN
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # 加权求和用批量矩阵乘法 (N, 1, d*d) @ (N, d*d, 3)；
+            # 8位像素之和在float32中是精确的，平方和用uint32累加（255²×孔内像素数远小于2^32），
+            # 因此方差可以直接按 E[x²]-E[x]² 计算而不损失精度
+            sums = (self._weights @ flat)[:, 0].astype(np.float64)
+            squares = (self._weights_u32 @ np.square(raw, dtype=np.uint32))[:, 0]
+            means = sums / counts
+            stds = np.sqrt(np.maximum(squares / counts - means * means, 0.0))
+            turbidity = 1.0 - (means @ _LUMA_WEIGHTS) / 255.0
+        luma = (flat @ _LUMA_WEIGHTS.astype(np.float32)).reshape(total_holes, size, size)
+
+        grad_x = luma[:, 1:-1, 2:] - luma[:, 1:-1, :-2]
+        grad_y = luma[:, 2:, 1:-1] - luma[:, :-2, 1:-1]
+        # 中心差分为 (右-左)/2，比较平方和时把阈值放大2倍
+        edges = (grad_x * grad_x + grad_y * grad_y) > (2 * self.edge_threshold) ** 2
+        edges &= self._interior[:, 1:-1, 1:-1]
+        edge_counts = edges.sum(axis=(1, 2))
+        edge_density = np.divide(edge_counts, self._interior_counts,
+                                 out=np.zeros(total_holes), where=self._interior_counts > 0)
+
+        features = np.concatenate([means, stds, turbidity[:, None], edge_density[:, None]], axis=1)
+        return features.astype(np.float32)
+
+    @staticmethod
+    def to_records(features: np.ndarray) -> Dict[int, Dict[str, float]]:
+        """特征矩阵转换为 孔位编号 -> {特征名: 值}"""
+        return {hole_index + 1: {name: float(value) for name, value in zip(FEATURE_NAMES, row)}
+                for hole_index, row in enumerate(features)}
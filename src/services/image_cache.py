@@ -0,0 +1,166 @@
+"""
+图像缓存
+按字节预算淘汰的LRU缓存，用于全景图和切片图像
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+from PIL import Image
+
+
+# 内存映射数组的像素页由操作系统按需换入换出，只按固定开销计入预算（同时限制映射的文件数量）
+MEMMAP_ENTRY_BYTES = 4 * 1024 * 1024
+
+
+def estimate_image_bytes(value: Any) -> int:
+    """
+    估算缓存对象占用的字节数
+
+    - PIL图像按 宽×高×通道数 计算
+    - 内存映射数组按固定开销 MEMMAP_ENTRY_BYTES 计算
+    - numpy数组按 nbytes 计算
+    - 列表/元组/字典按元素累加（用于图像金字塔等组合对象）
+    """
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, np.memmap):
+        return min(MEMMAP_ENTRY_BYTES, int(value.nbytes))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_image_bytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(estimate_image_bytes(item) for item in value.values())
+    return 0
+
+
+class ImageCache:
+    """
+    字节预算LRU图像缓存
+    超出预算时从最久未使用的条目开始淘汰，线程安全
+    """
+
+    def __init__(self, max_bytes: int, on_evict: Optional[Callable[[Hashable], None]] = None):
+        """
+        Args:
+            max_bytes: 字节预算
+            on_evict: 条目因超出预算被淘汰时以其键调用（在缓存锁内调用，回调中不要访问缓存）
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"缓存字节预算必须大于0: {max_bytes}")
+
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._current_bytes = 0
+        self._lock = threading.RLock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存条目，命中时将其标记为最近使用"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存条目但不影响LRU顺序和统计"""
+        with self._lock:
+            return self._entries.get(key, default)
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """
+        写入缓存条目
+
+        Args:
+            key: 缓存键
+            value: 缓存对象
+            size: 占用字节数，为None时自动估算
+        """
+        if size is None:
+            size = estimate_image_bytes(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+
+            # 单个条目超过整个预算时不缓存
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._current_bytes += size
+            self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """移除缓存条目"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._current_bytes -= self._sizes.pop(key)
+            return self._entries.pop(key)
+
+    def _evict(self) -> None:
+        """淘汰最久未使用的条目直到满足字节预算"""
+        while self._current_bytes > self.max_bytes and self._entries:
+            key, _ = self._entries.popitem(last=False)
+            self._current_bytes -= self._sizes.pop(key)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(key)
+
+    def clear(self) -> None:
+        """清空缓存（保留统计信息）"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._current_bytes = 0
+
+    def keys(self) -> List[Hashable]:
+        """按从旧到新的顺序返回缓存键"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    @property
+    def lock(self) -> threading.RLock:
+        """缓存的可重入锁，on_evict 回调在其中调用；调用方维护与缓存条目对应的状态时使用同一把锁"""
+        return self._lock
+
+    @property
+    def current_bytes(self) -> int:
+        return self._current_bytes
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'current_bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
@@ -0,0 +1,201 @@
+"""
+图像完整性校验
+在进程池中完整解码目录下的每个图像文件（截断的PNG、复制到一半的BMP在解码时才会报错），
+解码失败的文件记入隔离清单（<全景图目录>/.annotation_state/quarantine.json），导航时跳过；
+已校验文件的 (mtime, 文件字节数) 也保存在清单中并定期写盘，中断后重新运行只校验新增或变化的文件
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from PIL import Image
+
+QUARANTINE_FILENAME = 'quarantine.json'
+
+
+def verify_image(image_path: str) -> Optional[str]:
+    """
+    完整解码图像文件
+
+    Returns:
+        解码成功返回None，否则返回错误信息
+    """
+    try:
+        with Image.open(image_path) as image:
+            image.load()
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def _verify_task(args: Tuple[str, Sequence[str]]) -> List[Tuple[str, int, int, Optional[str]]]:
+    """工作进程：校验一组文件，返回 (相对路径, mtime_ns, 文件字节数, 错误信息)；文件已不存在时 mtime_ns 为-1"""
+    root, paths = args
+    results = []
+    for path in paths:
+        full_path = os.path.join(root, path)
+        try:
+            stat_result = os.stat(full_path)
+        except OSError:
+            results.append((path, -1, 0, None))
+            continue
+        results.append((path, stat_result.st_mtime_ns, stat_result.st_size, verify_image(full_path)))
+    return results
+
+
+class QuarantineManifest:
+    """
+    隔离清单
+    quarantined: 相对路径 -> {'error', 'mtime_ns', 'file_size'}
+    verified: 相对路径 -> (mtime_ns, 文件字节数)，记录解码成功的文件
+    """
+
+    FILE_VERSION = 1
+
+    def __init__(self, root: str = ''):
+        self.root = root
+        self.quarantined: Dict[str, Dict] = {}
+        self.verified: Dict[str, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.quarantined)
+
+    def record(self, path: str, mtime_ns: int, file_size: int, error: Optional[str]) -> None:
+        """记录一个文件的校验结果（mtime_ns 为-1表示文件已不存在）"""
+        self.quarantined.pop(path, None)
+        self.verified.pop(path, None)
+        if mtime_ns < 0:
+            return
+        if error is None:
+            self.verified[path] = (mtime_ns, file_size)
+        else:
+            self.quarantined[path] = {'error': error, 'mtime_ns': mtime_ns, 'file_size': file_size}
+
+    def is_current(self, path: str, stat_result: os.stat_result) -> bool:
+        """文件自上次校验后未变化（mtime和文件字节数一致）"""
+        entry = self.verified.get(path)
+        if entry is None:
+            quarantined = self.quarantined.get(path)
+            if quarantined is None:
+                return False
+            entry = (quarantined['mtime_ns'], quarantined['file_size'])
+        return entry == (stat_result.st_mtime_ns, stat_result.st_size)
+
+    def current_quarantine(self) -> Set[str]:
+        """仍处于隔离状态的相对路径：文件被替换或删除后不再隔离"""
+        paths = set()
+        for path, entry in self.quarantined.items():
+            try:
+                stat_result = os.stat(os.path.join(self.root, path))
+            except OSError:
+                continue
+            if (stat_result.st_mtime_ns, stat_result.st_size) == (entry['mtime_ns'], entry['file_size']):
+                paths.add(path)
+        return paths
+
+    @classmethod
+    def load(cls, manifest_path: str, root: str) -> 'QuarantineManifest':
+        """
+        读取隔离清单，文件不存在时返回空清单
+
+        Raises:
+            ValueError: 文件版本不支持或内容损坏
+        """
+        manifest = cls(root)
+        if not os.path.exists(manifest_path):
+            return manifest
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != cls.FILE_VERSION:
+            raise ValueError(f"不支持的隔离清单版本: {data.get('version')}")
+        manifest.quarantined = data['quarantined']
+        manifest.verified = {path: tuple(entry) for path, entry in data['verified'].items()}
+        return manifest
+
+    def save(self, manifest_path: str) -> None:
+        """写入临时文件后原子替换"""
+        os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+        temp_path = f"{manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.FILE_VERSION, 'root': self.root,
+                       'quarantined': self.quarantined, 'verified': self.verified},
+                      f, ensure_ascii=False)
+        os.replace(temp_path, manifest_path)
+
+
+def verify_files(root: str, paths: Iterable[str], manifest: Optional[QuarantineManifest] = None,
+                 max_workers: Optional[int] = None, chunk_size: int = 32,
+                 manifest_path: Optional[str] = None, checkpoint_seconds: float = 10.0,
+                 progress_callback: Optional[Callable[[int, int, str], None]] = None
+                 ) -> Tuple[QuarantineManifest, int]:
+    """
+    在进程池中完整解码一组文件，结果记入隔离清单
+
+    自上次校验后未变化的文件直接跳过；同时提交的任务数限制为工作进程数的两倍，
+    每隔 checkpoint_seconds 秒（以及结束或中断时）把清单写入 manifest_path，中断后可继续
+
+    Args:
+        root: 根目录
+        paths: 相对根目录的图像路径
+        manifest: 上次的隔离清单
+        max_workers: 工作进程数，默认使用CPU核数；0表示在调用进程中校验
+        chunk_size: 每个任务校验的文件数
+        manifest_path: 清单文件路径，None表示不写盘
+        checkpoint_seconds: 写盘间隔（秒）
+        progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+
+    Returns:
+        (隔离清单, 本次解码的文件数)
+    """
+    if manifest is None:
+        manifest = QuarantineManifest(root)
+    manifest.root = root
+    pending_paths = []
+    for path in paths:
+        try:
+            stat_result = os.stat(os.path.join(root, path))
+        except OSError:
+            manifest.record(path, -1, 0, None)
+            continue
+        if not manifest.is_current(path, stat_result):
+            pending_paths.append(path)
+
+    chunks = [pending_paths[start:start + chunk_size] for start in range(0, len(pending_paths), chunk_size)]
+    total = len(pending_paths)
+    done = 0
+    last_checkpoint = time.monotonic()
+
+    def collect(results: List[Tuple[str, int, int, Optional[str]]]) -> None:
+        nonlocal done, last_checkpoint
+        for result in results:
+            manifest.record(*result)
+        done += len(results)
+        if manifest_path and time.monotonic() - last_checkpoint >= checkpoint_seconds:
+            manifest.save(manifest_path)
+            last_checkpoint = time.monotonic()
+        if progress_callback:
+            progress_callback(done, total, f"校验图像 {done}/{total}...")
+
+    try:
+        if max_workers == 0:
+            for chunk in chunks:
+                collect(_verify_task((root, chunk)))
+        elif chunks:
+            window = (max_workers or os.cpu_count() or 1) * 2
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                pending = set()
+                for chunk in chunks:
+                    if len(pending) >= window:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            collect(future.result())
+                    pending.add(executor.submit(_verify_task, (root, chunk)))
+                for future in wait(pending).done:
+                    collect(future.result())
+    finally:
+        if manifest_path:
+            manifest.save(manifest_path)
+    return manifest, done
@@ -0,0 +1,279 @@
+"""
+图像元数据索引
+目录扫描时只读取图像文件头（PNG的IHDR块、BMP信息头，其他格式用PIL惰性打开不调用load），
+把宽高、颜色模式、文件字节数和mtime保存为NumPy结构化数组并持久化；
+之后查询尺寸或模式（显示尺寸计算、点击坐标映射、孔位布局）不再解码像素
+"""
+
+import io
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.services.bmp_reader import read_bmp_info
+
+# 日志导入
+try:
+    from src.utils.logger import log_error
+except ImportError:
+    # 如果日志模块不可用，使用print作为后备
+    def log_error(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+
+# 颜色模式表，记录中按下标保存；0 表示未知模式
+MODES = ('', '1', 'L', 'LA', 'P', 'PA', 'RGB', 'RGBA', 'CMYK', 'YCbCr', 'I', 'I;16', 'F')
+
+METADATA_DTYPE = np.dtype([
+    ('width', np.int32),
+    ('height', np.int32),
+    ('mode', np.uint8),       # MODES 下标
+    ('file_size', np.int64),  # 文件字节数
+    ('mtime', np.int64),      # 文件 st_mtime_ns
+])
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# PNG颜色类型 -> PIL模式（颜色类型0按位深区分）
+_PNG_MODES = {2: 'RGB', 3: 'P', 4: 'LA', 6: 'RGBA'}
+_PNG_GRAY_MODES = {1: '1', 16: 'I;16'}
+# 各模式每像素字节数
+_MODE_BYTES = {'1': 1, 'L': 1, 'P': 1, 'LA': 2, 'PA': 2, 'I;16': 2, 'RGB': 3, 'YCbCr': 3,
+               'RGBA': 4, 'CMYK': 4, 'I': 4, 'F': 4}
+
+
+@dataclass(frozen=True)
+class ImageMetadata:
+    """图像文件头信息"""
+    width: int
+    height: int
+    mode: str
+    file_size: int
+    mtime_ns: int
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(宽, 高)，与 PIL Image.size 一致"""
+        return self.width, self.height
+
+    @property
+    def pixel_bytes(self) -> int:
+        return pixel_bytes(self.width, self.height, self.mode)
+
+
+def pixel_bytes(width: int, height: int, mode: str) -> int:
+    """解码为数组后的像素字节数（模式未知时按RGB计算）"""
+    return width * height * _MODE_BYTES.get(mode, 3)
+
+
+def read_png_header(image_path: str) -> Optional[Tuple[int, int, str]]:
+    """
+    解析PNG文件的IHDR块
+
+    Returns:
+        (宽, 高, PIL模式)，不是PNG或文件头损坏时返回None
+    """
+    with open(image_path, 'rb') as f:
+        header = f.read(26)
+    if len(header) < 26 or header[:8] != _PNG_SIGNATURE or header[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type = struct.unpack_from('>IIBB', header, 16)
+    if color_type == 0:
+        mode = _PNG_GRAY_MODES.get(bit_depth, 'L')
+    else:
+        mode = _PNG_MODES.get(color_type)
+    if mode is None or width <= 0 or height <= 0:
+        return None
+    return width, height, mode
+
+
+def probe_image_header(image_path: str, stat_result: Optional[os.stat_result] = None) -> ImageMetadata:
+    """
+    只读取文件头获取图像元数据，不解码像素
+
+    Raises:
+        OSError: 文件不存在或无法读取
+        PIL.UnidentifiedImageError: 无法识别的图像格式
+    """
+    stat_result = stat_result or os.stat(image_path)
+    ext = os.path.splitext(image_path)[1].lower()
+    probed = None
+    if ext == '.png':
+        probed = read_png_header(image_path)
+    elif ext == '.bmp':
+        info = read_bmp_info(image_path)
+        if info is not None:
+            probed = (info.width, info.height, 'RGB')
+    if probed is None:
+        # 惰性打开只解析文件头，不调用load()
+        with Image.open(image_path) as image:
+            probed = (image.width, image.height, image.mode)
+    width, height, mode = probed
+    return ImageMetadata(width, height, mode, stat_result.st_size, stat_result.st_mtime_ns)
+
+
+class MetadataIndex:
+    """
+    图像元数据索引
+    条目为 (相对根目录的路径, METADATA_DTYPE 记录)，路径按首次出现顺序保存
+    """
+
+    FILE_VERSION = 1
+
+    def __init__(self, root: str = '', paths: Sequence[str] = (), records: Optional[np.ndarray] = None):
+        self.root = root
+        self.paths = list(paths)
+        self.records = records if records is not None else np.empty(0, dtype=METADATA_DTYPE)
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def nbytes(self) -> int:
+        """记录数组和路径字符串占用的近似字节数"""
+        return int(self.records.nbytes) + sum(len(path) + 49 for path in self.paths)
+
+    def position(self, path: str) -> Optional[int]:
+        """按相对路径查找条目下标"""
+        if self._positions is None:
+            self._positions = {path: position for position, path in enumerate(self.paths)}
+        return self._positions.get(path)
+
+    def entry(self, position: int) -> ImageMetadata:
+        row = self.records[position]
+        return ImageMetadata(int(row['width']), int(row['height']), MODES[row['mode']],
+                             int(row['file_size']), int(row['mtime']))
+
+    def get(self, path: str) -> Optional[ImageMetadata]:
+        """按相对路径查找条目（不检查文件是否变化）"""
+        position = self.position(path)
+        return self.entry(position) if position is not None else None
+
+    def lookup(self, path: str, mtime_ns: int, file_size: int) -> Optional[ImageMetadata]:
+        """按相对路径查找mtime和文件字节数都一致的条目"""
+        position = self.position(path)
+        if position is None:
+            return None
+        row = self.records[position]
+        if row['mtime'] != mtime_ns or row['file_size'] != file_size:
+            return None
+        return self.entry(position)
+
+    @classmethod
+    def refresh(cls, root: str, paths: Sequence[str], previous: Optional['MetadataIndex'] = None,
+                max_workers: int = 8,
+                progress_callback: Optional[Callable[[int, int, str], None]] = None
+                ) -> Tuple['MetadataIndex', int]:
+        """
+        为一组文件建立索引：stat未变（mtime和文件字节数一致）的条目从 previous 复用，其余读取文件头；
+        stat和文件头读取都是I/O操作，在线程池中分块进行
+
+        Args:
+            root: 根目录
+            paths: 相对根目录的文件路径
+            previous: 上次的索引
+
+        Returns:
+            (新索引, 读取文件头的文件数)，无法读取的文件记录日志后跳过
+        """
+        paths = list(paths)
+        mode_codes = {mode: code for code, mode in enumerate(MODES)}
+
+        def probe_chunk(chunk: Sequence[str]) -> List[Optional[Tuple]]:
+            """每个文件返回上次索引中的条目下标（可复用时）或新的记录元组，无法读取时为None"""
+            results: List[Optional[Tuple]] = []
+            for path in chunk:
+                full_path = os.path.join(root, path)
+                try:
+                    stat_result = os.stat(full_path)
+                    position = previous.position(path) if previous is not None else None
+                    if position is not None:
+                        row = previous.records[position]
+                        if row['mtime'] == stat_result.st_mtime_ns and row['file_size'] == stat_result.st_size:
+                            results.append((position,))
+                            continue
+                    metadata = probe_image_header(full_path, stat_result)
+                    results.append((-1, metadata.width, metadata.height, mode_codes.get(metadata.mode, 0),
+                                    metadata.file_size, metadata.mtime_ns))
+                except Exception as e:
+                    log_error(f"读取图像文件头失败 {full_path}: {e}", "IMAGE_METADATA")
+                    results.append(None)
+            return results
+
+        chunk_size = 1024
+        chunks = [paths[start:start + chunk_size] for start in range(0, len(paths), chunk_size)]
+        kept_paths: List[str] = []
+        reused: List[int] = []  # 复用条目在新索引中的下标
+        sources: List[int] = []  # 复用条目在上次索引中的下标
+        probed_positions: List[int] = []
+        probed_rows: List[Tuple] = []
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='image_metadata') as executor:
+            for number, (chunk, results) in enumerate(zip(chunks, executor.map(probe_chunk, chunks)), 1):
+                for path, result in zip(chunk, results):
+                    if result is None:
+                        continue
+                    if result[0] >= 0:
+                        reused.append(len(kept_paths))
+                        sources.append(result[0])
+                    else:
+                        probed_positions.append(len(kept_paths))
+                        probed_rows.append(result[1:])
+                    kept_paths.append(path)
+                if progress_callback:
+                    done = min(number * chunk_size, len(paths))
+                    progress_callback(done, len(paths), f"读取图像文件头 {done}/{len(paths)}...")
+
+        records = np.empty(len(kept_paths), dtype=METADATA_DTYPE)
+        if reused:
+            records[reused] = previous.records[sources]
+        if probed_rows:
+            records[probed_positions] = np.array(probed_rows, dtype=METADATA_DTYPE)
+        return cls(root, kept_paths, records), len(probed_rows)
+
+    def replaced(self, other: 'MetadataIndex', drop: Callable[[str], bool]) -> 'MetadataIndex':
+        """
+        合并增量刷新的结果：去掉 drop(路径) 为真的条目和 other 中已有的路径，再追加 other 的条目
+        （用于只刷新部分文件，不重新stat整个目录）
+        """
+        kept = [position for position, path in enumerate(self.paths)
+                if not drop(path) and other.position(path) is None]
+        return MetadataIndex(self.root, [self.paths[position] for position in kept] + other.paths,
+                             np.concatenate([self.records[kept], other.records]))
+
+    @classmethod
+    def load(cls, index_path: str) -> 'MetadataIndex':
+        """
+        读取持久化索引
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            ValueError: 文件版本不支持或内容损坏
+        """
+        with np.load(index_path, allow_pickle=False) as data:
+            if int(data['version']) != cls.FILE_VERSION:
+                raise ValueError(f"不支持的元数据索引版本: {int(data['version'])}")
+            records = data['records']
+            if records.dtype != METADATA_DTYPE:
+                raise ValueError(f"不支持的元数据记录: {records.dtype}")
+            blob = data['paths'].tobytes().decode('utf-8')
+            paths = blob.split('\n') if blob else []
+            index = cls(str(data['root']), paths, records)
+        if len(index.paths) != len(index.records):
+            raise ValueError(f"元数据索引内容不一致: {index_path}")
+        return index
+
+    def save(self, index_path: str) -> None:
+        """写入临时文件后原子替换"""
+        os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, version=np.array(self.FILE_VERSION), root=np.array(self.root),
+                 paths=np.frombuffer('\n'.join(self.paths).encode('utf-8'), dtype=np.uint8),
+                 records=self.records)
+        temp_path = f"{index_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(buffer.getbuffer())
+        os.replace(temp_path, index_path)
@@ -0,0 +1,160 @@
+"""
+全景图孔位覆盖层渲染
+分为缓存的底图层（显示分辨率的全景图 + 静态孔位编号）和动态的孔位边框层，
+孔位状态变化时只用NumPy重绘发生变化的孔位区域
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+
+@lru_cache(maxsize=16)
+def load_overlay_font(size: int):
+    """加载孔位编号字体（按字号缓存，避免每次绘制都重新加载）"""
+    try:
+        return ImageFont.truetype("arial.ttf", size)
+    except Exception:
+        return ImageFont.load_default(size)
+
+
+# 孔位状态颜色
+OVERLAY_COLORS = {
+    'current': '#FF0000',      # 红色 - 当前孔位
+    'negative': '#00FF00',     # 绿色 - 阴性
+    'positive': '#FF8000',     # 橙色 - 阳性
+    'unannotated': '#CCCCCC'   # 灰色 - 未标注
+}
+
+
+def get_hole_style(hole_number: int, current_hole: int,
+                   annotated_holes: Optional[Dict[int, str]] = None) -> Tuple[str, int]:
+    """
+    获取孔位边框样式
+
+    Returns:
+        (颜色, 原图分辨率下的线宽)
+    """
+    if hole_number == current_hole:
+        return OVERLAY_COLORS['current'], 3
+    if annotated_holes and hole_number in annotated_holes:
+        growth_level = annotated_holes[hole_number]
+        return OVERLAY_COLORS.get(growth_level, OVERLAY_COLORS['unannotated']), 2
+    return OVERLAY_COLORS['unannotated'], 1
+
+
+class PanoramicOverlayRenderer:
+    """
+    增量式覆盖层渲染器
+
+    底图层按 (底图键, 孔位布局参数) 缓存；每次渲染只比较各孔位的样式，
+    对发生变化的孔位先从底图恢复其区域，再用数组切片绘制新的边框。
+    草稿底图（快速重采样、不绘制孔位编号）用于导航过程中的快速预览，
+    之后以非草稿方式渲染时重建为完整底图
+    """
+
+    def __init__(self, hole_manager):
+        self.hole_manager = hole_manager
+        self._base_key: Optional[Hashable] = None
+        self._base: Optional[np.ndarray] = None
+        self._frame: Optional[np.ndarray] = None
+        self._scale = 1.0
+        self._rects: Dict[int, Tuple[int, int, int, int]] = {}
+        self._styles: Dict[int, Tuple[Tuple[int, int, int], int]] = {}
+        self.base_is_draft = False  # 当前底图是否为草稿
+
+        # 最近一次渲染中重绘的孔位数量（用于性能统计）
+        self.last_updated_holes = 0
+
+    def _build_base(self, display_image: Image.Image, scale: float, labels: bool = True) -> None:
+        """构建底图层：显示分辨率全景图 + 静态孔位编号（labels=False 时不绘制编号）"""
+        base_image = display_image.convert('RGB') if display_image.mode != 'RGB' else display_image.copy()
+        draw = ImageDraw.Draw(base_image)
+        font = load_overlay_font(max(8, round(18 * scale)))
+        label_color = OVERLAY_COLORS['unannotated']
+
+        height, width = base_image.height, base_image.width
+        self._rects = {}
+        for hole_number in range(1, self.hole_manager.total_holes + 1):
+            x, y, hole_width, hole_height = self.hole_manager.get_hole_coordinates(hole_number)
+            x0, y0 = round(x * scale), round(y * scale)
+            x1, y1 = round((x + hole_width) * scale), round((y + hole_height) * scale)
+            self._rects[hole_number] = (max(x0, 0), max(y0, 0), min(x1, width - 1), min(y1, height - 1))
+            if not labels:
+                continue
+
+            # 居中绘制孔位编号
+            hole_label = self.hole_manager.get_hole_label(hole_number)
+            bbox = draw.textbbox((0, 0), hole_label, font=font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+            draw.text(((x0 + x1) // 2 - text_width // 2, (y0 + y1) // 2 - text_height // 2),
+                      hole_label, fill=label_color, font=font)
+
+        self._base = np.array(base_image)
+        self._frame = self._base.copy()
+        self._scale = scale
+        self._styles = {}
+
+    def _draw_hole(self, hole_number: int, color: Tuple[int, int, int], line_width: int) -> None:
+        """从底图恢复孔位区域并绘制边框（边框向内加粗，与ImageDraw.rectangle一致）"""
+        x0, y0, x1, y1 = self._rects[hole_number]
+        if x1 < x0 or y1 < y0:
+            return
+
+        region = self._frame[y0:y1 + 1, x0:x1 + 1]
+        region[...] = self._base[y0:y1 + 1, x0:x1 + 1]
+
+        t = max(1, min(line_width, (x1 - x0 + 1) // 2, (y1 - y0 + 1) // 2))
+        region[:t, :] = color
+        region[-t:, :] = color
+        region[:, :t] = color
+        region[:, -t:] = color
+
+    def render(self, base_key: Hashable,
+               display_factory: Callable[[], Tuple[Image.Image, float]],
+               current_hole: int,
+               annotated_holes: Optional[Dict[int, str]] = None,
+               draft: bool = False) -> Image.Image:
+        """
+        渲染覆盖层
+
+        Args:
+            base_key: 底图缓存键（如全景图路径、mtime和显示尺寸）
+            display_factory: 底图未命中时调用，返回 (显示分辨率全景图, 相对原图的缩放比例)
+            current_hole: 当前孔位
+            annotated_holes: 已标注孔位 -> 生长级别
+            draft: 底图未命中时构建草稿底图（display_factory 应返回快速重采样的图像）；
+                为False时已缓存的草稿底图会被重建
+
+        Returns:
+            合成后的显示图像
+        """
+        full_key = (base_key, self.hole_manager.get_layout_key())
+        if full_key != self._base_key or self._frame is None or (self.base_is_draft and not draft):
+            display_image, scale = display_factory()
+            self._build_base(display_image, scale, labels=not draft)
+            self._base_key = full_key
+            self.base_is_draft = draft
+
+        updated = 0
+        for hole_number in range(1, self.hole_manager.total_holes + 1):
+            color_hex, line_width = get_hole_style(hole_number, current_hole, annotated_holes)
+            style = (ImageColor.getrgb(color_hex), max(1, round(line_width * self._scale)))
+            if self._styles.get(hole_number) != style:
+                self._draw_hole(hole_number, *style)
+                self._styles[hole_number] = style
+                updated += 1
+
+        self.last_updated_holes = updated
+        return Image.fromarray(self._frame)
+
+    def invalidate(self) -> None:
+        """丢弃缓存的底图层"""
+        self._base_key = None
+        self._base = None
+        self._frame = None
+        self._styles = {}
+        self.base_is_draft = False
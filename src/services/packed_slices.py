@@ -0,0 +1,182 @@
+"""
+切片打包格式
+一张全景图的全部孔位切片打包为切片子目录下的两个文件：
+- slices.npy: 未压缩的切片堆栈 (切片数, H, W, 3) uint8，尺寸不一的切片在右下补零到最大尺寸
+- slices.json: 孔位索引 {孔位编号: [堆栈下标, 高, 宽]}
+读取时以内存映射方式打开堆栈，读取一个孔位只访问其覆盖的页面；
+在网络共享和冷磁盘上省去逐个打开120个PNG文件的开销
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+PACKED_SLICES_FILENAME = 'slices.npy'
+PACKED_INDEX_FILENAME = 'slices.json'
+PACK_VERSION = 1
+
+
+def list_hole_files(slice_dir: str) -> Dict[int, str]:
+    """列出切片子目录下的 hole_<N>.png 文件，返回 孔位编号 -> 路径"""
+    files = {}
+    with os.scandir(slice_dir) as entries:
+        for entry in entries:
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() == '.png' and stem.startswith('hole_') and stem[5:].isdigit() and entry.is_file():
+                files[int(stem[5:])] = entry.path
+    return files
+
+
+class PackedSlices:
+    """一张全景图的打包切片（只读内存映射）"""
+
+    def __init__(self, stack: np.ndarray, holes: Dict[int, Tuple[int, int, int]]):
+        self.stack = stack
+        self.holes = holes  # 孔位编号 -> (堆栈下标, 高, 宽)
+
+    @classmethod
+    def open(cls, slice_dir: str) -> 'PackedSlices':
+        """
+        打开切片子目录下的打包文件
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            ValueError: 索引版本不支持或与堆栈尺寸不一致
+        """
+        with open(os.path.join(slice_dir, PACKED_INDEX_FILENAME), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') != PACK_VERSION:
+            raise ValueError(f"不支持的切片打包版本: {index.get('version')}")
+
+        stack = np.load(os.path.join(slice_dir, PACKED_SLICES_FILENAME), mmap_mode='r')
+        holes = {int(hole): tuple(entry) for hole, entry in index['holes'].items()}
+        if stack.ndim != 4 or list(stack.shape) != index['shape'] or any(
+                not (0 <= position < stack.shape[0] and height <= stack.shape[1] and width <= stack.shape[2])
+                for position, height, width in holes.values()):
+            raise ValueError(f"切片打包索引与堆栈不一致: {slice_dir}")
+        return cls(stack, holes)
+
+    def __contains__(self, hole_number: int) -> bool:
+        return hole_number in self.holes
+
+    @property
+    def hole_numbers(self) -> List[int]:
+        return sorted(self.holes)
+
+    def get(self, hole_number: int) -> np.ndarray:
+        """获取孔位切片的数组视图（不复制像素）"""
+        position, height, width = self.holes[hole_number]
+        return self.stack[position, :height, :width]
+
+
+def is_pack_current(slice_dir: str, hole_files: Optional[Dict[int, str]] = None) -> bool:
+    """打包文件存在且不早于任何切片PNG时返回True"""
+    try:
+        pack_mtime = min(os.stat(os.path.join(slice_dir, name)).st_mtime_ns
+                         for name in (PACKED_SLICES_FILENAME, PACKED_INDEX_FILENAME))
+    except OSError:
+        return False
+    hole_files = list_hole_files(slice_dir) if hole_files is None else hole_files
+    return all(os.stat(path).st_mtime_ns <= pack_mtime for path in hole_files.values())
+
+
+def pack_slice_directory(slice_dir: str, remove_sources: bool = False, force: bool = False) -> int:
+    """
+    将切片子目录下的 hole_<N>.png 打包
+    先写入临时文件再原子替换，最后写入索引；打包完成后可删除源PNG
+
+    Args:
+        slice_dir: 切片子目录（<全景目录>/<全景ID>）
+        remove_sources: 打包成功后删除源PNG
+        force: 打包文件已是最新时也重新打包
+
+    Returns:
+        打包的切片数，没有切片或打包已是最新时返回0
+    """
+    hole_files = list_hole_files(slice_dir)
+    if not hole_files or (not force and is_pack_current(slice_dir, hole_files)):
+        return 0
+
+    hole_numbers = sorted(hole_files)
+    arrays = []
+    for hole_number in hole_numbers:
+        with Image.open(hole_files[hole_number]) as image:
+            arrays.append(np.asarray(image.convert('RGB')))
+
+    height = max(array.shape[0] for array in arrays)
+    width = max(array.shape[1] for array in arrays)
+    stack = np.zeros((len(arrays), height, width, 3), dtype=np.uint8)
+    holes = {}
+    for position, (hole_number, array) in enumerate(zip(hole_numbers, arrays)):
+        stack[position, :array.shape[0], :array.shape[1]] = array
+        holes[str(hole_number)] = [position, array.shape[0], array.shape[1]]
+
+    stack_path = os.path.join(slice_dir, PACKED_SLICES_FILENAME)
+    index_path = os.path.join(slice_dir, PACKED_INDEX_FILENAME)
+    with open(f"{stack_path}.tmp", 'wb') as f:
+        np.save(f, stack)
+    os.replace(f"{stack_path}.tmp", stack_path)
+    with open(f"{index_path}.tmp", 'w', encoding='utf-8') as f:
+        json.dump({'version': PACK_VERSION, 'shape': list(stack.shape), 'holes': holes}, f)
+    os.replace(f"{index_path}.tmp", index_path)
+
+    if remove_sources:
+        for path in hole_files.values():
+            os.remove(path)
+    return len(arrays)
+
+
+def _pack_task(task: Tuple[str, bool, bool]) -> Tuple[str, int, Optional[str]]:
+    """进程池任务：返回 (切片子目录, 打包切片数, 错误信息)"""
+    slice_dir, remove_sources, force = task
+    try:
+        return slice_dir, pack_slice_directory(slice_dir, remove_sources, force), None
+    except Exception as e:
+        return slice_dir, 0, str(e)
+
+
+def pack_directory(panoramic_dir: str, max_workers: Optional[int] = None, remove_sources: bool = False,
+                   force: bool = False,
+                   progress_callback: Optional[Callable[[int, int, str], None]] = None
+                   ) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """
+    在进程池中并行打包全景图目录下的所有切片子目录
+
+    Args:
+        panoramic_dir: 全景图目录
+        max_workers: 工作进程数，默认使用CPU核数
+        remove_sources: 打包成功后删除源PNG
+        force: 打包文件已是最新时也重新打包
+        progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+
+    Returns:
+        (切片子目录 -> 打包切片数, 切片子目录 -> 错误信息)
+    """
+    slice_dirs = []
+    with os.scandir(panoramic_dir) as entries:
+        for entry in entries:
+            if entry.is_dir() and not entry.name.startswith('.'):
+                slice_dirs.append(entry.path)
+    slice_dirs.sort()
+
+    packed: Dict[str, int] = {}
+    errors: Dict[str, str] = {}
+    total = len(slice_dirs)
+    if not total:
+        return packed, errors
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_pack_task, (slice_dir, remove_sources, force)) for slice_dir in slice_dirs]
+        for done, future in enumerate(as_completed(futures), 1):
+            slice_dir, count, error = future.result()
+            if error is not None:
+                errors[slice_dir] = error
+            else:
+                packed[slice_dir] = count
+            if progress_callback:
+                progress_callback(done, total, f"打包切片 {done}/{total}...")
+    return packed, errors
@@ -0,0 +1,209 @@
+"""
+全景图无损转码
+未压缩的BMP全景图（约19MB/张）占归档I/O的大部分。在进程池中把BMP转码为无损PNG（压缩级别可调）
+或TIFF（deflate压缩），先写入临时文件并重新解码逐像素比对，一致时用 os.replace 原子换成目标文件，
+再删除原BMP；每个处理完的文件追加一行到进度日志（<全景图目录>/.annotation_state/transcode_log.jsonl），
+中断后重新运行跳过已完成的文件
+"""
+
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+TRANSCODE_LOG_FILENAME = 'transcode_log.jsonl'
+
+# 输出格式 -> 扩展名（与 supported_formats 和 find_panoramic_image 查找的扩展名一致）
+FORMAT_EXTENSIONS = {'png': '.png', 'tiff': '.tiff'}
+
+
+def _save_options(fmt: str, compress_level: int) -> Dict[str, Any]:
+    if fmt == 'png':
+        return {'format': 'PNG', 'compress_level': compress_level}
+    if fmt == 'tiff':
+        return {'format': 'TIFF', 'compression': 'tiff_adobe_deflate'}
+    raise ValueError(f"不支持的转码格式: {fmt}")
+
+
+def images_identical(first: Image.Image, second: Image.Image) -> bool:
+    """两幅图像的模式、尺寸、调色板和每个像素都一致"""
+    if first.mode != second.mode or first.size != second.size:
+        return False
+    if first.mode == 'P' and first.getpalette() != second.getpalette():
+        return False
+    return np.array_equal(np.asarray(first), np.asarray(second))
+
+
+def transcode_file(source_path: str, fmt: str = 'png', compress_level: int = 6,
+                   keep_source: bool = False) -> Dict[str, Any]:
+    """
+    转码单个文件（在工作进程中执行），像素不一致或出错时保留原文件
+
+    Returns:
+        结果记录 {'source', 'target', 'source_size', 'target_size', 'seconds', 'error'}，
+        source / target 为文件名；成功时 error 为None
+    """
+    start = time.perf_counter()
+    target_path = os.path.splitext(source_path)[0] + FORMAT_EXTENSIONS[fmt]
+    temp_path = f"{target_path}.tmp"
+    result = {'source': os.path.basename(source_path), 'target': os.path.basename(target_path),
+              'source_size': 0, 'target_size': 0, 'seconds': 0.0, 'error': None}
+    try:
+        stat_result = os.stat(source_path)
+        result['source_size'] = stat_result.st_size
+        with Image.open(source_path) as source:
+            source.load()
+            if os.path.exists(target_path):
+                # 上次在替换之后、删除原文件之前被中断时目标文件与原图一致，直接完成；否则不覆盖
+                with Image.open(target_path) as existing:
+                    existing.load()
+                    if not images_identical(source, existing):
+                        raise FileExistsError(f"目标文件已存在且内容不同: {result['target']}")
+            else:
+                source.save(temp_path, **_save_options(fmt, compress_level))
+                with Image.open(temp_path) as written:
+                    written.load()
+                    if not images_identical(source, written):
+                        raise ValueError("转码结果与原图像素不一致")
+                # 保留原文件的修改时间（采集时间）
+                os.utime(temp_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+                os.replace(temp_path, target_path)
+        result['target_size'] = os.path.getsize(target_path)
+        if not keep_source:
+            os.remove(source_path)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _transcode_task(args: Tuple[str, str, int, bool]) -> Dict[str, Any]:
+    return transcode_file(*args)
+
+
+class TranscodeLog:
+    """
+    转码进度日志（JSON Lines，每个处理完的文件一行，追加写入）
+    同一源文件有多行时以最后一行为准，失败的文件下次运行重新转码
+    """
+
+    def __init__(self, log_path: Optional[str] = None):
+        self.log_path = log_path
+        self.entries: Dict[str, Dict[str, Any]] = {}  # 源文件名 -> 最后一条记录
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def is_done(self, root: str, source: str, target: str) -> bool:
+        """源文件已成功转码为 target，且目标文件仍是当时写入的文件"""
+        entry = self.entries.get(source)
+        if entry is None or entry['error'] is not None or entry['target'] != target:
+            return False
+        try:
+            return os.path.getsize(os.path.join(root, target)) == entry['target_size']
+        except OSError:
+            return False
+
+    @classmethod
+    def load(cls, log_path: str) -> 'TranscodeLog':
+        """读取进度日志，文件不存在时返回空日志；写到一半的最后一行被忽略"""
+        log = cls(log_path)
+        if not os.path.exists(log_path):
+            return log
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                log.entries[entry['source']] = entry
+        return log
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        self.entries[entry['source']] = entry
+        if not self.log_path:
+            return
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def transcode_files(root: str, filenames: Iterable[str], fmt: str = 'png', compress_level: int = 6,
+                    keep_source: bool = False, max_workers: Optional[int] = None,
+                    log: Optional[TranscodeLog] = None,
+                    progress_callback: Optional[Callable[[int, int, str], None]] = None
+                    ) -> Tuple[TranscodeLog, Dict[str, Any]]:
+    """
+    在进程池中转码根目录下的一组文件，同时提交的任务数限制为工作进程数的两倍
+
+    进度日志中已完成且目标文件未变的文件跳过；此时原文件仍在（替换后、删除原文件前被中断）
+    且不保留原文件时直接删除原文件
+
+    Args:
+        root: 根目录
+        filenames: 相对根目录的源文件名
+        fmt: 输出格式，'png' 或 'tiff'
+        compress_level: PNG压缩级别（0-9），TIFF忽略
+        keep_source: 转码成功后保留原文件
+        max_workers: 工作进程数，默认使用CPU核数；0表示在调用进程中转码
+        log: 上次的进度日志
+        progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+
+    Returns:
+        (进度日志, 统计 {'files', 'failed', 'skipped', 'source_bytes', 'target_bytes', 'seconds'})
+    """
+    _save_options(fmt, compress_level)
+    if log is None:
+        log = TranscodeLog()
+    stats = {'files': 0, 'failed': 0, 'skipped': 0, 'source_bytes': 0, 'target_bytes': 0, 'seconds': 0.0}
+    pending = []
+    for filename in filenames:
+        if log.is_done(root, filename, os.path.splitext(filename)[0] + FORMAT_EXTENSIONS[fmt]):
+            stats['skipped'] += 1
+            source_path = os.path.join(root, filename)
+            if not keep_source and os.path.exists(source_path):
+                os.remove(source_path)
+            continue
+        pending.append(filename)
+
+    total = len(pending)
+    start = time.perf_counter()
+
+    def collect(entry: Dict[str, Any]) -> None:
+        log.append(entry)
+        if entry['error'] is None:
+            stats['files'] += 1
+            stats['source_bytes'] += entry['source_size']
+            stats['target_bytes'] += entry['target_size']
+        else:
+            stats['failed'] += 1
+        done = stats['files'] + stats['failed']
+        if progress_callback:
+            progress_callback(done, total, f"转码全景图 {done}/{total}...")
+
+    tasks = [(os.path.join(root, filename), fmt, compress_level, keep_source) for filename in pending]
+    try:
+        if max_workers == 0:
+            for task in tasks:
+                collect(_transcode_task(task))
+        elif tasks:
+            window = (max_workers or os.cpu_count() or 1) * 2
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = set()
+                for task in tasks:
+                    if len(futures) >= window:
+                        finished, futures = wait(futures, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            collect(future.result())
+                    futures.add(executor.submit(_transcode_task, task))
+                for future in wait(futures).done:
+                    collect(future.result())
+    finally:
+        stats['seconds'] = time.perf_counter() - start
+    return log, stats
@@ -3,24 +3,53 @@
 处理全景图和切片图像的加载、显示、缩放等功能
 """
 
+import hashlib
 import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, Hashable, Iterable, Iterator, List, Set
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import Image, ImageTk, ImageDraw
 import cv2
 import numpy as np
 
 # 日志导入
 try:
-    from src.utils.logger import log_error
+    from src.utils.logger import log_error, log_info
 except ImportError:
     # 如果日志模块不可用，使用print作为后备
     def log_error(msg, category=""):
         print(f"[{category}] {msg}" if category else msg)
+    
+    def log_info(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
 
 from src.ui.hole_manager import HoleManager
+from src.core.config import ImageConfig
+from src.services.image_cache import ImageCache, estimate_image_bytes
+from src.services.disk_cache import DiskImageCache
+from src.services.decode_backends import BACKENDS, ImageDecoder, load_backend_profile, select_backends
+from src.services.decode_service import DecodeService
+from src.services.hole_features import HoleFeatureExtractor
+from src.services.image_integrity import QUARANTINE_FILENAME, QuarantineManifest, verify_files
+from src.services.image_metadata import ImageMetadata, MetadataIndex, pixel_bytes, probe_image_header
+from src.services.panorama_transcoder import TRANSCODE_LOG_FILENAME, TranscodeLog, transcode_files
+from src.services.plate_normalization import IlluminationModel, PlateNormalizer
+from src.services.plate_report import PlateReportRenderer, render_plate_reports
+from src.services.thumbnail_atlas import ThumbnailAtlas, ThumbnailAtlasBuilder
+from src.services.slice_scanner import SliceScanner
+from src.services.slice_index import SliceIndex, SliceIndexBuilder
+from src.services.packed_slices import PACKED_SLICES_FILENAME, PackedSlices
+from src.services.perceptual_hash import HashIndex, compute_hashes
+from src.services.slice_embeddings import (
+    EMBEDDING_DIM, EmbeddingIndex, compute_embedding, quantize_embedding
+)
+from src.services.overlay_renderer import PanoramicOverlayRenderer, get_hole_style, load_overlay_font
+from src.services.enhancement_service import (
+    BatchEnhancer, EnhancementTimings, enhance_array, get_thread_buffer_pool, get_thread_clahe
+)
 
 
 class PanoramicImageService:
@@ -28,32 +57,695 @@ class PanoramicImageService:
     全景图像服务类
     """
     
-    def __init__(self):
+    def __init__(self, image_config: Optional[ImageConfig] = None):
+        self.image_config = image_config or ImageConfig()
         self.hole_manager = HoleManager()
-        self.panoramic_images: Dict[str, Image.Image] = {}  # 缓存全景图
-        self.slice_images: Dict[str, Image.Image] = {}      # 缓存切片图
+        # 全景图和切片图共用一个字节预算的LRU缓存
+        # 键格式: (类别, 路径, mtime)，类别为 'panoramic' / 'slice' / 'enhanced_slice' / 'pyramid'
+        self.image_cache = ImageCache(self.image_config.cache_bytes, on_evict=self._forget_cache_key)
+        # (类别, 路径) -> 最近一次使用的缓存键，读写都在 image_cache.lock 内（淘汰回调也在其中调用）
+        self._cache_keys: Dict[Tuple[str, str], Tuple] = {}
+        self.disk_cache: Optional[DiskImageCache] = None  # 由 enable_disk_cache 按全景图目录启用
+        self.enhancement_timings = EnhancementTimings()  # 切片解码/增强耗时统计
+        self._batch_enhancer: Optional[BatchEnhancer] = None
+        self._atlas_builder: Optional[ThumbnailAtlasBuilder] = None
+        self._decode_service: Optional[DecodeService] = None
+        self._display_size: Optional[Tuple[int, int]] = None  # 最近一次渲染覆盖层的显示区域
+        self.overlay_renderer = PanoramicOverlayRenderer(self.hole_manager)  # 增量式覆盖层渲染
+        self.feature_extractor = HoleFeatureExtractor(self.hole_manager)  # 整板孔位特征
+        self.plate_normalizer = PlateNormalizer(self.hole_manager)  # 整板光照归一化
         self.supported_formats = {'.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif'}
+        self.image_decoder = self._create_image_decoder()  # 按扩展名选择的解码后端
+        self._slice_scanners: Dict[str, SliceScanner] = {}  # 状态文件路径 -> 目录扫描器
+        self._virtual_sources: Dict[str, Optional[Tuple[str, int]]] = {}  # 切片路径 -> (全景图路径, 孔位编号)或None
+        self._packed_dirs: Dict[str, Optional[str]] = {}  # 切片子目录 -> 打包文件路径（None表示未打包）
+        self._metadata_indexes: Dict[str, MetadataIndex] = {}  # 扫描根目录（绝对路径） -> 图像元数据索引
+        self.metadata_stats = {'indexed': 0, 'probed': 0}  # 元数据查询命中索引 / 读取文件头的次数
     
-    def load_panoramic_image(self, image_path: str) -> Optional[Image.Image]:
+    # 显示金字塔层级的缩小倍数：原图、1/2、1/4、1/8
+    PYRAMID_FACTORS = (1, 2, 4, 8)
+    
+    # 切片增强参数（CLAHE对比度增强 + 高斯去噪），同时作为增强结果缓存键的一部分
+    ENHANCE_PARAMS = {
+        'clip_limit': 2.0,
+        'tile_grid_size': (8, 8),
+        'blur_kernel': (3, 3),
+        'blur_sigma': 0.5
+    }
+    
+    def enable_disk_cache(self, panoramic_dir: str) -> Optional[DiskImageCache]:
         """
-        加载全景图像
+        在全景图目录下启用磁盘缓存
+        配置禁用磁盘缓存时返回None
         """
-        try:
-            path = Path(image_path)
-            if not path.exists():
-                raise FileNotFoundError(f"全景图文件不存在: {image_path}")
-            
-            if path.suffix.lower() not in self.supported_formats:
-                raise ValueError(f"不支持的图像格式: {path.suffix}")
-            
+        if not self.image_config.disk_cache_enabled:
+            return None
+        
+        cache_dir = Path(panoramic_dir) / self.image_config.disk_cache_dir
+        if self.disk_cache is not None:
+            if self.disk_cache.cache_dir == cache_dir:
+                return self.disk_cache
+            self.disk_cache.shutdown()
+        
+        self.disk_cache = DiskImageCache(str(cache_dir))
+        return self.disk_cache
+    
+    def shutdown(self):
+        """完成磁盘缓存的后台写入并关闭批量增强、缩略图和解码进程池"""
+        if self.disk_cache is not None:
+            self.disk_cache.shutdown()
+        if self._batch_enhancer is not None:
+            self._batch_enhancer.shutdown()
+            self._batch_enhancer = None
+        if self._atlas_builder is not None:
+            self._atlas_builder.shutdown()
+            self._atlas_builder = None
+        if self._decode_service is not None:
+            self._decode_service.shutdown(wait=False)
+            self._decode_service = None
+    
+    def _backend_profile_path(self) -> Optional[str]:
+        profile = self.image_config.decode_backend_profile
+        return os.path.expanduser(profile) if profile else None
+    
+    def _create_image_decoder(self) -> ImageDecoder:
+        """创建解码器：指定后端时直接使用，自动模式读取已持久化的测速结果（没有时暂用PIL）"""
+        backend = self.image_config.decode_backend
+        if backend != 'auto':
+            return ImageDecoder.forced(backend, self.supported_formats)
+        profile_path = self._backend_profile_path()
+        return ImageDecoder(load_backend_profile(profile_path) if profile_path else None)
+    
+    def select_decode_backends(self) -> Dict[str, str]:
+        """
+        自动模式下按扩展名测速选择解码后端并持久化，已有本机测速结果时直接读取
+        测速约需数百毫秒，可在后台线程调用
+        
+        Returns:
+            扩展名 -> 后端名称
+        """
+        if self.image_config.decode_backend == 'auto':
+            try:
+                self.image_decoder = ImageDecoder(select_backends(self._backend_profile_path(),
+                                                                  self.supported_formats))
+            except Exception as e:
+                log_error(f"解码后端测速失败，继续使用当前后端: {e}", "IMAGE_SERVICE")
+        return dict(self.image_decoder.choices)
+    
+    def _make_cache_key(self, kind: str, path: Path, variant: Any = None,
+                        stat_path: Optional[Path] = None) -> Tuple:
+        """
+        生成缓存键，包含文件修改时间和可选的派生参数
+        文件mtime或派生参数变化时移除同一路径的旧缓存条目
+        
+        Args:
+            stat_path: 提供mtime的源文件，默认为 path 本身（虚拟切片使用全景图）
+        """
+        mtime = (stat_path or path).stat().st_mtime_ns
+        key = (kind, str(path), mtime) if variant is None else (kind, str(path), mtime, variant)
+        path_key = (kind, str(path))
+        with self.image_cache.lock:
+            previous = self._cache_keys.get(path_key)
+            if previous is not None and previous != key:
+                self.image_cache.pop(previous)
+            self._cache_keys[path_key] = key
+            if len(self._cache_keys) > 2 * len(self.image_cache) + 1024:
+                # 只查询未写入缓存的键（如预取前的命中检查）不会被淘汰回调移除，定期丢弃
+                stale = [other for other, cached in self._cache_keys.items()
+                         if other != path_key and cached not in self.image_cache]
+                for other in stale:
+                    del self._cache_keys[other]
+        return key
+    
+    def _forget_cache_key(self, key: Hashable) -> None:
+        """缓存条目被淘汰时移除其 (类别, 路径) 记录（在 image_cache.lock 内调用）"""
+        if isinstance(key, tuple) and self._cache_keys.get(key[:2]) == key:
+            del self._cache_keys[key[:2]]
+    
+    def _slice_cache_key(self, kind: str, image_path: str, variant: Any = None) -> Tuple:
+        """切片缓存键，打包切片以打包文件mtime、虚拟切片以全景图mtime和孔位布局作为版本"""
+        packed = self.get_packed_slice_source(image_path)
+        if packed is not None:
+            return self._make_cache_key(kind, Path(image_path), variant, stat_path=Path(packed[0]))
+        source = self.get_virtual_slice_source(image_path)
+        if source is None:
+            return self._make_cache_key(kind, Path(image_path), variant)
+        return self._make_cache_key(kind, Path(image_path),
+                                    (variant, self.get_plate_layout(source[0]).get_layout_key()),
+                                    stat_path=Path(source[0]))
+    
+    def _enhance_params_key(self) -> Tuple:
+        """增强参数的可哈希形式，作为增强结果缓存键的一部分"""
+        params = self.ENHANCE_PARAMS
+        return (params['clip_limit'], tuple(params['tile_grid_size']),
+                tuple(params['blur_kernel']), params['blur_sigma'])
+    
+    def _read_image(self, kind: str, image_path: str) -> Image.Image:
+        """
+        读取图像并写入缓存（不弹出错误对话框，可在后台线程调用）
+        
+        Args:
+            kind: 缓存类别，'panoramic' 或 'slice'
+            image_path: 图像路径
+        """
+        if kind == 'slice':
+            packed = self.get_packed_slice_source(image_path)
+            if packed is not None:
+                return self._read_packed_slice(image_path, *packed)
+            source = self.get_virtual_slice_source(image_path)
+            if source is not None:
+                return self._read_virtual_slice(image_path, *source)
+        
+        path = Path(image_path)
+        if not path.exists():
+            label = "全景图" if kind == 'panoramic' else "切片图"
+            raise FileNotFoundError(f"{label}文件不存在: {image_path}")
+        
+        if path.suffix.lower() not in self.supported_formats:
+            raise ValueError(f"不支持的图像格式: {path.suffix}")
+        
+        cache_key = self._make_cache_key(kind, path)
+        image = self.image_cache.get(cache_key)
+        if image is None:
             # 加载图像
-            image = Image.open(image_path)
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+            image = self.image_decoder.decode_image(image_path)
             
             # 缓存图像
-            panoramic_id = path.stem
-            self.panoramic_images[panoramic_id] = image
+            self.image_cache.put(cache_key, image)
+        
+        return image
+    
+    def get_virtual_slice_source(self, image_path: str) -> Optional[Tuple[str, int]]:
+        """
+        解析虚拟切片来源
+        切片PNG存在时作为覆盖直接读取文件；不存在时按 <全景目录>/<全景ID>/hole_<N>.png
+        找到 <全景目录>/<全景ID>.<扩展名>，从全景图中裁剪孔位
+        
+        Returns:
+            (全景图路径, 孔位编号)，非虚拟切片或虚拟切片已禁用时返回None
+        """
+        if not self.image_config.virtual_slices or os.path.exists(image_path):
+            return None
+        return self._find_slice_panoramic(image_path)
+    
+    def get_plate_slice_source(self, image_path: str) -> Optional[Tuple[str, int]]:
+        """
+        解析整板光照归一化使用的全景图（无论切片来自PNG、打包文件还是虚拟裁剪）
+        
+        Returns:
+            (全景图路径, 孔位编号)，增强方法不是 plate 或找不到全景图时返回None
+        """
+        if self.image_config.enhance_method != 'plate':
+            return None
+        return self._find_slice_panoramic(image_path)
+    
+    def _find_slice_panoramic(self, image_path: str) -> Optional[Tuple[str, int]]:
+        """按 <全景目录>/<全景ID>/hole_<N>.png 找到 <全景目录>/<全景ID>.<扩展名>，结果按切片路径记录"""
+        if image_path in self._virtual_sources:
+            return self._virtual_sources[image_path]
+        
+        try:
+            hole_number = self._parse_hole_number_from_filename(image_path)
+        except ValueError:
+            return None
+        source = None
+        slice_dir = os.path.dirname(image_path)
+        panoramic_id = os.path.basename(slice_dir)
+        for ext in ['.bmp', '.png', '.jpg', '.jpeg', '.tiff', '.tif']:
+            panoramic_path = os.path.join(os.path.dirname(slice_dir), f"{panoramic_id}{ext}")
+            if os.path.exists(panoramic_path):
+                source = (panoramic_path, hole_number)
+                break
+        self._virtual_sources[image_path] = source
+        return source
+    
+    def get_packed_slice_source(self, image_path: str) -> Optional[Tuple[str, int]]:
+        """
+        解析打包切片来源
+        切片子目录下存在 slices.npy 且包含该孔位时，切片从打包文件读取（优先于PNG和虚拟切片）；
+        子目录是否已打包在扫描时记录，未扫描过的子目录首次查询时检查一次
+        
+        Returns:
+            (打包文件路径, 孔位编号)，未打包、孔位不在打包文件中或打包已禁用时返回None
+        """
+        if not self.image_config.packed_slices:
+            return None
+        
+        slice_dir = os.path.dirname(image_path)
+        if slice_dir in self._packed_dirs:
+            pack_path = self._packed_dirs[slice_dir]
+        else:
+            pack_path = os.path.join(slice_dir, PACKED_SLICES_FILENAME)
+            pack_path = pack_path if os.path.exists(pack_path) else None
+            self._packed_dirs[slice_dir] = pack_path
+        if pack_path is None:
+            return None
+        
+        try:
+            hole_number = self._parse_hole_number_from_filename(image_path)
+        except ValueError:
+            return None
+        packed = self.get_packed_slices(pack_path)
+        if packed is None or hole_number not in packed:
+            return None
+        return pack_path, hole_number
+    
+    def get_packed_slices(self, pack_path: str) -> Optional[PackedSlices]:
+        """打开打包切片并按 (路径, mtime) 缓存，打包文件损坏时记录日志并返回None"""
+        try:
+            cache_key = self._make_cache_key('packed_slices', Path(pack_path))
+            packed = self.image_cache.get(cache_key)
+            if packed is None:
+                packed = PackedSlices.open(os.path.dirname(pack_path))
+                self.image_cache.put(cache_key, packed, size=estimate_image_bytes(packed.stack))
+            return packed
+        except (OSError, ValueError, KeyError) as e:
+            log_error(f"读取切片打包文件失败 {pack_path}: {e}", "IMAGE_SERVICE")
+            self._packed_dirs[os.path.dirname(pack_path)] = None
+            return None
+    
+    def _read_packed_slice(self, image_path: str, pack_path: str, hole_number: int) -> Image.Image:
+        """从打包文件读取切片，按 (切片路径, 打包文件mtime) 缓存"""
+        cache_key = self._slice_cache_key('slice', image_path)
+        image = self.image_cache.get(cache_key)
+        if image is None:
+            image = Image.fromarray(np.ascontiguousarray(self.get_packed_slices(pack_path).get(hole_number)))
+            self.image_cache.put(cache_key, image)
+        return image
+    
+    def get_panoramic_array(self, image_path: str) -> np.ndarray:
+        """
+        获取全景图像素数组 (H, W, 3)，按 (路径, mtime) 缓存
+        未压缩BMP直接内存映射（孔位裁剪和统计只读取用到的页面），其他格式解码一次
+        数组为只读，孔位裁剪直接返回其视图
+        """
+        path = Path(image_path)
+        cache_key = self._make_cache_key('panoramic_array', path)
+        array = self.image_cache.get(cache_key)
+        if array is None:
+            memmap_backend = BACKENDS['memmap']
+            if self.image_config.bmp_memmap and memmap_backend.supports(image_path):
+                array = memmap_backend.decode_array(image_path)
+            else:
+                array = self.image_decoder.decode_array(image_path)
+            array.flags.writeable = False
+            self.image_cache.put(cache_key, array)
+        return array
+    
+    def get_plate_layout(self, panoramic_path: str) -> HoleManager:
+        """
+        按全景图尺寸计算的孔位布局（hole_manager 的副本）
+        预取和批量计算线程用它取孔位坐标，不修改界面共享的 hole_manager
+        """
+        metadata = self.get_image_metadata(panoramic_path)
+        return self.hole_manager.layout_for_size(metadata.width, metadata.height)
+    
+    def get_hole_view(self, panoramic_path: str, hole_number: int) -> np.ndarray:
+        """获取孔位区域的数组视图（不复制像素，超出图像边界的部分被裁掉）"""
+        array = self.get_panoramic_array(panoramic_path)
+        layout = self.hole_manager.layout_for_size(array.shape[1], array.shape[0])
+        x, y, width, height = layout.get_hole_coordinates(hole_number)
+        return array[max(y, 0):y + height, max(x, 0):x + width]
+    
+    def _read_virtual_slice(self, image_path: str, panoramic_path: str, hole_number: int) -> Image.Image:
+        """从全景图裁剪虚拟切片，按 (切片路径, 全景图mtime, 孔位布局) 缓存"""
+        view = self.get_hole_view(panoramic_path, hole_number)
+        cache_key = self._slice_cache_key('slice', image_path)
+        image = self.image_cache.get(cache_key)
+        if image is None:
+            image = Image.fromarray(view)
+            self.image_cache.put(cache_key, image)
+        return image
+    
+    def get_slice_array(self, image_path: str) -> np.ndarray:
+        """
+        获取切片像素数组（不写入切片缓存，用于批量计算）
+        打包切片和虚拟切片返回只读视图，切片文件直接解码
+        """
+        packed = self.get_packed_slice_source(image_path)
+        if packed is not None:
+            return self.get_packed_slices(packed[0]).get(packed[1])
+        source = self.get_virtual_slice_source(image_path)
+        if source is not None:
+            return self.get_hole_view(*source)
+        return self.image_decoder.decode_array(image_path)
+    
+    def get_slice_source_mtime(self, image_path: str) -> int:
+        """切片源文件的mtime（打包切片为打包文件，虚拟切片为全景图）"""
+        packed = self.get_packed_slice_source(image_path)
+        if packed is not None:
+            return os.stat(packed[0]).st_mtime_ns
+        source = self.get_virtual_slice_source(image_path)
+        return os.stat(source[0] if source is not None else image_path).st_mtime_ns
+    
+    def get_hash_index_path(self, directory: str) -> Optional[str]:
+        """目录的感知哈希索引文件路径，禁用磁盘缓存时返回None"""
+        if not self.image_config.disk_cache_enabled:
+            return None
+        return str(Path(directory) / self.image_config.disk_cache_dir / "phash_index.npz")
+    
+    def _refresh_slice_values(self, slice_files: Iterable[Dict[str, Any]], directory: str, lookup,
+                              compute, label: str, progress_callback=None):
+        """
+        按切片计算持久化索引的值：已有且源文件mtime未变的值由 lookup 复用，其余切片在线程池中读取后计算
+        
+        Args:
+            lookup: (相对路径, mtime) -> 已有值或None
+            compute: 切片像素数组 -> 值
+            label: 日志和进度消息中的名称
+        
+        Returns:
+            (相对路径列表, mtime列表, 值列表, 重新计算的切片数)，读取失败的切片记录日志后跳过
+        """
+        paths: List[str] = []
+        mtimes: List[int] = []
+        values: List[Any] = []
+        pending: List[int] = []
+        for slice_info in slice_files:
+            try:
+                mtime_ns = self.get_slice_source_mtime(slice_info['filepath'])
+            except OSError as e:
+                log_error(f"读取切片失败 {slice_info['filepath']}: {e}", "IMAGE_SERVICE")
+                continue
+            relative_path = os.path.relpath(slice_info['filepath'], directory)
+            cached = lookup(relative_path, mtime_ns)
+            if cached is None:
+                pending.append(len(paths))
+            paths.append(relative_path)
+            mtimes.append(mtime_ns)
+            values.append(cached)
+        
+        def compute_slice(position: int) -> Tuple[int, Any]:
+            try:
+                return position, compute(self.get_slice_array(os.path.join(directory, paths[position])))
+            except Exception as e:
+                log_error(f"计算{label}失败 {paths[position]}: {e}", "IMAGE_SERVICE")
+                return position, None
+        
+        total = len(pending)
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.image_config.scan_workers,
+                                    thread_name_prefix='slice_values') as executor:
+                for done, (position, value) in enumerate(executor.map(compute_slice, pending), 1):
+                    values[position] = value
+                    if progress_callback and (done % 100 == 0 or done == total):
+                        progress_callback(done, total, f"计算{label} {done}/{total}...")
+        
+        valid = [position for position, value in enumerate(values) if value is not None]
+        return ([paths[position] for position in valid], [mtimes[position] for position in valid],
+                [values[position] for position in valid], total)
+    
+    def _load_slice_value_index(self, index_class, index_path: Optional[str], directory: str, label: str):
+        """读取已有的持久化索引，不存在或损坏时返回空索引"""
+        if index_path and os.path.exists(index_path):
+            try:
+                return index_class.load(index_path)
+            except (OSError, ValueError, KeyError) as e:
+                log_error(f"读取{label}索引失败，重新计算 {index_path}: {e}", "IMAGE_SERVICE")
+        return index_class(directory)
+    
+    def _save_slice_value_index(self, index, index_path: Optional[str], label: str) -> None:
+        if not index_path:
+            return
+        try:
+            index.save(index_path)
+        except OSError as e:
+            log_error(f"保存{label}索引失败 {index_path}: {e}", "IMAGE_SERVICE")
+    
+    def update_hash_index(self, slice_files: Iterable[Dict[str, Any]], directory: str,
+                          progress_callback=None) -> HashIndex:
+        """
+        计算目录下切片的感知哈希（dHash和pHash）并持久化到磁盘缓存目录
+        已有哈希且源文件mtime未变的切片直接复用，其余切片在线程池中读取并计算
+        
+        Args:
+            slice_files: 切片记录（get_slice_files_from_directory 的结果）
+            directory: 切片记录的根目录，索引中的路径相对于该目录
+            progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+        
+        Returns:
+            目录的哈希索引，读取失败的切片记录日志后跳过
+        """
+        directory = os.path.normpath(directory)
+        index_path = self.get_hash_index_path(directory)
+        previous = self._load_slice_value_index(HashIndex, index_path, directory, "感知哈希")
+        paths, mtimes, hashes, computed = self._refresh_slice_values(
+            slice_files, directory, previous.lookup, compute_hashes, "感知哈希", progress_callback)
+        
+        index = HashIndex(directory, paths, np.array(mtimes, dtype=np.int64),
+                          np.array([value[0] for value in hashes], dtype=np.uint64),
+                          np.array([value[1] for value in hashes], dtype=np.uint64))
+        if computed or len(index) != len(previous):
+            self._save_slice_value_index(index, index_path, "感知哈希")
+        return index
+    
+    def get_embedding_index_path(self, directory: str) -> Optional[str]:
+        """目录的切片嵌入索引文件路径，禁用磁盘缓存时返回None"""
+        if not self.image_config.disk_cache_enabled:
+            return None
+        return str(Path(directory) / self.image_config.disk_cache_dir / "slice_embeddings.npz")
+    
+    def update_embedding_index(self, slice_files: Iterable[Dict[str, Any]], directory: str,
+                               progress_callback=None) -> EmbeddingIndex:
+        """
+        计算目录下切片的外观嵌入向量并持久化到磁盘缓存目录（与感知哈希索引相同的增量规则）
+        
+        Args:
+            slice_files: 切片记录（get_slice_files_from_directory 的结果）
+            directory: 切片记录的根目录，索引中的路径相对于该目录
+            progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+        
+        Returns:
+            目录的嵌入索引，读取失败的切片记录日志后跳过
+        """
+        directory = os.path.normpath(directory)
+        index_path = self.get_embedding_index_path(directory)
+        previous = self._load_slice_value_index(EmbeddingIndex, index_path, directory, "切片嵌入")
+        paths, mtimes, vectors, computed = self._refresh_slice_values(
+            slice_files, directory, previous.lookup,
+            lambda array: quantize_embedding(compute_embedding(array)), "切片嵌入", progress_callback)
+        
+        index = EmbeddingIndex(directory, paths, np.array(mtimes, dtype=np.int64),
+                               np.array(vectors, dtype=np.uint8).reshape(-1, EMBEDDING_DIM))
+        if computed or len(index) != len(previous):
+            self._save_slice_value_index(index, index_path, "切片嵌入")
+        return index
+    
+    def get_metadata_index_path(self, directory: str) -> Optional[str]:
+        """目录的图像元数据索引文件路径，禁用磁盘缓存时返回None"""
+        if not self.image_config.disk_cache_enabled:
+            return None
+        return str(Path(directory) / self.image_config.disk_cache_dir / "image_metadata.npz")
+    
+    def update_metadata_index(self, directory: str, paths: Iterable[str],
+                              progress_callback=None) -> MetadataIndex:
+        """
+        读取目录下图像的文件头（宽高、模式、文件字节数、mtime）并持久化到磁盘缓存目录
+        mtime和文件字节数未变的文件直接复用上次的记录，只有新增或变化的文件读取文件头
+        
+        Args:
+            directory: 根目录
+            paths: 相对根目录的图像路径
+            progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+        """
+        directory = os.path.abspath(directory)
+        index_path = self.get_metadata_index_path(directory)
+        previous = self._get_metadata_index(directory, index_path)
+        index, probed = MetadataIndex.refresh(directory, paths, previous, self.image_config.scan_workers,
+                                              progress_callback)
+        if probed or len(index) != len(previous):
+            self._save_slice_value_index(index, index_path, "图像元数据")
+        self._metadata_indexes[directory] = index
+        return index
+    
+    def _get_metadata_index(self, directory: str, index_path: Optional[str]) -> MetadataIndex:
+        index = self._metadata_indexes.get(directory)
+        if index is None:
+            index = self._load_slice_value_index(MetadataIndex, index_path, directory, "图像元数据")
+        return index
+    
+    def _index_ingested_metadata(self, added: SliceIndex, panoramic_directory: str,
+                                 panoramic_ids: Set[str]) -> None:
+        """
+        只为增量纳入的全景图刷新元数据索引：读取这些全景图文件和新切片行的文件头，
+        这些全景图原有的条目被替换，其余条目不再stat
+        """
+        directory = os.path.abspath(panoramic_directory)
+        paths = [filename for filename in self.get_slice_scanner(panoramic_directory).get_listing('')
+                 if os.path.splitext(filename)[0] in panoramic_ids
+                 and os.path.splitext(filename)[1].lower() in self.supported_formats
+                 and not self._is_slice_filename(filename)]
+        paths.extend(added.relative_paths(('independent', 'subdirectory')))
+        index_path = self.get_metadata_index_path(directory)
+        previous = self._get_metadata_index(directory, index_path)
+        refreshed, probed = MetadataIndex.refresh(directory, paths, previous, self.image_config.scan_workers)
+        index = previous.replaced(
+            refreshed, lambda path: os.path.splitext(path.split(os.sep, 1)[0])[0] in panoramic_ids)
+        if probed or len(index) != len(previous):
+            self._save_slice_value_index(index, index_path, "图像元数据")
+        self._metadata_indexes[directory] = index
+    
+    def _index_scanned_metadata(self, slice_files: SliceIndex, panoramic_directory: Optional[str]) -> None:
+        """为扫描得到的切片文件和全景图建立元数据索引（打包和虚拟切片没有文件，尺寸由其来源给出）"""
+        slice_root = os.path.abspath(slice_files.root)
+        roots = {slice_root}
+        if panoramic_directory and os.path.isdir(panoramic_directory):
+            roots.add(os.path.abspath(panoramic_directory))
+        for root in sorted(roots):
+            paths = [os.path.basename(path) for path in self.list_panoramic_files(root)]
+            if root == slice_root:
+                paths.extend(slice_files.relative_paths(('independent', 'subdirectory')))
+            self.update_metadata_index(root, paths)
+    
+    def get_quarantine_manifest_path(self, directory: str) -> str:
+        """目录的隔离清单文件路径（位于持久状态目录下，不随磁盘缓存清理或禁用）"""
+        return str(Path(directory) / self.image_config.state_dir / QUARANTINE_FILENAME)
+    
+    def verify_directory_images(self, directory: str, max_workers: Optional[int] = None,
+                                progress_callback=None) -> Tuple[QuarantineManifest, int]:
+        """
+        完整解码目录下的全景图和切片文件，解码失败的文件记入隔离清单
+        上次校验后未变化的文件不再解码，中断后重新调用从断点继续；
+        打包切片和虚拟切片没有单独的文件，分别随打包文件的读取和全景图的校验检查
+        
+        Args:
+            directory: 全景图目录
+            max_workers: 校验进程数，默认使用配置（0表示CPU核数）；0表示在调用进程中校验
+            progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+        
+        Returns:
+            (隔离清单, 本次解码的文件数)
+        """
+        directory = os.path.abspath(directory)
+        paths = [os.path.basename(path) for path in self.list_panoramic_files(directory)]
+        paths.extend(record['relative_path'] for record in self.iter_slice_records(directory)
+                     if record['structure_type'] in ('independent', 'subdirectory'))
+        manifest_path = self.get_quarantine_manifest_path(directory)
+        try:
+            previous = QuarantineManifest.load(manifest_path, directory)
+        except Exception as e:
+            log_error(f"读取隔离清单失败，将重新校验: {e}", "IMAGE_INTEGRITY")
+            previous = None
+        workers = max_workers if max_workers is not None else (self.image_config.verify_workers or None)
+        return verify_files(directory, paths, previous, workers, manifest_path=manifest_path,
+                            progress_callback=progress_callback)
+    
+    def get_transcode_log_path(self, directory: str) -> str:
+        """目录的转码进度日志路径（位于持久状态目录下，不随磁盘缓存清理或禁用）"""
+        return str(Path(directory) / self.image_config.state_dir / TRANSCODE_LOG_FILENAME)
+    
+    def transcode_directory_panoramas(self, directory: str, fmt: Optional[str] = None,
+                                      compress_level: Optional[int] = None, keep_source: bool = False,
+                                      max_workers: Optional[int] = None,
+                                      progress_callback=None) -> Tuple[TranscodeLog, Dict[str, Any]]:
+        """
+        把目录下的BMP全景图无损转码为PNG或TIFF（逐像素比对一致后原子替换并删除BMP）
+        进度记入转码日志，中断后重新调用跳过已完成的文件；find_panoramic_image 按扩展名找到转码后的文件
+        
+        Args:
+            directory: 全景图目录
+            fmt: 输出格式 'png' 或 'tiff'，默认使用配置
+            compress_level: PNG压缩级别（0-9），默认使用配置
+            keep_source: 转码成功后保留BMP
+            max_workers: 转码进程数，默认使用配置（0表示CPU核数）；0表示在调用进程中转码
+            progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+        
+        Returns:
+            (转码日志, 统计 {'files', 'failed', 'skipped', 'source_bytes', 'target_bytes', 'seconds'})
+        """
+        directory = os.path.abspath(directory)
+        filenames = [os.path.basename(path) for path in self.list_panoramic_files(directory)
+                     if path.lower().endswith('.bmp')]
+        log_path = self.get_transcode_log_path(directory)
+        try:
+            previous = TranscodeLog.load(log_path)
+        except Exception as e:
+            log_error(f"读取转码日志失败，将重新转码: {e}", "TRANSCODE")
+            previous = TranscodeLog(log_path)
+        if compress_level is None:
+            compress_level = self.image_config.transcode_compress_level
+        workers = max_workers if max_workers is not None else (self.image_config.transcode_workers or None)
+        return transcode_files(directory, filenames, fmt or self.image_config.transcode_format, compress_level,
+                               keep_source, workers, previous, progress_callback)
+    
+    def get_quarantined_paths(self, directory: str) -> Set[str]:
+        """目录隔离清单中仍处于隔离状态的文件（相对路径），没有清单时为空"""
+        directory = os.path.abspath(directory)
+        try:
+            return QuarantineManifest.load(self.get_quarantine_manifest_path(directory),
+                                           directory).current_quarantine()
+        except Exception as e:
+            log_error(f"读取隔离清单失败: {e}", "IMAGE_INTEGRITY")
+            return set()
+    
+    def _skip_quarantined(self, slice_files: SliceIndex, panoramic_directory: Optional[str]) -> SliceIndex:
+        """去掉隔离的切片文件，全景图被隔离时去掉该全景图的全部切片"""
+        quarantined_slices = self.get_quarantined_paths(slice_files.root)
+        quarantined_panoramas = quarantined_slices
+        if panoramic_directory and os.path.abspath(panoramic_directory) != os.path.abspath(slice_files.root):
+            quarantined_panoramas = self.get_quarantined_paths(panoramic_directory)
+        panoramic_ids = {os.path.splitext(path)[0] for path in quarantined_panoramas if os.sep not in path}
+        if not quarantined_slices and not panoramic_ids:
+            return slice_files
+        kept = slice_files.exclude(quarantined_slices, panoramic_ids)
+        if len(kept) != len(slice_files):
+            log_info(f"跳过隔离清单中的 {len(slice_files) - len(kept)} 个切片"
+                     f"（{len(quarantined_slices | quarantined_panoramas)} 个解码失败的文件）", "IMAGE_INTEGRITY")
+        return kept
+    
+    def get_image_metadata(self, image_path: str) -> ImageMetadata:
+        """
+        获取图像尺寸和模式，不解码像素
+        扫描时建立的元数据索引中mtime和文件字节数一致时直接返回，否则只读取文件头；
+        打包切片和虚拟切片没有对应的文件，尺寸分别取自打包索引和孔位区域（file_size 为像素字节数）
+        
+        Raises:
+            OSError: 文件不存在或无法读取
+        """
+        packed = self.get_packed_slice_source(image_path)
+        if packed is not None:
+            _, height, width = self.get_packed_slices(packed[0]).holes[packed[1]]
+            return ImageMetadata(width, height, 'RGB', width * height * 3, os.stat(packed[0]).st_mtime_ns)
+        source = self.get_virtual_slice_source(image_path)
+        if source is not None:
+            panoramic = self.get_image_metadata(source[0])
+            layout = self.hole_manager.layout_for_size(panoramic.width, panoramic.height)
+            x, y, hole_width, hole_height = layout.get_hole_coordinates(source[1])
+            width = max(min(x + hole_width, panoramic.width) - max(x, 0), 0)
+            height = max(min(y + hole_height, panoramic.height) - max(y, 0), 0)
+            return ImageMetadata(width, height, 'RGB', width * height * 3, panoramic.mtime_ns)
+        
+        path = os.path.abspath(image_path)
+        stat_result = os.stat(path)
+        for root, index in self._metadata_indexes.items():
+            if path.startswith(root + os.sep):
+                metadata = index.lookup(path[len(root) + 1:], stat_result.st_mtime_ns, stat_result.st_size)
+                if metadata is not None:
+                    self.metadata_stats['indexed'] += 1
+                    return metadata
+        self.metadata_stats['probed'] += 1
+        return probe_image_header(path, stat_result)
+    
+    def load_panoramic_metadata(self, image_path: str) -> Optional[ImageMetadata]:
+        """
+        获取全景图元数据并按其尺寸设置孔位布局，不解码像素
+        （界面只需要全景图尺寸，显示图像由 render_panoramic_overlay 按显示尺寸生成）
+        """
+        try:
+            metadata = self.get_image_metadata(image_path)
+            self.hole_manager.set_layout_params(metadata.width, metadata.height)
+            return metadata
+            
+        except Exception as e:
+            messagebox.showerror("错误", f"加载全景图失败: {str(e)}")
+            return None
+    
+    def load_panoramic_image(self, image_path: str) -> Optional[Image.Image]:
+        """
+        加载全景图像
+        """
+        try:
+            image = self._read_image('panoramic', image_path)
             
             # 根据图像尺寸设置孔位布局
             self.hole_manager.set_layout_params(image.width, image.height)
@@ -69,27 +761,358 @@ class PanoramicImageService:
         加载切片图像
         """
         try:
-            path = Path(image_path)
-            if not path.exists():
-                raise FileNotFoundError(f"切片图文件不存在: {image_path}")
-            
-            if path.suffix.lower() not in self.supported_formats:
-                raise ValueError(f"不支持的图像格式: {path.suffix}")
-            
-            # 加载图像
-            image = Image.open(image_path)
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # 缓存图像
-            self.slice_images[path.name] = image
-            
-            return image
+            return self._read_image('slice', image_path)
             
         except Exception as e:
             messagebox.showerror("错误", f"加载切片图失败: {str(e)}")
             return None
     
+    def get_enhanced_slice_image(self, image_path: str) -> Image.Image:
+        """
+        获取增强后的切片图像，结果按 (路径, mtime, 增强参数) 缓存
+        不弹出错误对话框，可在后台线程调用
+        """
+        plate_source = self.get_plate_slice_source(image_path)
+        if plate_source is not None:
+            return self._get_plate_normalized_slice(image_path, *plate_source)
+        
+        cache_key = self._slice_cache_key('enhanced_slice', image_path, self._enhance_params_key())
+        enhanced = self.image_cache.get(cache_key)
+        if enhanced is None:
+            if self.disk_cache is not None:
+                enhanced = self.disk_cache.get('enhanced_slice', image_path, self.ENHANCE_PARAMS)
+            if enhanced is None:
+                start = time.perf_counter()
+                image = self._read_image('slice', image_path)
+                decoded = time.perf_counter()
+                enhanced = self.enhance_slice_image(image)
+                self.enhancement_timings.record((decoded - start) * 1000,
+                                                (time.perf_counter() - decoded) * 1000)
+                if self.disk_cache is not None:
+                    self.disk_cache.put_async('enhanced_slice', image_path, enhanced, self.ENHANCE_PARAMS)
+            self.image_cache.put(cache_key, enhanced)
+        return enhanced
+    
+    def _illumination_cache_key(self, panoramic_path: str) -> Tuple:
+        return self._make_cache_key('illumination', Path(panoramic_path),
+                                    (self.get_plate_layout(panoramic_path).get_layout_key(),
+                                     self.plate_normalizer.params_key()))
+    
+    def get_illumination_model(self, panoramic_path: str) -> IlluminationModel:
+        """
+        获取全景图的光照模型，按 (全景图路径, mtime, 孔位布局, 归一化参数) 缓存，
+        每张全景图只估计一次
+        """
+        array = self.get_panoramic_array(panoramic_path)
+        cache_key = self._illumination_cache_key(panoramic_path)
+        model = self.image_cache.get(cache_key)
+        if model is None:
+            model = self.plate_normalizer.estimate(
+                array, self.hole_manager.layout_for_size(array.shape[1], array.shape[0]))
+            self.image_cache.put(cache_key, model, size=model.nbytes)
+        return model
+    
+    def _plate_slice_cache_key(self, image_path: str, panoramic_path: str) -> Tuple:
+        return self._slice_cache_key('enhanced_slice', image_path,
+                                     ('plate',) + self._illumination_cache_key(panoramic_path))
+    
+    def _get_plate_normalized_slice(self, image_path: str, panoramic_path: str, hole_number: int) -> Image.Image:
+        """
+        用整板光照模型归一化切片，按 (切片, 全景图mtime, 孔位布局, 归一化参数) 缓存；
+        归一化只是一次乘加运算，结果不写入磁盘缓存
+        """
+        model = self.get_illumination_model(panoramic_path)
+        cache_key = self._plate_slice_cache_key(image_path, panoramic_path)
+        enhanced = self.image_cache.get(cache_key)
+        if enhanced is None:
+            start = time.perf_counter()
+            crop = self.get_slice_array(image_path)
+            decoded = time.perf_counter()
+            enhanced = Image.fromarray(model.apply(crop, hole_number))
+            self.enhancement_timings.record((decoded - start) * 1000, (time.perf_counter() - decoded) * 1000)
+            self.image_cache.put(cache_key, enhanced)
+        return enhanced
+    
+    def enhance_panoramic_slices(self, slice_paths: List[str],
+                                 max_workers: Optional[int] = None) -> Dict[str, Image.Image]:
+        """
+        批量增强一张全景图的全部切片
+        已缓存（内存或磁盘）的切片直接返回，整板光照归一化的切片在当前进程中处理，
+        其余在进程池中做CLAHE增强，每个工作进程复用一个CLAHE实例，结果写入缓存
+        
+        Args:
+            slice_paths: 切片文件路径列表
+            max_workers: 工作进程数，默认使用 ImageConfig.enhance_workers
+            
+        Returns:
+            路径 -> 增强后图像，增强失败的切片不包含在结果中
+        """
+        params_key = self._enhance_params_key()
+        results: Dict[str, Image.Image] = {}
+        missing: List[str] = []
+        
+        for image_path in slice_paths:
+            if (self.get_plate_slice_source(image_path) is not None or
+                    self.get_packed_slice_source(image_path) is not None or
+                    self.get_virtual_slice_source(image_path) is not None):
+                # 整板归一化只是乘加运算，打包切片和虚拟切片只需读取数组视图，直接在当前进程中增强
+                results[image_path] = self.get_enhanced_slice_image(image_path)
+                continue
+            cache_key = self._make_cache_key('enhanced_slice', Path(image_path), params_key)
+            enhanced = self.image_cache.get(cache_key)
+            if enhanced is None and self.disk_cache is not None:
+                enhanced = self.disk_cache.get('enhanced_slice', image_path, self.ENHANCE_PARAMS)
+                if enhanced is not None:
+                    self.image_cache.put(cache_key, enhanced)
+            if enhanced is None:
+                missing.append(image_path)
+            else:
+                results[image_path] = enhanced
+        
+        if missing:
+            enhancer = self._get_batch_enhancer(max_workers)
+            for image_path, enhanced_array in enhancer.enhance_files(missing).items():
+                enhanced = Image.fromarray(enhanced_array)
+                cache_key = self._make_cache_key('enhanced_slice', Path(image_path), params_key)
+                self.image_cache.put(cache_key, enhanced)
+                if self.disk_cache is not None:
+                    self.disk_cache.put_async('enhanced_slice', image_path, enhanced, self.ENHANCE_PARAMS)
+                results[image_path] = enhanced
+            for image_path, error in enhancer.errors.items():
+                log_error(f"批量增强切片失败 {image_path}: {error}", "IMAGE_SERVICE")
+            enhancer.errors.clear()
+        
+        return {path: results[path] for path in slice_paths if path in results}
+    
+    def _get_batch_enhancer(self, max_workers: Optional[int] = None) -> BatchEnhancer:
+        """获取批量增强器，工作进程数、增强参数或解码后端变化时重建进程池"""
+        workers = max_workers or self.image_config.enhance_workers or None
+        enhancer = self._batch_enhancer
+        if enhancer is not None and (enhancer.params != self.ENHANCE_PARAMS or
+                                     enhancer.decoder.choices != self.image_decoder.choices or
+                                     (workers and enhancer.max_workers != workers)):
+            enhancer.shutdown()
+            enhancer = None
+        if enhancer is None:
+            enhancer = BatchEnhancer(self.ENHANCE_PARAMS, workers, timings=self.enhancement_timings,
+                                     decoder=self.image_decoder)
+            self._batch_enhancer = enhancer
+        return enhancer
+    
+    def is_cached(self, kind: str, image_path: str) -> bool:
+        """检查图像是否已在缓存中（不影响LRU顺序和命中统计）"""
+        try:
+            if kind == 'enhanced_slice':
+                plate_source = self.get_plate_slice_source(image_path)
+                if plate_source is not None:
+                    return self._plate_slice_cache_key(image_path, plate_source[0]) in self.image_cache
+            variant = self._enhance_params_key() if kind == 'enhanced_slice' else None
+            if kind in ('slice', 'enhanced_slice'):
+                return self._slice_cache_key(kind, image_path, variant) in self.image_cache
+            return self._make_cache_key(kind, Path(image_path), variant) in self.image_cache
+        except OSError:
+            return False
+    
+    def build_image_pyramid(self, image: Image.Image) -> List[Image.Image]:
+        """
+        构建显示金字塔，层级依次为原图、1/2、1/4、1/8
+        每层由上一层做2×2盒式缩小得到
+        """
+        levels = [image]
+        for previous_factor, factor in zip(self.PYRAMID_FACTORS, self.PYRAMID_FACTORS[1:]):
+            step = factor // previous_factor
+            previous = levels[-1]
+            if previous.width < step or previous.height < step:
+                break
+            levels.append(previous.reduce(step))
+        return levels
+    
+    def _get_reduced_levels(self, image_path: str,
+                            full: Optional[Image.Image] = None) -> List[Image.Image]:
+        """
+        获取金字塔的缩小层级（1/2、1/4、1/8）
+        依次查找内存缓存、磁盘缓存，都未命中时从原图构建并异步写入磁盘缓存
+        """
+        cache_key = self._make_cache_key('pyramid', Path(image_path))
+        reduced_levels = self.image_cache.get(cache_key)
+        if reduced_levels is not None:
+            return reduced_levels
+        
+        factors = self.PYRAMID_FACTORS[1:]
+        if self.disk_cache is not None:
+            loaded = [self.disk_cache.get('panoramic_preview', image_path, {'factor': factor})
+                      for factor in factors]
+            if all(level is not None for level in loaded):
+                reduced_levels = loaded
+        
+        if reduced_levels is None:
+            if full is None:
+                full = self._read_image('panoramic', image_path)
+            reduced_levels = self.build_image_pyramid(full)[1:]
+            if self.disk_cache is not None:
+                for factor, level in zip(factors, reduced_levels):
+                    self.disk_cache.put_async('panoramic_preview', image_path, level, {'factor': factor})
+        
+        self.image_cache.put(cache_key, reduced_levels)
+        return reduced_levels
+    
+    def get_decode_service(self) -> Optional[DecodeService]:
+        """获取解码进程池（首次调用时启动并预热工作进程），配置禁用时返回None"""
+        if self.image_config.decode_workers <= 0:
+            return None
+        if self._decode_service is None:
+            self._decode_service = DecodeService(self.image_config.decode_workers)
+            self._decode_service.warm_up()
+        return self._decode_service
+    
+    def decode_async(self, kind: str, image_path: str,
+                     display_size: Optional[Tuple[int, int]] = None) -> Optional[Future]:
+        """
+        在解码进程池中准备图像，完成后写入缓存，之后的同步调用直接命中缓存
+        
+        Args:
+            kind: 'panoramic' 准备显示金字塔的缩小层级（1/2、1/4、1/8）；'slice' 解码切片原图
+            image_path: 图像路径
+            display_size: 全景图的显示区域 (宽, 高)，同时在工作进程中生成 render_panoramic_overlay
+                使用的显示底图，默认为最近一次渲染的显示区域
+        
+        Returns:
+            完成时得到缓存内容的 Future；已缓存、无需解码或解码进程池禁用时返回None
+        """
+        decode_service = self.get_decode_service()
+        if decode_service is None:
+            return None
+        
+        if kind == 'panoramic':
+            # 缩小层级已缓存时，显示底图由缓存层级直接缩放，不再重新解码
+            if self.is_cached('pyramid', image_path):
+                return None
+            factors = self.PYRAMID_FACTORS[1:]
+            display_size = display_size or self._display_size
+            if display_size is None and self.disk_cache is not None and all(
+                    self.disk_cache.contains('panoramic_preview', image_path, {'factor': factor})
+                    for factor in factors):
+                return None
+        elif kind == 'slice':
+            if (self.get_packed_slice_source(image_path) is not None or
+                    self.get_virtual_slice_source(image_path) is not None or self.is_cached('slice', image_path)):
+                return None
+            factors = (1,)
+        else:
+            raise ValueError(f"不支持的解码类别: {kind}")
+        
+        result: Future = Future()
+        
+        def store(future: Future) -> None:
+            # 在解码进程池的结果线程中执行：复制出共享内存并写入缓存
+            try:
+                with future.result() as decoded:
+                    levels = decoded.to_images()
+                    display = Image.fromarray(decoded.display) if decoded.display is not None else None
+                if display is not None:
+                    cache_key = self._make_cache_key('panoramic_display', Path(image_path), tuple(display_size))
+                    self.image_cache.put(cache_key, display)
+                if kind == 'panoramic':
+                    cache_key = self._make_cache_key('pyramid', Path(image_path))
+                    self.image_cache.put(cache_key, levels)
+                    if self.disk_cache is not None:
+                        for factor, level in zip(factors, levels):
+                            self.disk_cache.put_async('panoramic_preview', image_path, level, {'factor': factor})
+                    value = levels
+                else:
+                    value = levels[0]
+                    self.image_cache.put(self._make_cache_key('slice', Path(image_path)), value)
+            except BaseException as e:
+                log_error(f"后台解码失败 {image_path}: {e}", "IMAGE_SERVICE")
+                result.set_exception(e)
+                return
+            result.set_result(value)
+        
+        decode_service.submit(image_path, factors, display_size if kind == 'panoramic' else None,
+                              decoder=self.image_decoder).add_done_callback(store)
+        return result
+    
+    def get_panoramic_pyramid(self, image_path: str) -> List[Image.Image]:
+        """
+        获取全景图的显示金字塔，按 (路径, mtime) 缓存
+        不弹出错误对话框，可在后台线程调用
+        """
+        full = self._read_image('panoramic', image_path)
+        # 原图层已作为 'panoramic' 条目缓存，'pyramid' 条目只缓存缩小层
+        return [full] + list(self._get_reduced_levels(image_path, full))
+    
+    def get_panoramic_preview(self, image_path: str, max_width: int, max_height: int,
+                              fill_mode: str = 'fit') -> Tuple[Image.Image, float]:
+        """
+        获取用于显示的全景图层级
+        缩小层级命中缓存且显示不需要原图分辨率时，不解码原图
+        
+        Returns:
+            (层级图像, 相对原图的缩放比例)
+        """
+        full_size = self.get_image_metadata(image_path).size
+        target_width, target_height = self.compute_display_size(
+            full_size[0], full_size[1], max_width, max_height, fill_mode)
+        
+        reduced_levels = self._get_reduced_levels(image_path)
+        if reduced_levels and reduced_levels[0].width >= target_width and reduced_levels[0].height >= target_height:
+            level, _ = self.select_pyramid_level(list(reduced_levels), target_width, target_height)
+            return level, level.width / full_size[0]
+        
+        return self._read_image('panoramic', image_path), 1.0
+    
+    @staticmethod
+    def select_pyramid_level(pyramid: List[Image.Image], target_width: int,
+                             target_height: int) -> Tuple[Image.Image, float]:
+        """
+        选择不小于目标尺寸的最小金字塔层级
+        
+        Returns:
+            (层级图像, 相对原图的缩放比例)
+        """
+        full = pyramid[0]
+        selected = full
+        for level in pyramid[1:]:
+            if level.width >= target_width and level.height >= target_height:
+                selected = level
+            else:
+                break
+        return selected, selected.width / full.width
+    
+    @staticmethod
+    def compute_display_size(width: int, height: int, max_width: int, max_height: int,
+                             fill_mode: str = 'fit') -> Tuple[int, int]:
+        """计算图像在给定填充模式下缩放后的尺寸（'fill'模式为裁剪前尺寸）"""
+        if fill_mode == 'fit':
+            scale_ratio = min(max_width / width, max_height / height)
+            if scale_ratio >= 1.0:
+                return width, height
+            return int(width * scale_ratio), int(height * scale_ratio)
+        elif fill_mode == 'fill':
+            scale_ratio = max(max_width / width, max_height / height)
+            return int(width * scale_ratio), int(height * scale_ratio)
+        elif fill_mode == 'stretch':
+            return max_width, max_height
+        else:
+            raise ValueError(f"不支持的填充模式: {fill_mode}")
+    
+    @staticmethod
+    def compute_slice_display_size(width: int, height: int, canvas_width: int,
+                                   canvas_height: int) -> Tuple[int, int]:
+        """切片显示尺寸：按画布（留20px边距）等比放大，最多放大2.5倍避免过度模糊，不缩小"""
+        scale_factor = min((canvas_width - 20) / width, (canvas_height - 20) / height, 2.5)
+        if scale_factor <= 1.0:
+            return width, height
+        return int(width * scale_factor), int(height * scale_factor)
+    
+    def select_display_level(self, pyramid: List[Image.Image], max_width: int, max_height: int,
+                             fill_mode: str = 'fit') -> Tuple[Image.Image, float]:
+        """根据显示区域选择用于重采样的金字塔层级"""
+        full = pyramid[0]
+        target_width, target_height = self.compute_display_size(
+            full.width, full.height, max_width, max_height, fill_mode)
+        return self.select_pyramid_level(pyramid, target_width, target_height)
+    
     def find_panoramic_image(self, slice_filename: str, panoramic_dir: str) -> Optional[str]:
         """
         根据切片文件名查找对应的全景图
@@ -131,50 +1154,38 @@ class PanoramicImageService:
     
     def create_panoramic_overlay(self, panoramic_image: Image.Image, 
                                 current_hole: int, 
-                                annotated_holes: Dict[int, str] = None) -> Image.Image:
+                                annotated_holes: Dict[int, str] = None,
+                                scale: float = 1.0) -> Image.Image:
         """
         在全景图上创建孔位覆盖层
         显示当前孔位和已标注孔位
+        
+        Args:
+            scale: 传入图像相对原始全景图的缩放比例（金字塔层级），
+                   孔位坐标、线宽和字号按此比例缩放
         """
         # 创建副本
         overlay_image = panoramic_image.copy()
         draw = ImageDraw.Draw(overlay_image)
         
-        # 尝试加载字体
-        try:
-            font = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font = ImageFont.load_default(18)
-        
-        # 颜色定义
-        colors = {
-            'current': '#FF0000',      # 红色 - 当前孔位
-            'negative': '#00FF00',     # 绿色 - 阴性
-            'positive': '#FF8000',     # 橙色 - 阳性
-            'unannotated': '#CCCCCC'   # 灰色 - 未标注
-        }
+        # 字体按字号缓存
+        font = load_overlay_font(max(8, round(18 * scale)))
         
         # 绘制所有孔位
         for hole_number in range(1, 121):
             x, y, width, height = self.hole_manager.get_hole_coordinates(hole_number)
+            if scale != 1.0:
+                x, y = round(x * scale), round(y * scale)
+                width, height = round(width * scale), round(height * scale)
             
             # 确定颜色
-            if hole_number == current_hole:
-                color = colors['current']
-                outline_width = 3
-            elif annotated_holes and hole_number in annotated_holes:
-                growth_level = annotated_holes[hole_number]
-                color = colors.get(growth_level, colors['unannotated'])
-                outline_width = 2
-            else:
-                color = colors['unannotated']
-                outline_width = 1
+            color, outline_width = get_hole_style(hole_number, current_hole, annotated_holes)
             
             # 绘制孔位边框
             draw.rectangle(
                 [x, y, x + width, y + height],
                 outline=color,
-                width=outline_width
+                width=max(1, round(outline_width * scale))
             )
             
             # 绘制孔位编号
@@ -197,8 +1208,48 @@ class PanoramicImageService:
         
         return overlay_image
     
+    def render_panoramic_overlay(self, image_path: str, current_hole: int,
+                                 annotated_holes: Dict[int, str] = None,
+                                 max_width: int = 1220, max_height: int = 750,
+                                 fast: bool = False) -> Image.Image:
+        """
+        渲染显示尺寸的带覆盖层全景图
+        底图层（缩小后的全景图 + 孔位编号）按 (路径, mtime, 显示尺寸) 缓存，
+        切换孔位或标注时只重绘状态变化的孔位
+        
+        Args:
+            fast: 快速预览：底图未缓存时用NEAREST重采样并省略孔位编号构建草稿底图
+                （解码进程池已生成高质量显示底图时仍直接使用），
+                之后以 fast=False 渲染时重建为完整底图，见 overlay_renderer.base_is_draft
+        
+        Returns:
+            显示分辨率的覆盖层图像
+        """
+        path = Path(image_path)
+        base_key = (str(path), path.stat().st_mtime_ns, max_width, max_height)
+        self._display_size = (max_width, max_height)
+        display_key = self._make_cache_key('panoramic_display', path, (max_width, max_height))
+        draft = fast and display_key not in self.image_cache
+        
+        def build_display() -> Tuple[Image.Image, float]:
+            # 解码进程池已生成显示底图时直接使用
+            display_image = None if draft else self.image_cache.get(display_key)
+            if display_image is not None:
+                return display_image, display_image.width / self.get_image_metadata(image_path).width
+            level_image, level_scale = self.get_panoramic_preview(image_path, max_width, max_height,
+                                                                  fill_mode='fit')
+            resample = Image.Resampling.NEAREST if draft else Image.Resampling.LANCZOS
+            display_image = self.resize_image_for_display(level_image, max_width, max_height,
+                                                          fill_mode='fit', resample=resample)
+            return display_image, level_scale * display_image.width / level_image.width
+        
+        return self.overlay_renderer.render(base_key, build_display, current_hole, annotated_holes,
+                                            draft=draft)
+    
     def resize_image_for_display(self, image: Image.Image, max_width: int, max_height: int, 
-                               fill_mode: str = 'fit') -> Image.Image:
+                               fill_mode: str = 'fit',
+                               pyramid: Optional[List[Image.Image]] = None,
+                               resample: Image.Resampling = Image.Resampling.LANCZOS) -> Image.Image:
         """
         调整图像尺寸以适应显示区域
         
@@ -210,35 +1261,22 @@ class PanoramicImageService:
                 - 'fit': 保持宽高比，完整显示图像（可能有黑边）
                 - 'fill': 填满显示区域，可能裁剪图像
                 - 'stretch': 拉伸填满，不保持宽高比
+            pyramid: 可选的显示金字塔，提供时从不小于目标尺寸的最近层级重采样
+            resample: 重采样滤波器，默认LANCZOS；快速预览可使用NEAREST或BILINEAR
         """
-        original_width, original_height = image.size
+        if pyramid:
+            image, _ = self.select_display_level(pyramid, max_width, max_height, fill_mode)
         
-        if fill_mode == 'fit':
-            # 保持宽高比，完整显示（默认模式）
-            width_ratio = max_width / original_width
-            height_ratio = max_height / original_height
-            scale_ratio = min(width_ratio, height_ratio)
-            
-            # 如果图像已经足够小，不需要缩放
-            if scale_ratio >= 1.0:
-                return image
-            
-            # 计算新尺寸
-            new_width = int(original_width * scale_ratio)
-            new_height = int(original_height * scale_ratio)
-            
-        elif fill_mode == 'fill':
-            # 填满显示区域，保持宽高比，可能裁剪
-            width_ratio = max_width / original_width
-            height_ratio = max_height / original_height
-            scale_ratio = max(width_ratio, height_ratio)
-            
-            new_width = int(original_width * scale_ratio)
-            new_height = int(original_height * scale_ratio)
-            
-            # 缩放图像
-            resized = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
+        new_width, new_height = self.compute_display_size(
+            image.width, image.height, max_width, max_height, fill_mode)
+        
+        # 'fit'模式下图像已经足够小，不需要缩放
+        if (new_width, new_height) == image.size:
+            return image
+        
+        resized = image.resize((new_width, new_height), resample)
+        
+        if fill_mode == 'fill':
             # 居中裁剪
             left = (new_width - max_width) // 2
             top = (new_height - max_height) // 2
@@ -246,45 +1284,28 @@ class PanoramicImageService:
             bottom = top + max_height
             
             return resized.crop((left, top, right, bottom))
-            
-        elif fill_mode == 'stretch':
-            # 拉伸填满，不保持宽高比
-            new_width = max_width
-            new_height = max_height
-            
-        else:
-            raise ValueError(f"不支持的填充模式: {fill_mode}")
         
-        # 使用高质量重采样
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        return resized
     
     def enhance_slice_image(self, image: Image.Image) -> Image.Image:
         """
         增强切片图像显示效果
         应用对比度增强和噪声抑制
         """
-        # 转换为numpy数组
-        img_array = np.array(image)
+        params = self.ENHANCE_PARAMS
         
-        # 应用CLAHE（限制对比度自适应直方图均衡）
-        if len(img_array.shape) == 3:
-            # 彩色图像，转换为LAB色彩空间
-            lab = cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB)
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            lab[:, :, 0] = clahe.apply(lab[:, :, 0])
-            enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
-        else:
-            # 灰度图像
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            enhanced = clahe.apply(img_array)
+        # 转换为numpy数组（只读即可，增强不修改输入）
+        img_array = np.asarray(image)
         
-        # 轻微高斯滤波去噪
-        enhanced = cv2.GaussianBlur(enhanced, (3, 3), 0.5)
+        # 应用CLAHE（限制对比度自适应直方图均衡）和轻微高斯滤波去噪
+        # CLAHE实例和中间缓冲区按线程复用，避免每次调用都重新创建和分配
+        enhanced = enhance_array(img_array, get_thread_clahe(params), params, get_thread_buffer_pool())
         
-        return Image.fromarray(enhanced)
+        # 结果位于复用的缓冲区中，转换为PIL图像时复制一份（RGB图像总是复制，灰度图像需显式复制）
+        return Image.fromarray(enhanced if enhanced.ndim == 3 else enhanced.copy())
     
     def get_slice_files_from_directory(self, directory: str, panoramic_directory: str = None,
-                                     progress_callback=None) -> List[Dict[str, Any]]:
+                                     progress_callback=None) -> SliceIndex:
         """
         从目录中获取所有切片文件信息
         支持两种目录结构：
@@ -295,229 +1316,251 @@ class PanoramicImageService:
             directory: 切片文件目录
             panoramic_directory: 全景图目录
             progress_callback: 进度回调函数 (current, total, message)
+
+        Returns:
+            按 (全景ID, 孔位编号) 排序的切片索引，按下标访问或迭代得到切片字典
         """
-        slice_files = []
         directory_path = Path(directory)
 
         if not directory_path.exists():
-            return slice_files
+            return SliceIndex()
 
-        # 检测目录结构类型
         if progress_callback:
-            progress_callback(0, 100, "检测目录结构...")
-        structure_type = self._detect_directory_structure(directory_path, panoramic_directory)
+            progress_callback(0, 100, "扫描目录...")
 
-        if structure_type == "independent":
-            # 独立路径模式
-            slice_files = self._get_slice_files_independent(directory_path, progress_callback)
-        elif structure_type == "subdirectory":
-            # 子目录模式
-            slice_files = self._get_slice_files_subdirectory(directory_path, panoramic_directory, progress_callback)
-        else:
-            # 尝试两种模式
+        # 重新扫描时按磁盘现状重新解析切片来源（包括上次未找到全景图或打包文件的子目录）
+        self._virtual_sources.clear()
+        self._packed_dirs.clear()
+
+        def scan_progress(done, total, message):
             if progress_callback:
-                progress_callback(10, 100, "尝试独立路径模式...")
-            slice_files = self._get_slice_files_independent(directory_path, progress_callback)
-            if not slice_files and panoramic_directory:
+                progress = int((done / total) * 70) + 10 if total else 80  # 10-80%用于目录扫描
+                progress_callback(progress, 100, message)
+
+        # 单次遍历同时收集两种结构的切片
+        independent_files = SliceIndexBuilder(directory)
+        subdirectory_files = SliceIndexBuilder(directory)
+        for slice_info in self.iter_slice_records(str(directory_path), scan_progress):
+            if slice_info['structure_type'] == 'independent':
+                independent_files.add_record(slice_info)
+            else:
+                subdirectory_files.add_record(slice_info)
+
+        # 选择目录结构：独立路径文件不少于3个时使用独立路径模式，否则优先子目录模式
+        if len(independent_files) >= 3:
+            builder = independent_files
+        else:
+            if not panoramic_directory:
+                subdirectory_files = SliceIndexBuilder(directory)
+            elif Path(panoramic_directory).resolve() != directory_path.resolve():
                 if progress_callback:
                     progress_callback(50, 100, "尝试子目录模式...")
-                slice_files = self._get_slice_files_subdirectory(Path(panoramic_directory), panoramic_directory, progress_callback)
+                subdirectory_files = SliceIndexBuilder(panoramic_directory)
+                for slice_info in self.iter_slice_records(panoramic_directory):
+                    if slice_info['structure_type'] in ('subdirectory', 'packed'):
+                        subdirectory_files.add_record(slice_info)
+                self._add_virtual_slice_records(panoramic_directory, subdirectory_files)
+            else:
+                self._add_virtual_slice_records(str(directory_path), subdirectory_files)
+            if len(subdirectory_files) >= 3:
+                builder = subdirectory_files
+            else:
+                builder = independent_files if len(independent_files) else subdirectory_files
+        slice_files = builder.build()
+
+        if progress_callback:
+            progress_callback(80, 100, f"找到 {len(slice_files)} 个切片文件")
 
         # 按全景图ID和孔位编号排序
         if progress_callback:
             progress_callback(90, 100, "排序文件列表...")
-        slice_files.sort(key=lambda x: (x['panoramic_id'], x['hole_number']))
+        slice_files.sort()
+        
+        if self.image_config.skip_quarantined:
+            slice_files = self._skip_quarantined(slice_files, panoramic_directory)
+
+        if self.image_config.image_metadata_on_scan:
+            if progress_callback:
+                progress_callback(95, 100, "读取图像文件头...")
+            self._index_scanned_metadata(slice_files, panoramic_directory)
 
         if progress_callback:
             progress_callback(100, 100, "加载完成")
 
         return slice_files
     
-    def _detect_directory_structure(self, slice_dir: Path, panoramic_dir: str = None) -> str:
+    def _add_virtual_slice_records(self, panoramic_directory: str, builder: SliceIndexBuilder,
+                                   panoramic_ids: Optional[Set[str]] = None) -> None:
         """
-        检测目录结构类型
-        返回: "independent", "subdirectory", "unknown"
+        为没有切片PNG的全景图追加虚拟切片记录（需先扫描过该目录）
+        filepath 为名义上的 <全景ID>/hole_<N>.png 路径，读取时从全景图裁剪；之后放入的PNG文件会覆盖裁剪结果
+        
+        Args:
+            panoramic_ids: 只处理这些全景图，None表示目录下全部全景图
         """
-        # 检查独立路径模式
-        independent_files = 0
-        for file_path in slice_dir.rglob('*'):
-            if (file_path.is_file() and 
-                file_path.suffix.lower() in self.supported_formats and
-                self._is_slice_filename(file_path.name)):
-                independent_files += 1
-                if independent_files >= 3:  # 找到足够的文件确认模式
-                    return "independent"
+        if not self.image_config.virtual_slices:
+            return
         
-        # 检查子目录模式
-        if panoramic_dir:
-            panoramic_path = Path(panoramic_dir)
-            if panoramic_path.exists():
-                subdirectory_files = 0
-                for subdir in panoramic_path.iterdir():
-                    if subdir.is_dir():
-                        for file_path in subdir.rglob('hole_*.png'):
-                            if file_path.is_file():
-                                subdirectory_files += 1
-                                if subdirectory_files >= 3:
-                                    return "subdirectory"
+        panoramic_directory = os.path.normpath(panoramic_directory)
+        for filename in self.get_slice_scanner(panoramic_directory).get_listing(''):
+            panoramic_id, ext = os.path.splitext(filename)
+            if (builder.has_panoramic(panoramic_id) or self._is_slice_filename(filename)
+                    or ext.lower() not in self.supported_formats
+                    or (panoramic_ids is not None and panoramic_id not in panoramic_ids)):
+                continue
+            panoramic_path = os.path.join(panoramic_directory, filename)
+            for hole_number in range(1, self.hole_manager.total_holes + 1):
+                slice_filename = f"hole_{hole_number}.png"
+                slice_path = os.path.join(panoramic_directory, panoramic_id, slice_filename)
+                self._virtual_sources[slice_path] = (panoramic_path, hole_number)
+                builder.add(panoramic_id, hole_number, os.path.join(panoramic_id, slice_filename), 'virtual')
+    
+    def ingest_panoramas(self, slice_files: SliceIndex, panoramic_directory: str,
+                         panoramic_ids: Iterable[str]) -> SliceIndex:
+        """
+        增量纳入新增或变化的全景图（子目录结构），不重新扫描整个目录
+        只重新读取这些全景图的子目录，替换索引中它们原有的行（已删除的全景图行被去掉），
+        其余全景图的行保持不变；隔离清单和元数据索引按全量扫描的规则处理新行
         
-        return "unknown"
+        Args:
+            slice_files: 当前切片索引（根目录为 panoramic_directory）
+            panoramic_directory: 全景图目录
+            panoramic_ids: 新增、变化或删除的全景图ID
+        
+        Returns:
+            按 (全景ID, 孔位编号) 排序的新切片索引
+        """
+        panoramic_directory = os.path.normpath(panoramic_directory)
+        panoramic_ids = set(panoramic_ids)
+        self._forget_slice_sources(panoramic_directory, panoramic_ids)
+        builder = SliceIndexBuilder(panoramic_directory)
+        for slice_info in self.iter_slice_records(panoramic_directory, subdirs=panoramic_ids):
+            if (slice_info['structure_type'] in ('subdirectory', 'packed')
+                    and slice_info['panoramic_id'] in panoramic_ids):
+                builder.add_record(slice_info)
+        self._add_virtual_slice_records(panoramic_directory, builder, panoramic_ids)
+        added = builder.build()
+        
+        if self.image_config.skip_quarantined:
+            added = self._skip_quarantined(added, panoramic_directory)
+        merged = slice_files.merged(added, panoramic_ids)
+        if self.image_config.image_metadata_on_scan:
+            # 只读取变化的全景图和新切片的文件头，不重新stat整个目录（在界面线程中调用）
+            self._index_ingested_metadata(added, panoramic_directory, panoramic_ids)
+        log_info(f"增量纳入 {len(panoramic_ids)} 张全景图: {len(added)} 个切片，共 {len(merged)} 个切片",
+                 "IMAGE_SERVICE")
+        return merged
     
-    def _get_slice_files_independent(self, directory_path: Path, progress_callback=None) -> List[Dict[str, Any]]:
+    def _forget_slice_sources(self, panoramic_directory: str, panoramic_ids: Set[str]) -> None:
         """
-        获取独立路径模式的切片文件
+        丢弃这些全景图记录的切片来源（虚拟切片的全景图、子目录是否已打包），包括未找到来源的记录，
+        之后写入或删除的全景图和打包文件在下次解析时按磁盘现状处理
         """
-        slice_files = []
-
-        # 首先收集所有文件路径
-        all_files = list(directory_path.rglob('*'))
-        total_files = len(all_files)
-
-        if progress_callback:
-            progress_callback(0, 100, f"扫描目录文件... (共{total_files}个文件)")
-
-        processed_count = 0
-
-        # 遍历目录中的所有文件
-        for file_path in all_files:
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                filename = file_path.name
-
-                # 检查是否是切片文件格式
-                if self._is_slice_filename(filename):
-                    try:
-                        # 解析文件名信息
-                        panoramic_id, hole_number = self._parse_slice_filename(filename)
-
-                        slice_info = {
-                            'filename': filename,
-                            'filepath': str(file_path),
-                            'panoramic_id': panoramic_id,
-                            'hole_number': hole_number,
-                            'relative_path': str(file_path.relative_to(directory_path)),
-                            'structure_type': 'independent'
-                        }
-                        slice_files.append(slice_info)
-
-                    except Exception as e:
-                        log_error(f"解析切片文件名失败 {filename}: {e}", "IMAGE_SERVICE")
-
-            processed_count += 1
-
-            # 更新进度
-            if progress_callback and total_files > 0:
-                progress = int((processed_count / total_files) * 80)  # 80%用于文件扫描
-                progress_callback(progress, 100, f"扫描文件 {processed_count}/{total_files}...")
-
-        if progress_callback:
-            progress_callback(80, 100, f"找到 {len(slice_files)} 个切片文件")
-
-        return slice_files
+        def affected(slice_dir: str) -> bool:
+            parent, panoramic_id = os.path.split(slice_dir)
+            return parent == panoramic_directory and panoramic_id in panoramic_ids
+        
+        for slice_path in [path for path in list(self._virtual_sources) if affected(os.path.dirname(path))]:
+            self._virtual_sources.pop(slice_path, None)
+        for slice_dir in [path for path in list(self._packed_dirs) if affected(path)]:
+            self._packed_dirs.pop(slice_dir, None)
     
-    def _get_slice_files_subdirectory(self, panoramic_path: Path, panoramic_directory: str,
-                                    progress_callback=None) -> List[Dict[str, Any]]:
+    def get_slice_scanner(self, directory: str) -> SliceScanner:
         """
-        获取子目录模式的切片文件
-        支持两种子目录结构：
-        1. 传统子目录：切片文件在 <全景目录>/<全景ID>/hole_<孔序号>.png
-        2. 全景文件名子目录：切片文件在 <全景目录>/<全景文件名>/hole_<孔序号>.png
+        获取目录扫描器
+        启用磁盘缓存时目录mtime状态保存在缓存目录下，重新扫描只读取变化的目录
         """
-        slice_files = []
-
-        # 获取所有子目录
-        subdirs = list(panoramic_path.iterdir())
-        total_subdirs = len([d for d in subdirs if d.is_dir()])
-
-        if progress_callback:
-            progress_callback(0, 100, f"扫描子目录... (共{total_subdirs}个目录)")
-
-        processed_dirs = 0
-
-        # 遍历全景图目录中的子目录
-        for subdir in subdirs:
-            if subdir.is_dir():
-                panoramic_id = subdir.name
-
-                # 在子目录中查找hole_*.png文件
-                hole_files_found = False
-                hole_files = list(subdir.rglob('hole_*.png'))
-
-                for file_path in hole_files:
-                    if file_path.is_file():
-                        filename = file_path.name
-                        hole_files_found = True
-
-                        # 解析孔位编号
-                        try:
-                            hole_number = self._parse_hole_number_from_filename(filename)
-
-                            slice_info = {
-                                'filename': filename,
-                                'filepath': str(file_path),
-                                'panoramic_id': panoramic_id,
-                                'hole_number': hole_number,
-                                'relative_path': str(file_path.relative_to(panoramic_path)),
-                                'structure_type': 'subdirectory'
-                            }
-                            slice_files.append(slice_info)
-
-                        except Exception as e:
-                            log_error(f"解析子目录切片文件失败 {filename}: {e}", "IMAGE_SERVICE")
-
-                # 如果子目录中没有找到hole_*.png文件，尝试查找全景图文件
-                if not hole_files_found:
-                    # 尝试在全景目录中查找对应的全景图文件
-                    panoramic_file = None
-                    for ext in ['.bmp', '.png', '.jpg', '.jpeg', '.tiff', '.tif']:
-                        potential_file = panoramic_path / f"{panoramic_id}{ext}"
-                        if potential_file.exists():
-                            panoramic_file = potential_file
-                            break
-
-                    # 如果找到全景图文件，则假设切片在全景文件名对应的子目录中
-                    if panoramic_file:
-                        # 检查是否存在以全景ID命名的子目录
-                        panoramic_subdir = panoramic_path / panoramic_id
-                        if panoramic_subdir.exists() and panoramic_subdir.is_dir():
-                            hole_files = list(panoramic_subdir.rglob('hole_*.png'))
-                            for file_path in hole_files:
-                                if file_path.is_file():
-                                    filename = file_path.name
-
-                                    # 解析孔位编号
-                                    try:
-                                        hole_number = self._parse_hole_number_from_filename(filename)
-
-                                        slice_info = {
-                                            'filename': filename,
-                                            'filepath': str(file_path),
-                                            'panoramic_id': panoramic_id,
-                                            'hole_number': hole_number,
-                                            'relative_path': str(file_path.relative_to(panoramic_path)),
-                                            'structure_type': 'subdirectory'
-                                        }
-                                        slice_files.append(slice_info)
-
-                                    except Exception as e:
-                                        log_error(f"解析全景文件名子目录切片文件失败 {filename}: {e}", "IMAGE_SERVICE")
-
-                processed_dirs += 1
-
-                # 更新进度
-                if progress_callback and total_subdirs > 0:
-                    progress = int((processed_dirs / total_subdirs) * 70) + 10  # 10-80%用于目录扫描
-                    progress_callback(progress, 100, f"扫描目录 {processed_dirs}/{total_subdirs}...")
+        state_path = None
+        if self.image_config.disk_cache_enabled:
+            state_path = str(Path(directory) / self.image_config.disk_cache_dir / "scan_index.json")
+        scanner = self._slice_scanners.get(state_path or directory)
+        if scanner is None:
+            # 同时收集切片打包文件
+            formats = self.supported_formats | {os.path.splitext(PACKED_SLICES_FILENAME)[1]}
+            scanner = SliceScanner(formats, self.image_config.scan_workers, state_path)
+            self._slice_scanners[state_path or directory] = scanner
+        return scanner
+    
+    def iter_slice_records(self, directory: str, progress_callback=None,
+                           subdirs: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        流式产出目录下的切片文件信息（未排序）
+        同时识别两种结构：
+        1. 独立路径：任意层级下的 <全景ID>_hole_<孔序号>.<扩展名>，structure_type 为 'independent'
+        2. 子目录结构：<全景ID>/.../hole_<孔序号>.png，structure_type 为 'subdirectory'
+        3. 打包切片：<全景ID>/slices.npy 中PNG文件不存在的孔位，structure_type 为 'packed'，
+           filepath 为名义上的 hole_<孔序号>.png 路径
+        
+        Args:
+            directory: 扫描根目录
+            progress_callback: 进度回调函数 (已完成子目录数, 子目录总数, 消息)
+            subdirs: 只重新扫描根目录下的这些子目录（其余目录保持上次扫描状态），None表示扫描整个目录树
+        """
+        directory = os.path.normpath(directory)
+        scanner = self.get_slice_scanner(directory)
+        if subdirs is None:
+            listings = scanner.iter_listings(directory, progress_callback)
+        else:
+            listings = scanner.rescan_subdirs(directory, subdirs)
+        for rel_dir, filenames in listings:
+            dir_path = os.path.join(directory, rel_dir) if rel_dir else directory
+            panoramic_id = rel_dir.split(os.sep, 1)[0] if rel_dir else None
+            pack_path = None
+            listed_holes = set()
+            for filename in filenames:
+                if filename == PACKED_SLICES_FILENAME:
+                    pack_path = os.path.join(dir_path, filename)
+                    continue
+                try:
+                    if self._is_slice_filename(filename):
+                        slice_panoramic_id, hole_number = self._parse_slice_filename(filename)
+                        structure_type = 'independent'
+                    elif panoramic_id and filename.startswith('hole_') and filename.endswith('.png'):
+                        slice_panoramic_id = panoramic_id
+                        hole_number = self._parse_hole_number_from_filename(filename)
+                        structure_type = 'subdirectory'
+                    else:
+                        continue
+                except Exception as e:
+                    log_error(f"解析切片文件名失败 {filename}: {e}", "IMAGE_SERVICE")
+                    continue
 
-        if progress_callback:
-            progress_callback(80, 100, f"找到 {len(slice_files)} 个切片文件")
+                if structure_type == 'subdirectory':
+                    listed_holes.add(hole_number)
+                yield {
+                    'filename': filename,
+                    'filepath': os.path.join(dir_path, filename),
+                    'panoramic_id': slice_panoramic_id,
+                    'hole_number': hole_number,
+                    'relative_path': os.path.join(rel_dir, filename) if rel_dir else filename,
+                    'structure_type': structure_type
+                }
 
-        return slice_files
+            if not panoramic_id:
+                continue
+            # 记录子目录是否已打包，读取切片时不再逐个检查
+            self._packed_dirs[dir_path] = pack_path
+            packed = self.get_packed_slices(pack_path) if pack_path and self.image_config.packed_slices else None
+            if packed is None:
+                continue
+            for hole_number in packed.hole_numbers:
+                if hole_number in listed_holes:
+                    continue
+                filename = f"hole_{hole_number}.png"
+                yield {
+                    'filename': filename,
+                    'filepath': os.path.join(dir_path, filename),
+                    'panoramic_id': panoramic_id,
+                    'hole_number': hole_number,
+                    'relative_path': os.path.join(rel_dir, filename),
+                    'structure_type': 'packed'
+                }
     
     def _parse_hole_number_from_filename(self, filename: str) -> int:
         """
         从hole_*.png格式的文件名中解析孔位编号
         """
-        stem = Path(filename).stem
+        stem = os.path.splitext(os.path.basename(filename))[0]
         if stem.startswith('hole_'):
             hole_str = stem[5:]  # 去掉'hole_'前缀
             if hole_str.isdigit():
@@ -532,7 +1575,7 @@ class PanoramicImageService:
         检查文件名是否符合切片文件格式
         格式: EB10000026_hole_108.png
         """
-        stem = Path(filename).stem
+        stem = os.path.splitext(os.path.basename(filename))[0]
         parts = stem.split('_')
         
         return (len(parts) == 3 and 
@@ -545,7 +1588,7 @@ class PanoramicImageService:
         解析切片文件名
         返回 (panoramic_id, hole_number)
         """
-        stem = Path(filename).stem
+        stem = os.path.splitext(os.path.basename(filename))[0]
         parts = stem.split('_')
         
         if len(parts) != 3 or parts[1] != 'hole':
@@ -559,72 +1602,159 @@ class PanoramicImageService:
         
         return panoramic_id, hole_number
     
+    def get_thumbnail_atlas(self, slice_files: List[Dict[str, Any]],
+                            grid_size: Tuple[int, int] = (10, 12),
+                            thumbnail_size: Tuple[int, int] = (50, 50),
+                            max_workers: Optional[int] = None) -> ThumbnailAtlas:
+        """
+        获取一张全景图全部孔位的缩略图图集
+        切片在进程池中并行缩小，图集按 (各切片路径和mtime, 尺寸参数) 缓存在内存和磁盘中，
+        孔位 -> 图块矩形的索引由孔位布局确定
+        
+        Args:
+            slice_files: 同一张全景图的切片文件信息
+            grid_size: 网格行列数
+            thumbnail_size: 缩略图尺寸
+            max_workers: 工作进程数，默认使用 ImageConfig.atlas_workers
+        """
+        rows, cols = grid_size
+        thumb_width, thumb_height = thumbnail_size
+        tiles = {}
+        for hole_number in range(1, min(rows * cols, self.hole_manager.total_holes) + 1):
+            row, col = self.hole_manager.number_to_position(hole_number)
+            tiles[hole_number] = (col * thumb_width, row * thumb_height, thumb_width, thumb_height)
+        atlas_size = (cols * thumb_width, rows * thumb_height)
+        
+        # 切片来源：文件、打包切片或虚拟切片（后两者为数组视图）
+        file_sources: Dict[int, str] = {}
+        packed_sources: Dict[int, Tuple[str, int]] = {}
+        virtual_sources: Dict[int, Tuple[str, int]] = {}
+        for file_info in slice_files:
+            hole_number = file_info['hole_number']
+            if hole_number not in tiles:
+                continue
+            packed = self.get_packed_slice_source(file_info['filepath'])
+            source = self.get_virtual_slice_source(file_info['filepath']) if packed is None else None
+            if packed is not None:
+                packed_sources[hole_number] = packed
+            elif source is None:
+                file_sources[hole_number] = file_info['filepath']
+            else:
+                virtual_sources[hole_number] = source
+        
+        signature_parts = []
+        for hole_number, path in sorted(file_sources.items()):
+            signature_parts.append((hole_number, path, os.stat(path).st_mtime_ns))
+        for hole_number, (pack_path, _) in sorted(packed_sources.items()):
+            signature_parts.append((hole_number, pack_path, os.stat(pack_path).st_mtime_ns))
+        for hole_number, (panoramic_path, _) in sorted(virtual_sources.items()):
+            signature_parts.append((hole_number, panoramic_path, os.stat(panoramic_path).st_mtime_ns))
+        if virtual_sources:
+            signature_parts.append(self.get_plate_layout(next(iter(virtual_sources.values()))[0]).get_layout_key())
+        signature = hashlib.sha1(repr(signature_parts).encode('utf-8')).hexdigest()
+        params = {'grid': list(grid_size), 'size': list(thumbnail_size), 'signature': signature}
+        no_source = sorted(hole for hole in tiles if hole not in file_sources and
+                           hole not in packed_sources and hole not in virtual_sources)
+        
+        cache_key = ('thumbnail_atlas', signature, tuple(grid_size), tuple(thumbnail_size))
+        cached = self.image_cache.get(cache_key)
+        if cached is not None:
+            atlas_image, missing = cached
+            return ThumbnailAtlas(atlas_image, tuple(thumbnail_size), tiles, list(missing))
+        
+        disk_source = (next(iter(file_sources.values()), None) or
+                       next((source[0] for source in packed_sources.values()), None) or
+                       next((source[0] for source in virtual_sources.values()), None))
+        if self.disk_cache is not None and disk_source:
+            atlas_image = self.disk_cache.get('thumbnail_atlas', disk_source, params)
+            if atlas_image is not None:
+                self.image_cache.put(cache_key, (atlas_image, no_source))
+                return ThumbnailAtlas(atlas_image, tuple(thumbnail_size), tiles, no_source)
+        
+        builder = self._get_atlas_builder(max_workers)
+        array_sources = {hole_number: self.get_hole_view(panoramic_path, source_hole)
+                         for hole_number, (panoramic_path, source_hole) in virtual_sources.items()}
+        array_sources.update({hole_number: self.get_packed_slices(pack_path).get(source_hole)
+                              for hole_number, (pack_path, source_hole) in packed_sources.items()})
+        atlas = builder.build(tiles, file_sources, array_sources, thumbnail_size, atlas_size)
+        for hole_number, error in builder.errors.items():
+            log_error(f"加载缩略图失败 {file_sources.get(hole_number)}: {error}", "IMAGE_SERVICE")
+        
+        self.image_cache.put(cache_key, (atlas.image, atlas.missing))
+        # 有加载失败的孔位时不写入磁盘缓存，下次重新尝试
+        if self.disk_cache is not None and disk_source and not builder.errors:
+            self.disk_cache.put_async('thumbnail_atlas', disk_source, atlas.image, params)
+        builder.errors.clear()
+        return atlas
+    
+    def _get_atlas_builder(self, max_workers: Optional[int] = None) -> ThumbnailAtlasBuilder:
+        """获取缩略图图集构建器，工作进程数变化时重建进程池"""
+        workers = max_workers or self.image_config.atlas_workers or None
+        builder = self._atlas_builder
+        if builder is not None and workers and builder.max_workers != workers:
+            builder.shutdown()
+            builder = None
+        if builder is None:
+            builder = ThumbnailAtlasBuilder(workers)
+            self._atlas_builder = builder
+        return builder
+    
     def create_thumbnail_grid(self, slice_files: List[Dict[str, Any]], 
                              grid_size: Tuple[int, int] = (10, 12),
                              thumbnail_size: Tuple[int, int] = (50, 50)) -> Optional[Image.Image]:
         """
         创建切片图像的缩略图网格
-        用于快速预览整个全景图的所有孔位
+        用于快速预览整个全景图的所有孔位（基于缩略图图集）
         """
         try:
-            rows, cols = grid_size
-            thumb_width, thumb_height = thumbnail_size
-            
-            # 创建网格图像
-            grid_width = cols * thumb_width
-            grid_height = rows * thumb_height
-            grid_image = Image.new('RGB', (grid_width, grid_height), 'white')
-            
-            # 按孔位编号组织文件
-            hole_files = {}
-            for file_info in slice_files:
-                hole_number = file_info['hole_number']
-                hole_files[hole_number] = file_info
-            
-            # 填充网格
-            for hole_number in range(1, 121):
-                row, col = self.hole_manager.number_to_position(hole_number)
-                
-                # 计算在网格中的位置
-                x = col * thumb_width
-                y = row * thumb_height
-                
-                if hole_number in hole_files:
-                    # 加载并缩放图像
-                    file_path = hole_files[hole_number]['filepath']
-                    try:
-                        slice_img = Image.open(file_path)
-                        slice_img = slice_img.resize(thumbnail_size, Image.Resampling.LANCZOS)
-                        grid_image.paste(slice_img, (x, y))
-                    except Exception as e:
-                        log_error(f"加载缩略图失败 {file_path}: {e}", "IMAGE_SERVICE")
-                        # 创建占位符
-                        placeholder = Image.new('RGB', thumbnail_size, 'lightgray')
-                        grid_image.paste(placeholder, (x, y))
-                else:
-                    # 空孔位占位符
-                    placeholder = Image.new('RGB', thumbnail_size, 'lightgray')
-                    grid_image.paste(placeholder, (x, y))
-            
-            return grid_image
+            return self.get_thumbnail_atlas(slice_files, grid_size, thumbnail_size).image
             
         except Exception as e:
             log_error(f"创建缩略图网格失败: {e}", "IMAGE_SERVICE")
             return None
     
-    def get_image_statistics(self, image: Image.Image) -> Dict[str, Any]:
+    def get_image_statistics(self, image: Any, pixel_stats: bool = True) -> Dict[str, Any]:
         """
         获取图像统计信息
-        """
-        img_array = np.array(image)
         
-        stats = {
-            'width': image.width,
-            'height': image.height,
-            'mode': image.mode,
-            'format': getattr(image, 'format', 'Unknown'),
-            'size_bytes': len(img_array.tobytes())
-        }
+        Args:
+            image: PIL图像、像素数组（如 get_hole_view 返回的内存映射视图，只读取其覆盖的页面）
+                或图像路径（尺寸和模式取自元数据，只在计算像素统计时读取像素）
+            pixel_stats: 是否计算均值、标准差等像素统计，为False时只返回尺寸信息
+        """
+        if isinstance(image, str):
+            metadata = self.get_image_metadata(image)
+            stats = {
+                'width': metadata.width,
+                'height': metadata.height,
+                'mode': metadata.mode,
+                'format': os.path.splitext(image)[1].lstrip('.').upper(),
+                'size_bytes': metadata.pixel_bytes,
+                'file_size': metadata.file_size
+            }
+            if not pixel_stats:
+                return stats
+            img_array = self.get_slice_array(image)
+        elif isinstance(image, np.ndarray):
+            img_array = image
+            stats = {
+                'width': img_array.shape[1],
+                'height': img_array.shape[0],
+                'mode': 'RGB' if img_array.ndim == 3 else 'L',
+                'format': 'ndarray',
+                'size_bytes': int(img_array.nbytes)
+            }
+        else:
+            img_array = np.asarray(image) if pixel_stats else None
+            stats = {
+                'width': image.width,
+                'height': image.height,
+                'mode': image.mode,
+                'format': getattr(image, 'format', 'Unknown'),
+                'size_bytes': pixel_bytes(image.width, image.height, image.mode)
+            }
+        if not pixel_stats:
+            return stats
         
         # 计算像素统计
         if len(img_array.shape) == 3:
@@ -642,16 +1772,113 @@ class PanoramicImageService:
         
         return stats
     
+    def get_hole_features(self, panoramic_path: str) -> np.ndarray:
+        """
+        获取整板孔位特征矩阵 (孔位数, K)，列见 hole_features.FEATURE_NAMES
+        按 (全景图路径, mtime, 孔位布局) 缓存，返回的数组为只读
+        """
+        array = self.get_panoramic_array(panoramic_path)
+        layout = self.hole_manager.layout_for_size(array.shape[1], array.shape[0])
+        cache_key = self._make_cache_key('hole_features', Path(panoramic_path),
+                                         (layout.get_layout_key(), self.feature_extractor.edge_threshold))
+        features = self.image_cache.get(cache_key)
+        if features is None:
+            features = self.feature_extractor.extract(array, layout)
+            features.flags.writeable = False
+            self.image_cache.put(cache_key, features)
+        return features
+    
+    def list_panoramic_files(self, directory: str) -> List[str]:
+        """列出目录下的全景图文件（不含切片文件），按路径排序"""
+        panoramic_files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                ext = os.path.splitext(entry.name)[1].lower()
+                if (entry.is_file() and ext in self.supported_formats
+                        and not self._is_slice_filename(entry.name)):
+                    panoramic_files.append(entry.path)
+        panoramic_files.sort()
+        return panoramic_files
+    
+    def compute_directory_features(self, directory: str,
+                                   progress_callback=None) -> Dict[str, np.ndarray]:
+        """
+        批量计算目录下所有全景图的孔位特征
+        
+        Args:
+            directory: 全景图目录
+            progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+        
+        Returns:
+            全景ID -> 特征矩阵，读取失败的全景图记录日志后跳过
+        """
+        panoramic_files = self.list_panoramic_files(directory)
+        results = {}
+        total = len(panoramic_files)
+        for index, panoramic_path in enumerate(panoramic_files, 1):
+            panoramic_id = os.path.splitext(os.path.basename(panoramic_path))[0]
+            try:
+                results[panoramic_id] = self.get_hole_features(panoramic_path)
+            except Exception as e:
+                log_error(f"计算孔位特征失败 {panoramic_path}: {e}", "IMAGE_SERVICE")
+            if progress_callback:
+                progress_callback(index, total, f"计算孔位特征 {index}/{total}...")
+        return results
+    
+    def render_plate_reports(self, directory: str, output_dir: str,
+                             labels: Optional[Dict[str, Dict[int, str]]] = None,
+                             predictions: Optional[Dict[str, Dict[int, str]]] = None,
+                             max_workers: Optional[int] = None,
+                             progress_callback=None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        为目录下每张全景图渲染整板标注报告图，不经过界面的覆盖层缓存
+        
+        Args:
+            directory: 全景图目录
+            output_dir: 报告输出目录
+            labels: 全景ID -> {孔位编号: 最终生长级别}，见 plate_report.load_hole_labels
+            predictions: 全景ID -> {孔位编号: 模型预测的生长级别}
+            max_workers: 渲染进程数，默认使用配置（0表示CPU核数）
+            progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+        
+        Returns:
+            (全景ID -> 统计摘要, 全景ID -> 错误信息)
+        """
+        panoramic_files = self.list_panoramic_files(directory)
+        sizes = set()
+        for panoramic_path in panoramic_files:
+            try:
+                sizes.add(self.get_image_metadata(panoramic_path).size)
+            except Exception:
+                # 无法读取的全景图在渲染时报告错误
+                continue
+        renderer = PlateReportRenderer.from_hole_manager(self.hole_manager, sizes,
+                                                         max_width=self.image_config.report_width)
+        workers = max_workers if max_workers is not None else (self.image_config.report_workers or None)
+        return render_plate_reports(panoramic_files, output_dir, renderer,
+                                    labels or {}, predictions, workers,
+                                    progress_callback=progress_callback)
+    
     def clear_cache(self):
         """清理图像缓存"""
-        self.panoramic_images.clear()
-        self.slice_images.clear()
+        with self.image_cache.lock:
+            self.image_cache.clear()
+            self._cache_keys.clear()
+        self._packed_dirs.clear()
+        self._virtual_sources.clear()
+        self.overlay_renderer.invalidate()
     
     def get_cache_info(self) -> Dict[str, Any]:
         """获取缓存信息"""
-        return {
-            'panoramic_images_count': len(self.panoramic_images),
-            'slice_images_count': len(self.slice_images),
-            'panoramic_images': list(self.panoramic_images.keys()),
-            'slice_images': list(self.slice_images.keys())
+        keys = self.image_cache.keys()
+        panoramic_images = [key[1] for key in keys if key[0] == 'panoramic']
+        slice_images = [key[1] for key in keys if key[0] == 'slice']
+        
+        info = {
+            'panoramic_images_count': len(panoramic_images),
+            'slice_images_count': len(slice_images),
+            'panoramic_images': panoramic_images,
+            'slice_images': slice_images
         }
+        info.update(self.image_cache.get_stats())
+        return info
@@ -0,0 +1,251 @@
+"""
+切片感知哈希
+为每个切片计算64位 dHash（相邻像素梯度）和 pHash（低频DCT系数），保存在持久化索引中，
+按汉明距离查找整个数据集中的重复和近似重复切片（同一全景图被复制到多个批次目录、
+同一板被重新拍摄等），避免重复标注和训练集划分间的数据泄漏
+
+近似重复查询使用分段索引：汉明距离不超过 d 的两个哈希分为 d+m 段时至少有 m 段完全相同，
+按各 m 段组合分桶后只对同桶哈希做向量化的 popcount 校验，不需要全量两两比较
+"""
+
+import io
+import os
+from itertools import combinations
+from math import comb
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+HASH_KINDS = ('dhash', 'phash')
+HASH_BITS = 64
+
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+
+def _to_gray(image_array: np.ndarray) -> np.ndarray:
+    if image_array.ndim == 3:
+        return cv2.cvtColor(np.ascontiguousarray(image_array[:, :, :3]), cv2.COLOR_RGB2GRAY)
+    return np.ascontiguousarray(image_array)
+
+
+def _pack_bits(bits: np.ndarray) -> int:
+    """64个布尔值按行优先打包为无符号64位整数"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def dhash(image_array: np.ndarray) -> int:
+    """差值哈希：缩小到 9×8 灰度图，比较每行相邻像素"""
+    small = cv2.resize(_to_gray(image_array), (9, 8), interpolation=cv2.INTER_AREA).astype(np.int16)
+    return _pack_bits(small[:, 1:] > small[:, :-1])
+
+
+def phash(image_array: np.ndarray) -> int:
+    """DCT哈希：缩小到 32×32 灰度图，取左上 8×8 低频系数与其中位数比较"""
+    small = cv2.resize(_to_gray(image_array), (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8]
+    return _pack_bits(low > np.median(low))
+
+
+def compute_hashes(image_array: np.ndarray) -> Tuple[int, int]:
+    """返回 (dHash, pHash)"""
+    return dhash(image_array), phash(image_array)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """uint64 数组逐元素的置位数"""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def hamming_distance(hashes: np.ndarray, value: int) -> np.ndarray:
+    """哈希数组与单个哈希的汉明距离"""
+    return popcount64(np.asarray(hashes, dtype=np.uint64) ^ np.uint64(value))
+
+
+def _chunk_plan(count: int, max_distance: int) -> Tuple[int, int]:
+    """
+    选择分段方案 (段数, 每个键包含的段数)
+    分为 max_distance+m 段时，距离不超过 max_distance 的两个哈希至少有 m 段完全相同，
+    以任意 m 段的组合为键分桶；m 越大键越长、同桶候选越少，但组合数（排序趟数）越多
+    """
+    best = None
+    for keyed in (1, 2, 3):
+        chunks = max_distance + keyed
+        key_bits = HASH_BITS * keyed / chunks
+        cost = comb(chunks, keyed) * (count + count * count / 2 ** (key_bits + 1))
+        if best is None or cost < best[0]:
+            best = (cost, chunks, keyed)
+    return best[1], best[2]
+
+
+def find_near_pairs(hashes: np.ndarray, max_distance: int) -> np.ndarray:
+    """
+    查找汉明距离不超过 max_distance 的所有哈希对（哈希值互不相同时）
+
+    Args:
+        hashes: 互不相同的 uint64 哈希数组
+        max_distance: 最大汉明距离，0-15
+
+    Returns:
+        (K, 2) 的下标对数组，每对 i < j
+    """
+    if max_distance >= HASH_BITS // 4:
+        raise ValueError(f"最大汉明距离必须小于 {HASH_BITS // 4}: {max_distance}")
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    if max_distance <= 0 or len(hashes) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+
+    chunks, keyed = _chunk_plan(len(hashes), max_distance)
+    bounds = np.linspace(0, HASH_BITS, chunks + 1).astype(int)
+    chunk_masks = [((1 << (stop - start)) - 1) << start for start, stop in zip(bounds[:-1], bounds[1:])]
+    found = []
+    for combination in combinations(chunk_masks, keyed):
+        keys = hashes & np.uint64(sum(combination))
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        # 同桶的哈希在排序后相邻，按偏移量逐次比较，直到没有同桶的对
+        offset = 1
+        while offset < len(order):
+            same = np.flatnonzero(sorted_keys[offset:] == sorted_keys[:-offset])
+            if not len(same):
+                break
+            first, second = order[same], order[same + offset]
+            close = popcount64(hashes[first] ^ hashes[second]) <= max_distance
+            pairs = np.stack([np.minimum(first, second), np.maximum(first, second)], axis=1)[close]
+            found.append(pairs)
+            offset += 1
+
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(found).astype(np.int64), axis=0)
+
+
+def group_pairs(count: int, pairs: np.ndarray) -> List[List[int]]:
+    """按下标对合并连通分量，返回含两个及以上成员的分组（组内和组间按下标排序）"""
+    parent = np.arange(count)
+
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for first, second in pairs.tolist():
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[max(root_first, root_second)] = min(root_first, root_second)
+
+    groups: Dict[int, List[int]] = {}
+    for node in np.unique(pairs).tolist():
+        groups.setdefault(find(node), []).append(node)
+    return sorted((sorted(members) for members in groups.values() if len(members) > 1), key=lambda g: g[0])
+
+
+class HashIndex:
+    """
+    切片感知哈希索引
+    条目为 (相对根目录的切片路径, 源文件mtime, dHash, pHash)，
+    源文件对于打包切片为打包文件，虚拟切片为全景图
+    """
+
+    FILE_VERSION = 1
+
+    def __init__(self, root: str = '', paths: Sequence[str] = (), mtimes: Optional[np.ndarray] = None,
+                 dhashes: Optional[np.ndarray] = None, phashes: Optional[np.ndarray] = None):
+        self.root = root
+        self.paths = list(paths)
+        self.mtimes = np.asarray(mtimes if mtimes is not None else [], dtype=np.int64)
+        self.hashes = {
+            'dhash': np.asarray(dhashes if dhashes is not None else [], dtype=np.uint64),
+            'phash': np.asarray(phashes if phashes is not None else [], dtype=np.uint64),
+        }
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def full_path(self, position: int) -> str:
+        return os.path.join(self.root, self.paths[position])
+
+    def lookup(self, path: str, mtime_ns: int) -> Optional[Tuple[int, int]]:
+        """按相对路径查找mtime一致的条目，返回 (dHash, pHash)"""
+        if self._positions is None:
+            self._positions = {path: position for position, path in enumerate(self.paths)}
+        position = self._positions.get(path)
+        if position is None or self.mtimes[position] != mtime_ns:
+            return None
+        return int(self.hashes['dhash'][position]), int(self.hashes['phash'][position])
+
+    @classmethod
+    def load(cls, index_path: str) -> 'HashIndex':
+        """
+        读取持久化索引
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            ValueError: 文件版本不支持或内容损坏
+        """
+        with np.load(index_path, allow_pickle=False) as data:
+            if int(data['version']) != cls.FILE_VERSION:
+                raise ValueError(f"不支持的哈希索引版本: {int(data['version'])}")
+            blob = data['paths'].tobytes().decode('utf-8')
+            paths = blob.split('\n') if blob else []
+            index = cls(str(data['root']), paths, data['mtimes'], data['dhash'], data['phash'])
+        if not (len(index.paths) == len(index.mtimes) == len(index.hashes['dhash']) == len(index.hashes['phash'])):
+            raise ValueError(f"哈希索引内容不一致: {index_path}")
+        return index
+
+    def save(self, index_path: str) -> None:
+        """写入临时文件后原子替换"""
+        os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, version=np.array(self.FILE_VERSION), root=np.array(self.root),
+                 paths=np.frombuffer('\n'.join(self.paths).encode('utf-8'), dtype=np.uint8),
+                 mtimes=self.mtimes, dhash=self.hashes['dhash'], phash=self.hashes['phash'])
+        temp_path = f"{index_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(buffer.getbuffer())
+        os.replace(temp_path, index_path)
+
+    @classmethod
+    def merge(cls, indexes: Iterable['HashIndex']) -> 'HashIndex':
+        """合并多个目录的索引（路径改为绝对路径，根目录为空）"""
+        indexes = list(indexes)
+        paths = [index.full_path(position) for index in indexes for position in range(len(index))]
+        if not indexes:
+            return cls()
+        return cls('', paths, np.concatenate([index.mtimes for index in indexes]),
+                   np.concatenate([index.hashes['dhash'] for index in indexes]),
+                   np.concatenate([index.hashes['phash'] for index in indexes]))
+
+    def query(self, value: int, max_distance: int = 0, kind: str = 'phash') -> np.ndarray:
+        """返回与给定哈希的汉明距离不超过 max_distance 的条目下标（按距离排序）"""
+        distances = hamming_distance(self.hashes[kind], value)
+        matches = np.flatnonzero(distances <= max_distance)
+        return matches[np.argsort(distances[matches], kind='stable')]
+
+    def find_duplicate_groups(self, max_distance: int = 0, kind: str = 'phash') -> List[List[int]]:
+        """
+        查找重复切片分组
+        先按哈希值合并完全相同的条目，再对互不相同的哈希值查找近似重复对，按连通分量分组
+
+        Returns:
+            条目下标分组列表，每组两个及以上成员
+        """
+        unique_hashes, inverse = np.unique(self.hashes[kind], return_inverse=True)
+        inverse = inverse.ravel()
+        pairs = find_near_pairs(unique_hashes, max_distance)
+        # 近似重复的哈希值先分组，每个条目映射到其哈希值所在分组
+        hash_group = np.arange(len(unique_hashes))
+        for members in group_pairs(len(unique_hashes), pairs):
+            hash_group[members] = members[0]
+
+        order = np.argsort(hash_group[inverse], kind='stable')
+        group_keys = hash_group[inverse][order]
+        starts = np.flatnonzero(np.r_[True, group_keys[1:] != group_keys[:-1]])
+        stops = np.r_[starts[1:], len(order)]
+        groups = [order[start:stop].tolist() for start, stop in zip(starts, stops) if stop - start > 1]
+        return sorted(groups, key=lambda g: g[0])
@@ -0,0 +1,143 @@
+"""
+整板光照归一化
+从全景图一次性估计平场（光照）模型：在低分辨率亮度图上只取孔位之间的板面背景，
+经归一化卷积平滑得到光照分布，其倒数即为增益；再按整板亮度分位数做线性对比度拉伸。结果折算为每个孔位的增益图和统一偏移量，
+增强切片只需一次向量化的乘加运算，同一张板的所有孔位使用相同的亮度和对比度映射
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# 归一化参数，同时作为增强结果缓存键的一部分
+NORMALIZE_PARAMS = {
+    'sample_step': 4,  # 估计光照时全景图的行列采样步长
+    'downsample': 16,  # 光照模型相对全景图的缩小倍数
+    'smooth_spacings': 1.0,  # 光照平滑的高斯sigma（以孔间距为单位）
+    'min_background_fraction': 0.05,  # 孔位之外的背景像素少于该比例时改用整图估计
+    'percentiles': (1.0, 99.0),  # 对比度拉伸使用的整板亮度分位数
+    'target_range': (16.0, 240.0),  # 分位数映射到的输出亮度
+    'max_contrast_gain': 4.0,  # 对比度拉伸倍数上限，避免近乎均匀的板被过度放大
+}
+
+
+class IlluminationModel:
+    """
+    单张全景图的光照模型
+    gains[i] 为孔位 i+1 区域（与 get_hole_view 相同的裁剪）的增益图，已包含对比度拉伸倍数；
+    输出 = clip(像素 × 增益 + offset)，彩色图像各通道使用相同的增益，色调保持不变
+    """
+
+    def __init__(self, gains: List[np.ndarray], offset: float):
+        self.gains = gains
+        self.offset = float(offset)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(gain.nbytes for gain in self.gains)
+
+    def apply(self, crop: np.ndarray, hole_number: int) -> np.ndarray:
+        """
+        归一化孔位图像
+
+        Args:
+            crop: 孔位像素数组 (h, w, 3) 或 (h, w)，可以是只读视图
+            hole_number: 孔位编号
+
+        Returns:
+            新的uint8数组；切片尺寸与孔位区域不一致时（如外部裁剪的切片）增益图缩放到切片尺寸
+        """
+        gain = self.gains[hole_number - 1]
+        height, width = crop.shape[:2]
+        if gain.shape != (height, width):
+            gain = cv2.resize(gain, (width, height), interpolation=cv2.INTER_LINEAR)
+        if crop.ndim == 3:
+            gain = gain[:, :, None]
+        result = crop * gain
+        result += self.offset
+        np.clip(result, 0, 255, out=result)
+        return result.astype(np.uint8)
+
+
+class PlateNormalizer:
+    """整板光照模型估计器，孔位区域由 HoleManager 给出"""
+
+    def __init__(self, hole_manager, params: Optional[Dict[str, Any]] = None):
+        self.hole_manager = hole_manager
+        self.params = dict(params or NORMALIZE_PARAMS)
+
+    def params_key(self) -> Tuple:
+        """参数的可哈希形式"""
+        return tuple((name, tuple(value) if isinstance(value, (list, tuple)) else value)
+                     for name, value in sorted(self.params.items()))
+
+    def _background_mask(self, coarse_shape: Tuple[int, int], factor: int, layout) -> np.ndarray:
+        """低分辨率下孔位之外（板面背景）为1、孔位区域为0的掩膜"""
+        mask = np.ones(coarse_shape, dtype=np.float32)
+        for hole_number in range(1, layout.total_holes + 1):
+            x, y, width, height = layout.get_hole_coordinates(hole_number)
+            mask[max(y // factor, 0):(y + height) // factor + 1, max(x // factor, 0):(x + width) // factor + 1] = 0
+        return mask
+
+    def estimate_illumination(self, pixels: np.ndarray, layout=None) -> Tuple[np.ndarray, float, float]:
+        """
+        估计低分辨率增益图和对比度映射
+        光照只从孔位之间的板面背景估计（孔内容因样本而异，不能代表光照），
+        用归一化卷积 blur(亮度×掩膜) / blur(掩膜) 把背景亮度平滑地插值到孔位区域
+
+        Returns:
+            (增益图 float32，尺寸为全景图的 1/downsample, 对比度倍数, 偏移量)
+        """
+        layout = layout or self.hole_manager
+        params = self.params
+        step = params['sample_step']
+        # 按步长采样后再缩小，内存映射的全景图只读取采样到的行
+        if pixels.ndim == 3:
+            sampled = cv2.cvtColor(np.ascontiguousarray(pixels[::step, ::step, :3]), cv2.COLOR_RGB2GRAY)
+        else:
+            sampled = np.ascontiguousarray(pixels[::step, ::step])
+        height, width = pixels.shape[:2]
+        factor = params['downsample']
+        coarse_size = (max(width // factor, 1), max(height // factor, 1))
+        coarse = cv2.resize(sampled, coarse_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+        spacing = max(layout.horizontal_spacing, layout.vertical_spacing)
+        sigma = max(params['smooth_spacings'] * spacing / factor, 1.0)
+        mask = self._background_mask(coarse.shape, factor, layout)
+        if mask.sum() < params['min_background_fraction'] * mask.size:
+            # 孔位几乎覆盖整张图，没有足够的背景，退回整图平滑
+            mask[:] = 1
+        weights = cv2.GaussianBlur(mask, (0, 0), sigma)
+        background = cv2.GaussianBlur(coarse * mask, (0, 0), sigma)
+        np.divide(background, weights, out=background, where=weights > 1e-3)
+        background[weights <= 1e-3] = np.median(coarse[mask > 0])
+        np.maximum(background, 1.0, out=background)
+        gain = np.float32(np.median(background[mask > 0])) / background
+
+        low, high = np.percentile(coarse * gain, params['percentiles'])
+        target_low, target_high = params['target_range']
+        contrast = (target_high - target_low) / max(high - low, 1e-3)
+        contrast = min(contrast, params['max_contrast_gain'])
+        offset = target_low - contrast * low
+        return gain, float(contrast), float(offset)
+
+    def estimate(self, pixels: np.ndarray, layout=None) -> IlluminationModel:
+        """
+        估计整板光照模型
+
+        Args:
+            pixels: 全景图像素数组 (H, W, 3) 或 (H, W)，可以是只读的内存映射视图
+            layout: 该全景图的孔位布局（HoleManager），默认使用构造时传入的孔位管理器
+        """
+        layout = layout or self.hole_manager
+        gain, contrast, offset = self.estimate_illumination(pixels, layout)
+        height, width = pixels.shape[:2]
+        full_gain = cv2.resize(gain, (width, height), interpolation=cv2.INTER_LINEAR)
+        full_gain *= contrast
+
+        gains = []
+        for hole_number in range(1, layout.total_holes + 1):
+            x, y, hole_width, hole_height = layout.get_hole_coordinates(hole_number)
+            gains.append(full_gain[max(y, 0):y + hole_height, max(x, 0):x + hole_width].copy())
+        return IlluminationModel(gains, offset)
@@ -0,0 +1,317 @@
+"""
+整板标注报告图
+无界面地为每张全景图渲染缩小分辨率的标注总览PNG：各孔位按最终标注着色，
+模型预测与人工标注不一致的孔位用叉号标出，顶部为板号和各类计数的图例。
+全景图解码后立即按整数倍缩小到输出分辨率，直接在缩小后的像素上绘制；孔位坐标在父进程中
+由 HoleManager 按各全景图尺寸计算后传入工作进程；各板在进程池中并行渲染并直接写入磁盘，
+父进程只收集每张板的统计摘要
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+from src.services.bmp_reader import open_bmp_image
+from src.services.image_metadata import probe_image_header
+from src.services.overlay_renderer import OVERLAY_COLORS, load_overlay_font
+
+GROWTH_LEVELS = ('negative', 'weak_growth', 'positive')
+
+# 报告中的孔位颜色，弱生长在界面覆盖层中没有单独的颜色
+REPORT_COLORS = {
+    'negative': OVERLAY_COLORS['negative'],
+    'weak_growth': '#FFD700',  # 金黄色 - 弱生长
+    'positive': OVERLAY_COLORS['positive'],
+    'unannotated': OVERLAY_COLORS['unannotated'],
+    'disagreement': '#FF00FF',  # 品红色 - 模型预测与人工标注不一致
+}
+
+SUMMARY_FIELDS = ['panoramic_id', 'output', *GROWTH_LEVELS, 'unannotated', 'predicted',
+                  'disagreements', 'disagreement_holes']
+
+
+def load_hole_labels(json_path: str) -> Dict[str, Dict[int, str]]:
+    """
+    读取标注或模型预测文件中各孔位的生长级别
+    支持标注保存格式和模型预测格式（annotations 列表，生长级别位于 features 中）以及旧的平铺格式；
+    同一孔位出现多次时以最后一条为准
+
+    Returns:
+        全景ID -> {孔位编号: 生长级别}
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('annotations', []) if isinstance(data, dict) else data
+
+    labels: Dict[str, Dict[int, str]] = {}
+    for entry in entries:
+        features = entry.get('features') or entry
+        growth_level = features.get('growth_level')
+        panoramic_id = entry.get('panoramic_id') or entry.get('panoramic_image_id')
+        hole_number = entry.get('hole_number')
+        if not growth_level or not panoramic_id or hole_number is None:
+            continue
+        labels.setdefault(str(panoramic_id), {})[int(hole_number)] = growth_level
+    return labels
+
+
+def load_reduced_panoramic(image_path: str, max_width: int) -> Tuple[np.ndarray, float]:
+    """
+    按输出宽度解码全景图
+
+    未压缩BMP从内存映射的像素区一次解包，其余格式由PIL解码（JPEG用draft在DCT阶段缩小）；
+    先用 Image.reduce 按整数倍做盒式缩小（抗锯齿且远快于整图重采样），剩余部分再用双线性缩放
+
+    Returns:
+        (RGB像素数组，可写, 相对原图的缩放比例)
+    """
+    image = open_bmp_image(image_path)
+    if image is not None:
+        full_width = image.width
+    else:
+        with Image.open(image_path) as source:
+            full_width = source.width
+            source.draft('RGB', (max_width, max(1, source.height * max_width // source.width)))
+            image = source.convert('RGB')
+
+    factor = image.width // max_width
+    if factor > 1:
+        image = image.reduce(factor)
+    if image.width > max_width:
+        target_height = max(1, round(image.height * max_width / image.width))
+        image = image.resize((max_width, target_height), Image.Resampling.BILINEAR)
+    return np.array(image), image.width / full_width
+
+
+class PlateReportRenderer:
+    """
+    报告图渲染器
+    只保存原图分辨率下的孔位矩形和标签，可以直接传给工作进程
+    """
+
+    def __init__(self, hole_rects: Sequence[Tuple[int, int, int, int]], hole_labels: Sequence[str],
+                 max_width: int = 1024, fill_alpha: float = 0.35,
+                 sized_rects: Optional[Dict[Tuple[int, int], Sequence[Tuple[int, int, int, int]]]] = None):
+        """
+        Args:
+            hole_rects: 孔位 i+1 在原图中的 (x, y, 宽, 高)
+            hole_labels: 孔位 i+1 的标签（如 A1）
+            max_width: 输出图像宽度（原图更窄时保持原尺寸）
+            fill_alpha: 已标注孔位的着色不透明度
+            sized_rects: 全景图尺寸 (宽, 高) -> 该尺寸下的孔位矩形，未列出的尺寸使用 hole_rects
+        """
+        self.hole_rects = [tuple(rect) for rect in hole_rects]
+        self.hole_labels = list(hole_labels)
+        self.max_width = max_width
+        self.fill_alpha = fill_alpha
+        self.sized_rects = {tuple(size): [tuple(rect) for rect in rects]
+                            for size, rects in (sized_rects or {}).items()}
+
+    @classmethod
+    def from_hole_manager(cls, hole_manager, sizes: Iterable[Tuple[int, int]] = (),
+                          **kwargs) -> 'PlateReportRenderer':
+        """按孔位管理器创建渲染器，sizes 中每种全景图尺寸的孔位矩形按该尺寸的布局计算"""
+        numbers = range(1, hole_manager.total_holes + 1)
+        sized_rects = {}
+        for width, height in set(sizes):
+            layout = hole_manager.layout_for_size(width, height)
+            sized_rects[(width, height)] = [layout.get_hole_coordinates(number) for number in numbers]
+        return cls([hole_manager.get_hole_coordinates(number) for number in numbers],
+                   [hole_manager.get_hole_label(number) for number in numbers],
+                   sized_rects=sized_rects, **kwargs)
+
+    def rects_for(self, full_size: Optional[Tuple[int, int]]) -> Sequence[Tuple[int, int, int, int]]:
+        """尺寸为 full_size 的全景图的孔位矩形"""
+        if full_size is None:
+            return self.hole_rects
+        return self.sized_rects.get(tuple(full_size), self.hole_rects)
+
+    @staticmethod
+    def summarize(labels: Dict[int, str], predictions: Dict[int, str], total_holes: int) -> Dict[str, Any]:
+        """
+        统计各生长级别的孔位数和不一致孔位
+        只有人工标注和模型预测都存在且级别不同的孔位计为不一致
+        """
+        summary: Dict[str, Any] = {level: 0 for level in GROWTH_LEVELS}
+        for hole_number in range(1, total_holes + 1):
+            level = labels.get(hole_number)
+            if level is not None:
+                summary[level] = summary.get(level, 0) + 1
+        summary['unannotated'] = sum(1 for number in range(1, total_holes + 1) if number not in labels)
+        summary['predicted'] = sum(1 for number in range(1, total_holes + 1) if number in predictions)
+        summary['disagreements'] = sorted(number for number, level in labels.items()
+                                          if number in predictions and predictions[number] != level
+                                          and 1 <= number <= total_holes)
+        return summary
+
+    def _draw_legend(self, image: Image.Image, panoramic_id: str, summary: Dict[str, Any],
+                     header_height: int) -> None:
+        draw = ImageDraw.Draw(image)
+        font = load_overlay_font(max(10, header_height // 2))
+        padding = header_height // 4
+        swatch = header_height // 2
+        x = padding
+        draw.text((x, padding), panoramic_id, fill='#FFFFFF', font=font)
+        x += round(draw.textlength(panoramic_id, font=font)) + 3 * padding
+
+        items = [(level, f"{level} {summary[level]}") for level in (*GROWTH_LEVELS, 'unannotated')]
+        items.append(('disagreement', f"mismatch {len(summary['disagreements'])}"))
+        for color_name, text in items:
+            draw.rectangle([x, padding, x + swatch, padding + swatch], fill=REPORT_COLORS[color_name])
+            x += swatch + padding
+            draw.text((x, padding), text, fill='#FFFFFF', font=font)
+            x += round(draw.textlength(text, font=font)) + 2 * padding
+
+    def render(self, pixels: np.ndarray, scale: float, panoramic_id: str,
+               labels: Dict[int, str], predictions: Optional[Dict[int, str]] = None,
+               full_size: Optional[Tuple[int, int]] = None) -> Tuple[Image.Image, Dict[str, Any]]:
+        """
+        在缩小后的全景图上绘制报告
+
+        Args:
+            pixels: load_reduced_panoramic 返回的像素数组，直接在其上绘制
+            scale: 相对原图的缩放比例
+            labels: 孔位编号 -> 最终生长级别
+            predictions: 孔位编号 -> 模型预测的生长级别
+            full_size: 原图尺寸 (宽, 高)，用于选择该尺寸的孔位矩形
+
+        Returns:
+            (报告图像, 统计摘要)
+        """
+        predictions = predictions or {}
+        summary = self.summarize(labels, predictions, len(self.hole_rects))
+        disagreements = set(summary['disagreements'])
+        height, width = pixels.shape[:2]
+        colors = {name: np.array(ImageColor.getrgb(color), dtype=np.float32)
+                  for name, color in REPORT_COLORS.items()}
+        border = max(2, round(6 * scale))
+
+        for hole_number, (x, y, hole_width, hole_height) in enumerate(self.rects_for(full_size), 1):
+            x0, y0 = max(round(x * scale), 0), max(round(y * scale), 0)
+            x1, y1 = min(round((x + hole_width) * scale), width), min(round((y + hole_height) * scale), height)
+            if x1 <= x0 or y1 <= y0:
+                continue
+            region = pixels[y0:y1, x0:x1]
+            level = labels.get(hole_number)
+            if level is None:
+                region[:1, :] = region[-1:, :] = colors['unannotated']
+                region[:, :1] = region[:, -1:] = colors['unannotated']
+                continue
+
+            color = colors.get(level, colors['unannotated'])
+            tinted = region * np.float32(1 - self.fill_alpha) + color * np.float32(self.fill_alpha)
+            region[...] = tinted.astype(np.uint8)
+            t = max(1, min(border, (x1 - x0) // 2, (y1 - y0) // 2))
+            region[:t, :] = region[-t:, :] = color
+            region[:, :t] = region[:, -t:] = color
+            if hole_number in disagreements:
+                mark = tuple(int(value) for value in colors['disagreement'])
+                cv2.line(region, (0, 0), (x1 - x0 - 1, y1 - y0 - 1), mark, border)
+                cv2.line(region, (0, y1 - y0 - 1), (x1 - x0 - 1, 0), mark, border)
+
+        header_height = max(20, width // 40)
+        image = Image.new('RGB', (width, height + header_height), (32, 32, 32))
+        image.paste(Image.fromarray(pixels), (0, header_height))
+        self._draw_legend(image, panoramic_id, summary, header_height)
+        summary['disagreement_holes'] = [self.hole_labels[number - 1] for number in summary['disagreements']]
+        return image, summary
+
+
+def _render_task(task: Tuple) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """进程池任务：渲染并写入一张板的报告图，返回 (全景ID, 统计摘要, 错误信息)"""
+    panoramic_path, output_path, renderer, labels, predictions, compress_level = task
+    panoramic_id = os.path.splitext(os.path.basename(panoramic_path))[0]
+    try:
+        full_size = probe_image_header(panoramic_path).size
+        pixels, scale = load_reduced_panoramic(panoramic_path, renderer.max_width)
+        image, summary = renderer.render(pixels, scale, panoramic_id, labels, predictions, full_size)
+        image.save(output_path, format='PNG', compress_level=compress_level)
+        summary['output'] = output_path
+        return panoramic_id, summary, None
+    except Exception as e:
+        return panoramic_id, None, str(e)
+
+
+def render_plate_reports(panoramic_files: Iterable[str], output_dir: str, renderer: PlateReportRenderer,
+                         labels: Dict[str, Dict[int, str]],
+                         predictions: Optional[Dict[str, Dict[int, str]]] = None,
+                         max_workers: Optional[int] = None, compress_level: int = 1,
+                         progress_callback: Optional[Callable[[int, int, str], None]] = None
+                         ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    在进程池中并行渲染整板报告图，输出为 <输出目录>/<全景ID>.png
+
+    同时提交的任务数限制为工作进程数的几倍，标注字典只随对应的任务传递，
+    图像在工作进程中直接写盘，父进程内存与全景图数量无关
+
+    Args:
+        panoramic_files: 全景图路径
+        output_dir: 输出目录
+        renderer: 报告渲染器
+        labels: 全景ID -> {孔位编号: 最终生长级别}
+        predictions: 全景ID -> {孔位编号: 模型预测的生长级别}
+        max_workers: 工作进程数，默认使用CPU核数；0表示在调用进程中渲染
+        compress_level: PNG压缩级别（0-9）
+        progress_callback: 进度回调函数 (已完成数, 总数, 消息)
+
+    Returns:
+        (全景ID -> 统计摘要, 全景ID -> 错误信息)
+    """
+    panoramic_files = list(panoramic_files)
+    predictions = predictions or {}
+    os.makedirs(output_dir, exist_ok=True)
+
+    def make_task(panoramic_path: str) -> Tuple:
+        panoramic_id = os.path.splitext(os.path.basename(panoramic_path))[0]
+        return (panoramic_path, os.path.join(output_dir, f"{panoramic_id}.png"), renderer,
+                labels.get(panoramic_id, {}), predictions.get(panoramic_id, {}), compress_level)
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    total = len(panoramic_files)
+
+    def collect(result: Tuple[str, Optional[Dict[str, Any]], Optional[str]]) -> None:
+        panoramic_id, summary, error = result
+        if error is not None:
+            errors[panoramic_id] = error
+        else:
+            summaries[panoramic_id] = summary
+        if progress_callback:
+            done = len(summaries) + len(errors)
+            progress_callback(done, total, f"渲染报告 {done}/{total}...")
+
+    if max_workers == 0:
+        for panoramic_path in panoramic_files:
+            collect(_render_task(make_task(panoramic_path)))
+        return summaries, errors
+
+    window = (max_workers or os.cpu_count() or 1) * 4
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for panoramic_path in panoramic_files:
+            if len(pending) >= window:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future.result())
+            pending.add(executor.submit(_render_task, make_task(panoramic_path)))
+        for future in wait(pending).done:
+            collect(future.result())
+    return summaries, errors
+
+
+def write_report_summary(csv_path: str, summaries: Dict[str, Dict[str, Any]]) -> None:
+    """将各板统计摘要写入CSV（按全景ID排序，不一致孔位以空格分隔）"""
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for panoramic_id in sorted(summaries):
+            summary = summaries[panoramic_id]
+            writer.writerow({**summary, 'panoramic_id': panoramic_id,
+                             'disagreements': len(summary['disagreements']),
+                             'disagreement_holes': ' '.join(summary['disagreement_holes'])})
@@ -0,0 +1,207 @@
+"""
+切片预取服务
+在后台线程池中预先解码并增强当前孔位前后的切片，并为下一张全景图构建显示金字塔，
+结果写入 PanoramicImageService 的图像缓存，导航时直接命中缓存
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+# 日志导入
+try:
+    from src.utils.logger import log_debug
+except ImportError:
+    # 如果日志模块不可用，使用print作为后备
+    def log_debug(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+
+
+class SlicePrefetcher:
+    """
+    切片预取器
+
+    每次导航调用 schedule()，预取窗口为当前索引之后 depth 个切片、
+    之前 behind_depth 个切片以及下一张全景图。不在新窗口内的未开始任务会被取消，
+    已被移出窗口的任务在开始执行时直接跳过。
+    """
+
+    def __init__(self, image_service, depth: int = 3, max_workers: int = 2,
+                 behind_depth: Optional[int] = None, decode_timeout: float = 30.0):
+        """
+        Args:
+            image_service: PanoramicImageService 实例
+            depth: 向后预取的切片数量，0表示禁用预取
+            max_workers: 线程池大小
+            behind_depth: 向前预取的切片数量，默认为 depth 的一半
+            decode_timeout: 等待解码进程池准备全景图的最长时间（秒），超时后放弃该预取任务
+        """
+        self.image_service = image_service
+        self.depth = max(0, depth)
+        self.behind_depth = max(0, behind_depth if behind_depth is not None else self.depth // 2)
+        self.max_workers = max(1, max_workers)
+        self.decode_timeout = decode_timeout
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.RLock()
+
+        # 统计信息
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'cancelled': 0,
+            'stale_skipped': 0,
+            'failed': 0,
+            'timed_out': 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.depth > 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='prefetch')
+        return self._executor
+
+    def _build_jobs(self, slice_files: List[Dict[str, Any]], current_index: int,
+                    panoramic_directory: Optional[str]) -> List[Tuple[str, str]]:
+        """按优先级生成预取任务列表: 后续切片 -> 之前切片 -> 下一张全景图"""
+        jobs = []
+        total = len(slice_files)
+
+        for offset in range(1, self.depth + 1):
+            index = current_index + offset
+            if index < total:
+                jobs.append(('slice', slice_files[index]['filepath']))
+
+        for offset in range(1, self.behind_depth + 1):
+            index = current_index - offset
+            if index >= 0:
+                jobs.append(('slice', slice_files[index]['filepath']))
+
+        if panoramic_directory and 0 <= current_index < total:
+            current_id = slice_files[current_index]['panoramic_id']
+            for index in range(current_index + 1, total):
+                next_id = slice_files[index]['panoramic_id']
+                if next_id != current_id:
+                    panoramic_file = self.image_service.find_panoramic_image(
+                        f"{next_id}/hole_1.png", panoramic_directory)
+                    if panoramic_file:
+                        jobs.append(('panoramic', panoramic_file))
+                    break
+
+        return jobs
+
+    def schedule(self, slice_files: List[Dict[str, Any]], current_index: int,
+                 panoramic_directory: Optional[str] = None) -> int:
+        """
+        根据当前位置重新安排预取任务
+
+        Returns:
+            新提交的任务数量
+        """
+        if not self.enabled or not slice_files:
+            return 0
+
+        jobs = self._build_jobs(slice_files, current_index, panoramic_directory)
+        wanted = set(jobs)
+        submitted = 0
+
+        with self._lock:
+            # 取消不在新窗口内的任务
+            for key in list(self._pending):
+                if key not in wanted:
+                    if self._pending.pop(key).cancel():
+                        self.stats['cancelled'] += 1
+
+            for kind, path in jobs:
+                key = (kind, path)
+                if key in self._pending:
+                    continue
+                cache_kind = 'enhanced_slice' if kind == 'slice' else 'pyramid'
+                if self.image_service.is_cached(cache_kind, path):
+                    continue
+
+                future = self._get_executor().submit(self._run_job, kind, path)
+                future.add_done_callback(lambda f, k=key: self._on_done(k, f))
+                self._pending[key] = future
+                self.stats['submitted'] += 1
+                submitted += 1
+
+        return submitted
+
+    def _run_job(self, kind: str, path: str) -> bool:
+        """执行单个预取任务"""
+        with self._lock:
+            if (kind, path) not in self._pending:
+                # 用户已跳转，任务不在当前预取窗口内
+                self.stats['stale_skipped'] += 1
+                return False
+
+        if kind == 'slice':
+            self.image_service.get_enhanced_slice_image(path)
+        else:
+            # 解码进程池可用时在独立进程中构建缩小层级，避免预取线程与Tk主线程争用GIL
+            future = self.image_service.decode_async('panoramic', path)
+            if future is not None:
+                try:
+                    future.result(timeout=self.decode_timeout)
+                except FutureTimeoutError:
+                    # 解码进程卡住或排队过久时不再占用预取线程；解码结果完成后仍会写入缓存
+                    with self._lock:
+                        self.stats['timed_out'] += 1
+                    log_debug(f"预取全景图超时（{self.decode_timeout:.0f}s），放弃任务: {path}", "PREFETCH")
+                    return False
+            else:
+                self.image_service.get_panoramic_pyramid(path)
+        return True
+
+    def _on_done(self, key: Tuple[str, str], future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                self.stats['failed'] += 1
+                log_debug(f"预取失败 {key[1]}: {error}", "PREFETCH")
+            elif future.result():
+                self.stats['completed'] += 1
+
+    def cancel_pending(self) -> None:
+        """取消所有尚未开始的预取任务"""
+        with self._lock:
+            for future in self._pending.values():
+                if future.cancel():
+                    self.stats['cancelled'] += 1
+            self._pending.clear()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> None:
+        """等待当前所有预取任务完成（用于测试和基准测试）"""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                pass
+
+    def shutdown(self, wait: bool = False) -> None:
+        """关闭线程池"""
+        self.cancel_pending()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取预取统计信息"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+        stats['depth'] = self.depth
+        stats['behind_depth'] = self.behind_depth
+        return stats
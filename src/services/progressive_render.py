@@ -0,0 +1,108 @@
+"""
+两阶段渐进式渲染
+导航时先用快速重采样（NEAREST/双线性）显示，导航停止后在空闲时再用LANCZOS高质量重绘；
+连续导航时未执行的高质量重绘会被取消，用户看不到的帧不承担高质量重采样的开销
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class RenderTimings:
+    """
+    渲染阶段耗时统计
+    'preview' 为从开始导航到快速预览交给画布的耗时（首像素时间），
+    'refine' 为空闲时高质量重绘本身的耗时
+    """
+
+    PHASES = ('preview', 'refine')
+
+    def __init__(self):
+        self._samples: Dict[str, List[float]] = {phase: [] for phase in self.PHASES}
+        self._lock = threading.Lock()
+
+    def record(self, phase: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._samples[phase].append(elapsed_ms)
+
+    def clear(self) -> None:
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+
+    def count(self, phase: str) -> int:
+        with self._lock:
+            return len(self._samples[phase])
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """获取各阶段的次数、中位数和p95耗时"""
+        result = {}
+        with self._lock:
+            for phase, samples in self._samples.items():
+                stats: Dict[str, float] = {'count': len(samples)}
+                if samples:
+                    stats['median_ms'] = float(np.median(samples))
+                    stats['p95_ms'] = float(np.percentile(samples, 95))
+                result[phase] = stats
+        return result
+
+    def format_summary(self) -> str:
+        """生成一行文本摘要"""
+        parts = []
+        for phase, stats in self.summary().items():
+            if stats['count']:
+                parts.append(f"{phase}: 中位数 {stats['median_ms']:.1f}ms, p95 {stats['p95_ms']:.1f}ms "
+                             f"({stats['count']}次)")
+        return "; ".join(parts)
+
+
+class RefinementScheduler:
+    """
+    高质量重绘调度器
+    schedule() 先等待 delay_ms（按住方向键时的自动重复间隔通常为30ms左右，
+    在两次按键之间事件队列也会短暂空闲），再通过 after_idle 在空闲时执行；
+    再次导航时调用 cancel() 或 schedule() 取消尚未执行的重绘
+    """
+
+    def __init__(self, widget: Any, delay_ms: int = 80):
+        """
+        Args:
+            widget: 提供 after / after_idle / after_cancel 的Tk控件（通常为根窗口）
+            delay_ms: 导航停止后等待的时间，0表示直接在下一次空闲时执行
+        """
+        self.widget = widget
+        self.delay_ms = max(0, delay_ms)
+        self._after_id: Optional[str] = None
+        self._callback: Optional[Callable[[], None]] = None
+
+    @property
+    def pending(self) -> bool:
+        return self._after_id is not None
+
+    def schedule(self, callback: Callable[[], None]) -> None:
+        """安排高质量重绘（取消之前尚未执行的重绘）"""
+        self.cancel()
+        self._callback = callback
+        if self.delay_ms > 0:
+            self._after_id = self.widget.after(self.delay_ms, self._on_settled)
+        else:
+            self._after_id = self.widget.after_idle(self._run)
+
+    def cancel(self) -> None:
+        """取消尚未执行的重绘"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._after_id = None
+        self._callback = None
+
+    def _on_settled(self) -> None:
+        self._after_id = self.widget.after_idle(self._run)
+
+    def _run(self) -> None:
+        callback, self._callback = self._callback, None
+        self._after_id = None
+        if callback is not None:
+            callback()
+
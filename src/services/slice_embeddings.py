@@ -0,0 +1,204 @@
+"""
+切片嵌入向量
+为每个切片计算紧凑的外观嵌入（颜色直方图 + 梯度统计），保存为持久化矩阵，
+按余弦相似度查找与当前孔位外观相似的切片（如同样的丝状生长形态），便于批量标注
+
+各分块先归一化为分布再取平方根（Hellinger映射），拼接后整体L2归一化，
+因此两个嵌入的点积即为余弦相似度。嵌入各分量非负，持久化矩阵中按 0-255 量化为uint8
+（每个切片 EMBEDDING_DIM 字节），查询时分片转换为float32计算
+"""
+
+import io
+import os
+from typing import Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+COLOR_BINS = 4  # 每通道的颜色直方图分箱数，联合直方图共 COLOR_BINS³ 维
+ORIENTATION_BINS = 8  # 梯度方向直方图（按梯度幅值加权）
+MAGNITUDE_BINS = 8  # 梯度幅值直方图（对数间隔）
+EMBEDDING_DIM = COLOR_BINS ** 3 + ORIENTATION_BINS + MAGNITUDE_BINS
+QUANTIZATION_SCALE = 255  # 量化后的分量 = round(分量 × QUANTIZATION_SCALE)
+
+# 梯度幅值分箱边界（Sobel 3×3 在0-255灰度上的幅值范围约 0-1440）
+_MAGNITUDE_EDGES = np.array([4, 8, 16, 32, 64, 128, 256], dtype=np.float32)
+# 各分块在拼接前的权重：颜色决定外观的大部分，纹理用于区分颜色相近的生长形态
+_BLOCK_WEIGHTS = (1.0, 0.7, 0.5)
+
+
+def _distribution(counts: np.ndarray) -> np.ndarray:
+    total = counts.sum()
+    if total <= 0:
+        return np.zeros(len(counts), dtype=np.float32)
+    return np.sqrt(counts / total).astype(np.float32)
+
+
+def compute_embedding(image_array: np.ndarray) -> np.ndarray:
+    """
+    计算切片嵌入
+
+    Args:
+        image_array: 切片像素数组 (H, W, 3) 或灰度 (H, W)
+
+    Returns:
+        (EMBEDDING_DIM,) float32 单位向量
+    """
+    if image_array.ndim == 2:
+        image_array = np.repeat(image_array[:, :, None], 3, axis=2)
+    rgb = np.ascontiguousarray(image_array[:, :, :3])
+
+    # 联合颜色直方图：每通道量化为 COLOR_BINS 级
+    quantized = (rgb // (256 // COLOR_BINS)).astype(np.intp)
+    codes = (quantized[:, :, 0] * COLOR_BINS + quantized[:, :, 1]) * COLOR_BINS + quantized[:, :, 2]
+    color = np.bincount(codes.ravel(), minlength=COLOR_BINS ** 3).astype(np.float32)
+
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY).astype(np.float32)
+    grad_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+    grad_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+    magnitude, angle = cv2.cartToPolar(grad_x, grad_y)
+    # 方向不区分正负（0-π），只统计有明显梯度的像素
+    orientation_bins = (angle % np.pi * (ORIENTATION_BINS / np.pi)).astype(np.intp) % ORIENTATION_BINS
+    strong = magnitude > _MAGNITUDE_EDGES[0]
+    orientation = np.bincount(orientation_bins[strong], weights=magnitude[strong],
+                              minlength=ORIENTATION_BINS).astype(np.float32)
+    magnitude_hist = np.bincount(np.searchsorted(_MAGNITUDE_EDGES, magnitude.ravel()),
+                                 minlength=MAGNITUDE_BINS).astype(np.float32)
+
+    blocks = [weight * _distribution(block) for weight, block
+              in zip(_BLOCK_WEIGHTS, (color, orientation, magnitude_hist))]
+    embedding = np.concatenate(blocks)
+    norm = float(np.linalg.norm(embedding))
+    return embedding / norm if norm > 0 else embedding
+
+
+def quantize_embedding(embeddings: np.ndarray) -> np.ndarray:
+    """单位嵌入向量（单个或矩阵）量化为uint8"""
+    return np.rint(np.clip(embeddings, 0.0, 1.0) * QUANTIZATION_SCALE).astype(np.uint8)
+
+
+def top_k_cosine(matrix: np.ndarray, query: np.ndarray, k: int, shard_size: int = 65536,
+                 scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    分片暴力搜索与查询向量余弦相似度最高的 k 行（行向量为单位向量乘以 scale，如量化后的矩阵）
+
+    每个分片转换为float32后与查询向量相乘，用 argpartition 保留分片内前 k 个，
+    最后在各分片的候选中取前 k 个；转换的峰值内存为一个分片，与矩阵总行数无关
+
+    Returns:
+        (行下标, 相似度)，按相似度从高到低排序
+    """
+    query = np.asarray(query, dtype=np.float32)
+    norm = float(np.linalg.norm(query))
+    if norm > 0:
+        query = query / (norm * scale)
+    candidates = []
+    scores = []
+    for start in range(0, len(matrix), shard_size):
+        shard_scores = np.asarray(matrix[start:start + shard_size], dtype=np.float32) @ query
+        if len(shard_scores) > k:
+            best = np.argpartition(shard_scores, -k)[-k:]
+        else:
+            best = np.arange(len(shard_scores))
+        candidates.append(best + start)
+        scores.append(shard_scores[best])
+    if not candidates:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    candidates = np.concatenate(candidates)
+    scores = np.concatenate(scores)
+    # 相似度相同时按行下标排序，结果与分片大小无关
+    order = np.lexsort((candidates, -scores))[:k]
+    return candidates[order].astype(np.int64), scores[order]
+
+
+class EmbeddingIndex:
+    """
+    切片嵌入索引
+    条目为 (相对根目录的切片路径, 源文件mtime, 量化嵌入)，矩阵形状 (N, EMBEDDING_DIM)，uint8
+    """
+
+    FILE_VERSION = 1
+
+    def __init__(self, root: str = '', paths: Sequence[str] = (), mtimes: Optional[np.ndarray] = None,
+                 vectors: Optional[np.ndarray] = None):
+        self.root = root
+        self.paths = list(paths)
+        self.mtimes = np.asarray(mtimes if mtimes is not None else [], dtype=np.int64)
+        self.vectors = np.asarray(vectors if vectors is not None else np.empty((0, EMBEDDING_DIM)),
+                                  dtype=np.uint8).reshape(-1, EMBEDDING_DIM)
+        self._positions: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def full_path(self, position: int) -> str:
+        return os.path.join(self.root, self.paths[position])
+
+    def position(self, path: str) -> Optional[int]:
+        """按相对路径查找条目下标"""
+        if self._positions is None:
+            self._positions = {path: position for position, path in enumerate(self.paths)}
+        return self._positions.get(path)
+
+    def lookup(self, path: str, mtime_ns: int) -> Optional[np.ndarray]:
+        """按相对路径查找mtime一致的条目，返回量化嵌入"""
+        position = self.position(path)
+        if position is None or self.mtimes[position] != mtime_ns:
+            return None
+        return self.vectors[position]
+
+    @classmethod
+    def load(cls, index_path: str) -> 'EmbeddingIndex':
+        """
+        读取持久化索引
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            ValueError: 文件版本、向量维度不支持或内容损坏
+        """
+        with np.load(index_path, allow_pickle=False) as data:
+            if int(data['version']) != cls.FILE_VERSION:
+                raise ValueError(f"不支持的嵌入索引版本: {int(data['version'])}")
+            vectors = data['vectors']
+            if vectors.dtype != np.uint8 or vectors.ndim != 2 or vectors.shape[1] != EMBEDDING_DIM:
+                raise ValueError(f"不支持的嵌入矩阵: {vectors.dtype} {vectors.shape}")
+            blob = data['paths'].tobytes().decode('utf-8')
+            paths = blob.split('\n') if blob else []
+            index = cls(str(data['root']), paths, data['mtimes'], vectors)
+        if not (len(index.paths) == len(index.mtimes) == len(index.vectors)):
+            raise ValueError(f"嵌入索引内容不一致: {index_path}")
+        return index
+
+    def save(self, index_path: str) -> None:
+        """写入临时文件后原子替换"""
+        os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+        buffer = io.BytesIO()
+        np.savez(buffer, version=np.array(self.FILE_VERSION), root=np.array(self.root),
+                 paths=np.frombuffer('\n'.join(self.paths).encode('utf-8'), dtype=np.uint8),
+                 mtimes=self.mtimes, vectors=self.vectors)
+        temp_path = f"{index_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(buffer.getbuffer())
+        os.replace(temp_path, index_path)
+
+    def search(self, query: np.ndarray, k: int = 20, shard_size: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+        """返回与查询向量（嵌入或量化嵌入）最相似的 k 个条目 (下标, 余弦相似度)"""
+        return top_k_cosine(self.vectors, query, k, shard_size, QUANTIZATION_SCALE)
+
+    def find_similar(self, path: str, k: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        查找与指定切片最相似的 k 个其他切片
+
+        Args:
+            path: 相对根目录的切片路径
+
+        Returns:
+            (下标, 余弦相似度)，切片不在索引中时为空
+        """
+        position = self.position(path)
+        if position is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        positions, scores = self.search(self.vectors[position], k + 1)
+        keep = positions != position
+        return positions[keep][:k], scores[keep][:k]
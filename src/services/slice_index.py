@@ -0,0 +1,290 @@
+"""
+切片索引
+以NumPy结构化数组保存目录扫描得到的切片记录，每行只包含整数编码（15字节）：
+全景ID、所在目录（相对扫描根目录）和文件名在字符串表中只保存一次，
+filepath / relative_path 在访问时拼接，不再为每个切片保存一个六键字典。
+支持向量化排序和按 (全景ID, 孔位编号) 的O(1)查找；按下标访问和迭代时产出
+与原有切片记录相同的字典，原有调用方无需修改
+"""
+
+import os
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# 切片来源类型，记录中按下标保存
+STRUCTURE_TYPES = ('independent', 'subdirectory', 'virtual', 'packed')
+
+RECORD_DTYPE = np.dtype([
+    ('panoramic', np.int32),   # 全景ID在字符串表中的编号（按全景ID字典序编号）
+    ('hole', np.int16),        # 孔位编号
+    ('structure', np.uint8),   # STRUCTURE_TYPES 下标
+    ('directory', np.int32),   # 相对扫描根目录的目录编号
+    ('filename', np.int32),    # 文件名编号
+])
+
+# 构建时各列使用的 array 类型码
+_COLUMN_TYPECODES = (('panoramic', 'i'), ('hole', 'h'), ('structure', 'B'), ('directory', 'i'), ('filename', 'i'))
+
+
+class StringTable:
+    """字符串驻留表：相同字符串只保存一次，按首次出现顺序编号"""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self._codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._codes
+
+
+class SliceIndexBuilder:
+    """逐条追加切片记录，build() 生成 SliceIndex"""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: 扫描根目录，记录的 relative_path 相对于该目录
+        """
+        self.root = os.path.normpath(root)
+        self._panoramic = StringTable()
+        self._directories = StringTable()
+        self._filenames = StringTable()
+        self._columns = {name: array(typecode) for name, typecode in _COLUMN_TYPECODES}
+
+    def __len__(self) -> int:
+        return len(self._columns['hole'])
+
+    def add(self, panoramic_id: str, hole_number: int, relative_path: str, structure_type: str) -> None:
+        directory, filename = os.path.split(relative_path)
+        self._columns['panoramic'].append(self._panoramic.intern(panoramic_id))
+        self._columns['hole'].append(hole_number)
+        self._columns['structure'].append(STRUCTURE_TYPES.index(structure_type))
+        self._columns['directory'].append(self._directories.intern(directory))
+        self._columns['filename'].append(self._filenames.intern(filename))
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        """追加一条切片字典记录（iter_slice_records 的产出）"""
+        self.add(record['panoramic_id'], record['hole_number'], record['relative_path'],
+                 record['structure_type'])
+
+    def has_panoramic(self, panoramic_id: str) -> bool:
+        return panoramic_id in self._panoramic
+
+    def build(self) -> 'SliceIndex':
+        records = np.empty(len(self), dtype=RECORD_DTYPE)
+        for name, _ in _COLUMN_TYPECODES:
+            records[name] = np.frombuffer(self._columns[name], dtype=records.dtype[name]) if len(self) else []
+
+        # 全景ID按字典序重新编号，按编号排序即按全景ID排序
+        panoramic_ids = sorted(self._panoramic.strings)
+        if panoramic_ids:
+            order = np.argsort(np.array(self._panoramic.strings, dtype=object))
+            remap = np.empty(len(order), dtype=np.int32)
+            remap[order] = np.arange(len(order), dtype=np.int32)
+            records['panoramic'] = remap[records['panoramic']]
+        return SliceIndex(self.root, records, panoramic_ids, self._directories.strings,
+                          self._filenames.strings)
+
+
+class SliceIndex(Sequence):
+    """
+    切片索引（只读序列）
+    index[i] 返回与原有切片记录相同的字典（每次新建），热路径可使用
+    panoramic_id() / hole_number() / filepath() 等按列访问的方法
+    """
+
+    def __init__(self, root: str = '', records: Optional[np.ndarray] = None,
+                 panoramic_ids: Sequence = (), directories: Sequence = (), filenames: Sequence = ()):
+        self.root = root
+        self._records = records if records is not None else np.empty(0, dtype=RECORD_DTYPE)
+        self._panoramic_ids = list(panoramic_ids)
+        self._panoramic_codes = {panoramic_id: code for code, panoramic_id in enumerate(self._panoramic_ids)}
+        self._directories = list(directories)
+        self._filenames = list(filenames)
+        self._lookup: Optional[np.ndarray] = None  # (全景编号, 孔位编号) -> 行号，-1表示不存在
+        self._path_codes: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None  # (目录, 文件名) -> 编号
+
+    @property
+    def records(self) -> np.ndarray:
+        """结构化记录数组（只读视图）"""
+        view = self._records.view()
+        view.flags.writeable = False
+        return view
+
+    @property
+    def nbytes(self) -> int:
+        """记录数组和字符串表占用的近似字节数"""
+        strings = self._panoramic_ids + self._directories + self._filenames
+        return int(self._records.nbytes) + sum(len(value) + 49 for value in strings)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return SliceIndex(self.root, self._records[position], self._panoramic_ids,
+                              self._directories, self._filenames)
+        return self._make_record(self._records[position])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for row in self._records:
+            yield self._make_record(row)
+
+    def _make_record(self, row) -> Dict[str, Any]:
+        filename = self._filenames[row['filename']]
+        relative_path = os.path.join(self._directories[row['directory']], filename)
+        return {
+            'filename': filename,
+            'filepath': os.path.join(self.root, relative_path),
+            'panoramic_id': self._panoramic_ids[row['panoramic']],
+            'hole_number': int(row['hole']),
+            'relative_path': relative_path,
+            'structure_type': STRUCTURE_TYPES[row['structure']]
+        }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """转换为原有的切片字典列表"""
+        return list(self)
+
+    def panoramic_id(self, position: int) -> str:
+        return self._panoramic_ids[self._records['panoramic'][position]]
+
+    def hole_number(self, position: int) -> int:
+        return int(self._records['hole'][position])
+
+    def filepath(self, position: int) -> str:
+        row = self._records[position]
+        return os.path.join(self.root, self._directories[row['directory']], self._filenames[row['filename']])
+
+    def relative_paths(self, structure_types: Optional[Sequence[str]] = None) -> List[str]:
+        """各行的 relative_path（可只取指定来源类型的行），按行顺序"""
+        records = self._records
+        if structure_types is not None:
+            codes = [STRUCTURE_TYPES.index(structure_type) for structure_type in structure_types]
+            records = records[np.isin(records['structure'], codes)]
+        directories, filenames = self._directories, self._filenames
+        return [os.path.join(directories[directory], filenames[filename])
+                for directory, filename in zip(records['directory'].tolist(), records['filename'].tolist())]
+
+    def get_panoramic_ids(self) -> List[str]:
+        """索引中出现的全景ID（字典序）"""
+        return [self._panoramic_ids[code] for code in np.unique(self._records['panoramic'])]
+
+    def sort(self) -> None:
+        """按 (全景ID, 孔位编号) 稳定排序"""
+        order = np.lexsort((self._records['hole'], self._records['panoramic']))
+        self._records = self._records[order]
+        self._lookup = None
+
+    def _get_lookup(self) -> np.ndarray:
+        if self._lookup is None:
+            holes = self._records['hole'].astype(np.int64)
+            width = int(holes.max()) + 1 if len(holes) else 1
+            lookup = np.full((len(self._panoramic_ids), width), -1, dtype=np.int32)
+            keys = self._records['panoramic'].astype(np.int64) * width + holes
+            # 同一 (全景ID, 孔位编号) 出现多次时取第一条
+            unique_keys, first = np.unique(keys, return_index=True)
+            lookup.flat[unique_keys] = first
+            self._lookup = lookup
+        return self._lookup
+
+    def find(self, panoramic_id: str, hole_number: int) -> Optional[int]:
+        """按 (全景ID, 孔位编号) 查找行号，不存在时返回None"""
+        code = self._panoramic_codes.get(panoramic_id)
+        lookup = self._get_lookup()
+        if code is None or not 0 <= hole_number < lookup.shape[1]:
+            return None
+        position = int(lookup[code, hole_number])
+        return position if position >= 0 else None
+
+    def find_first(self, panoramic_id: Optional[str] = None, min_hole: int = 1) -> Optional[int]:
+        """查找（指定全景图中）第一个孔位编号不小于 min_hole 的行号"""
+        mask = self._records['hole'] >= min_hole
+        if panoramic_id is not None:
+            code = self._panoramic_codes.get(panoramic_id)
+            if code is None:
+                return None
+            mask &= self._records['panoramic'] == code
+        positions = np.flatnonzero(mask)
+        return int(positions[0]) if len(positions) else None
+
+    def find_hole(self, hole_number: int) -> Optional[int]:
+        """查找任意全景图中孔位编号为 hole_number 的第一行"""
+        positions = np.flatnonzero(self._records['hole'] == hole_number)
+        return int(positions[0]) if len(positions) else None
+
+    def _get_path_codes(self) -> Tuple[Dict[str, int], Dict[str, int]]:
+        if self._path_codes is None:
+            self._path_codes = ({value: code for code, value in enumerate(self._directories)},
+                                {value: code for code, value in enumerate(self._filenames)})
+        return self._path_codes
+
+    def find_path(self, filepath: str) -> Optional[int]:
+        """按切片文件路径查找第一行，不存在时返回None"""
+        relative_path = os.path.relpath(filepath, self.root) if self.root else filepath
+        directory, filename = os.path.split(relative_path)
+        directory_codes, filename_codes = self._get_path_codes()
+        directory_code = directory_codes.get(directory)
+        filename_code = filename_codes.get(filename)
+        if directory_code is None or filename_code is None:
+            return None
+        mask = (self._records['directory'] == directory_code) & (self._records['filename'] == filename_code)
+        positions = np.flatnonzero(mask)
+        return int(positions[0]) if len(positions) else None
+
+    def exclude(self, relative_paths: Iterable[str] = (), panoramic_ids: Iterable[str] = ()) -> 'SliceIndex':
+        """返回去掉指定 relative_path 的行和指定全景图全部行后的新索引（保持行顺序）"""
+        directory_codes, filename_codes = self._get_path_codes()
+        width = max(len(self._filenames), 1)
+        keys = []
+        for relative_path in relative_paths:
+            directory, filename = os.path.split(relative_path)
+            if directory in directory_codes and filename in filename_codes:
+                keys.append(directory_codes[directory] * width + filename_codes[filename])
+        codes = [self._panoramic_codes[panoramic_id] for panoramic_id in panoramic_ids
+                 if panoramic_id in self._panoramic_codes]
+        records = self._records
+        row_keys = records['directory'].astype(np.int64) * width + records['filename']
+        mask = ~(np.isin(row_keys, keys) | np.isin(records['panoramic'], codes))
+        return SliceIndex(self.root, records[mask], self._panoramic_ids, self._directories, self._filenames)
+
+    def merged(self, other: 'SliceIndex', replace_panoramic_ids: Iterable[str] = ()) -> 'SliceIndex':
+        """
+        返回去掉 replace_panoramic_ids 全部行、再追加 other 各行并排序后的新索引
+        other 的 relative_path 须相对同一根目录；字符串表合并后向量化重新编号，不逐行生成字典
+        """
+        kept = self.exclude(panoramic_ids=replace_panoramic_ids)._records.copy()
+        added = other._records.copy()
+
+        panoramic_ids = sorted(set(self._panoramic_ids) | set(other._panoramic_ids))
+        panoramic_codes = {panoramic_id: code for code, panoramic_id in enumerate(panoramic_ids)}
+        directories, filenames = StringTable(), StringTable()
+        for table, own, others, column in ((directories, self._directories, other._directories, 'directory'),
+                                           (filenames, self._filenames, other._filenames, 'filename')):
+            for value in own:
+                table.intern(value)
+            remap = np.array([table.intern(value) for value in others], dtype=np.int32)
+            added[column] = remap[added[column]] if len(added) else added[column]
+        for records, own_ids in ((kept, self._panoramic_ids), (added, other._panoramic_ids)):
+            if len(records):
+                remap = np.array([panoramic_codes[panoramic_id] for panoramic_id in own_ids], dtype=np.int32)
+                records['panoramic'] = remap[records['panoramic']]
+
+        index = SliceIndex(self.root or other.root, np.concatenate([kept, added]), panoramic_ids,
+                           directories.strings, filenames.strings)
+        index.sort()
+        return index
@@ -0,0 +1,226 @@
+"""
+切片目录扫描器
+基于 os.scandir 单次遍历全景图目录，各全景图子目录在线程池中并行扫描，
+按目录逐个产出图像文件列表；持久化每个目录的mtime，重新扫描时只读取发生变化的目录
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 日志导入
+try:
+    from src.utils.logger import log_debug, log_error
+except ImportError:
+    # 如果日志模块不可用，使用print作为后备
+    def log_debug(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+    def log_error(msg, category=""):
+        print(f"[{category}] {msg}" if category else msg)
+
+
+class SliceScanner:
+    """
+    增量式目录扫描器
+
+    每个目录记录 {mtime_ns, 子目录名, 图像文件名}。目录的mtime只在其直接条目
+    增删或改名时变化，因此mtime未变的目录直接复用上次的条目列表，不再调用 scandir。
+    以 '.' 开头的隐藏目录（如 .annotation_cache）不扫描。
+    """
+
+    STATE_VERSION = 1
+
+    def __init__(self, supported_formats: Iterable[str], max_workers: int = 8,
+                 state_path: Optional[str] = None):
+        """
+        Args:
+            supported_formats: 需要收集的图像扩展名（小写，含'.'）
+            max_workers: 并行扫描子目录的线程数
+            state_path: 目录mtime状态文件路径，为空时不持久化
+        """
+        self.supported_formats = {ext.lower() for ext in supported_formats}
+        self.max_workers = max(1, max_workers)
+        self.state_path = Path(state_path) if state_path else None
+        self._dirs: Dict[str, Dict[str, Any]] = {}
+        self._root: Optional[str] = None
+        self._lock = threading.Lock()
+
+        # 最近一次扫描的统计信息
+        self.stats = {'dirs_scanned': 0, 'dirs_reused': 0, 'files': 0}
+
+    def _load_state(self, root: str) -> Dict[str, Dict[str, Any]]:
+        """读取持久化的目录状态，根目录或版本不匹配时丢弃"""
+        if self._root == root:
+            return self._dirs
+        if self.state_path is None or not self.state_path.exists():
+            return {}
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == self.STATE_VERSION and state.get('root') == root:
+                return state.get('dirs', {})
+        except (OSError, ValueError) as e:
+            log_error(f"读取扫描状态失败 {self.state_path}: {e}", "SLICE_SCANNER")
+        return {}
+
+    def _save_state(self) -> None:
+        """写入临时文件后原子替换"""
+        if self.state_path is None:
+            return
+        temp_path = self.state_path.with_name(f"{self.state_path.name}.tmp")
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.STATE_VERSION, 'root': self._root, 'dirs': self._dirs}, f)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            log_error(f"保存扫描状态失败 {self.state_path}: {e}", "SLICE_SCANNER")
+
+    def _list_directory(self, root: str, rel_dir: str,
+                        old_dirs: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        获取单个目录的条目，mtime未变时复用旧状态
+
+        Returns:
+            (目录状态, 是否调用了scandir)
+        """
+        path = os.path.join(root, rel_dir) if rel_dir else root
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = old_dirs.get(rel_dir)
+        if cached is not None and cached['mtime_ns'] == mtime_ns:
+            return cached, False
+
+        files: List[str] = []
+        subdirs: List[str] = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif os.path.splitext(entry.name)[1].lower() in self.supported_formats:
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        return {'mtime_ns': mtime_ns, 'subdirs': subdirs, 'files': files}, True
+
+    def _walk_subtree(self, root: str, top_rel: str,
+                      old_dirs: Dict[str, Dict[str, Any]]) -> Tuple[List[Tuple[str, List[str]]], Dict[str, Any], int, int]:
+        """
+        遍历一个全景图子目录及其下级目录（在工作线程中执行）
+
+        Returns:
+            ([(相对目录, 图像文件名)], 新目录状态, scandir次数, 复用次数)
+        """
+        listings = []
+        new_dirs = {}
+        scanned = reused = 0
+        stack = [top_rel]
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                state, did_scan = self._list_directory(root, rel_dir, old_dirs)
+            except OSError as e:
+                log_debug(f"跳过无法读取的目录 {rel_dir}: {e}", "SLICE_SCANNER")
+                continue
+            new_dirs[rel_dir] = state
+            scanned += did_scan
+            reused += not did_scan
+            if state['files']:
+                listings.append((rel_dir, state['files']))
+            stack.extend(os.path.join(rel_dir, name) for name in state['subdirs'])
+        return listings, new_dirs, scanned, reused
+
+    def iter_listings(self, root: str, progress_callback=None) -> Iterator[Tuple[str, List[str]]]:
+        """
+        扫描目录树，按目录逐个产出 (相对目录, 图像文件名列表)
+        根目录最先产出，其余子目录按并行扫描完成顺序产出；完整遍历后保存目录状态
+
+        Args:
+            root: 扫描根目录
+            progress_callback: 进度回调函数 (已完成子目录数, 子目录总数, 消息)
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            old_dirs = self._load_state(root)
+            if self.state_path is not None:
+                # 先创建状态目录，避免首次保存状态时改变根目录的mtime
+                try:
+                    self.state_path.parent.mkdir(parents=True, exist_ok=True)
+                except OSError:
+                    pass
+            self.stats = {'dirs_scanned': 0, 'dirs_reused': 0, 'files': 0}
+
+            root_state, did_scan = self._list_directory(root, '', old_dirs)
+            new_dirs = {'': root_state}
+            self.stats['dirs_scanned' if did_scan else 'dirs_reused'] += 1
+            self.stats['files'] += len(root_state['files'])
+            if root_state['files']:
+                yield '', root_state['files']
+
+            subdirs = root_state['subdirs']
+            total = len(subdirs)
+            if progress_callback:
+                progress_callback(0, total, f"扫描子目录... (共{total}个目录)")
+
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='slice_scan') as executor:
+                futures = [executor.submit(self._walk_subtree, root, name, old_dirs) for name in subdirs]
+                for done, future in enumerate(as_completed(futures), 1):
+                    listings, subtree_dirs, scanned, reused = future.result()
+                    new_dirs.update(subtree_dirs)
+                    self.stats['dirs_scanned'] += scanned
+                    self.stats['dirs_reused'] += reused
+                    for rel_dir, files in listings:
+                        self.stats['files'] += len(files)
+                        yield rel_dir, files
+                    if progress_callback:
+                        progress_callback(done, total, f"扫描目录 {done}/{total}...")
+
+            self._root = root
+            self._dirs = new_dirs
+            self._save_state()
+            log_debug(f"目录扫描完成: scandir {self.stats['dirs_scanned']} 个目录, "
+                      f"复用 {self.stats['dirs_reused']} 个目录, {self.stats['files']} 个图像文件",
+                      "SLICE_SCANNER")
+
+    def rescan_subdirs(self, root: str, names: Iterable[str]) -> List[Tuple[str, List[str]]]:
+        """
+        只重新读取根目录和指定的子目录（如监视到变化的全景图子目录），其余目录保持上次扫描的状态
+
+        Args:
+            root: 扫描根目录
+            names: 根目录下的子目录名
+
+        Returns:
+            指定子目录及其下级目录的 [(相对目录, 图像文件名列表)]，已删除的子目录没有条目
+        """
+        root = os.path.abspath(root)
+        names = set(names)
+        with self._lock:
+            old_dirs = self._load_state(root)
+            # 调用方已知这些目录发生变化，不按mtime复用（同一时钟刻度内的两次写入mtime可能相同）
+            root_state, _ = self._list_directory(root, '', {})
+            new_dirs = {rel_dir: state for rel_dir, state in old_dirs.items()
+                        if not rel_dir or rel_dir.split(os.sep, 1)[0] not in names}
+            new_dirs[''] = root_state
+
+            listings = []
+            for name in sorted(names & set(root_state['subdirs'])):
+                subtree_listings, subtree_dirs, _, _ = self._walk_subtree(root, name, {})
+                new_dirs.update(subtree_dirs)
+                listings.extend(subtree_listings)
+
+            self._root = root
+            self._dirs = new_dirs
+            self._save_state()
+            return listings
+
+    def get_listing(self, rel_dir: str = '') -> List[str]:
+        """获取最近一次扫描中某个目录（相对扫描根目录）的图像文件名"""
+        with self._lock:
+            state = self._dirs.get(rel_dir)
+            return list(state['files']) if state else []
@@ -0,0 +1,151 @@
+"""
+缩略图图集
+在进程池中并行生成一张全景图全部孔位的缩略图（draft/reduce 先做整数倍缩小，再缩放到目标尺寸），
+拼接为一张图集，并记录 孔位 -> 图集中矩形 的索引，供网格总览和质检联系表使用
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 缺失或加载失败的孔位占位颜色
+PLACEHOLDER_COLOR = 'lightgray'
+
+
+def downsample_image(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """先用 reduce 做整数倍盒式缩小，再用双线性插值缩放到目标尺寸"""
+    factor = max(1, min(image.width // size[0], image.height // size[1]))
+    if factor > 1:
+        image = image.reduce(factor)
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.BILINEAR)
+    return image
+
+
+def _render_thumbnail(task: Tuple[int, str, Tuple[int, int]]) -> Tuple[int, Optional[bytes], Optional[str]]:
+    """
+    在工作进程中生成单个切片的缩略图
+
+    Returns:
+        (孔位编号, RGB像素字节, 错误信息)
+    """
+    hole_number, image_path, size = task
+    try:
+        with Image.open(image_path) as image:
+            # JPEG等格式可在解码时直接按比例缩小，其他格式无影响
+            image.draft('RGB', size)
+            image = image.convert('RGB') if image.mode != 'RGB' else image
+            return hole_number, downsample_image(image, size).tobytes(), None
+    except Exception as e:
+        return hole_number, None, str(e)
+
+
+@dataclass
+class ThumbnailAtlas:
+    """一张全景图的缩略图图集"""
+    image: Image.Image
+    thumbnail_size: Tuple[int, int]
+    tiles: Dict[int, Tuple[int, int, int, int]] = field(default_factory=dict)  # 孔位 -> (x, y, 宽, 高)
+    missing: List[int] = field(default_factory=list)  # 使用占位图的孔位
+
+    def get_tile(self, hole_number: int) -> Image.Image:
+        """裁剪单个孔位的缩略图"""
+        x, y, width, height = self.tiles[hole_number]
+        return self.image.crop((x, y, x + width, y + height))
+
+    def hole_at(self, x: int, y: int) -> Optional[int]:
+        """根据图集坐标查找孔位（用于网格视图点击）"""
+        for hole_number, (tile_x, tile_y, width, height) in self.tiles.items():
+            if tile_x <= x < tile_x + width and tile_y <= y < tile_y + height:
+                return hole_number
+        return None
+
+    def to_index(self) -> Dict[str, object]:
+        """导出图集索引（可序列化为JSON）"""
+        return {
+            'thumbnail_size': list(self.thumbnail_size),
+            'atlas_size': list(self.image.size),
+            'tiles': {str(hole): list(rect) for hole, rect in self.tiles.items()},
+            'missing': list(self.missing)
+        }
+
+
+class ThumbnailAtlasBuilder:
+    """
+    缩略图图集构建器
+    切片文件在进程池中解码缩小，虚拟切片（已在内存中的数组视图）在当前进程中缩小
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: 工作进程数，为空或0时使用CPU核数，1表示在当前进程中执行
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.errors: Dict[int, str] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def build(self, tiles: Dict[int, Tuple[int, int, int, int]],
+              file_sources: Dict[int, str],
+              array_sources: Optional[Dict[int, np.ndarray]] = None,
+              thumbnail_size: Tuple[int, int] = (50, 50),
+              atlas_size: Optional[Tuple[int, int]] = None) -> ThumbnailAtlas:
+        """
+        构建图集
+
+        Args:
+            tiles: 孔位 -> 图集中的矩形 (x, y, 宽, 高)
+            file_sources: 孔位 -> 切片文件路径
+            array_sources: 孔位 -> 像素数组（虚拟切片、打包切片）
+            thumbnail_size: 缩略图尺寸
+            atlas_size: 图集尺寸，默认覆盖所有矩形
+        """
+        if atlas_size is None:
+            atlas_size = (max((x + w for x, _, w, _ in tiles.values()), default=0),
+                          max((y + h for _, y, _, h in tiles.values()), default=0))
+        atlas_image = Image.new('RGB', atlas_size, PLACEHOLDER_COLOR)
+        rendered = set()
+
+        tasks = [(hole_number, path, thumbnail_size) for hole_number, path in sorted(file_sources.items())]
+        if tasks:
+            if self.max_workers <= 1:
+                outcomes = map(_render_thumbnail, tasks)
+            else:
+                chunksize = max(1, len(tasks) // (self.max_workers * 2))
+                outcomes = self._get_executor().map(_render_thumbnail, tasks, chunksize=chunksize)
+            for hole_number, pixels, error in outcomes:
+                if error is not None:
+                    self.errors[hole_number] = error
+                    continue
+                x, y, _, _ = tiles[hole_number]
+                atlas_image.paste(Image.frombytes('RGB', thumbnail_size, pixels), (x, y))
+                rendered.add(hole_number)
+
+        for hole_number, pixels in (array_sources or {}).items():
+            try:
+                thumbnail = downsample_image(Image.fromarray(np.ascontiguousarray(pixels)), thumbnail_size)
+            except Exception as e:
+                self.errors[hole_number] = str(e)
+                continue
+            x, y, _, _ = tiles[hole_number]
+            atlas_image.paste(thumbnail, (x, y))
+            rendered.add(hole_number)
+
+        missing = sorted(hole for hole in tiles if hole not in rendered)
+        return ThumbnailAtlas(image=atlas_image, thumbnail_size=tuple(thumbnail_size),
+                              tiles=dict(tiles), missing=missing)
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
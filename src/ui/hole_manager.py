@@ -3,6 +3,7 @@
 处理12×10孔位布局的管理和导航
 """
 
+import copy
 from typing import Tuple, List, Optional, Dict, Any
 from dataclasses import dataclass
 
@@ -195,6 +196,15 @@ class HoleManager:
             self.vertical_spacing = self.hole_spacing_y
             self.hole_diameter = min(self.hole_width, self.hole_height)
     
+    def layout_for_size(self, panoramic_width: int, panoramic_height: int) -> 'HoleManager':
+        """
+        返回按指定全景图尺寸设置布局的副本，不修改当前对象
+        （后台线程按各自全景图的尺寸取孔位坐标，不改动界面使用的布局）
+        """
+        layout = copy.copy(self)
+        layout.set_layout_params(panoramic_width, panoramic_height)
+        return layout
+    
     def number_to_position(self, hole_number: int) -> Tuple[int, int]:
         """
         孔位编号转换为行列坐标
@@ -246,6 +256,13 @@ class HoleManager:
         
         return (x, y, self.hole_diameter, self.hole_diameter)
     
+    def get_layout_key(self) -> Tuple[int, ...]:
+        """
+        获取孔位布局参数元组，布局变化时依赖孔位坐标的缓存（覆盖层、虚拟切片）随之失效
+        """
+        return (self.first_hole_x, self.first_hole_y, self.horizontal_spacing,
+                self.vertical_spacing, self.hole_diameter, self.total_holes)
+    
     def get_hole_center_coordinates(self, hole_number: int) -> Tuple[int, int]:
         """
         获取孔位中心坐标
@@ -8,8 +8,11 @@ from tkinter import ttk, filedialog, messagebox
 from tkinter import font as tkFont
 from PIL import Image, ImageTk
 import os
+import queue
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Dict, List, Any, Callable
+from typing import Optional, Dict, List, Any, Callable, Tuple
 import json
 from enum import Enum
 
@@ -59,9 +62,14 @@ if str(src_dir) not in sys.path:
     sys.path.insert(0, str(src_dir))
 
 # 直接导入模块
+from src.core.config import get_config
 from src.ui.hole_manager import HoleManager
 from src.ui.enhanced_annotation_panel import EnhancedAnnotationPanel
 from src.services.panoramic_image_service import PanoramicImageService
+from src.services.prefetch_service import SlicePrefetcher
+from src.services.directory_watcher import DirectoryWatcher
+from src.services.progressive_render import RefinementScheduler, RenderTimings
+from src.services.slice_index import SliceIndex
 from src.services.config_file_service import ConfigFileService
 from src.models.panoramic_annotation import PanoramicAnnotation, PanoramicDataset
 from src.models.enhanced_annotation import EnhancedPanoramicAnnotation, FeatureCombination
@@ -232,9 +240,36 @@ class PanoramicAnnotationGUI:
         self.log_warning = log_warning
         self.log_error = log_error
         
-        # 服务和管理器
-        self.image_service = PanoramicImageService()
+        # 服务和管理器（图像相关设置来自 config/app.yaml 的 image 段）
+        try:
+            image_config = get_config().image
+        except Exception as e:
+            log_error(f"读取配置文件失败，图像设置使用默认值: {e}", "INIT")
+            image_config = None
+        self.image_service = PanoramicImageService(image_config)
         self.hole_manager = HoleManager()
+        image_config = self.image_service.image_config
+        self.prefetcher = SlicePrefetcher(
+            self.image_service,
+            depth=image_config.prefetch_depth,
+            max_workers=image_config.prefetch_workers
+        )
+        # 提前启动并预热全景图解码进程池
+        self.image_service.get_decode_service()
+        # 后台测速选择解码后端（本机已有测速结果时直接读取）
+        threading.Thread(target=self.image_service.select_decode_backends,
+                         name="decode-backend-select", daemon=True).start()
+        self._pending_panoramic_decode = None  # (全景ID, 全景图路径, Future)
+        self._failed_panoramic_decodes = set()
+        # 两阶段渲染：导航时先快速重采样显示，停止导航后空闲时再高质量重绘
+        self.progressive_render = image_config.progressive_render
+        self.refine_scheduler = RefinementScheduler(self.root, image_config.refine_delay_ms)
+        self.render_timings = RenderTimings()
+        self._navigation_start = None  # 本次导航开始时间（perf_counter）
+        self._slice_refine_source = None  # (增强切片, 显示尺寸)，等待LANCZOS重绘
+        self._slice_image_item = None
+        self._panoramic_image_item = None
+        self._panoramic_render_args = None  # (全景图路径, 显示宽度, 显示高度)
         self.config_service = ConfigFileService()
         
         # 模型建议服务 - 仅在可用时初始化
@@ -260,7 +295,11 @@ class PanoramicAnnotationGUI:
         
         # 数据
         self.current_dataset = PanoramicDataset("新数据集", "全景图像标注数据集")
-        self.slice_files: List[Dict[str, Any]] = []
+        self.slice_files = SliceIndex()  # 按下标访问得到切片字典
+        self.hash_index = None  # 当前目录的切片感知哈希索引，由后台线程生成
+        self.embedding_index = None  # 当前目录的切片嵌入索引，由后台线程生成，用于查找相似孔位
+        self.directory_watcher = None  # 监视当前目录新写入的全景图和cfg文件
+        self._directory_changes = queue.Queue()  # 监视线程发现的 (监视器, 变化)，由界面线程轮询取出
         self.current_slice_index = 0
         self.current_panoramic_id = ""
         self.current_hole_number = 1
@@ -338,7 +377,7 @@ class PanoramicAnnotationGUI:
         self.panoramic_directory = ""
         
         # 图像显示
-        self.panoramic_image: Optional[Image.Image] = None
+        self.panoramic_metadata = None  # 当前全景图的尺寸等元数据（ImageMetadata，不含像素）
         self.slice_image: Optional[Image.Image] = None
         self.panoramic_photo: Optional[ImageTk.PhotoImage] = None
         self.slice_photo: Optional[ImageTk.PhotoImage] = None
@@ -642,6 +681,10 @@ class PanoramicAnnotationGUI:
         # 模型建议按钮
         ttk.Button(button_frame, text="模型建议", 
                   command=self.import_model_suggestions).pack(side=tk.LEFT, padx=2)
+        
+        # 相似孔位按钮（Ctrl+F）
+        ttk.Button(button_frame, text="相似孔位", 
+                  command=self.show_similar_slices).pack(side=tk.LEFT, padx=2)
     
     def create_annotation_panel(self, parent):
         """创建标注控制面板"""
@@ -1151,6 +1194,9 @@ class PanoramicAnnotationGUI:
         # 窗口尺寸变化事件
         self.root.bind('<Configure>', self.on_window_resize)
         
+        # 窗口关闭事件
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
         # 只在非输入控件获得焦点时响应快捷键
         # 方向导航快捷键
         self.root.bind('<Key-1>', self.on_key_1)
@@ -1175,6 +1221,9 @@ class PanoramicAnnotationGUI:
         # 版本信息快捷键
         self.root.bind('<F1>', lambda e: self.show_about_dialog())  # F1 显示操作指南
         
+        # 相似孔位快捷键
+        self.root.bind('<Control-f>', lambda e: self.show_similar_slices())  # Ctrl+F 查找相似孔位
+        
         # 其他快捷键
         self.root.bind('<space>', self.on_key_space)
         self.root.bind('<Return>', self.on_key_return)
@@ -1182,6 +1231,17 @@ class PanoramicAnnotationGUI:
         # 设置焦点以接收键盘事件
         self.root.focus_set()
     
+    def on_closing(self):
+        """窗口关闭时停止后台预取和磁盘缓存线程"""
+        try:
+            self._stop_directory_watcher()
+            self.prefetcher.shutdown(wait=False)
+            # 完成磁盘缓存的剩余写入
+            self.image_service.shutdown()
+        except Exception as e:
+            log_error(f"关闭后台线程失败: {e}", "PREFETCH")
+        self.root.destroy()
+    
     def is_input_widget_focused(self):
         """检查当前焦点是否在输入控件上"""
         focused_widget = self.root.focus_get()
@@ -1369,6 +1429,13 @@ class PanoramicAnnotationGUI:
             return False
 
         progress_dialog = None
+        
+        # 取消旧数据集的预取任务，停止监视旧目录
+        self.prefetcher.cancel_pending()
+        self._stop_directory_watcher()
+        
+        # 在全景图目录下启用磁盘缓存（.annotation_cache）
+        self.image_service.enable_disk_cache(self.panoramic_directory)
 
         try:
             # 立即显示进度条以提供即时反馈
@@ -1377,44 +1444,6 @@ class PanoramicAnnotationGUI:
             progress_dialog.update_progress(0, "开始扫描文件...")
             log_debug("进度对话框已创建", "LOAD_DATA")
             
-            # 预扫描：更精确的文件计数 - 只统计图像文件
-            from pathlib import Path
-            directory_path = Path(self.panoramic_directory)
-            
-            progress_dialog.update_progress(5, "正在统计图像文件...")
-            
-            # 只统计实际的图像文件
-            image_extensions = {'.bmp', '.png', '.jpg', '.jpeg', '.tiff', '.tif'}
-            image_files = []
-            subdirs = []
-            
-            progress_dialog.update_progress(10, "正在扫描主目录...")
-            
-            for item in directory_path.iterdir():
-                if item.is_file() and item.suffix.lower() in image_extensions:
-                    image_files.append(item)
-                elif item.is_dir():
-                    subdirs.append(item)
-                    # 统计子目录中的图像文件
-                    for sub_item in item.iterdir():
-                        if sub_item.is_file() and sub_item.suffix.lower() in image_extensions:
-                            image_files.append(sub_item)
-            
-            progress_dialog.update_progress(20, "文件统计完成...")
-            
-            total_files = len(image_files)
-            log_debug(f"检测到 {total_files} 个图像文件", "LOAD_DATA")
-            
-            # 决定是否继续显示进度条
-            show_progress = total_files > 5  # 进一步降低阈值到5个文件
-            log_debug(f"继续显示进度条: {show_progress} (文件数: {total_files})", "LOAD_DATA")
-
-            if not show_progress:
-                # 如果文件不多，关闭进度条
-                progress_dialog.close()
-                progress_dialog = None
-                log_debug("文件数量较少，关闭进度条", "LOAD_DATA")
-
             # 进度回调函数
             def progress_callback(current, total, message):
                 if progress_dialog:
@@ -1433,9 +1462,11 @@ class PanoramicAnnotationGUI:
             # 使用子目录模式：直接使用全景目录下的子目录
             log_debug("开始调用 get_slice_files_from_directory", "LOAD_DATA")
             
-            # 确保进度回调被正确传递
-            if progress_dialog:
-                progress_callback(0, total_files, "开始处理切片文件...")
+            # 目录扫描与切片解析为单次遍历，子目录并行扫描，未变化的目录复用上次的扫描状态
+            progress_callback(0, 100, "开始扫描切片文件...")
+            
+            # 扫描前记录监视基线，扫描期间写入的全景图之后也会被增量纳入
+            watcher = self._create_directory_watcher()
             
             self.slice_files = self.image_service.get_slice_files_from_directory(
                 self.panoramic_directory, self.panoramic_directory, progress_callback)
@@ -1454,7 +1485,7 @@ class PanoramicAnnotationGUI:
 
             # 更新进度 - 数据加载完成
             if progress_dialog:
-                progress_callback(total_files, total_files, "数据加载完成，正在初始化界面...")
+                progress_callback(100, 100, "数据加载完成，正在初始化界面...")
 
             # 更新全景图列表
             self.update_panoramic_list()
@@ -1501,6 +1532,20 @@ class PanoramicAnnotationGUI:
             self.update_progress()
             # 保留关键的用户提示信息
             log_info(f"数据加载完成: {len(self.slice_files)} 个切片", "LOAD_DATA")
+
+            # 后台计算切片感知哈希和外观嵌入（已有且未变化的切片直接复用），用于检测重复切片和查找相似孔位
+            self.hash_index = None
+            self.embedding_index = None
+            image_config = self.image_service.image_config
+            if image_config.perceptual_hash_on_scan or image_config.slice_embeddings_on_scan:
+                threading.Thread(target=self._update_slice_indexes,
+                                 args=(self.slice_files, self.panoramic_directory),
+                                 name="slice-indexes", daemon=True).start()
+            
+            if watcher is not None:
+                self.directory_watcher = watcher
+                watcher.start()
+                self.root.after(100, self._poll_directory_changes, watcher)
             return True
 
         except Exception as e:
@@ -1514,6 +1559,111 @@ class PanoramicAnnotationGUI:
             messagebox.showerror("错误", f"加载数据失败: {str(e)}")
             return False
     
+    def _create_directory_watcher(self) -> Optional[DirectoryWatcher]:
+        """创建当前目录的监视器并记录基线（未启用目录监视时返回None）"""
+        image_config = self.image_service.image_config
+        if not image_config.watch_directory:
+            return None
+        watcher = DirectoryWatcher(self.panoramic_directory, self.image_service.supported_formats,
+                                   image_config.watch_interval_ms / 1000.0)
+        # 回调在监视线程中执行，只把变化放入队列，由界面线程取出处理
+        watcher.on_change = lambda changes: self._directory_changes.put((watcher, changes))
+        watcher.capture_baseline()
+        return watcher
+    
+    def _stop_directory_watcher(self):
+        """停止监视当前目录并丢弃尚未处理的变化"""
+        watcher, self.directory_watcher = self.directory_watcher, None
+        if watcher is not None:
+            watcher.stop()
+        while True:
+            try:
+                self._directory_changes.get_nowait()
+            except queue.Empty:
+                break
+    
+    def _poll_directory_changes(self, watcher: DirectoryWatcher):
+        """界面线程中：取出监视线程发现的变化并应用，监视器被停止或替换后结束轮询"""
+        if watcher is not self.directory_watcher:
+            return
+        while True:
+            try:
+                source, changes = self._directory_changes.get_nowait()
+            except queue.Empty:
+                break
+            if source is watcher:
+                self._apply_directory_changes(changes)
+        self.root.after(100, self._poll_directory_changes, watcher)
+    
+    def _apply_directory_changes(self, changes):
+        """增量扫描变化的全景图并替换切片索引，重新导入变化的cfg标注，保持当前全景图和孔位不变"""
+        panoramic_ids = changes.panoramas | changes.removed
+        if panoramic_ids:
+            try:
+                slice_files = self.image_service.ingest_panoramas(self.slice_files, self.panoramic_directory,
+                                                                  panoramic_ids)
+            except Exception as e:
+                log_error(f"增量纳入全景图失败: {e}", "DIR_WATCHER")
+                return
+            self.slice_files = slice_files
+            index = slice_files.find(self.current_panoramic_id, self.current_hole_number)
+            if index is not None:
+                self.current_slice_index = index
+            elif slice_files:
+                # 当前全景图已被删除
+                self.current_slice_index = min(self.current_slice_index, len(slice_files) - 1)
+                self.load_current_slice()
+            self.update_panoramic_list()
+            self.update_progress()
+        
+        # cfg变化：丢弃该全景图未确认的配置导入标注，下次进入时按新内容重新导入
+        config_cache = getattr(self, '_config_cache', set())
+        for panoramic_id in changes.configs:
+            config_cache.discard(f"{panoramic_id}_config")
+            self.current_dataset.annotations = [
+                ann for ann in self.current_dataset.annotations
+                if not (ann.panoramic_image_id == panoramic_id and ann.annotation_source == 'config'
+                        and not ann.is_confirmed)]
+        if self.current_panoramic_id in changes.configs:
+            self.load_config_annotations()
+        self.update_statistics()
+        
+        elapsed_ms = (time.monotonic() - changes.first_seen) * 1000 if changes.first_seen else 0.0
+        added = sorted(changes.panoramas | changes.configs)
+        self.update_status(f"已纳入新写入的全景图/配置 {len(added)} 个，共 {len(self.slice_files)} 个切片"
+                           f"（发现到可见 {elapsed_ms:.0f}ms）")
+        log_info(f"目录变化已纳入: {changes}，发现到可见 {elapsed_ms:.0f}ms", "DIR_WATCHER")
+        
+        image_config = self.image_service.image_config
+        if changes.panoramas and (image_config.perceptual_hash_on_scan or image_config.slice_embeddings_on_scan):
+            threading.Thread(target=self._update_slice_indexes,
+                             args=(self.slice_files, self.panoramic_directory),
+                             name="slice-indexes", daemon=True).start()
+    
+    def _update_slice_indexes(self, slice_files, directory: str):
+        """在后台线程中更新感知哈希索引和切片嵌入索引，记录发现的重复切片数量"""
+        image_config = self.image_service.image_config
+        if image_config.perceptual_hash_on_scan:
+            try:
+                hash_index = self.image_service.update_hash_index(slice_files, directory)
+                groups = hash_index.find_duplicate_groups(image_config.duplicate_max_distance)
+                if slice_files is self.slice_files:
+                    self.hash_index = hash_index
+                if groups:
+                    log_info(f"发现 {len(groups)} 组重复或近似重复切片（共 {sum(len(group) for group in groups)} 个），"
+                             f"可使用 tools/find_duplicates.py 查看报告", "SLICE_HASH")
+            except Exception as e:
+                log_error(f"计算切片感知哈希失败: {e}", "SLICE_HASH")
+        
+        if image_config.slice_embeddings_on_scan:
+            try:
+                embedding_index = self.image_service.update_embedding_index(slice_files, directory)
+                if slice_files is self.slice_files:
+                    self.embedding_index = embedding_index
+                log_debug(f"切片嵌入索引就绪: {len(embedding_index)} 个切片", "SIMILAR")
+            except Exception as e:
+                log_error(f"计算切片嵌入失败: {e}", "SIMILAR")
+    
     def find_first_valid_slice_index(self) -> int:
         """找到第一个有效孔位的切片索引"""
         if not self.slice_files:
@@ -1521,14 +1671,9 @@ class PanoramicAnnotationGUI:
         
         start_hole = self.hole_manager.start_hole_number
         
-        # 查找第一个孔位号大于等于起始孔位的切片
-        for i, slice_file in enumerate(self.slice_files):
-            hole_number = slice_file.get('hole_number', 1)
-            if hole_number >= start_hole:
-                return i
-        
-        # 如果没找到有效孔位，返回0
-        return 0
+        # 查找第一个孔位号大于等于起始孔位的切片，没找到有效孔位时返回0
+        index = self.slice_files.find_first(min_hole=start_hole)
+        return index if index is not None else 0
     
     def _load_annotations_optimized(self):
         """优化的标注加载：一次性设置所有属性，避免多次UI更新"""
@@ -1795,6 +1940,11 @@ class PanoramicAnnotationGUI:
         current_file = self.slice_files[self.current_slice_index]
         self.log_debug(f"load_current_slice: 当前文件 {current_file.get('filepath', 'Unknown')}")
         
+        # 再次导航时取消尚未执行的高质量重绘
+        self._navigation_start = time.perf_counter()
+        self.refine_scheduler.cancel()
+        self._slice_refine_source = None
+        
         try:
             # 检查全景图是否改变
             old_panoramic_id = getattr(self, 'current_panoramic_id', None)
@@ -1863,47 +2013,55 @@ class PanoramicAnnotationGUI:
             if self.current_panoramic_id and self.current_panoramic_id in self.panoramic_ids:
                 self.panoramic_id_var.set(self.current_panoramic_id)
             
-            # 加载切片图像
+            # 加载切片图像（预取命中时直接使用缓存）
             self.slice_image = self.image_service.load_slice_image(current_file['filepath'])
             if self.slice_image:
                 # 增强显示效果
-                enhanced_slice = self.image_service.enhance_slice_image(self.slice_image)
+                enhanced_slice = self.image_service.get_enhanced_slice_image(current_file['filepath'])
                 
                 # 获取画布尺寸用于缩放
                 canvas_width = self.slice_canvas.winfo_width() or 200
                 canvas_height = self.slice_canvas.winfo_height() or 200
                 
-                # 计算合适的缩放比例，充分利用可视区域
-                img_width, img_height = enhanced_slice.size
-                scale_factor = min((canvas_width - 20) / img_width, (canvas_height - 20) / img_height)
-                scale_factor = min(scale_factor, 2.5)  # 最大放大2.5倍，避免过度模糊
-                
-                # 缩放图像以更好地利用空间
-                if scale_factor > 1.0:  # 只有当需要放大时才缩放
-                    new_width = int(img_width * scale_factor)
-                    new_height = int(img_height * scale_factor)
-                    enhanced_slice = enhanced_slice.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                # 按画布等比放大以充分利用可视区域（最多2.5倍，不缩小）
+                display_size = self.image_service.compute_slice_display_size(
+                    enhanced_slice.width, enhanced_slice.height, canvas_width, canvas_height)
+                if display_size != enhanced_slice.size:
+                    if self.progressive_render:
+                        # 先用双线性插值快速显示，停止导航后再用LANCZOS重绘
+                        self._slice_refine_source = (enhanced_slice, display_size)
+                        enhanced_slice = enhanced_slice.resize(display_size, Image.Resampling.BILINEAR)
+                    else:
+                        enhanced_slice = enhanced_slice.resize(display_size, Image.Resampling.LANCZOS)
                 
                 self.slice_photo = ImageTk.PhotoImage(enhanced_slice)
                 
                 # 显示在画布上
                 self.slice_canvas.delete("all")
+                self._slice_image_item = None
                 if canvas_width > 1 and canvas_height > 1:  # 确保画布已初始化
                     x = canvas_width // 2
                     y = canvas_height // 2
-                    self.slice_canvas.create_image(x, y, image=self.slice_photo)
+                    self._slice_image_item = self.slice_canvas.create_image(x, y, image=self.slice_photo)
                     
                     # 添加标注状态指示
                     self.draw_slice_annotation_indicator(canvas_width, canvas_height)
             
             # 加载对应的全景图（强制每次都加载以确保刷新）
             self.log_debug(f"load_current_slice: 强制调用load_panoramic_image (panoramic_changed={panoramic_changed})")
-            self.load_panoramic_image()
+            self.load_panoramic_image(fast=self.progressive_render)
             self.log_debug("load_current_slice: load_panoramic_image调用完成")
             
+            # 后台预取前后相邻切片和下一张全景图，跳转时取消过期任务
+            self.prefetcher.schedule(self.slice_files, self.current_slice_index,
+                                     self.panoramic_directory)
+            
             # 更新当前孔位指示框
             self.draw_current_hole_indicator()
             
+            # 快速预览已交给画布：记录首像素时间，需要时安排高质量重绘
+            self._finish_preview_render()
+            
             # 更新切片信息，包含标注状态
             self.update_slice_info_display()
             
@@ -2003,8 +2161,100 @@ class PanoramicAnnotationGUI:
         except Exception as e:
             log_error(f"验证同步失败: {e}", "SYNC")
     
-    def load_panoramic_image(self):
-        """加载全景图"""
+    def _defer_panoramic_render(self, panoramic_file: str, display_size: Tuple[int, int]) -> bool:
+        """
+        显示底图未缓存时提交到解码进程池，主线程不等待解码和缩放
+        
+        Returns:
+            已提交（或正在等待）后台解码时返回True
+        """
+        pending = self._pending_panoramic_decode
+        if pending is not None and pending[1] == panoramic_file:
+            return True
+        if panoramic_file in self._failed_panoramic_decodes:
+            return False
+        
+        future = self.image_service.decode_async('panoramic', panoramic_file, display_size)
+        if future is None:
+            return False
+        
+        self._pending_panoramic_decode = (self.current_panoramic_id, panoramic_file, future)
+        self.panoramic_info_label.config(text=f"正在加载全景图: {self.current_panoramic_id}...")
+        self.root.after(15, self._poll_panoramic_decode)
+        return True
+    
+    def _poll_panoramic_decode(self):
+        """轮询后台解码结果，完成后渲染仍为当前全景图的结果"""
+        pending = self._pending_panoramic_decode
+        if pending is None:
+            return
+        panoramic_id, panoramic_file, future = pending
+        if not future.done():
+            self.root.after(15, self._poll_panoramic_decode)
+            return
+        
+        self._pending_panoramic_decode = None
+        if future.exception() is not None:
+            # 后台解码失败时回退到主线程同步解码
+            self._failed_panoramic_decodes.add(panoramic_file)
+        if panoramic_id == self.current_panoramic_id:
+            self.load_panoramic_image()
+    
+    def _get_panoramic_annotated_holes(self) -> Dict[int, str]:
+        """获取当前全景图已标注孔位 -> 生长级别"""
+        annotated_holes = {}
+        for ann in self.current_dataset.get_annotations_by_panoramic_id(self.current_panoramic_id):
+            annotated_holes[ann.hole_number] = ann.growth_level
+        return annotated_holes
+    
+    def _finish_preview_render(self):
+        """记录快速预览的首像素时间，切片或全景图底图为快速重采样结果时安排高质量重绘"""
+        if self._navigation_start is None:
+            return
+        self.render_timings.record('preview', (time.perf_counter() - self._navigation_start) * 1000)
+        self._navigation_start = None
+        
+        # 每100次导航输出一次首像素时间统计
+        if self.render_timings.count('preview') % 100 == 0:
+            log_perf(f"渐进式渲染耗时 {self.render_timings.format_summary()}")
+        
+        if self._slice_refine_source is not None or self.image_service.overlay_renderer.base_is_draft:
+            self.refine_scheduler.schedule(self._refine_display)
+    
+    def _refine_display(self):
+        """导航停止后的高质量重绘：LANCZOS放大切片，重建完整的全景图底图层（只替换画布上的图像）"""
+        start = time.perf_counter()
+        try:
+            if self._slice_refine_source is not None:
+                source, display_size = self._slice_refine_source
+                self._slice_refine_source = None
+                self.slice_photo = ImageTk.PhotoImage(source.resize(display_size, Image.Resampling.LANCZOS))
+                if self._slice_image_item is not None:
+                    self.slice_canvas.itemconfig(self._slice_image_item, image=self.slice_photo)
+            
+            if self.image_service.overlay_renderer.base_is_draft and self._panoramic_render_args:
+                panoramic_file, target_width, target_height = self._panoramic_render_args
+                display_panoramic = self.image_service.render_panoramic_overlay(
+                    panoramic_file,
+                    self.current_hole_number,
+                    self._get_panoramic_annotated_holes(),
+                    max_width=target_width,
+                    max_height=target_height
+                )
+                self.panoramic_photo = ImageTk.PhotoImage(display_panoramic)
+                if self._panoramic_image_item is not None:
+                    self.panoramic_canvas.itemconfig(self._panoramic_image_item, image=self.panoramic_photo)
+        except Exception as e:
+            log_error(f"高质量重绘失败: {e}", "RENDER")
+        self.render_timings.record('refine', (time.perf_counter() - start) * 1000)
+    
+    def load_panoramic_image(self, fast: bool = False):
+        """
+        加载全景图
+        
+        Args:
+            fast: 快速预览（导航过程中使用），底图未缓存时先显示草稿底图，由 _refine_display 高质量重绘
+        """
         if not self.current_panoramic_id:
             return
         
@@ -2067,20 +2317,11 @@ class PanoramicAnnotationGUI:
                 self.panoramic_info_label.config(text=f"未找到全景图: {self.current_panoramic_id}")
                 return
             
-            # 加载全景图
-            self.panoramic_image = self.image_service.load_panoramic_image(panoramic_file)
-            if self.panoramic_image:
+            # 只读取全景图元数据（尺寸）并设置孔位布局，显示图像由覆盖层渲染按显示尺寸生成
+            self.panoramic_metadata = self.image_service.load_panoramic_metadata(panoramic_file)
+            if self.panoramic_metadata:
                 # 获取已标注孔位信息
-                annotated_holes = {}
-                for ann in self.current_dataset.get_annotations_by_panoramic_id(self.current_panoramic_id):
-                    annotated_holes[ann.hole_number] = ann.growth_level
-                
-                # 创建带标注覆盖的全景图
-                overlay_image = self.image_service.create_panoramic_overlay(
-                    self.panoramic_image, 
-                    self.current_hole_number,
-                    annotated_holes
-                )
+                annotated_holes = self._get_panoramic_annotated_holes()
                 
                 # 调整尺寸适应显示 - 使用fill模式减少黑边，更好利用画布空间
                 canvas_width = self.panoramic_canvas.winfo_width()
@@ -2098,22 +2339,34 @@ class PanoramicAnnotationGUI:
                 target_width = max(canvas_width - 40, 1220)  # 最小1220px宽度，适应右侧360px面板
                 target_height = max(canvas_height - 40, 750)  # 最小750px高度
                 
-                display_panoramic = self.image_service.resize_image_for_display(
-                    overlay_image, target_width, target_height, fill_mode='fit'
+                if self._defer_panoramic_render(panoramic_file, (target_width, target_height)):
+                    # 显示底图在解码进程中准备，完成后重新调用本方法渲染
+                    return
+                
+                # 底图层（显示金字塔缩放结果 + 孔位编号）已缓存时只重绘状态变化的孔位
+                display_panoramic = self.image_service.render_panoramic_overlay(
+                    panoramic_file,
+                    self.current_hole_number,
+                    annotated_holes,
+                    max_width=target_width,
+                    max_height=target_height,
+                    fast=fast
                 )
                 self.panoramic_photo = ImageTk.PhotoImage(display_panoramic)
+                self._panoramic_render_args = (panoramic_file, target_width, target_height)
                 
                 # 显示在画布上
                 self.panoramic_canvas.delete("all")
+                self._panoramic_image_item = None
                 canvas_width = self.panoramic_canvas.winfo_width()
                 canvas_height = self.panoramic_canvas.winfo_height()
                 if canvas_width > 1 and canvas_height > 1:
                     x = canvas_width // 2
                     y = canvas_height // 2
-                    self.panoramic_canvas.create_image(x, y, image=self.panoramic_photo)
+                    self._panoramic_image_item = self.panoramic_canvas.create_image(x, y, image=self.panoramic_photo)
                 
                 # 更新全景图信息
-                self.panoramic_info_label.config(text=f"全景图: {self.current_panoramic_id} ({self.panoramic_image.width}×{self.panoramic_image.height})")
+                self.panoramic_info_label.config(text=f"全景图: {self.current_panoramic_id} ({self.panoramic_metadata.width}×{self.panoramic_metadata.height})")
             
         except FileNotFoundError as e:
             log_debug(f"全景图文件未找到: {str(e)}", "LOAD_PANORAMIC")
@@ -2302,10 +2555,10 @@ class PanoramicAnnotationGUI:
 
     def draw_current_hole_indicator(self):
         """更新当前孔位的外框颜色状态"""
-        log_debug(f"draw_current_hole_indicator 调用 - panoramic_image: {self.panoramic_image is not None}, current_hole_number: {getattr(self, 'current_hole_number', 'N/A')}", "DISPLAY")
+        log_debug(f"draw_current_hole_indicator 调用 - panoramic_metadata: {self.panoramic_metadata is not None}, current_hole_number: {getattr(self, 'current_hole_number', 'N/A')}", "DISPLAY")
         
-        if not self.panoramic_image or not hasattr(self, 'current_hole_number'):
-            log_debug("draw_current_hole_indicator 早期退出: 缺少panoramic_image或current_hole_number", "DISPLAY")
+        if not self.panoramic_metadata or not hasattr(self, 'current_hole_number'):
+            log_debug("draw_current_hole_indicator 早期退出: 缺少panoramic_metadata或current_hole_number", "DISPLAY")
             return
             
         # 直接调用绘制所有配置框的方法，会自动高亮当前孔位
@@ -2313,7 +2566,7 @@ class PanoramicAnnotationGUI:
     
     def draw_all_config_hole_boxes(self):
         """在全景图上绘制所有孔位的配置状态框，当前孔位用特殊样式高亮，并显示人工确认状态"""
-        if not self.panoramic_image or not hasattr(self, 'current_panoramic_id'):
+        if not self.panoramic_metadata or not hasattr(self, 'current_panoramic_id'):
             return
 
         try:
@@ -2325,8 +2578,8 @@ class PanoramicAnnotationGUI:
                 return
 
             # 计算显示图像的实际尺寸（保持宽高比）
-            original_width = self.panoramic_image.width
-            original_height = self.panoramic_image.height
+            original_width = self.panoramic_metadata.width
+            original_height = self.panoramic_metadata.height
 
             # 计算缩放比例（保持宽高比，适应画布）
             scale_w = (canvas_width - 20) / original_width
@@ -4715,13 +4968,12 @@ class PanoramicAnnotationGUI:
             hole_number = int(self.hole_number_var.get())
             
             # 查找对应的切片文件索引
-            for i, file_info in enumerate(self.slice_files):
-                if (file_info['panoramic_id'] == self.current_panoramic_id and 
-                    file_info['hole_number'] == hole_number):
-                    self.current_slice_index = i
-                    self.load_current_slice()
-                    self.update_progress()
-                    return
+            index = self.slice_files.find(self.current_panoramic_id, hole_number)
+            if index is not None:
+                self.current_slice_index = index
+                self.load_current_slice()
+                self.update_progress()
+                return
             
             messagebox.showwarning("警告", f"未找到孔位 {hole_number} 的切片文件")
             
@@ -4766,23 +5018,81 @@ class PanoramicAnnotationGUI:
             return
             
         # 查找对应的切片文件索引
-        for i, file_info in enumerate(self.slice_files):
-            if (file_info['panoramic_id'] == self.current_panoramic_id and 
-                file_info['hole_number'] == hole_number):
-                self.current_slice_index = i
-                self.load_current_slice()
-                self.update_progress()
-                return
+        index = self.slice_files.find(self.current_panoramic_id, hole_number)
+        if index is not None:
+            self.current_slice_index = index
+            self.load_current_slice()
+            self.update_progress()
+            return
         
         # 如果当前全景图没有该孔位，尝试查找其他全景图
-        for i, file_info in enumerate(self.slice_files):
-            if file_info['hole_number'] == hole_number:
-                self.current_slice_index = i
-                self.load_current_slice()
-                # 导航后强制刷新统计和状态
-                self.root.after(10, self._force_navigation_refresh)
-                self.update_progress()
+        index = self.slice_files.find_hole(hole_number)
+        if index is not None:
+            self.current_slice_index = index
+            self.load_current_slice()
+            # 导航后强制刷新统计和状态
+            self.root.after(10, self._force_navigation_refresh)
+            self.update_progress()
+    
+    def show_similar_slices(self):
+        """查找与当前孔位外观最相似的切片，双击结果跳转到对应孔位"""
+        if not self.slice_files:
+            return
+        if self.embedding_index is None:
+            messagebox.showinfo("相似孔位", "切片嵌入索引正在后台生成，请稍后再试")
+            return
+        
+        current = self.slice_files[self.current_slice_index]
+        relative_path = os.path.relpath(current['filepath'], self.embedding_index.root)
+        positions, scores = self.embedding_index.find_similar(
+            relative_path, self.image_service.image_config.similar_slices_top_k)
+        if not len(positions):
+            messagebox.showinfo("相似孔位", "当前孔位不在切片嵌入索引中")
+            return
+        
+        results = []
+        for position, score in zip(positions.tolist(), scores.tolist()):
+            index = self.slice_files.find_path(self.embedding_index.full_path(position))
+            if index is not None:
+                results.append((index, score))
+        
+        similar_window = tk.Toplevel(self.root)
+        similar_window.title(f"相似孔位 - {current['panoramic_id']} 孔位{current['hole_number']}")
+        similar_window.geometry("420x480")
+        similar_window.transient(self.root)
+        
+        tree = ttk.Treeview(similar_window, columns=('panoramic', 'hole', 'score', 'growth'),
+                            show='headings', selectmode='browse')
+        for column, heading, width in (('panoramic', "全景图", 140), ('hole', "孔位", 60),
+                                       ('score', "相似度", 80), ('growth', "标注", 100)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.CENTER)
+        # 行记录 (全景ID, 孔位编号)：目录监视纳入新全景图后切片索引会重建，下标不再有效
+        rows = {}
+        for row, (index, score) in enumerate(results):
+            panoramic_id, hole_number = self.slice_files.panoramic_id(index), self.slice_files.hole_number(index)
+            annotation = self.current_dataset.get_annotation_by_hole(panoramic_id, hole_number)
+            growth = self._map_growth_level_for_display(annotation.growth_level) if annotation else "未标注"
+            rows[str(row)] = (panoramic_id, hole_number)
+            tree.insert('', tk.END, iid=str(row), values=(panoramic_id, hole_number, f"{score:.3f}", growth))
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        
+        def go_to_selected(event=None):
+            selection = tree.selection()
+            if not selection:
                 return
+            index = self.slice_files.find(*rows[selection[0]])
+            if index is None:
+                self.update_status(f"切片已不在当前目录中: {rows[selection[0]][0]} 孔位{rows[selection[0]][1]}")
+                return
+            self.current_slice_index = index
+            self.load_current_slice()
+            self.update_progress()
+        
+        tree.bind('<Double-Button-1>', go_to_selected)
+        tree.bind('<Return>', go_to_selected)
+        ttk.Button(similar_window, text="关闭",
+                  command=similar_window.destroy).pack(side=tk.RIGHT, padx=10, pady=(0, 10))
     
     def switch_to_hole(self, hole_number: int):
         """切换到指定孔位（用于继续标注功能）"""
@@ -4812,7 +5122,7 @@ class PanoramicAnnotationGUI:
     
     def on_panoramic_click(self, event):
         """全景图点击事件处理 - 优化的孔位定位算法"""
-        if not self.panoramic_image:
+        if not self.panoramic_metadata:
             return
         
         try:
@@ -4821,8 +5131,8 @@ class PanoramicAnnotationGUI:
             canvas_height = self.panoramic_canvas.winfo_height()
             
             # 计算显示图像的实际尺寸（保持宽高比）
-            original_width = self.panoramic_image.width
-            original_height = self.panoramic_image.height
+            original_width = self.panoramic_metadata.width
+            original_height = self.panoramic_metadata.height
             
             # 计算缩放比例（保持宽高比，适应画布）
             scale_w = (canvas_width - 20) / original_width
@@ -5642,12 +5952,8 @@ class PanoramicAnnotationGUI:
     def update_panoramic_list(self):
         """更新全景图列表"""
         try:
-            # 从切片文件中提取唯一的全景图ID
-            panoramic_ids = set()
-            for slice_file in self.slice_files:
-                panoramic_ids.add(slice_file['panoramic_id'])
-            
-            self.panoramic_ids = sorted(list(panoramic_ids))
+            # 从切片索引中提取唯一的全景图ID
+            self.panoramic_ids = self.slice_files.get_panoramic_ids()
             
             # 更新下拉列表
             if hasattr(self, 'panoramic_combobox'):
@@ -5729,14 +6035,8 @@ class PanoramicAnnotationGUI:
 
         # 查找目标全景图的第一个孔位
         # 查找目标全景图的第一个有效孔位（从起始孔位开始）
-        target_slice_index = None
         start_hole = self.hole_manager.start_hole_number
-
-        for i, slice_file in enumerate(self.slice_files):
-            if (slice_file['panoramic_id'] == panoramic_id and
-                slice_file.get('hole_number', 1) >= start_hole):
-                target_slice_index = i
-                break
+        target_slice_index = self.slice_files.find_first(panoramic_id, start_hole)
 
         if target_slice_index is not None:
             # 更新当前索引和全景图ID
@@ -5782,14 +6082,8 @@ class PanoramicAnnotationGUI:
                 log_debug(f"普通类型全景图，设置起始孔位为1", "SWITCH")
 
         # 查找目标全景图的第一个孔位
-        target_slice_index = None
         start_hole = self.hole_manager.start_hole_number
-
-        for i, slice_file in enumerate(self.slice_files):
-            if (slice_file['panoramic_id'] == panoramic_id and
-                slice_file.get('hole_number', 1) >= start_hole):
-                target_slice_index = i
-                break
+        target_slice_index = self.slice_files.find_first(panoramic_id, start_hole)
 
         if target_slice_index is not None:
             # 更新当前索引和全景图ID
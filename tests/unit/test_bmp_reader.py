@@ -0,0 +1,186 @@
+"""
+Tests for the memory-mapped BMP reader.
+"""
+import os
+import struct
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.bmp_reader import open_bmp_array, open_bmp_image, read_bmp_info
+from src.services.image_cache import MEMMAP_ENTRY_BYTES, estimate_image_bytes
+from src.services.panoramic_image_service import PanoramicImageService
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def random_pixels(width=53, height=37, seed=0):
+    return np.random.default_rng(seed).integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+
+
+def write_bmp(path, pixels, bits_per_pixel=24, top_down=False):
+    """Write an uncompressed BMP by hand (PIL only writes bottom-up files)."""
+    height, width, _ = pixels.shape
+    bytes_per_pixel = bits_per_pixel // 8
+    stride = (width * bytes_per_pixel + 3) // 4 * 4
+    rows = np.zeros((height, stride), dtype=np.uint8)
+    bgr = pixels[:, :, ::-1]
+    if bytes_per_pixel == 4:
+        bgr = np.dstack([bgr, np.full((height, width), 255, dtype=np.uint8)])
+    rows[:, :width * bytes_per_pixel] = bgr.reshape(height, -1)
+    if not top_down:
+        rows = rows[::-1]
+    data = rows.tobytes()
+    header = struct.pack('<2sIHHI', b'BM', 54 + len(data), 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, width, -height if top_down else height, 1,
+                       bits_per_pixel, 0, len(data), 2835, 2835, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(header + info + data)
+
+
+class TestBmpReader:
+    """Test cases for bmp_reader."""
+
+    @pytest.mark.parametrize('bits_per_pixel,top_down', [(24, False), (24, True), (32, False), (32, True)])
+    def test_pixels_match_pil(self, tmp_path, bits_per_pixel, top_down):
+        """Test pixel equality with PIL for row orders and pixel depths."""
+        pixels = random_pixels()
+        path = str(tmp_path / "plate.bmp")
+        write_bmp(path, pixels, bits_per_pixel, top_down)
+
+        with Image.open(path) as image:
+            reference = np.asarray(image.convert('RGB'))
+
+        assert np.array_equal(reference, pixels)
+        assert np.array_equal(open_bmp_array(path), reference)
+        assert np.array_equal(np.asarray(open_bmp_image(path)), reference)
+
+    def test_pil_written_bmp(self, tmp_path):
+        """Test a bottom-up BMP written by PIL with row padding."""
+        pixels = random_pixels(width=31, height=9)
+        path = str(tmp_path / "plate.bmp")
+        Image.fromarray(pixels).save(path)
+
+        info = read_bmp_info(path)
+        array = open_bmp_array(path)
+
+        assert (info.width, info.height, info.row_stride, info.top_down) == (31, 9, 96, False)
+        assert isinstance(array, np.memmap)
+        assert not array.flags.writeable
+        assert np.array_equal(array, pixels)
+
+    def test_unsupported_files_are_rejected(self, tmp_path):
+        """Test that palette BMPs, other formats and truncated files are not memory-mapped."""
+        pixels = random_pixels()
+        gray_path = str(tmp_path / "gray.bmp")
+        Image.fromarray(pixels[:, :, 0]).save(gray_path)
+        png_path = str(tmp_path / "plate.png")
+        Image.fromarray(pixels).save(png_path)
+        truncated_path = str(tmp_path / "truncated.bmp")
+        Image.fromarray(pixels).save(truncated_path)
+        with open(truncated_path, 'r+b') as f:
+            f.truncate(200)
+
+        assert read_bmp_info(gray_path) is None
+        assert read_bmp_info(png_path) is None
+        assert read_bmp_info(truncated_path) is None
+        assert open_bmp_array(gray_path) is None
+        assert open_bmp_image(png_path) is None
+
+    def test_memmap_cache_accounting(self, tmp_path):
+        """Test that memory-mapped arrays are charged a fixed overhead."""
+        path = str(tmp_path / "plate.bmp")
+        Image.fromarray(random_pixels(width=2000, height=1500)).save(path)
+
+        assert estimate_image_bytes(open_bmp_array(path)) == MEMMAP_ENTRY_BYTES
+
+    def test_peak_rss_crop_lower_than_pil(self, tmp_path):
+        """Test that cropping through the memmap does not fault in the whole panorama."""
+        if not os.path.exists('/proc/self/status'):
+            pytest.skip("peak RSS measurement requires /proc/self/status")
+        path = str(tmp_path / "plate.bmp")
+        Image.fromarray(random_pixels(width=3088, height=2064)).save(path)
+
+        # VmHWM（峰值RSS，单位KB）在exec时重置，不会继承父进程的峰值
+        script = textwrap.dedent('''
+            import sys
+            import numpy as np
+            from PIL import Image
+            sys.path.insert(0, {root!r})
+            from src.services.bmp_reader import open_bmp_array
+
+            def peak_kb():
+                with open('/proc/self/status') as f:
+                    for line in f:
+                        if line.startswith('VmHWM:'):
+                            return int(line.split()[1])
+
+            path, mode = sys.argv[1], sys.argv[2]
+            before = peak_kb()
+            if mode == 'memmap':
+                crop = np.ascontiguousarray(open_bmp_array(path)[400:490, 700:790])
+            else:
+                with Image.open(path) as image:
+                    crop = np.asarray(image.convert('RGB'))[400:490, 700:790].copy()
+            print(peak_kb() - before, int(crop.sum()))
+        ''').format(root=PROJECT_ROOT)
+
+        def peak_delta(mode):
+            output = subprocess.run([sys.executable, '-c', script, path, mode],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            return int(output[0]), int(output[1])
+
+        memmap_delta, memmap_sum = peak_delta('memmap')
+        pil_delta, pil_sum = peak_delta('pil')
+
+        assert memmap_sum == pil_sum
+        # 全景图约18MB
+        assert pil_delta > 10 * 1024
+        assert memmap_delta < pil_delta / 4
+
+
+class TestServiceMemmap:
+    """Test cases for the memmap fast path in PanoramicImageService."""
+
+    def test_panoramic_array_and_statistics(self, tmp_path):
+        """Test that hole statistics are computed from the mapped panorama."""
+        pixels = random_pixels(width=3088, height=2064)
+        path = str(tmp_path / "EB10000000.bmp")
+        Image.fromarray(pixels).save(path)
+        service = PanoramicImageService(ImageConfig())
+
+        array = service.get_panoramic_array(path)
+        view = service.get_hole_view(path, 25)
+        stats = service.get_image_statistics(view)
+
+        assert isinstance(array, np.memmap)
+        x, y, w, h = service.hole_manager.get_hole_coordinates(25)
+        expected = pixels[y:y + h, x:x + w]
+        assert (stats['width'], stats['height'], stats['mode']) == (w, h, 'RGB')
+        assert stats['mean_rgb'] == pytest.approx([float(expected[:, :, i].mean()) for i in range(3)])
+
+    def test_hole_view_keeps_shared_layout(self, tmp_path):
+        """Test that cropping a plate of another size does not change the shared hole layout."""
+        path = str(tmp_path / "EB10000000.bmp")
+        Image.fromarray(random_pixels(width=2000, height=1500)).save(path)
+        service = PanoramicImageService(ImageConfig())
+        layout_key = service.hole_manager.get_layout_key()
+
+        view = service.get_hole_view(path, 1)
+
+        x, y, w, h = service.hole_manager.layout_for_size(2000, 1500).get_hole_coordinates(1)
+        assert view.shape[:2] == (h, w)
+        assert service.hole_manager.get_layout_key() == layout_key
+
+    def test_memmap_disabled(self, tmp_path):
+        """Test that bmp_memmap=False decodes through PIL."""
+        path = str(tmp_path / "EB10000000.bmp")
+        Image.fromarray(random_pixels()).save(path)
+        service = PanoramicImageService(ImageConfig(bmp_memmap=False))
+
+        assert not isinstance(service.get_panoramic_array(path), np.memmap)
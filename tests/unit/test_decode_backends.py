@@ -0,0 +1,231 @@
+"""
+Pixel-equivalence tests for the pluggable decode backends and backend selection.
+"""
+import json
+import struct
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services import decode_backends
+from src.services.decode_backends import (
+    BACKENDS, ImageDecoder, choose_backends, load_backend_profile, machine_signature,
+    save_backend_profile, select_backends
+)
+from src.services.enhancement_service import BatchEnhancer
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def sample_pixels(width=67, height=45, seed=0):
+    return decode_backends.make_sample_pixels(width, height, seed)
+
+
+def write_top_down_bmp(path, pixels, bits_per_pixel=32):
+    """Write an uncompressed top-down BMP by hand (PIL only writes bottom-up files)."""
+    height, width, _ = pixels.shape
+    bytes_per_pixel = bits_per_pixel // 8
+    stride = (width * bytes_per_pixel + 3) // 4 * 4
+    rows = np.zeros((height, stride), dtype=np.uint8)
+    bgr = pixels[:, :, ::-1]
+    if bytes_per_pixel == 4:
+        bgr = np.dstack([bgr, np.full((height, width), 255, dtype=np.uint8)])
+    rows[:, :width * bytes_per_pixel] = bgr.reshape(height, -1)
+    data = rows.tobytes()
+    header = struct.pack('<2sIHHI', b'BM', 54 + len(data), 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, width, -height, 1, bits_per_pixel, 0, len(data), 2835, 2835, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(header + info + data)
+
+
+def pil_reference(path):
+    with Image.open(path) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+LOSSLESS_SAMPLES = {
+    'rgb.bmp': lambda pixels: Image.fromarray(pixels),
+    'rgb.png': lambda pixels: Image.fromarray(pixels),
+    'rgba.png': lambda pixels: Image.fromarray(np.dstack([pixels, pixels[:, :, 0]])),
+    'gray.png': lambda pixels: Image.fromarray(pixels[:, :, 1]),
+    'palette.png': lambda pixels: Image.fromarray(pixels).quantize(64),
+    'palette.bmp': lambda pixels: Image.fromarray(pixels).quantize(64),
+    'rgb.tif': lambda pixels: Image.fromarray(pixels),
+    'rgb.tiff': lambda pixels: Image.fromarray(pixels),
+}
+
+
+class TestPixelEquivalence:
+    """Every backend must decode to the same RGB pixels as PIL."""
+
+    @pytest.mark.parametrize('backend_name', sorted(BACKENDS))
+    @pytest.mark.parametrize('filename', sorted(LOSSLESS_SAMPLES))
+    def test_lossless_formats(self, tmp_path, backend_name, filename):
+        """Test exact equality for lossless formats and pixel modes."""
+        backend = BACKENDS[backend_name]
+        path = str(tmp_path / filename)
+        LOSSLESS_SAMPLES[filename](sample_pixels()).save(path)
+        if not backend.supports(path):
+            pytest.skip(f"{backend_name} does not handle {filename}")
+
+        reference = pil_reference(path)
+        array = backend.decode_array(path)
+        image = backend.decode_image(path)
+        assert array.dtype == np.uint8
+        assert np.array_equal(array, reference)
+        assert image.mode == 'RGB'
+        assert np.array_equal(np.asarray(image), reference)
+
+    @pytest.mark.parametrize('backend_name', sorted(BACKENDS))
+    def test_top_down_bgrx_bmp(self, tmp_path, backend_name):
+        """Test a hand-written top-down 32-bit BMP."""
+        pixels = sample_pixels(seed=3)
+        path = str(tmp_path / "top_down.bmp")
+        write_top_down_bmp(path, pixels)
+        assert np.array_equal(pil_reference(path), pixels)
+        assert np.array_equal(BACKENDS[backend_name].decode_array(path), pixels)
+
+    @pytest.mark.parametrize('backend_name', ['pil', 'opencv'])
+    def test_jpeg_within_tolerance(self, tmp_path, backend_name):
+        """Test that JPEG decoders agree up to IDCT rounding."""
+        path = str(tmp_path / "plate.jpg")
+        Image.fromarray(sample_pixels(320, 240)).save(path, quality=90)
+        array = BACKENDS[backend_name].decode_array(path).astype(np.int16)
+        assert np.abs(array - pil_reference(path)).mean() <= 1.0
+
+    def test_jpeg_exif_orientation_ignored(self, tmp_path):
+        """Test that OpenCV does not apply EXIF rotation, matching PIL."""
+        path = str(tmp_path / "rotated.jpg")
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise
+        Image.fromarray(sample_pixels(80, 40)).save(path, exif=exif.tobytes())
+        assert BACKENDS['opencv'].decode_array(path).shape == pil_reference(path).shape == (40, 80, 3)
+
+    def test_unicode_path(self, tmp_path):
+        """Test that OpenCV decodes files with non-ASCII names."""
+        path = str(tmp_path / "全景图_孔位.png")
+        Image.fromarray(sample_pixels()).save(path)
+        assert np.array_equal(BACKENDS['opencv'].decode_array(path), pil_reference(path))
+
+    @pytest.mark.parametrize('backend_name', sorted(BACKENDS))
+    def test_decode_error(self, tmp_path, backend_name):
+        """Test that corrupt files raise instead of returning garbage."""
+        path = tmp_path / "broken.bmp"
+        path.write_bytes(b"BM not really a bitmap")
+        with pytest.raises(Exception):
+            BACKENDS[backend_name].decode_array(str(path))
+
+
+class TestImageDecoder:
+    """Test cases for ImageDecoder dispatch."""
+
+    def test_dispatch_by_extension(self):
+        """Test per-extension dispatch with PIL as the default."""
+        decoder = ImageDecoder({'.BMP': 'memmap', '.png': 'opencv'})
+        assert decoder.backend_for('/plates/EB10000000.bmp').name == 'memmap'
+        assert decoder.backend_for('/plates/EB10000000/hole_1.PNG').name == 'opencv'
+        assert decoder.backend_for('/plates/EB10000000.tif').name == 'pil'
+
+    def test_forced_backend(self):
+        """Test that a forced backend only applies to extensions it supports."""
+        decoder = ImageDecoder.forced('memmap', ['.bmp', '.png'])
+        assert decoder.choices == {'.bmp': 'memmap'}
+
+    def test_invalid_choices(self):
+        """Test that unknown backends and unsupported extensions are rejected."""
+        with pytest.raises(ValueError):
+            ImageDecoder({'.png': 'libvips'})
+        with pytest.raises(ValueError):
+            ImageDecoder({'.png': 'memmap'})
+
+
+class TestBackendSelection:
+    """Test cases for benchmarking and persisting backend choices."""
+
+    def test_choose_fastest(self):
+        """Test that the fastest backend wins per extension."""
+        timings = {'.bmp': {'pil': 30.0, 'opencv': 12.0, 'memmap': 18.0}, '.png': {'pil': 5.0}, '.tif': {}}
+        assert choose_backends(timings) == {'.bmp': 'opencv', '.png': 'pil'}
+
+    def test_benchmark_covers_backends(self):
+        """Test that the micro-benchmark times every backend supporting each extension."""
+        timings = decode_backends.benchmark_backends(['.bmp', '.png'], sample_size=(64, 48), repeat=1)
+        assert set(timings['.bmp']) == {'pil', 'opencv', 'memmap'}
+        assert set(timings['.png']) == {'pil', 'opencv'}
+
+    def test_mismatching_backend_excluded(self, monkeypatch):
+        """Test that a backend whose pixels differ from PIL is never selected."""
+        monkeypatch.setattr(decode_backends.OpenCVBackend, 'decode_array',
+                            lambda self, path: np.zeros((48, 64, 3), dtype=np.uint8))
+        timings = decode_backends.benchmark_backends(['.png'], sample_size=(64, 48), repeat=1)
+        assert set(timings['.png']) == {'pil'}
+
+    def test_profile_persisted_and_reused(self, tmp_path, monkeypatch):
+        """Test that the choice is saved once and reused on the next start."""
+        profile_path = str(tmp_path / "profile" / "decode_backends.json")
+        monkeypatch.setattr(decode_backends, 'benchmark_backends',
+                            lambda extensions: {'.bmp': {'opencv': 1.0, 'pil': 2.0}, '.png': {'pil': 1.0}})
+        assert select_backends(profile_path, ['.bmp', '.png']) == {'.bmp': 'opencv', '.png': 'pil'}
+
+        def fail(extensions):
+            raise AssertionError("benchmark should not run again")
+        monkeypatch.setattr(decode_backends, 'benchmark_backends', fail)
+        assert select_backends(profile_path, ['.png', '.bmp']) == {'.bmp': 'opencv', '.png': 'pil'}
+
+    def test_profile_invalidated_by_signature(self, tmp_path):
+        """Test that a profile from another machine or library version is ignored."""
+        profile_path = tmp_path / "decode_backends.json"
+        save_backend_profile(str(profile_path), {'.bmp': 'opencv'}, {'.bmp': {'opencv': 1.0}})
+        assert load_backend_profile(str(profile_path)) == {'.bmp': 'opencv'}
+
+        profile = json.loads(profile_path.read_text(encoding='utf-8'))
+        profile['signature'] = dict(machine_signature(), opencv='0.0.0')
+        profile_path.write_text(json.dumps(profile), encoding='utf-8')
+        assert load_backend_profile(str(profile_path)) is None
+
+        profile_path.write_text("{not json", encoding='utf-8')
+        assert load_backend_profile(str(profile_path)) is None
+
+
+class TestServiceDecoders:
+    """Test cases for decode backend integration in the image services."""
+
+    @pytest.mark.parametrize('backend_name', ['pil', 'opencv', 'memmap'])
+    def test_forced_backend_loads_same_pixels(self, tmp_path, backend_name):
+        """Test that panoramas and slices load identically whatever the backend."""
+        pixels = sample_pixels(300, 200)
+        Image.fromarray(pixels).save(tmp_path / "EB10000000.bmp")
+        Image.fromarray(pixels[:90, :90]).save(tmp_path / "EB10000000_hole_1.png")
+        service = PanoramicImageService(ImageConfig(decode_backend=backend_name, decode_workers=0,
+                                                    bmp_memmap=False, disk_cache_enabled=False))
+
+        panoramic = service.load_panoramic_image(str(tmp_path / "EB10000000.bmp"))
+        slice_image = service.load_slice_image(str(tmp_path / "EB10000000_hole_1.png"))
+        assert np.array_equal(np.asarray(panoramic), pixels)
+        assert np.array_equal(np.asarray(slice_image), pixels[:90, :90])
+        assert np.array_equal(service.get_panoramic_array(str(tmp_path / "EB10000000.bmp")), pixels)
+
+    def test_auto_selection_updates_decoder(self, tmp_path, monkeypatch):
+        """Test that auto mode starts on PIL and switches after selection."""
+        monkeypatch.setattr(decode_backends, 'benchmark_backends',
+                            lambda extensions: {extension: {'opencv': 1.0, 'pil': 2.0} for extension in extensions})
+        profile_path = str(tmp_path / "decode_backends.json")
+        service = PanoramicImageService(ImageConfig(decode_backend_profile=profile_path))
+        assert service.image_decoder.choices == {}
+
+        choices = service.select_decode_backends()
+        assert choices['.png'] == 'opencv'
+        assert service.image_decoder.backend_for('hole_1.png').name == 'opencv'
+
+        # The persisted profile is picked up immediately by the next service
+        assert PanoramicImageService(ImageConfig(decode_backend_profile=profile_path)).image_decoder.choices == choices
+
+    def test_batch_enhancer_decoders_agree(self, tmp_path):
+        """Test that batch enhancement gives the same result with either decoder."""
+        path = str(tmp_path / "hole_1.png")
+        Image.fromarray(sample_pixels(90, 90)).save(path)
+        params = PanoramicImageService.ENHANCE_PARAMS
+        results = [BatchEnhancer(params, max_workers=1, decoder=ImageDecoder({'.png': name})).enhance_files([path])
+                   for name in ('pil', 'opencv')]
+        assert np.array_equal(results[0][path], results[1][path])
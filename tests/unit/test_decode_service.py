@@ -0,0 +1,152 @@
+"""
+Tests for the process-pool decode service with shared-memory handoff.
+"""
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.decode_service import DecodeService, decode_levels
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def shm_entries():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+@pytest.fixture(scope='module')
+def decode_service():
+    service = DecodeService(max_workers=1)
+    service.warm_up(wait=True)
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def image_file(tmp_path):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 255, size=(300, 400, 3), dtype=np.uint8)
+    path = tmp_path / "EB10000000.bmp"
+    Image.fromarray(pixels).save(path)
+    return str(path), pixels
+
+
+class TestDecodeService:
+    """Test cases for DecodeService."""
+
+    def test_decode_full_image(self, decode_service, image_file):
+        """Test that the shared-memory array matches the decoded pixels."""
+        path, pixels = image_file
+        with decode_service.decode(path, timeout=30) as decoded:
+            assert len(decoded.levels) == 1
+            assert np.array_equal(decoded.levels[0], pixels)
+            assert not decoded.levels[0].flags.writeable
+
+    def test_decode_reduced_levels(self, decode_service, image_file):
+        """Test that reduced levels match the in-process pyramid."""
+        path, pixels = image_file
+        expected = PanoramicImageService().build_image_pyramid(Image.fromarray(pixels))[1:]
+        with decode_service.decode(path, (2, 4, 8), timeout=30) as decoded:
+            assert decoded.factors == (2, 4, 8)
+            for level, image in zip(decoded.levels, expected):
+                assert np.array_equal(level, np.asarray(image))
+
+    def test_shared_memory_released(self, decode_service, image_file):
+        """Test that segments are unlinked once taken over by the main process."""
+        path, _ = image_file
+        before = shm_entries()
+        decoded = decode_service.decode(path, (1, 2), timeout=30)
+        assert shm_entries() == before
+        images = decoded.to_images()
+        decoded.close()
+        assert decoded.levels == []
+        assert images[1].size == (200, 150)
+
+    def test_decode_error(self, decode_service, tmp_path):
+        """Test that decode failures are reported through the future."""
+        bad_file = tmp_path / "broken.png"
+        bad_file.write_bytes(b"not an image")
+        with pytest.raises(RuntimeError):
+            decode_service.decode(str(bad_file), timeout=30)
+
+    def test_recovers_from_worker_crash(self, image_file):
+        """Test that a crashed worker pool is rebuilt and the task retried."""
+        path, pixels = image_file
+        service = DecodeService(max_workers=1)
+        try:
+            with pytest.raises(BrokenProcessPool):
+                service._get_executor().submit(os._exit, 1).result(timeout=30)
+            with service.decode(path, timeout=30) as decoded:
+                assert np.array_equal(decoded.levels[0], pixels)
+            assert service.stats['restarts'] == 1
+        finally:
+            service.shutdown()
+
+    def test_decode_levels_stops_at_tiny_images(self, tmp_path):
+        """Test that levels smaller than the reduction step are skipped."""
+        path = tmp_path / "tiny.png"
+        Image.new('RGB', (3, 3)).save(path)
+        assert [level.shape for level in decode_levels(str(path), (1, 2, 4, 8))] == \
+            [(3, 3, 3), (2, 2, 3), (1, 1, 3)]
+        Image.new('RGB', (1, 4)).save(path)
+        assert [level.shape for level in decode_levels(str(path), (1, 2))] == [(4, 1, 3)]
+
+
+class TestServiceDecodeAsync:
+    """Test cases for PanoramicImageService.decode_async."""
+
+    def test_panoramic_levels_cached(self, image_file):
+        """Test that background decoding fills the pyramid cache."""
+        path, pixels = image_file
+        service = PanoramicImageService(ImageConfig(decode_workers=1, disk_cache_enabled=False))
+        try:
+            levels = service.decode_async('panoramic', path).result(timeout=30)
+            assert service.is_cached('pyramid', path)
+            expected = service.build_image_pyramid(Image.fromarray(pixels))[1:]
+            assert [level.size for level in levels] == [level.size for level in expected]
+            assert service.decode_async('panoramic', path) is None
+            assert service._get_reduced_levels(path) is levels
+        finally:
+            service.shutdown()
+
+    def test_slice_cached(self, tmp_path):
+        """Test that a slice decoded in the pool is served from the cache."""
+        path = tmp_path / "hole_1.png"
+        Image.new('RGB', (90, 90), (10, 20, 30)).save(path)
+        service = PanoramicImageService(ImageConfig(decode_workers=1))
+        try:
+            image = service.decode_async('slice', str(path)).result(timeout=30)
+            assert image.getpixel((0, 0)) == (10, 20, 30)
+            assert service.load_slice_image(str(path)) is image
+        finally:
+            service.shutdown()
+
+    def test_disabled(self, image_file):
+        """Test that decode_workers=0 keeps decoding in the calling thread."""
+        path, _ = image_file
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+        assert service.get_decode_service() is None
+        assert service.decode_async('panoramic', path) is None
+
+    def test_display_image_matches_sync_render(self, tmp_path):
+        """Test that the overlay rendered from the worker's display image matches the sync path."""
+        rng = np.random.default_rng(1)
+        pixels = rng.integers(0, 255, size=(2064, 3088, 3), dtype=np.uint8)
+        path = str(tmp_path / "EB10000001.bmp")
+        Image.fromarray(pixels).save(path)
+
+        sync_service = PanoramicImageService(ImageConfig(decode_workers=0, disk_cache_enabled=False))
+        expected = np.asarray(sync_service.render_panoramic_overlay(path, 5, {1: 'positive'}, 1220, 750))
+
+        service = PanoramicImageService(ImageConfig(decode_workers=1, disk_cache_enabled=False))
+        try:
+            service.decode_async('panoramic', path, (1220, 750)).result(timeout=30)
+            assert service.is_cached('pyramid', path)
+            assert not service.is_cached('panoramic', path)
+            rendered = np.asarray(service.render_panoramic_overlay(path, 5, {1: 'positive'}, 1220, 750))
+            assert np.array_equal(rendered, expected)
+        finally:
+            service.shutdown()
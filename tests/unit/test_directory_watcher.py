@@ -0,0 +1,215 @@
+"""
+Tests for the polling directory watcher and incremental plate ingestion.
+"""
+import os
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.directory_watcher import DirectoryWatcher
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def write_plate(root, panoramic_id, holes=3, config=None):
+    """Write <root>/<id>.bmp, <root>/<id>/hole_N.png and optionally <root>/<id>.cfg."""
+    Image.new('RGB', (16, 16)).save(root / f"{panoramic_id}.bmp")
+    (root / panoramic_id).mkdir(exist_ok=True)
+    for hole_number in range(1, holes + 1):
+        Image.new('RGB', (4, 4)).save(root / panoramic_id / f"hole_{hole_number}.png")
+    if config is not None:
+        (root / f"{panoramic_id}.cfg").write_text(config)
+
+
+def poll_until(watcher, attempts=5):
+    for _ in range(attempts):
+        changes = watcher.poll()
+        if changes:
+            return changes
+    return changes
+
+
+@pytest.fixture
+def plates(tmp_path):
+    root = tmp_path / "plates"
+    root.mkdir()
+    write_plate(root, "EB10000000")
+    return root
+
+
+class TestDirectoryWatcher:
+    """Test cases for DirectoryWatcher polling."""
+
+    def test_baseline_is_not_reported(self, plates):
+        """Test that plates present at the baseline produce no changes."""
+        watcher = DirectoryWatcher(str(plates), ['.bmp', '.png'])
+        watcher.capture_baseline()
+
+        assert not watcher.poll()
+        assert not watcher.poll()
+
+    def test_new_plate_reported_after_settling(self, plates):
+        """Test that a new plate is reported once it is unchanged across two polls."""
+        watcher = DirectoryWatcher(str(plates), ['.bmp', '.png'])
+        watcher.capture_baseline()
+
+        write_plate(plates, "EB10000001", config="+-+")
+        assert not watcher.poll()
+        changes = watcher.poll()
+
+        assert changes.panoramas == {'EB10000001'}
+        assert changes.configs == {'EB10000001'}
+        assert changes.first_seen is not None
+        assert not watcher.poll()
+
+    def test_growing_directory_waits_until_stable(self, plates):
+        """Test that a slice directory still being written is not reported."""
+        watcher = DirectoryWatcher(str(plates), ['.bmp', '.png'])
+        watcher.capture_baseline()
+
+        (plates / "EB10000001").mkdir()
+        assert not watcher.poll()
+        Image.new('RGB', (4, 4)).save(plates / "EB10000001" / "hole_1.png")
+        assert not watcher.poll()
+
+        assert watcher.poll().panoramas == {'EB10000001'}
+
+    def test_changed_config_and_removed_plate(self, plates):
+        """Test cfg rewrites and deleted plates."""
+        (plates / "EB10000000.cfg").write_text("+++")
+        watcher = DirectoryWatcher(str(plates), ['.bmp', '.png'])
+        watcher.capture_baseline()
+
+        (plates / "EB10000000.cfg").write_text("+-+-")
+        assert poll_until(watcher).configs == {'EB10000000'}
+
+        (plates / "EB10000000.bmp").unlink()
+        for path in (plates / "EB10000000").iterdir():
+            path.unlink()
+        (plates / "EB10000000").rmdir()
+        changes = watcher.poll()
+        assert changes.removed == {'EB10000000'}
+        assert not changes.panoramas
+
+    def test_hidden_and_unrelated_entries_ignored(self, plates):
+        """Test that the cache directory and unrelated files are not watched."""
+        watcher = DirectoryWatcher(str(plates), ['.bmp', '.png'])
+        watcher.capture_baseline()
+
+        (plates / ".annotation_cache").mkdir()
+        (plates / "notes.log").write_text("x")
+
+        assert not poll_until(watcher)
+
+    def test_stop_wakes_inotify_wait(self, plates):
+        """Test that stop returns promptly while the thread waits for inotify events."""
+        class IdleINotify:
+            def read(self, timeout=None):
+                time.sleep(timeout / 1000)
+                return []
+
+            def add_watch(self, path, mask):
+                return 1
+
+            def close(self):
+                pass
+
+        watcher = DirectoryWatcher(str(plates), ['.bmp', '.png'], interval=10, use_inotify=False)
+        watcher._inotify = IdleINotify()
+        watcher.start()
+        time.sleep(0.05)
+
+        start = time.monotonic()
+        watcher.stop()
+        assert time.monotonic() - start < 1
+        assert not watcher.inotify_enabled
+
+
+class TestIncrementalIngestion:
+    """Test cases for ingesting watched plates into the slice index."""
+
+    def test_ingest_keeps_existing_rows(self, plates):
+        """Test that ingestion adds new plates and drops removed ones without a full rescan."""
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+        slice_files = service.get_slice_files_from_directory(str(plates), str(plates))
+        assert len(slice_files) == 3
+
+        write_plate(plates, "EB10000001", holes=2)
+        slice_files = service.ingest_panoramas(slice_files, str(plates), {'EB10000001'})
+
+        assert slice_files.get_panoramic_ids() == ['EB10000000', 'EB10000001']
+        assert slice_files.find('EB10000001', 2) == 4
+        assert slice_files[0]['structure_type'] == 'subdirectory'
+        indexed = service.metadata_stats['indexed']
+        service.get_image_metadata(str(plates / "EB10000001" / "hole_2.png"))
+        service.get_image_metadata(str(plates / "EB10000000" / "hole_1.png"))
+        assert service.metadata_stats['indexed'] == indexed + 2
+
+        Image.new('RGB', (4, 4)).save(plates / "EB10000001" / "hole_3.png")
+        slice_files = service.ingest_panoramas(slice_files, str(plates), {'EB10000001'})
+        assert slice_files.find('EB10000001', 3) == 5
+
+        (plates / "EB10000000.bmp").unlink()
+        for path in (plates / "EB10000000").iterdir():
+            path.unlink()
+        (plates / "EB10000000").rmdir()
+        slice_files = service.ingest_panoramas(slice_files, str(plates), {'EB10000000'})
+        assert slice_files.get_panoramic_ids() == ['EB10000001']
+        service.shutdown()
+
+    def test_ingest_finds_panorama_written_after_slices(self, plates):
+        """Test that a panorama lookup that missed before the plate was complete is retried."""
+        service = PanoramicImageService(ImageConfig(decode_workers=0, enhance_method='plate'))
+        slice_files = service.get_slice_files_from_directory(str(plates), str(plates))
+        (plates / "EB10000001").mkdir()
+        Image.new('RGB', (4, 4)).save(plates / "EB10000001" / "hole_1.png")
+        slice_path = str(plates / "EB10000001" / "hole_1.png")
+        assert service.get_plate_slice_source(slice_path) is None
+
+        Image.new('RGB', (16, 16)).save(plates / "EB10000001.bmp")
+        service.ingest_panoramas(slice_files, str(plates), {'EB10000001'})
+
+        assert service.get_plate_slice_source(slice_path) == (str(plates / "EB10000001.bmp"), 1)
+        service.shutdown()
+
+    def test_plates_written_while_watching_become_visible(self, plates):
+        """Test that plates written while the watcher thread runs are ingested, and report time-to-visible."""
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+        state = {'slice_files': service.get_slice_files_from_directory(str(plates), str(plates))}
+        visible = {}
+        lock = threading.Lock()
+
+        def on_change(changes):
+            with lock:
+                state['slice_files'] = service.ingest_panoramas(state['slice_files'], str(plates),
+                                                                changes.panoramas | changes.removed)
+                for panoramic_id in changes.panoramas:
+                    visible[panoramic_id] = time.monotonic()
+
+        watcher = DirectoryWatcher(str(plates), service.supported_formats, interval=0.05,
+                                   on_change=on_change, use_inotify=False)
+        watcher.capture_baseline()
+        watcher.start()
+        written = {}
+        try:
+            for index in range(1, 4):
+                panoramic_id = f"EB{10000000 + index}"
+                write_plate(plates, panoramic_id)
+                written[panoramic_id] = time.monotonic()
+                time.sleep(0.02)
+            deadline = time.monotonic() + 5
+            while len(visible) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+            service.shutdown()
+
+        assert set(visible) == set(written)
+        assert len(state['slice_files']) == 12
+        assert state['slice_files'].find('EB10000003', 3) is not None
+        delays = [visible[panoramic_id] - written[panoramic_id] for panoramic_id in written]
+        print(f"\ntime-to-visible: max {max(delays) * 1000:.0f}ms "
+              f"(interval 50ms, {watcher.stats['polls']} polls)")
+        assert max(delays) < 2.0
@@ -0,0 +1,147 @@
+"""
+Tests for the persistent on-disk image cache.
+"""
+import os
+
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.disk_cache import DiskImageCache
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "hole_1.png"
+    Image.new('RGB', (40, 40), (10, 20, 30)).save(path)
+    return path
+
+
+class TestDiskImageCache:
+    """Test cases for DiskImageCache class."""
+
+    def test_round_trip(self, tmp_path, source_file):
+        """Test that a written entry is read back with the same pixels."""
+        cache = DiskImageCache(str(tmp_path / '.annotation_cache'))
+        image = Image.new('RGB', (40, 40), (1, 2, 3))
+
+        assert cache.get('enhanced_slice', str(source_file)) is None
+        cache.put_async('enhanced_slice', str(source_file), image)
+        cache.flush()
+
+        cached = cache.get('enhanced_slice', str(source_file))
+        assert cached is not None
+        assert cached.tobytes() == image.tobytes()
+        assert cache.get_stats()['hits'] == 1
+
+    def test_params_are_part_of_key(self, tmp_path, source_file):
+        """Test that different derivation parameters do not collide."""
+        cache = DiskImageCache(str(tmp_path / '.annotation_cache'))
+        cache.put_async('enhanced_slice', str(source_file), Image.new('RGB', (4, 4)), {'clip_limit': 2.0})
+        cache.flush()
+
+        assert cache.get('enhanced_slice', str(source_file), {'clip_limit': 2.0}) is not None
+        assert cache.get('enhanced_slice', str(source_file), {'clip_limit': 3.0}) is None
+
+    def test_source_change_invalidates(self, tmp_path, source_file):
+        """Test that modifying the source file misses the old entry."""
+        cache = DiskImageCache(str(tmp_path / '.annotation_cache'))
+        cache.put_async('enhanced_slice', str(source_file), Image.new('RGB', (4, 4)))
+        cache.flush()
+
+        stat = source_file.stat()
+        os.utime(source_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        assert cache.get('enhanced_slice', str(source_file)) is None
+
+    def test_prune_removes_least_recently_used(self, tmp_path):
+        """Test that pruning keeps the cache under the size limit."""
+        cache = DiskImageCache(str(tmp_path / '.annotation_cache'))
+        sources = []
+        for i in range(5):
+            source = tmp_path / f"hole_{i + 1}.png"
+            Image.new('RGB', (8, 8)).save(source)
+            sources.append(source)
+            cache.put_async('enhanced_slice', str(source), Image.new('RGB', (64, 64), (i * 40, 0, 0)))
+        cache.flush()
+
+        entry_size = cache.get_size() // 5
+        # Make the first entry the most recently used one
+        entries = sorted((tmp_path / '.annotation_cache').rglob('*.png'))
+        for index, entry in enumerate(entries):
+            os.utime(entry, (1000 + index, 1000 + index))
+        cache.get('enhanced_slice', str(sources[0]))
+
+        removed, freed = cache.prune(entry_size * 2)
+        assert removed == 3
+        assert freed > 0
+        assert cache.get_size() <= entry_size * 2
+        assert cache.get('enhanced_slice', str(sources[0])) is not None
+
+    def test_clear_keeps_other_files(self, tmp_path):
+        """Test that clearing removes derived images but keeps scan state and index files."""
+        cache_dir = tmp_path / '.annotation_cache'
+        cache = DiskImageCache(str(cache_dir))
+        source = tmp_path / "hole_1.png"
+        Image.new('RGB', (8, 8)).save(source)
+        cache.put_async('enhanced_slice', str(source), Image.new('RGB', (64, 64)))
+        cache_dir.mkdir(exist_ok=True)
+        (cache_dir / "scan_index.json").write_text("{}")
+
+        removed, freed = cache.clear()
+
+        assert removed == 1 and freed > 0
+        assert sorted(os.listdir(cache_dir)) == ["scan_index.json"]
+
+
+class TestServiceDiskCache:
+    """Test cases for PanoramicImageService disk cache integration."""
+
+    def make_plate(self, directory):
+        Image.new('RGB', (800, 600), (100, 100, 100)).save(directory / "EB10000001.bmp")
+        slice_dir = directory / "EB10000001"
+        slice_dir.mkdir()
+        for hole_number in range(1, 4):
+            Image.new('RGB', (40, 40), (hole_number * 50, 80, 80)).save(slice_dir / f"hole_{hole_number}.png")
+
+    def test_warm_session_reads_from_disk(self, tmp_path):
+        """Test that a new session reuses enhanced slices and previews from disk."""
+        self.make_plate(tmp_path)
+        slice_path = str(tmp_path / "EB10000001" / "hole_1.png")
+        panoramic_path = str(tmp_path / "EB10000001.bmp")
+
+        cold = PanoramicImageService(ImageConfig())
+        cold.enable_disk_cache(str(tmp_path))
+        cold_enhanced = cold.get_enhanced_slice_image(slice_path)
+        cold.get_panoramic_preview(panoramic_path, 300, 200)
+        cold.shutdown()
+
+        warm = PanoramicImageService(ImageConfig())
+        warm.enable_disk_cache(str(tmp_path))
+        warm_enhanced = warm.get_enhanced_slice_image(slice_path)
+        level, scale = warm.get_panoramic_preview(panoramic_path, 300, 200)
+
+        assert warm_enhanced.tobytes() == cold_enhanced.tobytes()
+        assert level.size == (400, 300)
+        assert scale == 0.5
+        # The full panorama is never decoded in the warm session
+        assert warm.get_cache_info()['panoramic_images_count'] == 0
+        assert warm.disk_cache.get_stats()['hits'] == 4
+
+    def test_cache_dir_skipped_by_scanner(self, tmp_path):
+        """Test that the cache directory is not scanned as a panorama folder."""
+        self.make_plate(tmp_path)
+        service = PanoramicImageService(ImageConfig())
+        service.enable_disk_cache(str(tmp_path))
+        service.get_enhanced_slice_image(str(tmp_path / "EB10000001" / "hole_1.png"))
+        service.shutdown()
+
+        slice_files = service.get_slice_files_from_directory(str(tmp_path), str(tmp_path))
+        assert {info['panoramic_id'] for info in slice_files} == {'EB10000001'}
+
+    def test_disabled_by_config(self, tmp_path):
+        """Test that the disk cache can be disabled in ImageConfig."""
+        service = PanoramicImageService(ImageConfig(disk_cache_enabled=False))
+        assert service.enable_disk_cache(str(tmp_path)) is None
+        assert service.disk_cache is None
@@ -0,0 +1,181 @@
+"""
+Tests for batch slice enhancement.
+"""
+import tracemalloc
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.enhancement_service import (
+    BatchEnhancer, EnhanceBufferPool, EnhancementTimings, create_clahe, enhance_array
+)
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+@pytest.fixture
+def slice_paths(tmp_path):
+    """Create a handful of noisy synthetic slices."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for hole_number in range(1, 7):
+        pixels = rng.integers(0, 255, size=(48, 48, 3), dtype=np.uint8)
+        path = tmp_path / f"hole_{hole_number}.png"
+        Image.fromarray(pixels).save(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def service():
+    return PanoramicImageService(ImageConfig(cache_bytes=64 * 1024 * 1024))
+
+
+class TestBatchEnhancement:
+    """Test cases for the batch enhancement API."""
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_batch_matches_single_slice_enhancement(self, service, slice_paths, workers):
+        """Test that batch results are pixel-identical to enhance_slice_image."""
+        results = service.enhance_panoramic_slices(slice_paths, max_workers=workers)
+        service.shutdown()
+
+        assert list(results) == slice_paths
+        for path in slice_paths:
+            expected = service.enhance_slice_image(Image.open(path).convert('RGB'))
+            assert results[path].tobytes() == expected.tobytes()
+
+    def test_results_are_memoized(self, service, slice_paths):
+        """Test that a second call is served from the cache."""
+        first = service.enhance_panoramic_slices(slice_paths, max_workers=1)
+        hits_before = service.get_cache_info()['hits']
+        second = service.enhance_panoramic_slices(slice_paths, max_workers=1)
+
+        assert all(first[path] is second[path] for path in slice_paths)
+        assert service.get_cache_info()['hits'] - hits_before == len(slice_paths)
+        assert service.enhancement_timings.summary()['count'] == len(slice_paths)
+
+    def test_batch_results_shared_with_single_lookup(self, service, slice_paths):
+        """Test that get_enhanced_slice_image reuses batch results."""
+        results = service.enhance_panoramic_slices(slice_paths, max_workers=1)
+        assert service.get_enhanced_slice_image(slice_paths[0]) is results[slice_paths[0]]
+
+    def test_params_change_invalidates(self, service, slice_paths, monkeypatch):
+        """Test that changing the enhancement parameters misses the memo."""
+        first = service.enhance_panoramic_slices(slice_paths[:1], max_workers=1)
+        monkeypatch.setattr(service, 'ENHANCE_PARAMS', dict(service.ENHANCE_PARAMS, clip_limit=4.0))
+        second = service.enhance_panoramic_slices(slice_paths[:1], max_workers=1)
+
+        assert first[slice_paths[0]] is not second[slice_paths[0]]
+
+    def test_corrupt_slice_is_skipped(self, service, slice_paths, tmp_path):
+        """Test that an undecodable slice is left out of the results."""
+        broken = tmp_path / "hole_7.png"
+        broken.write_bytes(b"not a png")
+
+        results = service.enhance_panoramic_slices(slice_paths + [str(broken)], max_workers=1)
+        assert str(broken) not in results
+        assert len(results) == len(slice_paths)
+
+
+def enhance_reference(img_array, params):
+    """The original allocating implementation, kept as the pixel reference."""
+    clahe = create_clahe(params)
+    if img_array.ndim == 3:
+        lab = cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB)
+        lab[:, :, 0] = clahe.apply(lab[:, :, 0])
+        enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+    else:
+        enhanced = clahe.apply(img_array)
+    return cv2.GaussianBlur(enhanced, tuple(params['blur_kernel']), params['blur_sigma'])
+
+
+class TestBufferedEnhancement:
+    """Test cases for the pooled-buffer enhancement pipeline."""
+
+    params = PanoramicImageService.ENHANCE_PARAMS
+
+    @pytest.mark.parametrize("shape", [(90, 90, 3), (37, 90, 3), (64, 80)])
+    def test_matches_reference(self, shape):
+        """Test that pooled enhancement is pixel-identical to the allocating version."""
+        img_array = np.random.default_rng(0).integers(0, 255, size=shape, dtype=np.uint8)
+        pool = EnhanceBufferPool()
+        enhanced = enhance_array(img_array, create_clahe(self.params), self.params, pool)
+        assert np.array_equal(enhanced, enhance_reference(img_array, self.params))
+        assert np.array_equal(enhance_array(img_array, create_clahe(self.params), self.params),
+                              enhance_reference(img_array, self.params))
+
+    def test_no_allocations_after_warm_up(self):
+        """Test with tracemalloc that steady-state enhancement allocates no pixel buffers."""
+        rng = np.random.default_rng(1)
+        slices = [rng.integers(0, 255, size=(90, 90, 3), dtype=np.uint8) for _ in range(20)]
+        clahe = create_clahe(self.params)
+        pool = EnhanceBufferPool()
+        enhance_array(slices[0], clahe, self.params, pool)
+
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            for img_array in slices:
+                enhance_array(img_array, clahe, self.params, pool)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # One 90x90 RGB buffer is 24,300 bytes; the old pipeline peaked at several of them
+        assert peak - baseline < 4096
+        assert current - baseline < 4096
+
+    def test_pool_reuses_buffers_per_shape(self):
+        """Test that buffers are reused per shape and old shapes are evicted."""
+        pool = EnhanceBufferPool(max_shapes=2)
+        first = pool.get((90, 90, 3))
+        assert pool.get((90, 90, 3)) is first
+        pool.get((37, 90, 3))
+        pool.get((90, 37, 3))
+        second = pool.get((90, 90, 3))
+        assert second is not first
+        assert pool.nbytes == second.nbytes + pool.get((90, 37, 3)).nbytes
+
+    def test_service_result_is_independent_copy(self, service):
+        """Test that returned images do not alias the reused output buffer."""
+        rng = np.random.default_rng(2)
+        first_input, second_input = (Image.fromarray(rng.integers(0, 255, size=(90, 90, 3), dtype=np.uint8))
+                                     for _ in range(2))
+        first = service.enhance_slice_image(first_input)
+        expected = first.tobytes()
+        service.enhance_slice_image(second_input)
+        assert first.tobytes() == expected
+
+        gray = service.enhance_slice_image(Image.fromarray(rng.integers(0, 255, size=(90, 90), dtype=np.uint8)))
+        gray_bytes = gray.tobytes()
+        service.enhance_slice_image(Image.fromarray(np.zeros((90, 90), dtype=np.uint8)))
+        assert gray.tobytes() == gray_bytes
+
+
+class TestEnhancementTimings:
+    """Test cases for EnhancementTimings class."""
+
+    def test_histogram_counts(self):
+        """Test that timings fall into the expected bins."""
+        timings = EnhancementTimings()
+        timings.record(0.2, 3.0)
+        timings.record(1.5, 3.5)
+        timings.record(60.0, 0.1)
+
+        hist = timings.histogram(bins=(0, 1, 5, float('inf')))
+        assert hist['decode'] == [1, 1, 1]
+        assert hist['enhance'] == [1, 2, 0]
+        assert timings.summary()['count'] == 3
+
+    def test_enhancer_records_timings(self, slice_paths):
+        """Test that BatchEnhancer records decode and enhance cost per slice."""
+        enhancer = BatchEnhancer(PanoramicImageService.ENHANCE_PARAMS, max_workers=1)
+        enhancer.enhance_files(slice_paths)
+
+        summary = enhancer.timings.summary()
+        assert summary['count'] == len(slice_paths)
+        assert 'decode_median_ms' in summary
+        assert 'enhance_median_ms' in summary
@@ -0,0 +1,122 @@
+"""
+Tests for the vectorized per-hole feature extractor.
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.hole_features import FEATURE_NAMES, HoleFeatureExtractor
+from src.services.panoramic_image_service import PanoramicImageService
+from src.ui.hole_manager import HoleManager
+
+PANORAMIC_SIZE = (3088, 2064)
+
+
+def make_pixels(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, size=(PANORAMIC_SIZE[1], PANORAMIC_SIZE[0], 3), dtype=np.uint8)
+
+
+def reference_features(pixels, hole_manager, hole_number, edge_threshold=24.0):
+    """Straightforward per-hole computation used as the reference."""
+    height, width = pixels.shape[:2]
+    x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+    yy, xx = np.mgrid[y:y + h, x:x + w]
+    center_x, center_y = x + (w - 1) / 2.0, y + (h - 1) / 2.0
+    inside = ((yy - center_y) ** 2 + (xx - center_x) ** 2 <= (w / 2.0) ** 2)
+    inside &= (yy >= 0) & (yy < height) & (xx >= 0) & (xx < width)
+    values = pixels[yy[inside], xx[inside]].astype(np.float64)
+    means = values.mean(axis=0)
+    stds = values.std(axis=0)
+    luma_weights = np.array([0.299, 0.587, 0.114])
+    turbidity = 1.0 - means @ luma_weights / 255.0
+    return np.concatenate([means, stds, [turbidity]])
+
+
+@pytest.fixture
+def hole_manager():
+    manager = HoleManager()
+    manager.set_layout_params(*PANORAMIC_SIZE)
+    return manager
+
+
+class TestHoleFeatureExtractor:
+    """Test cases for HoleFeatureExtractor."""
+
+    def test_feature_matrix_shape(self, hole_manager):
+        """Test that one row per hole and one column per feature is returned."""
+        features = HoleFeatureExtractor(hole_manager).extract(make_pixels())
+        assert features.shape == (120, len(FEATURE_NAMES))
+        assert features.dtype == np.float32
+
+    @pytest.mark.parametrize("hole_number", [1, 12, 60, 109, 120])
+    def test_matches_reference(self, hole_manager, hole_number):
+        """Test mean/std/turbidity against a per-hole loop with explicit masks."""
+        pixels = make_pixels(hole_number)
+        features = HoleFeatureExtractor(hole_manager).extract(pixels)
+        expected = reference_features(pixels, hole_manager, hole_number)
+        np.testing.assert_allclose(features[hole_number - 1, :7], expected, rtol=1e-3, atol=1e-2)
+
+    def test_uniform_wells(self, hole_manager):
+        """Test that flat wells have zero std and edge density."""
+        pixels = np.full((PANORAMIC_SIZE[1], PANORAMIC_SIZE[0], 3), 255, dtype=np.uint8)
+        x, y, w, h = hole_manager.get_hole_coordinates(5)
+        pixels[y:y + h, x:x + w] = (51, 51, 51)
+
+        features = HoleFeatureExtractor(hole_manager).extract(pixels)
+        records = HoleFeatureExtractor.to_records(features)
+        assert records[5]['mean_r'] == pytest.approx(51)
+        assert records[5]['turbidity'] == pytest.approx(0.8)
+        assert records[6]['turbidity'] == pytest.approx(0.0, abs=1e-6)
+        assert np.allclose(features[:, 3:6], 0)
+        assert np.allclose(features[:, 7], 0)
+
+    def test_edge_density(self, hole_manager):
+        """Test that a striped well has a higher edge density than a flat one."""
+        pixels = np.full((PANORAMIC_SIZE[1], PANORAMIC_SIZE[0], 3), 128, dtype=np.uint8)
+        x, y, w, h = hole_manager.get_hole_coordinates(1)
+        pixels[y:y + h, x:x + w:4] = 0
+
+        features = HoleFeatureExtractor(hole_manager).extract(pixels)
+        assert features[0, 7] > 0.3
+        assert features[1, 7] == 0
+
+    def test_holes_outside_image(self):
+        """Test that holes clipped by or outside the image are handled."""
+        manager = HoleManager()
+        manager.set_layout_params(*PANORAMIC_SIZE)
+        pixels = make_pixels()[:500, :1000]
+
+        features = HoleFeatureExtractor(manager).extract(pixels)
+        assert np.all(np.isfinite(features[0]))
+        assert np.isnan(features[119, 0])
+
+
+class TestServiceHoleFeatures:
+    """Test cases for the PanoramicImageService feature API."""
+
+    def test_features_cached_per_panorama(self, tmp_path):
+        """Test that features are computed once per panorama version."""
+        Image.fromarray(make_pixels(1)).save(tmp_path / "EB10000000.bmp")
+        service = PanoramicImageService(ImageConfig(cache_bytes=128 * 1024 * 1024))
+
+        first = service.get_hole_features(str(tmp_path / "EB10000000.bmp"))
+        second = service.get_hole_features(str(tmp_path / "EB10000000.bmp"))
+        assert second is first
+        assert not first.flags.writeable
+
+    def test_directory_batch(self, tmp_path):
+        """Test the batch API over a plate directory."""
+        for index in range(2):
+            Image.fromarray(make_pixels(index)).save(tmp_path / f"EB1000000{index}.bmp")
+        (tmp_path / "EB10000000").mkdir()
+        Image.new('RGB', (90, 90)).save(tmp_path / "EB10000000_hole_1.png")
+
+        service = PanoramicImageService(ImageConfig(cache_bytes=128 * 1024 * 1024))
+        progress = []
+        results = service.compute_directory_features(str(tmp_path),
+                                                     lambda done, total, msg: progress.append((done, total)))
+        assert sorted(results) == ['EB10000000', 'EB10000001']
+        assert results['EB10000001'].shape == (120, len(FEATURE_NAMES))
+        assert progress[-1] == (2, 2)
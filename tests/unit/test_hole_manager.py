@@ -198,4 +198,13 @@ class TestHoleManager:
         assert self.hole_manager.hole_width > 0
         assert self.hole_manager.hole_height > 0
         assert self.hole_manager.start_x >= 30
-        assert self.hole_manager.start_y >= 30
\ No newline at end of file
+        assert self.hole_manager.start_y >= 30
+    
+    def test_layout_for_size(self):
+        """Test that a per-plate layout copy leaves the original layout unchanged."""
+        original_key = self.hole_manager.get_layout_key()
+        
+        layout = self.hole_manager.layout_for_size(2000, 1500)
+        
+        assert layout.get_layout_key() != original_key
+        assert self.hole_manager.get_layout_key() == original_key
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""
+Tests for the byte-budgeted LRU image cache.
+"""
+import pytest
+import numpy as np
+from PIL import Image
+
+from src.core.config import ConfigManager, ImageConfig
+from src.services.image_cache import ImageCache, estimate_image_bytes
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def make_image(width=100, height=100, mode='RGB'):
+    """Create a synthetic image."""
+    return Image.new(mode, (width, height))
+
+
+class TestImageCache:
+    """Test cases for ImageCache class."""
+
+    def test_estimate_image_bytes(self):
+        """Test size accounting by width x height x bands."""
+        assert estimate_image_bytes(make_image(100, 50, 'RGB')) == 100 * 50 * 3
+        assert estimate_image_bytes(make_image(100, 50, 'L')) == 100 * 50
+        assert estimate_image_bytes(np.zeros((10, 10, 3), dtype=np.uint8)) == 300
+        assert estimate_image_bytes([make_image(10, 10), make_image(5, 5)]) == 375
+
+    def test_invalid_budget(self):
+        """Test that a non-positive budget is rejected."""
+        with pytest.raises(ValueError):
+            ImageCache(0)
+
+    def test_hits_and_misses(self):
+        """Test hit and miss counting."""
+        cache = ImageCache(10 * 30000)
+        cache.put('a', make_image())
+
+        assert cache.get('a') is not None
+        assert cache.get('b') is None
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['current_bytes'] == 30000
+
+    def test_evicts_oldest_when_budget_exceeded(self):
+        """Test that the least recently used entries are evicted first."""
+        cache = ImageCache(3 * 30000)
+        for key in ['a', 'b', 'c', 'd']:
+            cache.put(key, make_image())
+
+        assert 'a' not in cache
+        assert cache.keys() == ['b', 'c', 'd']
+        assert cache.get_stats()['evictions'] == 1
+        assert cache.current_bytes <= cache.max_bytes
+
+    def test_get_refreshes_recency(self):
+        """Test that accessing an entry protects it from eviction."""
+        cache = ImageCache(3 * 30000)
+        for key in ['a', 'b', 'c']:
+            cache.put(key, make_image())
+
+        cache.get('a')
+        cache.put('d', make_image())
+
+        assert 'a' in cache
+        assert 'b' not in cache
+
+    def test_oversized_entry_not_cached(self):
+        """Test that an entry larger than the whole budget is skipped."""
+        cache = ImageCache(1000)
+        cache.put('big', make_image())
+
+        assert 'big' not in cache
+        assert cache.current_bytes == 0
+
+    def test_on_evict_called_with_key(self):
+        """Test that the eviction callback receives each evicted key."""
+        evicted = []
+        cache = ImageCache(2 * 30000, on_evict=evicted.append)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, make_image())
+
+        assert evicted == ['a']
+
+    def test_replace_entry_updates_size(self):
+        """Test that re-putting a key replaces its size accounting."""
+        cache = ImageCache(100000)
+        cache.put('a', make_image(100, 100))
+        cache.put('a', make_image(10, 10))
+
+        assert len(cache) == 1
+        assert cache.current_bytes == 300
+
+
+class TestPanoramicImageServiceCache:
+    """Test cases for PanoramicImageService cache integration."""
+
+    def write_images(self, directory, count, size=(100, 100)):
+        paths = []
+        for i in range(count):
+            path = directory / f"hole_{i + 1}.png"
+            Image.new('RGB', size, (i, i, i)).save(path)
+            paths.append(str(path))
+        return paths
+
+    def test_budget_from_image_config(self):
+        """Test that the budget comes from ImageConfig.cache_bytes."""
+        service = PanoramicImageService(ImageConfig(cache_bytes=12345))
+        assert service.image_cache.max_bytes == 12345
+
+    @pytest.mark.parametrize("legacy, expected", [
+        (100, ImageConfig().cache_bytes),
+        (64 * 1024 * 1024, 64 * 1024 * 1024),
+    ])
+    def test_legacy_cache_size_key(self, tmp_path, monkeypatch, legacy, expected):
+        """Test that an old item-count cache_size is not used as a tiny byte budget."""
+        monkeypatch.chdir(tmp_path)
+        config_path = tmp_path / "app.yaml"
+        config_path.write_text(f"image:\n  cache_size: {legacy}\n")
+
+        manager = ConfigManager(str(config_path))
+
+        assert manager.get_image_config().cache_bytes == expected
+        assert not any("缓存" in error for error in manager.validate_config())
+
+    def test_load_slices_evicts_oldest(self, tmp_path):
+        """Test that loading past the budget evicts the oldest slices."""
+        paths = self.write_images(tmp_path, 5)
+        service = PanoramicImageService(ImageConfig(cache_bytes=3 * 30000))
+
+        for path in paths:
+            assert service.load_slice_image(path) is not None
+
+        info = service.get_cache_info()
+        assert info['slice_images'] == paths[2:]
+        assert info['evictions'] == 2
+        assert info['misses'] == 5
+        assert info['current_bytes'] <= info['max_bytes']
+        # Evicted slices no longer keep their path -> key records
+        assert sorted(path for _, path in service._cache_keys) == paths[2:]
+
+    def test_repeated_load_hits_cache(self, tmp_path):
+        """Test that reloading a cached slice counts as a hit."""
+        paths = self.write_images(tmp_path, 1)
+        service = PanoramicImageService(ImageConfig(cache_bytes=10 * 30000))
+
+        first = service.load_slice_image(paths[0])
+        second = service.load_slice_image(paths[0])
+
+        assert first is second
+        assert service.get_cache_info()['hits'] == 1
+
+    def test_panoramic_and_slice_share_budget(self, tmp_path):
+        """Test that panoramas and slices are accounted in one budget."""
+        panoramic_path = tmp_path / "EB10000001.bmp"
+        Image.new('RGB', (200, 100)).save(panoramic_path)
+        paths = self.write_images(tmp_path, 2)
+        service = PanoramicImageService(ImageConfig(cache_bytes=100000))
+
+        service.load_panoramic_image(str(panoramic_path))
+        for path in paths:
+            service.load_slice_image(path)
+
+        info = service.get_cache_info()
+        assert info['panoramic_images'] == []
+        assert info['slice_images_count'] == 2
+
+    def test_clear_cache(self, tmp_path):
+        """Test clearing the cache."""
+        paths = self.write_images(tmp_path, 2)
+        service = PanoramicImageService(ImageConfig(cache_bytes=10 * 30000))
+        for path in paths:
+            service.load_slice_image(path)
+
+        service.clear_cache()
+        info = service.get_cache_info()
+        assert info['slice_images_count'] == 0
+        assert info['current_bytes'] == 0
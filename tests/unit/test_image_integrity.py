@@ -0,0 +1,115 @@
+"""
+Tests for image integrity verification and the quarantine manifest.
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.image_integrity import QuarantineManifest, verify_files, verify_image
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def save_image(path, size=(40, 30), seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+
+
+def truncate(path, fraction=0.5):
+    data = path.read_bytes()
+    path.write_bytes(data[:int(len(data) * fraction)])
+
+
+class TestVerifyFiles:
+    """Test cases for decoding files and recording failures."""
+
+    @pytest.mark.parametrize("ext", ['.png', '.bmp'])
+    def test_truncated_file_fails(self, tmp_path, ext):
+        """Test that a half-written file fails verification while the intact one passes."""
+        path = tmp_path / f"plate{ext}"
+        save_image(path)
+        assert verify_image(str(path)) is None
+
+        truncate(path)
+        assert "truncated" in verify_image(str(path))
+        (tmp_path / "empty.png").write_bytes(b"")
+        assert verify_image(str(tmp_path / "empty.png")) is not None
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_quarantine_and_resume(self, tmp_path, workers):
+        """Test that failures are quarantined, unchanged files are skipped and changed files are rechecked."""
+        for index in range(5):
+            save_image(tmp_path / f"hole_{index}.png", seed=index)
+        truncate(tmp_path / "hole_3.png")
+        paths = [f"hole_{index}.png" for index in range(5)] + ["missing.png"]
+        manifest_path = str(tmp_path / "cache" / "quarantine.json")
+
+        manifest, checked = verify_files(str(tmp_path), paths, max_workers=workers, chunk_size=2,
+                                         manifest_path=manifest_path)
+        assert checked == 5
+        assert list(manifest.quarantined) == ["hole_3.png"]
+        assert len(manifest.verified) == 4
+
+        loaded = QuarantineManifest.load(manifest_path, str(tmp_path))
+        assert loaded.current_quarantine() == {"hole_3.png"}
+        manifest, checked = verify_files(str(tmp_path), paths, loaded, max_workers=workers)
+        assert checked == 0
+
+        # Replacing the corrupt file releases it from quarantine
+        save_image(tmp_path / "hole_3.png", seed=9)
+        os.utime(tmp_path / "hole_3.png", ns=(1, 1))
+        assert manifest.current_quarantine() == set()
+        manifest, checked = verify_files(str(tmp_path), paths, manifest, max_workers=workers)
+        assert checked == 1 and not manifest.quarantined
+
+    def test_interrupted_run_resumes(self, tmp_path):
+        """Test that progress is saved when a run is interrupted and the next run only checks the rest."""
+        paths = []
+        for index in range(6):
+            save_image(tmp_path / f"hole_{index}.png", seed=index)
+            paths.append(f"hole_{index}.png")
+        manifest_path = str(tmp_path / "quarantine.json")
+
+        def interrupt(done, total, message):
+            if done >= 2:
+                raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            verify_files(str(tmp_path), paths, max_workers=0, chunk_size=2, manifest_path=manifest_path,
+                         progress_callback=interrupt)
+
+        resumed = QuarantineManifest.load(manifest_path, str(tmp_path))
+        assert len(resumed.verified) == 2
+        manifest, checked = verify_files(str(tmp_path), paths, resumed, max_workers=0)
+        assert checked == 4 and len(manifest.verified) == 6
+
+
+class TestQuarantinedNavigation:
+    """Test cases for skipping quarantined files when a directory is loaded."""
+
+    def test_scan_skips_quarantined(self, tmp_path):
+        """Test that a corrupt slice and every slice of a corrupt panorama are left out of the scan."""
+        for panoramic_id in ("EB10000000", "EB10000001", "EB10000002"):
+            save_image(tmp_path / f"{panoramic_id}.bmp", size=(64, 48))
+            (tmp_path / panoramic_id).mkdir()
+            for hole_number in (1, 2, 3):
+                save_image(tmp_path / panoramic_id / f"hole_{hole_number}.png", seed=hole_number)
+        truncate(tmp_path / "EB10000000" / "hole_2.png")
+        truncate(tmp_path / "EB10000002.bmp", 0.8)
+
+        service = PanoramicImageService(ImageConfig(decode_workers=0, virtual_slices=False))
+        manifest, checked = service.verify_directory_images(str(tmp_path), max_workers=0)
+        assert checked == 12
+        assert sorted(manifest.quarantined) == [os.path.join("EB10000000", "hole_2.png"), "EB10000002.bmp"]
+        assert (tmp_path / ".annotation_state" / "quarantine.json").exists()
+
+        slice_files = service.get_slice_files_from_directory(str(tmp_path), str(tmp_path))
+        assert [(record['panoramic_id'], record['hole_number']) for record in slice_files] == [
+            ("EB10000000", 1), ("EB10000000", 3),
+            ("EB10000001", 1), ("EB10000001", 2), ("EB10000001", 3)]
+
+        skipping_disabled = PanoramicImageService(ImageConfig(decode_workers=0, virtual_slices=False,
+                                                              skip_quarantined=False))
+        assert len(skipping_disabled.get_slice_files_from_directory(str(tmp_path), str(tmp_path))) == 9
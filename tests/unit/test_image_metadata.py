@@ -0,0 +1,139 @@
+"""
+Tests for header-only image metadata and the scan-time metadata index.
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.image_metadata import MetadataIndex, probe_image_header, read_png_header
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def forbid_pixel_decode(monkeypatch):
+    """Fail the test if any PIL image or decoder reads pixel data from here on."""
+    def fail(*args, **kwargs):
+        raise AssertionError("pixels were decoded")
+    monkeypatch.setattr(Image.Image, 'load', fail)
+    monkeypatch.setattr(np, 'memmap', fail)
+
+
+class TestHeaderProbe:
+    """Test cases for reading image headers."""
+
+    @pytest.mark.parametrize("mode", ['1', 'L', 'LA', 'P', 'RGB', 'RGBA', 'I;16'])
+    def test_png_header_matches_pil(self, tmp_path, mode):
+        """Test that the IHDR parser reports the same size and mode as PIL."""
+        path = tmp_path / f"slice_{mode.replace(';', '')}.png"
+        Image.new(mode, (37, 21)).save(path)
+        with Image.open(path) as image:
+            expected = (image.width, image.height, image.mode)
+
+        assert read_png_header(str(path)) == expected
+
+    @pytest.mark.parametrize("ext", ['.png', '.bmp', '.jpg', '.tiff'])
+    def test_probe_reads_header_only(self, tmp_path, ext, monkeypatch):
+        """Test that probing returns size, mode, byte size and mtime without decoding."""
+        path = tmp_path / f"plate{ext}"
+        Image.new('RGB', (64, 48), (10, 20, 30)).save(path)
+        stat_result = os.stat(path)
+        forbid_pixel_decode(monkeypatch)
+
+        metadata = probe_image_header(str(path))
+
+        assert (metadata.width, metadata.height, metadata.mode) == (64, 48, 'RGB')
+        assert metadata.file_size == stat_result.st_size
+        assert metadata.mtime_ns == stat_result.st_mtime_ns
+        assert metadata.pixel_bytes == 64 * 48 * 3
+
+    def test_refresh_reuses_unchanged_files(self, tmp_path):
+        """Test incremental refresh, skipped unreadable files and the persistent round trip."""
+        for name, size in (("a.png", (10, 12)), ("b.png", (20, 22)), ("c.bmp", (30, 32))):
+            Image.new('RGB', size).save(tmp_path / name)
+        (tmp_path / "broken.png").write_bytes(b"not an image")
+        paths = ["a.png", "b.png", "c.bmp", "broken.png", "missing.png"]
+
+        index, probed = MetadataIndex.refresh(str(tmp_path), paths)
+        assert probed == 3 and index.paths == ["a.png", "b.png", "c.bmp"]
+        assert index.get("c.bmp").size == (30, 32)
+
+        Image.new('L', (5, 6)).save(tmp_path / "b.png")
+        os.utime(tmp_path / "b.png", ns=(1, 1))
+        updated, probed = MetadataIndex.refresh(str(tmp_path), paths, index)
+        assert probed == 1
+        assert updated.get("b.png").size == (5, 6) and updated.get("b.png").mode == 'L'
+        assert updated.get("a.png") == index.get("a.png")
+
+        index_path = str(tmp_path / "cache" / "image_metadata.npz")
+        updated.save(index_path)
+        loaded = MetadataIndex.load(index_path)
+        assert loaded.paths == updated.paths
+        assert loaded.lookup("b.png", 1, os.path.getsize(tmp_path / "b.png")).size == (5, 6)
+        assert loaded.lookup("b.png", 2, os.path.getsize(tmp_path / "b.png")) is None
+
+    def test_replaced_merges_partial_refresh(self, tmp_path):
+        """Test that a partial refresh replaces dropped and refreshed paths and keeps the rest."""
+        for name in ("a.png", "b.png", "c.png"):
+            Image.new('RGB', (10, 10)).save(tmp_path / name)
+        index, _ = MetadataIndex.refresh(str(tmp_path), ["a.png", "b.png", "c.png"])
+        Image.new('RGB', (4, 4)).save(tmp_path / "c.png")
+        os.utime(tmp_path / "c.png", ns=(1, 1))
+        refreshed, probed = MetadataIndex.refresh(str(tmp_path), ["c.png"], index)
+
+        merged = index.replaced(refreshed, lambda path: path == "b.png")
+
+        assert probed == 1
+        assert merged.paths == ["a.png", "c.png"]
+        assert merged.get("c.png").size == (4, 4)
+
+
+class TestServiceMetadata:
+    """Test cases for metadata queries through the image service."""
+
+    @pytest.fixture
+    def plate_directory(self, tmp_path):
+        Image.new('RGB', (3088, 2064), (50, 60, 70)).save(tmp_path / "EB10000000.bmp")
+        Image.new('RGB', (3088, 2064), (50, 60, 70)).save(tmp_path / "EB10000001.bmp")
+        slice_dir = tmp_path / "EB10000001"
+        slice_dir.mkdir()
+        for hole_number in (1, 2, 3):
+            Image.new('RGB', (90, 88)).save(slice_dir / f"hole_{hole_number}.png")
+        return tmp_path
+
+    def test_scan_indexes_slices_and_panoramas(self, plate_directory, monkeypatch):
+        """Test that size queries after a scan are answered from the index without decoding."""
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+        service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        assert os.path.exists(service.get_metadata_index_path(str(plate_directory)))
+
+        forbid_pixel_decode(monkeypatch)
+        metadata = service.load_panoramic_metadata(str(plate_directory / "EB10000000.bmp"))
+        assert metadata.size == (3088, 2064)
+        assert service.get_image_metadata(str(plate_directory / "EB10000001" / "hole_2.png")).size == (90, 88)
+        assert service.metadata_stats == {'indexed': 2, 'probed': 0}
+
+        # Virtual slices take their size from the hole rectangle
+        virtual = service.get_image_metadata(str(plate_directory / "EB10000000" / "hole_1.png"))
+        x, y, width, height = service.hole_manager.get_hole_coordinates(1)
+        assert virtual.size == (width, height)
+
+        stats = service.get_image_statistics(str(plate_directory / "EB10000001" / "hole_1.png"), pixel_stats=False)
+        assert (stats['width'], stats['height'], stats['mode'], stats['size_bytes']) == (90, 88, 'RGB', 90 * 88 * 3)
+
+    def test_changed_file_is_reprobed(self, plate_directory):
+        """Test that a file changed after the scan is answered from its header, not the stale entry."""
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+        service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        slice_path = plate_directory / "EB10000001" / "hole_3.png"
+        Image.new('RGB', (64, 64)).save(slice_path)
+        os.utime(slice_path, ns=(1, 1))
+
+        assert service.get_image_metadata(str(slice_path)).size == (64, 64)
+        assert service.metadata_stats['probed'] == 1
+
+        rescanned = PanoramicImageService(ImageConfig(decode_workers=0))
+        rescanned.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        assert rescanned.get_image_metadata(str(slice_path)).size == (64, 64)
+        assert rescanned.metadata_stats == {'indexed': 1, 'probed': 0}
@@ -0,0 +1,104 @@
+"""
+Tests for the layered, incremental panoramic overlay renderer.
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.overlay_renderer import PanoramicOverlayRenderer, OVERLAY_COLORS
+from src.services.panoramic_image_service import PanoramicImageService
+from src.ui.hole_manager import HoleManager
+
+
+def make_display(width=772, height=516):
+    return Image.new('RGB', (width, height), (40, 60, 80))
+
+
+@pytest.fixture
+def renderer():
+    return PanoramicOverlayRenderer(HoleManager())
+
+
+class TestPanoramicOverlayRenderer:
+    """Test cases for PanoramicOverlayRenderer."""
+
+    def render(self, renderer, current_hole, annotated_holes=None, key='plate'):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return make_display(), 0.25
+
+        image = renderer.render(key, factory, current_hole, annotated_holes)
+        return image, len(calls)
+
+    def test_base_layer_built_once(self, renderer):
+        """Test that the base layer is reused while the key is unchanged."""
+        _, first_calls = self.render(renderer, 25)
+        _, second_calls = self.render(renderer, 26)
+        _, third_calls = self.render(renderer, 26, key='other')
+
+        assert (first_calls, second_calls, third_calls) == (1, 0, 1)
+
+    def test_only_changed_holes_redrawn(self, renderer):
+        """Test that moving the highlight redraws only the two affected holes."""
+        self.render(renderer, 25)
+        assert renderer.last_updated_holes == 120
+
+        self.render(renderer, 26)
+        assert renderer.last_updated_holes == 2
+
+        self.render(renderer, 26, {30: 'positive'})
+        assert renderer.last_updated_holes == 1
+
+        self.render(renderer, 26, {30: 'positive'})
+        assert renderer.last_updated_holes == 0
+
+    def test_incremental_matches_fresh_render(self, renderer):
+        """Test that an incrementally updated frame equals a fresh render."""
+        annotated = {1: 'negative', 40: 'positive'}
+        for hole in (25, 26, 60, 1):
+            incremental, _ = self.render(renderer, hole, annotated)
+
+        fresh_renderer = PanoramicOverlayRenderer(HoleManager())
+        fresh, _ = self.render(fresh_renderer, 1, annotated)
+
+        assert np.array_equal(np.array(incremental), np.array(fresh))
+
+    def test_outline_colors(self, renderer):
+        """Test that outlines use the state colours at the hole corners."""
+        image, _ = self.render(renderer, 25, {26: 'negative'})
+        pixels = np.array(image)
+
+        x0, y0, _, _ = renderer._rects[25]
+        assert tuple(pixels[y0, x0]) == (255, 0, 0)
+        x0, y0, _, _ = renderer._rects[26]
+        assert tuple(pixels[y0, x0]) == (0, 255, 0)
+        x0, y0, _, _ = renderer._rects[27]
+        assert tuple(pixels[y0, x0]) == Image.new('RGB', (1, 1), OVERLAY_COLORS['unannotated']).getpixel((0, 0))
+
+    def test_layout_change_rebuilds_base(self, renderer):
+        """Test that changing hole positioning invalidates the base layer."""
+        self.render(renderer, 25)
+        renderer.hole_manager.first_hole_x += 10
+        _, calls = self.render(renderer, 25)
+
+        assert calls == 1
+
+
+class TestServiceOverlay:
+    """Test cases for PanoramicImageService.render_panoramic_overlay."""
+
+    def test_render_at_display_size(self, tmp_path):
+        """Test that the overlay is rendered at display resolution."""
+        path = tmp_path / "EB10000001.bmp"
+        Image.new('RGB', (3088, 2064), (90, 120, 150)).save(path)
+        service = PanoramicImageService(ImageConfig(cache_bytes=256 * 1024 * 1024))
+        service.load_panoramic_image(str(path))
+
+        image = service.render_panoramic_overlay(str(path), 25, {}, 1220, 750)
+        assert image.size == service.compute_display_size(3088, 2064, 1220, 750, 'fit')
+
+        service.render_panoramic_overlay(str(path), 26, {}, 1220, 750)
+        assert service.overlay_renderer.last_updated_holes == 2
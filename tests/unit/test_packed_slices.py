@@ -0,0 +1,166 @@
+"""
+Tests for the per-panorama packed slice format.
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.packed_slices import (
+    PACKED_INDEX_FILENAME, PACKED_SLICES_FILENAME, PackedSlices,
+    is_pack_current, pack_directory, pack_slice_directory
+)
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def make_slices(slice_dir, holes=(1, 2, 3), size=(40, 30)):
+    """Write hole PNGs with distinct random pixels and return them by hole number."""
+    slice_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(len(holes))
+    pixels = {}
+    for hole_number in holes:
+        array = rng.integers(0, 255, size=(size[1], size[0], 3), dtype=np.uint8)
+        Image.fromarray(array).save(slice_dir / f"hole_{hole_number}.png")
+        pixels[hole_number] = array
+    return pixels
+
+
+class TestPackSliceDirectory:
+    """Test cases for writing and opening packed slices."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that packed slices equal the source PNGs, including padded sizes."""
+        slice_dir = tmp_path / "EB10000000"
+        pixels = make_slices(slice_dir)
+        pixels.update(make_slices(slice_dir, holes=(7,), size=(24, 50)))
+
+        assert pack_slice_directory(str(slice_dir)) == 4
+        packed = PackedSlices.open(str(slice_dir))
+
+        assert packed.hole_numbers == [1, 2, 3, 7]
+        assert packed.stack.shape == (4, 50, 40, 3)
+        assert isinstance(packed.stack, np.memmap)
+        for hole_number, expected in pixels.items():
+            assert np.array_equal(packed.get(hole_number), expected)
+
+    def test_skips_current_pack(self, tmp_path):
+        """Test that an up-to-date pack is not rewritten unless forced."""
+        slice_dir = tmp_path / "EB10000000"
+        make_slices(slice_dir)
+        pack_slice_directory(str(slice_dir))
+
+        assert is_pack_current(str(slice_dir))
+        assert pack_slice_directory(str(slice_dir)) == 0
+        assert pack_slice_directory(str(slice_dir), force=True) == 3
+
+        newer = os.stat(slice_dir / PACKED_SLICES_FILENAME).st_mtime_ns + 10 ** 9
+        os.utime(slice_dir / "hole_2.png", ns=(newer, newer))
+        assert not is_pack_current(str(slice_dir))
+
+    def test_remove_sources(self, tmp_path):
+        """Test that source PNGs are deleted only after packing."""
+        slice_dir = tmp_path / "EB10000000"
+        make_slices(slice_dir)
+
+        pack_slice_directory(str(slice_dir), remove_sources=True)
+
+        assert sorted(os.listdir(slice_dir)) == [PACKED_INDEX_FILENAME, PACKED_SLICES_FILENAME]
+
+    def test_inconsistent_index_rejected(self, tmp_path):
+        """Test that an index that does not match the stack raises ValueError."""
+        slice_dir = tmp_path / "EB10000000"
+        make_slices(slice_dir)
+        pack_slice_directory(str(slice_dir))
+        index_path = slice_dir / PACKED_INDEX_FILENAME
+        index = json.loads(index_path.read_text())
+        index['holes']['9'] = [5, 30, 40]
+        index_path.write_text(json.dumps(index))
+
+        with pytest.raises(ValueError):
+            PackedSlices.open(str(slice_dir))
+
+    def test_pack_directory_parallel(self, tmp_path):
+        """Test parallel conversion with per-directory error reporting."""
+        make_slices(tmp_path / "EB10000000")
+        make_slices(tmp_path / "EB10000001", holes=(1, 2))
+        (tmp_path / "EB10000002").mkdir()
+        (tmp_path / "EB10000002" / "hole_1.png").write_bytes(b"not a png")
+
+        packed, errors = pack_directory(str(tmp_path), max_workers=2)
+
+        assert packed == {str(tmp_path / "EB10000000"): 3, str(tmp_path / "EB10000001"): 2}
+        assert list(errors) == [str(tmp_path / "EB10000002")]
+
+
+@pytest.fixture
+def service():
+    return PanoramicImageService(ImageConfig(cache_bytes=64 * 1024 * 1024, disk_cache_enabled=False))
+
+
+class TestPackedSliceService:
+    """Test cases for transparent reading of packed slices."""
+
+    def test_reads_pack_instead_of_png(self, service, tmp_path):
+        """Test that a packed hole is served from the pack, not the PNG."""
+        slice_dir = tmp_path / "EB10000000"
+        pixels = make_slices(slice_dir)
+        pack_slice_directory(str(slice_dir))
+        # Overwrite the PNG without repacking: the pack still wins
+        Image.new('RGB', (40, 30), (1, 2, 3)).save(slice_dir / "hole_2.png")
+        slice_path = str(slice_dir / "hole_2.png")
+
+        assert service.get_packed_slice_source(slice_path) == (str(slice_dir / PACKED_SLICES_FILENAME), 2)
+        assert np.array_equal(np.array(service.load_slice_image(slice_path)), pixels[2])
+        assert service.get_enhanced_slice_image(slice_path).size == (40, 30)
+        assert service.is_cached('enhanced_slice', slice_path)
+
+    def test_scan_yields_packed_records(self, service, tmp_path):
+        """Test that holes only present in the pack are listed with nominal PNG paths."""
+        slice_dir = tmp_path / "EB10000000"
+        pixels = make_slices(slice_dir)
+        pack_slice_directory(str(slice_dir), remove_sources=True)
+        Image.new('RGB', (40, 30)).save(slice_dir / "hole_5.png")
+        Image.new('RGB', (40, 30)).save(tmp_path / "EB10000000.bmp")
+
+        slice_files = service.get_slice_files_from_directory(str(tmp_path), str(tmp_path))
+
+        assert [(f['hole_number'], f['structure_type']) for f in slice_files] == [
+            (1, 'packed'), (2, 'packed'), (3, 'packed'), (5, 'subdirectory')]
+        assert slice_files[0]['filepath'] == str(slice_dir / "hole_1.png")
+        # A virtual source exists as well, but the pack takes precedence over cropping
+        assert service.get_virtual_slice_source(slice_files[0]['filepath']) is not None
+        assert np.array_equal(np.array(service.load_slice_image(slice_files[0]['filepath'])), pixels[1])
+
+    def test_thumbnail_atlas_from_pack(self, service, tmp_path):
+        """Test that thumbnails are rendered from packed slices."""
+        slice_dir = tmp_path / "EB10000000"
+        make_slices(slice_dir)
+        pack_slice_directory(str(slice_dir), remove_sources=True)
+        slice_files = service.get_slice_files_from_directory(str(tmp_path), str(tmp_path))
+
+        atlas = service.get_thumbnail_atlas(slice_files, max_workers=1)
+
+        assert 1 not in atlas.missing and 4 in atlas.missing
+
+    def test_corrupt_pack_falls_back_to_png(self, service, tmp_path):
+        """Test that an unreadable pack is ignored and the PNG is read."""
+        slice_dir = tmp_path / "EB10000000"
+        pixels = make_slices(slice_dir)
+        pack_slice_directory(str(slice_dir))
+        (slice_dir / PACKED_INDEX_FILENAME).write_text("{")
+        slice_path = str(slice_dir / "hole_1.png")
+
+        assert service.get_packed_slice_source(slice_path) is None
+        assert np.array_equal(np.array(service.load_slice_image(slice_path)), pixels[1])
+
+    def test_disabled(self, tmp_path):
+        """Test that disabling packed slices ignores existing packs."""
+        slice_dir = tmp_path / "EB10000000"
+        make_slices(slice_dir)
+        pack_slice_directory(str(slice_dir))
+        service = PanoramicImageService(ImageConfig(packed_slices=False, disk_cache_enabled=False))
+
+        assert service.get_packed_slice_source(str(slice_dir / "hole_1.png")) is None
@@ -0,0 +1,144 @@
+"""
+Tests for lossless BMP panorama transcoding.
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services import panorama_transcoder
+from src.services.panorama_transcoder import TranscodeLog, images_identical, transcode_file, transcode_files
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def save_bmp(path, size=(40, 30), seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+    return pixels
+
+
+class TestTranscodeFile:
+    """Test cases for transcoding a single file."""
+
+    @pytest.mark.parametrize("fmt, ext", [('png', '.png'), ('tiff', '.tiff')])
+    def test_pixels_identical_and_source_removed(self, tmp_path, fmt, ext):
+        """Test that the target decodes to the same pixels and replaces the BMP."""
+        source = tmp_path / "EB10000000.bmp"
+        pixels = save_bmp(source)
+        mtime_ns = source.stat().st_mtime_ns
+
+        result = transcode_file(str(source), fmt, compress_level=1)
+
+        target = tmp_path / f"EB10000000{ext}"
+        assert result['error'] is None
+        assert result['target'] == target.name
+        assert result['target_size'] == target.stat().st_size
+        assert not source.exists()
+        assert target.stat().st_mtime_ns == mtime_ns
+        with Image.open(target) as image:
+            assert np.array_equal(np.asarray(image), pixels)
+        assert sorted(os.listdir(tmp_path)) == [target.name]
+
+    def test_mismatch_keeps_source(self, tmp_path, monkeypatch):
+        """Test that a failed pixel comparison leaves the BMP and no temporary file."""
+        source = tmp_path / "EB10000000.bmp"
+        save_bmp(source)
+        monkeypatch.setattr(panorama_transcoder, 'images_identical', lambda first, second: False)
+
+        result = transcode_file(str(source))
+
+        assert 'ValueError' in result['error']
+        assert sorted(os.listdir(tmp_path)) == [source.name]
+
+    def test_existing_different_target_not_overwritten(self, tmp_path):
+        """Test that an unrelated file with the target name is left alone."""
+        source = tmp_path / "EB10000000.bmp"
+        save_bmp(source, seed=1)
+        save_bmp(tmp_path / "other.bmp", seed=2)
+        Image.open(tmp_path / "other.bmp").save(tmp_path / "EB10000000.png")
+
+        result = transcode_file(str(source))
+
+        assert 'FileExistsError' in result['error']
+        assert source.exists()
+
+    def test_images_identical(self):
+        """Test mode, size and pixel comparisons."""
+        image = Image.new('RGB', (4, 4), (1, 2, 3))
+        assert images_identical(image, image.copy())
+        assert not images_identical(image, image.convert('L'))
+        changed = image.copy()
+        changed.putpixel((0, 0), (1, 2, 4))
+        assert not images_identical(image, changed)
+
+
+class TestTranscodeFiles:
+    """Test cases for batch transcoding and the progress log."""
+
+    def test_resume_skips_completed_files(self, tmp_path):
+        """Test that a rerun with the log only transcodes new files."""
+        for index in range(3):
+            save_bmp(tmp_path / f"EB{index}.bmp", seed=index)
+        log_path = str(tmp_path / ".annotation_state" / "transcode_log.jsonl")
+
+        log, stats = transcode_files(str(tmp_path), ['EB0.bmp', 'EB1.bmp'], max_workers=0,
+                                     keep_source=True, log=TranscodeLog(log_path))
+        assert stats['files'] == 2 and stats['source_bytes'] > 0
+
+        log, stats = transcode_files(str(tmp_path), ['EB0.bmp', 'EB1.bmp', 'EB2.bmp'], max_workers=0,
+                                     log=TranscodeLog.load(log_path))
+        assert (stats['files'], stats['skipped'], stats['failed']) == (1, 2, 0)
+        assert sorted(os.listdir(tmp_path)) == ['.annotation_state', 'EB0.png', 'EB1.png', 'EB2.png']
+        assert len(TranscodeLog.load(log_path)) == 3
+
+    def test_interrupted_swap_is_completed(self, tmp_path):
+        """Test that a target left next to its BMP by an interrupted run is accepted."""
+        source = tmp_path / "EB0.bmp"
+        save_bmp(source)
+        Image.open(source).save(tmp_path / "EB0.png")
+
+        log, stats = transcode_files(str(tmp_path), ['EB0.bmp'], max_workers=0)
+
+        assert stats['files'] == 1
+        assert not source.exists()
+
+    def test_process_pool(self, tmp_path):
+        """Test transcoding in worker processes."""
+        for index in range(4):
+            save_bmp(tmp_path / f"EB{index}.bmp", seed=index)
+        progress = []
+
+        log, stats = transcode_files(str(tmp_path), [f"EB{index}.bmp" for index in range(4)], 'tiff',
+                                     max_workers=2, progress_callback=lambda done, total, message:
+                                     progress.append(done))
+
+        assert stats['files'] == 4 and stats['failed'] == 0
+        assert sorted(progress) == [1, 2, 3, 4]
+        assert all((tmp_path / f"EB{index}.tiff").exists() for index in range(4))
+
+    def test_unknown_format_rejected(self, tmp_path):
+        """Test that an unsupported output format fails before any work."""
+        with pytest.raises(ValueError):
+            transcode_files(str(tmp_path), [], 'jpeg')
+
+
+class TestServiceTranscoding:
+    """Test cases for directory transcoding through PanoramicImageService."""
+
+    def test_transcoded_panoramas_are_found(self, tmp_path):
+        """Test that panoramas are located and loaded after transcoding."""
+        pixels = save_bmp(tmp_path / "EB10000000.bmp", size=(64, 48))
+        (tmp_path / "EB10000000").mkdir()
+        Image.new('RGB', (4, 4)).save(tmp_path / "EB10000000" / "hole_1.png")
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+
+        log, stats = service.transcode_directory_panoramas(str(tmp_path), 'png', 1, max_workers=0)
+
+        assert stats['files'] == 1
+        assert (tmp_path / ".annotation_state" / "transcode_log.jsonl").exists()
+        panoramic_path = service.find_panoramic_image("EB10000000/hole_1.png", str(tmp_path))
+        assert panoramic_path == str(tmp_path / "EB10000000.png")
+        assert np.array_equal(np.asarray(service.load_panoramic_image(panoramic_path)), pixels)
+        service.shutdown()
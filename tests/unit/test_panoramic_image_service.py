@@ -0,0 +1,90 @@
+"""
+Tests for PanoramicImageService display helpers.
+"""
+import os
+
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+@pytest.fixture
+def service():
+    return PanoramicImageService(ImageConfig(cache_bytes=256 * 1024 * 1024))
+
+
+@pytest.fixture
+def panoramic_path(tmp_path):
+    path = tmp_path / "EB10000001.bmp"
+    Image.new('RGB', (3088, 2064), (90, 120, 150)).save(path)
+    return path
+
+
+class TestDisplayPyramid:
+    """Test cases for the multi-resolution display pyramid."""
+
+    def test_pyramid_levels(self, service, panoramic_path):
+        """Test that the pyramid holds full, 1/2, 1/4 and 1/8 levels."""
+        pyramid = service.get_panoramic_pyramid(str(panoramic_path))
+
+        assert [level.size for level in pyramid] == [
+            (3088, 2064), (1544, 1032), (772, 516), (386, 258)
+        ]
+
+    def test_pyramid_is_cached(self, service, panoramic_path):
+        """Test that the reduced levels are built once and cached."""
+        first = service.get_panoramic_pyramid(str(panoramic_path))
+        second = service.get_panoramic_pyramid(str(panoramic_path))
+
+        assert first[1] is second[1]
+        assert service.is_cached('pyramid', str(panoramic_path))
+
+    def test_pyramid_invalidated_on_mtime_change(self, service, panoramic_path):
+        """Test that a modified file rebuilds its pyramid."""
+        first = service.get_panoramic_pyramid(str(panoramic_path))
+
+        Image.new('RGB', (3088, 2064), (10, 10, 10)).save(panoramic_path)
+        stat = panoramic_path.stat()
+        os.utime(panoramic_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        second = service.get_panoramic_pyramid(str(panoramic_path))
+        assert second[1] is not first[1]
+        assert second[1].getpixel((0, 0)) == (10, 10, 10)
+        # The stale entries for the old mtime are dropped
+        assert service.get_cache_info()['entries'] == 2
+
+    def test_select_pyramid_level(self, service, panoramic_path):
+        """Test that the smallest level not smaller than the target is chosen."""
+        pyramid = service.get_panoramic_pyramid(str(panoramic_path))
+
+        level, scale = service.select_pyramid_level(pyramid, 1200, 800)
+        assert level.size == (1544, 1032)
+        assert scale == 0.5
+
+        level, scale = service.select_pyramid_level(pyramid, 300, 200)
+        assert level.size == (386, 258)
+        assert scale == 0.125
+
+        level, scale = service.select_pyramid_level(pyramid, 2000, 1500)
+        assert scale == 1.0
+
+    def test_resize_from_pyramid_matches_target_size(self, service, panoramic_path):
+        """Test that resampling from the pyramid yields the same display size."""
+        pyramid = service.get_panoramic_pyramid(str(panoramic_path))
+
+        direct = service.resize_image_for_display(pyramid[0], 1220, 750)
+        from_pyramid = service.resize_image_for_display(pyramid[0], 1220, 750, pyramid=pyramid)
+
+        assert abs(direct.width - from_pyramid.width) <= 1
+        assert abs(direct.height - from_pyramid.height) <= 1
+
+    def test_compute_display_size(self, service):
+        """Test display size computation for each fill mode."""
+        assert service.compute_display_size(3088, 2064, 1544, 2064) == (1544, 1032)
+        assert service.compute_display_size(100, 50, 200, 200) == (100, 50)
+        assert service.compute_display_size(100, 50, 200, 200, 'fill') == (400, 200)
+        assert service.compute_display_size(100, 50, 30, 40, 'stretch') == (30, 40)
+        with pytest.raises(ValueError):
+            service.compute_display_size(100, 50, 30, 40, 'zoom')
@@ -0,0 +1,141 @@
+"""
+Tests for perceptual slice hashing and duplicate search.
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import src.services.panoramic_image_service as service_module
+import src.services.perceptual_hash as perceptual_hash
+from src.core.config import ImageConfig
+from src.services.perceptual_hash import (
+    HashIndex, dhash, find_near_pairs, hamming_distance, phash, popcount64
+)
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def make_slice(seed, size=90):
+    """A smooth random pattern, so that hashes are stable under small edits."""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 255, size=(6, 6, 3), dtype=np.uint8)
+    return np.asarray(Image.fromarray(coarse).resize((size, size), Image.Resampling.BICUBIC))
+
+
+def brute_force_pairs(hashes, max_distance):
+    pairs = []
+    for i in range(len(hashes)):
+        for j in range(i + 1, len(hashes)):
+            if bin(int(hashes[i]) ^ int(hashes[j])).count('1') <= max_distance:
+                pairs.append((i, j))
+    return pairs
+
+
+class TestHashes:
+    """Test cases for dHash and pHash."""
+
+    @pytest.mark.parametrize("hash_func", [dhash, phash])
+    def test_near_duplicate_is_close(self, hash_func):
+        """Test that re-imaging noise keeps the distance small while other slices differ."""
+        original = make_slice(0)
+        rng = np.random.default_rng(1)
+        reimaged = np.clip(original.astype(np.int16) + 6 + rng.integers(-3, 4, original.shape), 0, 255)
+        reimaged = reimaged.astype(np.uint8)
+
+        assert hash_func(original) == hash_func(original.copy())
+        assert bin(hash_func(original) ^ hash_func(reimaged)).count('1') <= 4
+        assert bin(hash_func(original) ^ hash_func(make_slice(2))).count('1') > 10
+
+    def test_popcount(self, monkeypatch):
+        """Test vectorized popcount, with and without np.bitwise_count."""
+        values = np.random.default_rng(0).integers(0, 2 ** 63, size=100, dtype=np.uint64)
+        values[0] = np.uint64(2 ** 64 - 1)
+        expected = [bin(int(value)).count('1') for value in values]
+
+        assert popcount64(values).tolist() == expected
+        monkeypatch.delattr(np, 'bitwise_count', raising=False)
+        assert popcount64(values).tolist() == expected
+
+
+class TestDuplicateSearch:
+    """Test cases for the chunked Hamming search."""
+
+    @pytest.mark.parametrize("keyed", [1, 2, 3])
+    def test_matches_brute_force(self, keyed, monkeypatch):
+        """Test that every chunk plan finds exactly the brute-force pairs."""
+        monkeypatch.setattr(perceptual_hash, '_chunk_plan', lambda count, distance: (distance + keyed, keyed))
+        rng = np.random.default_rng(3)
+        hashes = rng.integers(0, 2 ** 63, size=300, dtype=np.uint64)
+        # Plant near duplicates at distance 1-5
+        for position in range(0, 60, 2):
+            bits = rng.choice(64, size=position % 5 + 1, replace=False)
+            hashes[position + 1] = hashes[position] ^ np.uint64(sum(1 << int(bit) for bit in bits))
+        hashes = np.unique(hashes)
+
+        for max_distance in (1, 3, 5, 8):
+            pairs = find_near_pairs(hashes, max_distance)
+            assert [tuple(pair) for pair in pairs.tolist()] == brute_force_pairs(hashes, max_distance)
+
+        with pytest.raises(ValueError):
+            find_near_pairs(hashes, 16)
+
+    def test_duplicate_groups(self):
+        """Test grouping of exact and near duplicates."""
+        base = 0x0123456789ABCDEF
+        hashes = np.array([base, 0xFFFF0000FFFF0000, base, base ^ 0b11, 0x0F0F0F0F0F0F0F0F, base ^ 0b111 << 20],
+                          dtype=np.uint64)
+        index = HashIndex('', [f"p{i}" for i in range(6)], np.zeros(6), hashes, hashes)
+
+        assert index.find_duplicate_groups(0) == [[0, 2]]
+        assert index.find_duplicate_groups(2) == [[0, 2, 3]]
+        assert index.find_duplicate_groups(3) == [[0, 2, 3, 5]]
+        assert index.query(base, 2).tolist() == [0, 2, 3]
+        assert hamming_distance(hashes, base).tolist() == [bin(int(h) ^ base).count('1') for h in hashes]
+
+
+class TestHashIndex:
+    """Test cases for HashIndex persistence and service integration."""
+
+    def test_save_load_merge(self, tmp_path):
+        """Test the persistent round trip and merging of per-directory indexes."""
+        index = HashIndex(str(tmp_path), [os.path.join("EB1", "hole_1.png"), os.path.join("EB1", "hole_2.png")],
+                          np.array([5, 6]), np.array([1, 2], dtype=np.uint64),
+                          np.array([2 ** 64 - 1, 3], dtype=np.uint64))
+        index_path = str(tmp_path / "cache" / "phash_index.npz")
+        index.save(index_path)
+        loaded = HashIndex.load(index_path)
+
+        assert loaded.root == str(tmp_path) and loaded.paths == index.paths
+        assert loaded.lookup(os.path.join("EB1", "hole_2.png"), 6) == (2, 3)
+        assert loaded.lookup(os.path.join("EB1", "hole_2.png"), 7) is None
+        assert int(loaded.hashes['phash'][0]) == 2 ** 64 - 1
+
+        merged = HashIndex.merge([loaded, HashIndex(str(tmp_path / "other"), ["a.png"], [1], [9], [9])])
+        assert len(merged) == 3
+        assert merged.paths[2] == str(tmp_path / "other" / "a.png")
+
+    def test_service_update_reuses_hashes(self, tmp_path, monkeypatch):
+        """Test hashing during scanning, persistence and incremental reuse."""
+        slice_dir = tmp_path / "EB10000000"
+        slice_dir.mkdir()
+        for hole_number in (1, 2, 3):
+            Image.fromarray(make_slice(hole_number % 2)).save(slice_dir / f"hole_{hole_number}.png")
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+        slice_files = service.get_slice_files_from_directory(str(tmp_path), str(tmp_path))
+
+        index = service.update_hash_index(slice_files, str(tmp_path))
+        assert len(index) == 3
+        assert os.path.exists(service.get_hash_index_path(str(tmp_path)))
+        assert index.find_duplicate_groups(0) == [[0, 2]]
+
+        calls = []
+        original = service_module.compute_hashes
+        monkeypatch.setattr(service_module, 'compute_hashes', lambda array: calls.append(1) or original(array))
+        Image.fromarray(make_slice(5)).save(slice_dir / "hole_2.png")
+        os.utime(slice_dir / "hole_2.png", ns=(1, 1))
+
+        updated = PanoramicImageService(ImageConfig(decode_workers=0)).update_hash_index(slice_files, str(tmp_path))
+        assert len(calls) == 1
+        assert updated.paths == index.paths
+        assert int(updated.hashes['phash'][1]) == phash(make_slice(5))
@@ -0,0 +1,120 @@
+"""
+Tests for plate-level illumination normalization.
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.plate_normalization import IlluminationModel, PlateNormalizer
+from src.ui.hole_manager import HoleManager
+
+PANORAMIC_SIZE = (3088, 2064)
+
+
+def make_vignetted_plate(hole_manager):
+    """Identical wells on a plate lit from the right: brightness falls to 55% on the left edge."""
+    width, height = PANORAMIC_SIZE
+    pixels = np.full((height, width, 3), (110, 105, 100), dtype=np.float32)
+    rng = np.random.default_rng(0)
+    well = None
+    for hole_number in range(1, hole_manager.total_holes + 1):
+        x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+        if well is None:
+            well = np.empty((h, w, 3), dtype=np.float32)
+            well[:] = (190, 170, 150)
+            well[:, ::5] = (120, 100, 90)
+            well += rng.normal(0, 4, size=well.shape)
+        region = pixels[max(y, 0):y + h, max(x, 0):x + w]
+        region[:] = well[:region.shape[0], :region.shape[1]]
+    illumination = np.linspace(0.55, 1.0, width, dtype=np.float32)
+    return np.clip(pixels * illumination[None, :, None], 0, 255).astype(np.uint8)
+
+
+def well_means(pixels, hole_manager, transform=lambda crop, hole_number: crop):
+    means = []
+    for hole_number in range(1, hole_manager.total_holes + 1):
+        x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+        crop = pixels[max(y, 0):y + h, max(x, 0):x + w]
+        means.append(transform(crop, hole_number).mean())
+    return np.array(means)
+
+
+@pytest.fixture
+def hole_manager():
+    manager = HoleManager()
+    manager.set_layout_params(*PANORAMIC_SIZE)
+    return manager
+
+
+class TestPlateNormalizer:
+    """Test cases for PlateNormalizer and IlluminationModel."""
+
+    def test_flattens_illumination(self, hole_manager):
+        """Test that identical wells come out equally bright across the plate."""
+        pixels = make_vignetted_plate(hole_manager)
+        model = PlateNormalizer(hole_manager).estimate(pixels)
+
+        raw = well_means(pixels, hole_manager)
+        normalized = well_means(pixels, hole_manager, model.apply)
+        assert len(model.gains) == hole_manager.total_holes
+        assert normalized.std() / normalized.mean() < raw.std() / raw.mean() / 3
+
+    def test_apply_shapes(self, hole_manager):
+        """Test colour, grayscale and mismatched crop sizes."""
+        model = IlluminationModel([np.full((10, 12), 2.0, dtype=np.float32)], offset=-10.0)
+        crop = np.full((10, 12, 3), 100, dtype=np.uint8)
+
+        result = model.apply(crop, 1)
+        assert result.dtype == np.uint8 and result.shape == crop.shape
+        assert (result == 190).all()
+        assert model.apply(np.full((10, 12), 200, dtype=np.uint8), 1).max() == 255
+        assert model.apply(np.full((8, 9, 3), 100, dtype=np.uint8), 1).shape == (8, 9, 3)
+
+
+class TestServicePlateNormalization:
+    """Test cases for the plate enhancement method in PanoramicImageService."""
+
+    def make_plate(self, directory, hole_manager):
+        pixels = make_vignetted_plate(hole_manager)
+        Image.fromarray(pixels).save(directory / "EB10000001.bmp")
+        slice_dir = directory / "EB10000001"
+        slice_dir.mkdir()
+        for hole_number in (1, 12):
+            x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+            Image.fromarray(pixels[max(y, 0):y + h, max(x, 0):x + w]).save(slice_dir / f"hole_{hole_number}.png")
+        return slice_dir
+
+    def test_model_estimated_once_per_plate(self, tmp_path, hole_manager, monkeypatch):
+        """Test that all slices of a plate share one cached illumination model."""
+        slice_dir = self.make_plate(tmp_path, hole_manager)
+        service = PanoramicImageService(ImageConfig(enhance_method='plate', disk_cache_enabled=False))
+        estimates = []
+        original = service.plate_normalizer.estimate
+        monkeypatch.setattr(service.plate_normalizer, 'estimate',
+                            lambda pixels, layout=None: estimates.append(1) or original(pixels, layout))
+
+        first = service.get_enhanced_slice_image(str(slice_dir / "hole_1.png"))
+        last = service.get_enhanced_slice_image(str(slice_dir / "hole_12.png"))
+
+        assert len(estimates) == 1
+        assert service.is_cached('enhanced_slice', str(slice_dir / "hole_1.png"))
+        model = service.get_illumination_model(str(tmp_path / "EB10000001.bmp"))
+        expected = model.apply(np.asarray(Image.open(slice_dir / "hole_1.png")), 1)
+        assert np.array_equal(np.asarray(first), expected)
+        # Darker left well is brought up to the right well's level
+        assert abs(np.asarray(first).mean() - np.asarray(last).mean()) < 8
+
+    def test_clahe_fallback(self, tmp_path):
+        """Test that slices without a panorama, or the clahe method, use per-slice CLAHE."""
+        slice_dir = tmp_path / "EB10000002"
+        slice_dir.mkdir()
+        Image.new('RGB', (40, 40), (120, 90, 60)).save(slice_dir / "hole_1.png")
+        slice_path = str(slice_dir / "hole_1.png")
+
+        service = PanoramicImageService(ImageConfig(enhance_method='plate', disk_cache_enabled=False))
+        assert service.get_plate_slice_source(slice_path) is None
+        expected = service.enhance_slice_image(Image.open(slice_path))
+        assert service.get_enhanced_slice_image(slice_path).tobytes() == expected.tobytes()
+        assert PanoramicImageService(ImageConfig()).get_plate_slice_source(slice_path) is None
@@ -0,0 +1,153 @@
+"""
+Tests for headless plate-report rendering.
+"""
+import csv
+import json
+
+import numpy as np
+import pytest
+from PIL import Image, ImageColor
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.plate_report import (
+    REPORT_COLORS, PlateReportRenderer, load_hole_labels, load_reduced_panoramic, write_report_summary
+)
+from src.ui.hole_manager import HoleManager
+
+PANORAMIC_SIZE = (3088, 2064)
+
+
+@pytest.fixture
+def hole_manager():
+    manager = HoleManager()
+    manager.set_layout_params(*PANORAMIC_SIZE)
+    return manager
+
+
+def make_plate(path, value=100):
+    Image.new('RGB', PANORAMIC_SIZE, (value, value, value)).save(path)
+
+
+def hole_center(hole_manager, hole_number, scale, header_height):
+    x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+    return round((x + w / 2) * scale), round((y + h / 2) * scale) + header_height
+
+
+class TestLabels:
+    """Test cases for reading annotation and prediction files."""
+
+    def test_load_hole_labels(self, tmp_path):
+        """Test the saved-annotation, model-prediction and flat formats; later entries win."""
+        json_path = tmp_path / "labels.json"
+        json_path.write_text(json.dumps({'annotations': [
+            {'panoramic_id': 'EB1', 'hole_number': 1, 'features': {'growth_level': 'positive'}},
+            {'panoramic_id': 'EB1', 'hole_number': 2, 'features': {'growth_level': 'negative', 'confidence': 0.9}},
+            {'panoramic_image_id': 'EB2', 'hole_number': 5, 'growth_level': 'weak_growth'},
+            {'panoramic_id': 'EB1', 'hole_number': 1, 'features': {'growth_level': 'negative'}},
+            {'panoramic_id': 'EB1', 'hole_number': 3, 'features': {}},
+        ]}))
+
+        assert load_hole_labels(str(json_path)) == {'EB1': {1: 'negative', 2: 'negative'},
+                                                    'EB2': {5: 'weak_growth'}}
+
+    def test_summarize_disagreements(self):
+        """Test that only holes with both a label and a different prediction disagree."""
+        labels = {1: 'positive', 2: 'negative', 3: 'weak_growth'}
+        predictions = {1: 'negative', 2: 'negative', 4: 'positive'}
+        summary = PlateReportRenderer.summarize(labels, predictions, 120)
+
+        assert (summary['positive'], summary['negative'], summary['weak_growth']) == (1, 1, 1)
+        assert summary['unannotated'] == 117
+        assert summary['predicted'] == 3
+        assert summary['disagreements'] == [1]
+
+
+class TestRendering:
+    """Test cases for the reduced-resolution renderer."""
+
+    def test_reduced_decode(self, tmp_path):
+        """Test that BMP and PNG plates decode to the output width with the right scale."""
+        for ext in ('.bmp', '.png'):
+            path = tmp_path / f"EB1{ext}"
+            make_plate(path, 90)
+            pixels, scale = load_reduced_panoramic(str(path), 1024)
+            assert pixels.shape == (round(2064 * 1024 / 3088), 1024, 3)
+            assert pixels.flags.writeable
+            assert scale == pytest.approx(1024 / 3088)
+            assert np.all(pixels == 90)
+
+        pixels, scale = load_reduced_panoramic(str(path), 4000)
+        assert pixels.shape == (2064, 3088, 3) and scale == 1.0
+
+    def test_wells_coloured_and_marked(self, tmp_path, hole_manager):
+        """Test the well tint, the disagreement cross and the legend header."""
+        make_plate(tmp_path / "EB1.bmp")
+        renderer = PlateReportRenderer.from_hole_manager(hole_manager, max_width=1024)
+        pixels, scale = load_reduced_panoramic(str(tmp_path / "EB1.bmp"), 1024)
+        image, summary = renderer.render(pixels, scale, 'EB1', {1: 'positive', 2: 'negative'},
+                                         {1: 'negative', 2: 'negative'})
+        header_height = image.height - pixels.shape[0]
+        assert image.width == 1024 and header_height > 0
+        assert summary['disagreement_holes'] == ['A1']
+
+        rendered = np.asarray(image)
+        # Hole 1: crossed out in the disagreement colour; hole 2: tinted green; hole 3: untouched
+        x, y = hole_center(hole_manager, 1, scale, header_height)
+        assert tuple(rendered[y, x]) == ImageColor.getrgb(REPORT_COLORS['disagreement'])
+        x, y = hole_center(hole_manager, 2, scale, header_height)
+        red, green, blue = rendered[y, x].astype(int)
+        assert green > red + 40 and green > blue + 40
+        x, y = hole_center(hole_manager, 3, scale, header_height)
+        assert tuple(rendered[y, x]) == (100, 100, 100)
+
+    def test_rects_follow_plate_size(self, tmp_path, hole_manager):
+        """Test that a plate of another size uses the layout computed for its own size."""
+        size = (2000, 1500)
+        Image.new('RGB', size, (100, 100, 100)).save(tmp_path / "EB2.bmp")
+        renderer = PlateReportRenderer.from_hole_manager(hole_manager, [size], max_width=1000)
+        pixels, scale = load_reduced_panoramic(str(tmp_path / "EB2.bmp"), 1000)
+
+        image, _ = renderer.render(pixels, scale, 'EB2', {1: 'positive'}, full_size=size)
+
+        layout = hole_manager.layout_for_size(*size)
+        assert renderer.rects_for(size)[0] == layout.get_hole_coordinates(1)
+        assert renderer.rects_for(PANORAMIC_SIZE) == renderer.hole_rects
+        x, y = hole_center(layout, 1, scale, image.height - pixels.shape[0])
+        red, green, blue = np.asarray(image)[y, x].astype(int)
+        assert red > green + 40 and red > blue + 40
+
+
+class TestBatchReports:
+    """Test cases for batch rendering through the service."""
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_render_directory(self, tmp_path, workers):
+        """Test that every plate is written, failures are reported and summaries are collected."""
+        plate_dir = tmp_path / "plates"
+        plate_dir.mkdir()
+        for index in range(3):
+            make_plate(plate_dir / f"EB{index}.bmp")
+        (plate_dir / "EB9.png").write_bytes(b"not an image")
+        output_dir = tmp_path / "reports"
+
+        service = PanoramicImageService(ImageConfig(decode_workers=0, report_width=512))
+        progress = []
+        summaries, errors = service.render_plate_reports(
+            str(plate_dir), str(output_dir), {'EB1': {5: 'positive'}}, {'EB1': {5: 'negative'}},
+            max_workers=workers, progress_callback=lambda done, total, message: progress.append((done, total)))
+        service.shutdown()
+
+        assert sorted(summaries) == ['EB0', 'EB1', 'EB2']
+        assert list(errors) == ['EB9']
+        assert progress[-1] == (4, 4)
+        assert summaries['EB1']['disagreement_holes'] == ['A5']
+        with Image.open(output_dir / "EB1.png") as report:
+            assert report.width == 512
+
+        csv_path = output_dir / "summary.csv"
+        write_report_summary(str(csv_path), summaries)
+        with open(csv_path, encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert [row['panoramic_id'] for row in rows] == ['EB0', 'EB1', 'EB2']
+        assert rows[1]['disagreements'] == '1' and rows[1]['positive'] == '1'
@@ -0,0 +1,131 @@
+"""
+Tests for the background slice prefetcher.
+"""
+from concurrent.futures import Future
+
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.prefetch_service import SlicePrefetcher
+
+
+@pytest.fixture
+def plate_directory(tmp_path):
+    """Create two small synthetic plates in subdirectory layout."""
+    for panoramic_id in ['EB10000001', 'EB10000002']:
+        Image.new('RGB', (320, 240), (80, 80, 80)).save(tmp_path / f"{panoramic_id}.bmp")
+        slice_dir = tmp_path / panoramic_id
+        slice_dir.mkdir()
+        for hole_number in range(1, 11):
+            Image.new('RGB', (40, 40), (hole_number * 10, 50, 50)).save(slice_dir / f"hole_{hole_number}.png")
+    return tmp_path
+
+
+@pytest.fixture
+def service():
+    return PanoramicImageService(ImageConfig(cache_bytes=64 * 1024 * 1024, decode_workers=0))
+
+
+class TestSlicePrefetcher:
+    """Test cases for SlicePrefetcher class."""
+
+    def test_prefetches_neighbouring_slices(self, plate_directory, service):
+        """Test that slices around the current index are enhanced into the cache."""
+        slice_files = service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        prefetcher = SlicePrefetcher(service, depth=3, behind_depth=1)
+
+        try:
+            prefetcher.schedule(slice_files, 4, str(plate_directory))
+            prefetcher.wait_idle(timeout=10)
+
+            for index in [3, 5, 6, 7]:
+                assert service.is_cached('enhanced_slice', slice_files[index]['filepath'])
+            assert not service.is_cached('enhanced_slice', slice_files[8]['filepath'])
+        finally:
+            prefetcher.shutdown(wait=True)
+
+    def test_prefetches_next_panorama(self, plate_directory, service):
+        """Test that the next panorama is decoded ahead of time."""
+        slice_files = service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        prefetcher = SlicePrefetcher(service, depth=1)
+
+        try:
+            prefetcher.schedule(slice_files, 0, str(plate_directory))
+            prefetcher.wait_idle(timeout=10)
+
+            assert service.is_cached('panoramic', str(plate_directory / 'EB10000002.bmp'))
+            assert service.is_cached('pyramid', str(plate_directory / 'EB10000002.bmp'))
+        finally:
+            prefetcher.shutdown(wait=True)
+
+    def test_prefetches_next_panorama_in_decode_pool(self, plate_directory):
+        """Test that the decode pool builds the next panorama's reduced levels."""
+        service = PanoramicImageService(ImageConfig(cache_bytes=64 * 1024 * 1024, decode_workers=1))
+        slice_files = service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        prefetcher = SlicePrefetcher(service, depth=1)
+
+        try:
+            prefetcher.schedule(slice_files, 0, str(plate_directory))
+            prefetcher.wait_idle(timeout=30)
+
+            # The full-resolution panorama is never decoded in the main process
+            assert service.is_cached('pyramid', str(plate_directory / 'EB10000002.bmp'))
+            assert not service.is_cached('panoramic', str(plate_directory / 'EB10000002.bmp'))
+        finally:
+            prefetcher.shutdown(wait=True)
+            service.shutdown()
+
+    def test_cached_slices_not_resubmitted(self, plate_directory, service):
+        """Test that already cached slices are not scheduled again."""
+        slice_files = service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        prefetcher = SlicePrefetcher(service, depth=2, behind_depth=0)
+
+        try:
+            assert prefetcher.schedule(slice_files, 0) == 2
+            prefetcher.wait_idle(timeout=10)
+            assert prefetcher.schedule(slice_files, 0) == 0
+        finally:
+            prefetcher.shutdown(wait=True)
+
+    def test_jump_drops_stale_jobs(self, plate_directory, service):
+        """Test that jobs outside the new window are cancelled or skipped."""
+        slice_files = service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        prefetcher = SlicePrefetcher(service, depth=5, max_workers=1, behind_depth=0)
+
+        prefetcher.schedule(slice_files, 0)
+        prefetcher.schedule(slice_files, 14)
+        prefetcher.wait_idle(timeout=10)
+        # Let already-started stale jobs finish
+        prefetcher.shutdown(wait=True)
+
+        stats = prefetcher.get_stats()
+        assert stats['cancelled'] + stats['stale_skipped'] + stats['completed'] == stats['submitted']
+        assert stats['pending'] == 0
+        for index in range(15, 20):
+            assert service.is_cached('enhanced_slice', slice_files[index]['filepath'])
+
+    def test_depth_zero_disables_prefetch(self, plate_directory, service):
+        """Test that a depth of zero disables prefetching."""
+        slice_files = service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        prefetcher = SlicePrefetcher(service, depth=0)
+
+        assert not prefetcher.enabled
+        assert prefetcher.schedule(slice_files, 0, str(plate_directory)) == 0
+
+    def test_panoramic_decode_timeout_abandons_job(self, plate_directory, service, monkeypatch):
+        """Test that a decode that never finishes does not hold a prefetch thread forever."""
+        slice_files = service.get_slice_files_from_directory(str(plate_directory), str(plate_directory))
+        monkeypatch.setattr(service, 'decode_async', lambda kind, path, display_size=None: Future())
+        prefetcher = SlicePrefetcher(service, depth=1, decode_timeout=0.05)
+
+        try:
+            prefetcher.schedule(slice_files, 0, str(plate_directory))
+            prefetcher.wait_idle(timeout=10)
+
+            stats = prefetcher.get_stats()
+            assert stats['timed_out'] == 1
+            assert stats['pending'] == 0
+        finally:
+            prefetcher.shutdown(wait=True)
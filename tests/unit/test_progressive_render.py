@@ -0,0 +1,171 @@
+"""
+Tests for two-phase progressive rendering.
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.progressive_render import RefinementScheduler, RenderTimings
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+class FakeWidget:
+    """Records Tk after/after_idle calls so they can be fired by hand."""
+
+    def __init__(self):
+        self.pending = {}
+        self.log = []
+        self._next_id = 0
+
+    def _add(self, kind, callback):
+        self._next_id += 1
+        after_id = f"after#{self._next_id}"
+        self.pending[after_id] = (kind, callback)
+        self.log.append(kind)
+        return after_id
+
+    def after(self, delay_ms, callback):
+        return self._add('after', callback)
+
+    def after_idle(self, callback):
+        return self._add('idle', callback)
+
+    def after_cancel(self, after_id):
+        self.pending.pop(after_id, None)
+
+    def fire_all(self):
+        while self.pending:
+            after_id = next(iter(self.pending))
+            _, callback = self.pending.pop(after_id)
+            callback()
+
+
+class TestRefinementScheduler:
+    """Test cases for RefinementScheduler."""
+
+    def test_waits_for_quiet_period_then_idle(self):
+        """Test that refinement runs after the delay, from an idle callback."""
+        widget = FakeWidget()
+        runs = []
+        scheduler = RefinementScheduler(widget, delay_ms=80)
+        scheduler.schedule(lambda: runs.append(1))
+        assert scheduler.pending and widget.log == ['after']
+
+        widget.fire_all()
+        assert widget.log == ['after', 'idle']
+        assert runs == [1]
+        assert not scheduler.pending
+
+    def test_navigation_cancels_pending_refinement(self):
+        """Test that rescheduling or cancelling drops the stale refinement."""
+        widget = FakeWidget()
+        runs = []
+        scheduler = RefinementScheduler(widget, delay_ms=80)
+        scheduler.schedule(lambda: runs.append('first'))
+        scheduler.schedule(lambda: runs.append('second'))
+        widget.fire_all()
+        assert runs == ['second']
+
+        scheduler.schedule(lambda: runs.append('third'))
+        scheduler.cancel()
+        widget.fire_all()
+        assert runs == ['second']
+
+    def test_zero_delay_uses_after_idle(self):
+        """Test that a zero delay schedules straight onto after_idle."""
+        widget = FakeWidget()
+        runs = []
+        RefinementScheduler(widget, delay_ms=0).schedule(lambda: runs.append(1))
+        assert widget.log == ['idle']
+        widget.fire_all()
+        assert runs == [1]
+
+
+class TestRenderTimings:
+    """Test cases for RenderTimings."""
+
+    def test_summary(self):
+        """Test median and p95 per phase."""
+        timings = RenderTimings()
+        for value in range(1, 101):
+            timings.record('preview', float(value))
+        timings.record('refine', 40.0)
+
+        summary = timings.summary()
+        assert summary['preview']['count'] == 100
+        assert summary['preview']['median_ms'] == pytest.approx(50.5)
+        assert summary['preview']['p95_ms'] == pytest.approx(95.05)
+        assert summary['refine']['median_ms'] == 40.0
+        assert 'preview' in timings.format_summary()
+
+        timings.clear()
+        assert timings.count('preview') == 0
+
+
+@pytest.fixture
+def panoramic_file(tmp_path):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 255, size=(2064, 3088, 3), dtype=np.uint8)
+    path = tmp_path / "EB10000000.bmp"
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+
+class TestFastOverlay:
+    """Test cases for the fast preview path of render_panoramic_overlay."""
+
+    def make_service(self):
+        return PanoramicImageService(ImageConfig(decode_workers=0, disk_cache_enabled=False))
+
+    def test_fast_render_builds_draft_then_refines(self, panoramic_file):
+        """Test that the draft base is replaced by the full-quality base on refinement."""
+        expected = np.asarray(self.make_service().render_panoramic_overlay(panoramic_file, 5, {1: 'positive'}))
+
+        service = self.make_service()
+        draft = service.render_panoramic_overlay(panoramic_file, 5, {1: 'positive'}, fast=True)
+        assert service.overlay_renderer.base_is_draft
+        assert draft.size == (expected.shape[1], expected.shape[0])
+        assert not np.array_equal(np.asarray(draft), expected)
+
+        # Navigating within the plate keeps using the draft base
+        service.render_panoramic_overlay(panoramic_file, 6, {1: 'positive'}, fast=True)
+        assert service.overlay_renderer.base_is_draft
+
+        refined = service.render_panoramic_overlay(panoramic_file, 5, {1: 'positive'})
+        assert not service.overlay_renderer.base_is_draft
+        assert np.array_equal(np.asarray(refined), expected)
+
+    def test_fast_render_reuses_full_base(self, panoramic_file):
+        """Test that a cached full-quality base is never downgraded."""
+        service = self.make_service()
+        full = np.asarray(service.render_panoramic_overlay(panoramic_file, 5))
+        fast = np.asarray(service.render_panoramic_overlay(panoramic_file, 5, fast=True))
+        assert not service.overlay_renderer.base_is_draft
+        assert np.array_equal(fast, full)
+
+    def test_fast_render_uses_worker_display(self, panoramic_file):
+        """Test that a display image from the decode pool is used even in fast mode."""
+        service = self.make_service()
+        with Image.open(panoramic_file) as image:
+            display = service.resize_image_for_display(image.reduce(2), 1220, 750)
+        cache_key = service._make_cache_key('panoramic_display', Path(panoramic_file), (1220, 750))
+        service.image_cache.put(cache_key, display)
+
+        service.render_panoramic_overlay(panoramic_file, 5, fast=True)
+        assert not service.overlay_renderer.base_is_draft
+
+
+class TestSliceDisplaySize:
+    """Test cases for compute_slice_display_size."""
+
+    @pytest.mark.parametrize("size,canvas,expected", [
+        ((90, 90), (300, 300), (225, 225)),   # capped at 2.5x
+        ((90, 90), (170, 200), (150, 150)),   # limited by the narrower side
+        ((90, 90), (100, 100), (90, 90)),     # never shrinks
+    ])
+    def test_scaling(self, size, canvas, expected):
+        """Test fit-to-canvas scaling with the 2.5x cap."""
+        assert PanoramicImageService.compute_slice_display_size(*size, *canvas) == expected
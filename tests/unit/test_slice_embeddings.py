@@ -0,0 +1,114 @@
+"""
+Tests for slice embeddings and the similar-wells search.
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import src.services.panoramic_image_service as service_module
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.slice_embeddings import (
+    EMBEDDING_DIM, EmbeddingIndex, compute_embedding, quantize_embedding, top_k_cosine
+)
+
+
+def make_well(color, stripes=False, size=80):
+    """A uniform well, optionally with a filament-like stripe texture."""
+    image = np.empty((size, size, 3), dtype=np.uint8)
+    image[:] = color
+    if stripes:
+        image[:, ::6] = np.clip(np.array(color) - 90, 0, 255)
+    return image
+
+
+class TestEmbedding:
+    """Test cases for compute_embedding."""
+
+    def test_unit_vector(self):
+        """Test shape, dtype and normalization, including grayscale input."""
+        embedding = compute_embedding(make_well((200, 180, 150), stripes=True))
+        assert embedding.shape == (EMBEDDING_DIM,) and embedding.dtype == np.float32
+        assert np.linalg.norm(embedding) == pytest.approx(1.0, abs=1e-5)
+        assert compute_embedding(np.full((40, 40), 128, dtype=np.uint8)).shape == (EMBEDDING_DIM,)
+
+    def test_similar_wells_rank_higher(self):
+        """Test that texture and colour both separate well appearances."""
+        query = compute_embedding(make_well((200, 180, 150), stripes=True))
+        same_pattern = compute_embedding(make_well((205, 183, 152), stripes=True))
+        no_pattern = compute_embedding(make_well((200, 180, 150)))
+        other_color = compute_embedding(make_well((60, 90, 200), stripes=True))
+
+        assert query @ same_pattern > 0.95
+        assert query @ same_pattern > query @ no_pattern
+        assert query @ same_pattern > query @ other_color
+
+
+class TestTopK:
+    """Test cases for the sharded brute-force search."""
+
+    @pytest.mark.parametrize("shard_size", [3, 64, 1000, 100000])
+    def test_matches_full_sort(self, shard_size):
+        """Test that sharding does not change the result."""
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(1000, EMBEDDING_DIM)).astype(np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        query = matrix[17] + 0.1 * rng.normal(size=EMBEDDING_DIM).astype(np.float32)
+
+        positions, scores = top_k_cosine(matrix, query, 10, shard_size)
+        expected_scores = matrix @ (query / np.linalg.norm(query))
+        assert positions.tolist() == np.argsort(-expected_scores, kind='stable')[:10].tolist()
+        assert positions[0] == 17
+        assert np.allclose(scores, expected_scores[positions], atol=1e-5)
+
+    def test_small_and_empty(self):
+        """Test k larger than the corpus and an empty corpus."""
+        matrix = np.eye(3, EMBEDDING_DIM, dtype=np.float16)
+        positions, scores = top_k_cosine(matrix, matrix[1], 10)
+        assert positions.tolist()[0] == 1 and len(positions) == 3
+        assert len(top_k_cosine(np.empty((0, EMBEDDING_DIM)), matrix[0], 5)[0]) == 0
+
+
+class TestEmbeddingIndex:
+    """Test cases for EmbeddingIndex persistence and service integration."""
+
+    def test_save_load_find_similar(self, tmp_path):
+        """Test the persistent round trip and self-exclusion in find_similar."""
+        vectors = np.stack([compute_embedding(make_well(color, stripes)) for color, stripes in
+                            [((200, 180, 150), True), ((60, 90, 200), False), ((202, 181, 150), True)]])
+        index = EmbeddingIndex(str(tmp_path), ["a.png", "b.png", "c.png"], np.arange(3), quantize_embedding(vectors))
+        index_path = str(tmp_path / "cache" / "slice_embeddings.npz")
+        index.save(index_path)
+        loaded = EmbeddingIndex.load(index_path)
+
+        assert loaded.paths == index.paths and loaded.vectors.dtype == np.uint8
+        # Quantized scores stay close to the exact cosine similarity
+        assert loaded.search(vectors[0], k=3)[1][1] == pytest.approx(float(vectors[0] @ vectors[2]), abs=0.01)
+        assert loaded.lookup("b.png", 1) is not None and loaded.lookup("b.png", 2) is None
+        positions, scores = loaded.find_similar("a.png", k=1)
+        assert positions.tolist() == [2] and scores[0] > 0.95
+        assert len(loaded.find_similar("missing.png")[0]) == 0
+
+    def test_service_update_reuses_embeddings(self, tmp_path, monkeypatch):
+        """Test incremental embedding updates during scanning."""
+        slice_dir = tmp_path / "EB10000000"
+        slice_dir.mkdir()
+        for hole_number, color in ((1, (200, 180, 150)), (2, (60, 90, 200)), (3, (203, 180, 151))):
+            Image.fromarray(make_well(color, stripes=True)).save(slice_dir / f"hole_{hole_number}.png")
+        service = PanoramicImageService(ImageConfig(decode_workers=0))
+        slice_files = service.get_slice_files_from_directory(str(tmp_path), str(tmp_path))
+
+        index = service.update_embedding_index(slice_files, str(tmp_path))
+        assert len(index) == 3
+        assert os.path.exists(service.get_embedding_index_path(str(tmp_path)))
+        assert index.find_similar(os.path.join("EB10000000", "hole_1.png"), k=1)[0].tolist() == [2]
+
+        calls = []
+        original = service_module.compute_embedding
+        monkeypatch.setattr(service_module, 'compute_embedding', lambda array: calls.append(1) or original(array))
+        os.utime(slice_dir / "hole_3.png", ns=(1, 1))
+        updated = PanoramicImageService(ImageConfig(decode_workers=0)).update_embedding_index(
+            slice_files, str(tmp_path))
+        assert len(calls) == 1 and len(updated) == 3
@@ -0,0 +1,140 @@
+"""
+Tests for the structured-array slice index.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from src.services.slice_index import RECORD_DTYPE, SliceIndex, SliceIndexBuilder
+
+
+def build_index(rows, root="/data/plates"):
+    builder = SliceIndexBuilder(root)
+    for panoramic_id, hole_number, structure_type in rows:
+        builder.add(panoramic_id, hole_number, os.path.join(panoramic_id, f"hole_{hole_number}.png"),
+                    structure_type)
+    return builder.build()
+
+
+@pytest.fixture
+def index():
+    slice_index = build_index([
+        ('EB10000002', 3, 'subdirectory'),
+        ('EB10000001', 7, 'virtual'),
+        ('EB10000002', 1, 'packed'),
+        ('EB10000001', 2, 'virtual'),
+    ])
+    slice_index.sort()
+    return slice_index
+
+
+class TestSliceIndex:
+    """Test cases for SliceIndex."""
+
+    def test_dict_compatibility(self, index):
+        """Test that rows read back as the legacy slice dicts."""
+        assert index[0] == {
+            'filename': 'hole_2.png',
+            'filepath': os.path.join("/data/plates", "EB10000001", "hole_2.png"),
+            'panoramic_id': 'EB10000001',
+            'hole_number': 2,
+            'relative_path': os.path.join("EB10000001", "hole_2.png"),
+            'structure_type': 'virtual'
+        }
+        assert index[-1]['structure_type'] == 'subdirectory'
+        assert index.to_dicts() == list(index)
+        assert index.filepath(2) == index[2]['filepath']
+        assert (index.panoramic_id(2), index.hole_number(2)) == ('EB10000002', 1)
+
+    def test_sorted_by_panoramic_and_hole(self, index):
+        """Test vectorized sorting by (panoramic id, hole number)."""
+        assert [(f['panoramic_id'], f['hole_number']) for f in index] == [
+            ('EB10000001', 2), ('EB10000001', 7), ('EB10000002', 1), ('EB10000002', 3)]
+        assert index.get_panoramic_ids() == ['EB10000001', 'EB10000002']
+
+    def test_find(self, index):
+        """Test (panoramic, hole) lookup and first-match helpers."""
+        assert index.find('EB10000002', 3) == 3
+        assert index.find('EB10000002', 2) is None
+        assert index.find('EB19999999', 1) is None
+        assert index.find('EB10000001', 500) is None
+        assert index.find_first('EB10000002', min_hole=2) == 3
+        assert index.find_first(min_hole=5) == 1
+        assert index.find_first('EB10000001', min_hole=8) is None
+        assert index.find_hole(1) == 2
+        assert index.find_path(os.path.join("/data/plates", "EB10000002", "hole_3.png")) == 3
+        assert index.find_path(os.path.join("/data/plates", "EB10000002", "hole_7.png")) is None
+        assert index.relative_paths(('subdirectory', 'packed')) == [
+            os.path.join("EB10000002", "hole_1.png"), os.path.join("EB10000002", "hole_3.png")]
+        assert index.relative_paths()[0] == os.path.join("EB10000001", "hole_2.png")
+
+    def test_exclude(self, index):
+        """Test that excluded paths and panoramas are dropped and the rest keep their order."""
+        kept = index.exclude([os.path.join("EB10000002", "hole_3.png"), os.path.join("EB10000009", "hole_1.png")])
+        assert [(row['panoramic_id'], row['hole_number']) for row in kept] == [
+            ('EB10000001', 2), ('EB10000001', 7), ('EB10000002', 1)]
+        assert kept.find('EB10000002', 1) == 2
+
+        assert index.exclude(panoramic_ids=['EB10000001', 'EB10000009']).get_panoramic_ids() == ['EB10000002']
+        assert len(index.exclude()) == 4
+
+    def test_duplicate_key_finds_first_row(self):
+        """Test that duplicated (panoramic, hole) pairs resolve to the first row."""
+        builder = SliceIndexBuilder("/data")
+        builder.add('EB10000001', 4, os.path.join("a", "EB10000001_hole_4.png"), 'independent')
+        builder.add('EB10000001', 4, os.path.join("b", "EB10000001_hole_4.png"), 'independent')
+        slice_index = builder.build()
+        slice_index.sort()
+
+        assert slice_index.find('EB10000001', 4) == 0
+        assert slice_index[0]['relative_path'] == os.path.join("a", "EB10000001_hole_4.png")
+
+    def test_strings_are_interned(self):
+        """Test that rows store integer codes and shared strings are kept once."""
+        slice_index = build_index([(f"EB{10000000 + plate}", hole, 'subdirectory')
+                                   for plate in range(5) for hole in range(1, 121)])
+
+        assert slice_index.records.dtype == RECORD_DTYPE
+        assert slice_index.records.itemsize == 15
+        assert len(slice_index._filenames) == 120
+        assert len(slice_index._directories) == 5
+        assert not slice_index.records.flags.writeable
+
+    def test_slicing_and_empty(self, index):
+        """Test slice views and the empty index."""
+        head = index[:2]
+        assert isinstance(head, SliceIndex)
+        assert [f['hole_number'] for f in head] == [2, 7]
+
+        empty = SliceIndex()
+        assert not empty and len(empty) == 0
+        assert empty.find('EB10000001', 1) is None
+        assert empty.find_first() is None
+        assert empty.get_panoramic_ids() == []
+        assert len(SliceIndexBuilder("/data").build()) == 0
+
+    def test_merged_replaces_panoramas(self, index):
+        """Test that merging replaces the rows of changed plates and keeps the others."""
+        added = build_index([
+            ('EB10000003', 2, 'subdirectory'),
+            ('EB10000000', 5, 'subdirectory'),
+            ('EB10000002', 9, 'subdirectory'),
+        ])
+
+        merged = index.merged(added, {'EB10000002', 'EB10000003', 'EB10000000'})
+
+        assert [(f['panoramic_id'], f['hole_number']) for f in merged] == [
+            ('EB10000000', 5), ('EB10000001', 2), ('EB10000001', 7), ('EB10000002', 9), ('EB10000003', 2)]
+        assert merged.find('EB10000003', 2) == 4
+        assert merged[4]['relative_path'] == os.path.join('EB10000003', 'hole_2.png')
+        assert merged[1]['structure_type'] == 'virtual'
+        assert len(index) == 4
+
+    def test_merged_drops_removed_panoramas(self, index):
+        """Test that a replaced plate without new rows disappears."""
+        merged = SliceIndex().merged(index).merged(SliceIndex(), {'EB10000001'})
+
+        assert merged.get_panoramic_ids() == ['EB10000002']
+        assert merged.find('EB10000001', 2) is None
+        assert [f['hole_number'] for f in merged] == [1, 3]
@@ -0,0 +1,153 @@
+"""
+Tests for the incremental scandir-based slice scanner.
+"""
+import os
+
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.slice_scanner import SliceScanner
+
+
+def make_subdirectory_tree(root, plates=3, holes=5):
+    """Create <root>/<id>.bmp and <root>/<id>/hole_N.png files."""
+    root.mkdir(parents=True, exist_ok=True)
+    for index in range(plates):
+        panoramic_id = f"EB{10000000 + index}"
+        Image.new('RGB', (8, 8)).save(root / f"{panoramic_id}.bmp")
+        (root / panoramic_id).mkdir()
+        for hole_number in range(1, holes + 1):
+            Image.new('RGB', (4, 4)).save(root / panoramic_id / f"hole_{hole_number}.png")
+    return root
+
+
+def listing_map(scanner, root):
+    return {rel_dir: sorted(files) for rel_dir, files in scanner.iter_listings(str(root))}
+
+
+class TestSliceScanner:
+    """Test cases for SliceScanner."""
+
+    def test_lists_image_files_per_directory(self, tmp_path):
+        """Test that each directory yields its image files only."""
+        root = make_subdirectory_tree(tmp_path / "plates", plates=2, holes=2)
+        (root / "notes.txt").write_text("x")
+        hidden = root / ".annotation_cache"
+        hidden.mkdir()
+        Image.new('RGB', (4, 4)).save(hidden / "cached.png")
+
+        listings = listing_map(SliceScanner({'.png', '.bmp'}), root)
+
+        assert listings == {
+            '': ['EB10000000.bmp', 'EB10000001.bmp'],
+            'EB10000000': ['hole_1.png', 'hole_2.png'],
+            'EB10000001': ['hole_1.png', 'hole_2.png'],
+        }
+
+    def test_rescan_reuses_unchanged_directories(self, tmp_path):
+        """Test that a rescan with persisted state does not re-read any directory."""
+        root = make_subdirectory_tree(tmp_path / "plates")
+        state_path = root / ".annotation_cache" / "scan_index.json"
+
+        first = SliceScanner({'.png', '.bmp'}, state_path=str(state_path))
+        first_listings = listing_map(first, root)
+        assert first.stats['dirs_scanned'] == 4
+        assert state_path.exists()
+
+        second = SliceScanner({'.png', '.bmp'}, state_path=str(state_path))
+        assert listing_map(second, root) == first_listings
+        assert second.stats == {'dirs_scanned': 0, 'dirs_reused': 4, 'files': first.stats['files']}
+
+    def test_rescan_revisits_changed_directories_only(self, tmp_path):
+        """Test that only directories whose mtime changed are re-read."""
+        root = make_subdirectory_tree(tmp_path / "plates")
+        scanner = SliceScanner({'.png', '.bmp'}, state_path=str(root / ".state" / "scan.json"))
+        listing_map(scanner, root)
+
+        Image.new('RGB', (4, 4)).save(root / "EB10000001" / "hole_6.png")
+        os.utime(root / "EB10000001", ns=(1, 1))
+        listings = listing_map(scanner, root)
+
+        assert scanner.stats['dirs_scanned'] == 1
+        assert 'hole_6.png' in listings['EB10000001']
+
+    def test_rescan_subdirs_reads_only_named_directories(self, tmp_path):
+        """Test that a partial rescan returns the named plates and updates the saved state."""
+        root = make_subdirectory_tree(tmp_path / "plates", plates=2, holes=2)
+        state_path = root / ".state" / "scan.json"
+        scanner = SliceScanner({'.png', '.bmp'}, state_path=str(state_path))
+        listing_map(scanner, root)
+
+        (root / "EB20000000").mkdir()
+        Image.new('RGB', (4, 4)).save(root / "EB20000000" / "hole_1.png")
+        Image.new('RGB', (8, 8)).save(root / "EB20000000.bmp")
+        listings = scanner.rescan_subdirs(str(root), ['EB20000000', 'EB19999999'])
+
+        assert listings == [('EB20000000', ['hole_1.png'])]
+        assert 'EB20000000.bmp' in scanner.get_listing('')
+        reloaded = SliceScanner({'.png', '.bmp'}, state_path=str(state_path))
+        assert listing_map(reloaded, root)['EB20000000'] == ['hole_1.png']
+        assert reloaded.stats['dirs_scanned'] == 0
+
+    def test_removed_directory_disappears(self, tmp_path):
+        """Test that a deleted plate directory is dropped on rescan."""
+        root = make_subdirectory_tree(tmp_path / "plates", plates=2, holes=1)
+        scanner = SliceScanner({'.png', '.bmp'})
+        listing_map(scanner, root)
+
+        os.remove(root / "EB10000001" / "hole_1.png")
+        os.rmdir(root / "EB10000001")
+
+        assert 'EB10000001' not in listing_map(scanner, root)
+
+
+class TestServiceSliceFiles:
+    """Test cases for get_slice_files_from_directory on top of the scanner."""
+
+    def test_subdirectory_mode(self, tmp_path):
+        """Test subdirectory-mode records."""
+        root = make_subdirectory_tree(tmp_path / "plates", plates=2, holes=3)
+        service = PanoramicImageService(ImageConfig())
+
+        slice_files = service.get_slice_files_from_directory(str(root), str(root))
+
+        assert len(slice_files) == 6
+        assert slice_files[0] == {
+            'filename': 'hole_1.png',
+            'filepath': str(root / "EB10000000" / "hole_1.png"),
+            'panoramic_id': 'EB10000000',
+            'hole_number': 1,
+            'relative_path': os.path.join("EB10000000", "hole_1.png"),
+            'structure_type': 'subdirectory'
+        }
+        assert [(f['panoramic_id'], f['hole_number']) for f in slice_files] == sorted(
+            (f['panoramic_id'], f['hole_number']) for f in slice_files)
+
+    def test_independent_mode(self, tmp_path):
+        """Test independent-mode records take precedence when present."""
+        root = tmp_path / "slices"
+        (root / "nested").mkdir(parents=True)
+        for hole_number in (1, 2, 3):
+            Image.new('RGB', (4, 4)).save(root / "nested" / f"EB10000009_hole_{hole_number}.png")
+
+        service = PanoramicImageService(ImageConfig(disk_cache_enabled=False))
+        slice_files = service.get_slice_files_from_directory(str(root), str(root))
+
+        assert [f['hole_number'] for f in slice_files] == [1, 2, 3]
+        assert all(f['structure_type'] == 'independent' for f in slice_files)
+        assert slice_files[0]['relative_path'] == os.path.join("nested", "EB10000009_hole_1.png")
+        assert not (root / ".annotation_cache").exists()
+
+    def test_progress_is_monotonic(self, tmp_path):
+        """Test that progress reaches 100 without going backwards."""
+        root = make_subdirectory_tree(tmp_path / "plates")
+        service = PanoramicImageService(ImageConfig())
+        progress = []
+
+        service.get_slice_files_from_directory(str(root), str(root),
+                                               lambda current, total, message: progress.append(current))
+
+        assert progress == sorted(progress)
+        assert progress[-1] == 100
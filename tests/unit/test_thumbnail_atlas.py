@@ -0,0 +1,132 @@
+"""
+Tests for the parallel thumbnail atlas.
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.thumbnail_atlas import ThumbnailAtlasBuilder, downsample_image
+
+
+def make_plate(directory, holes=(1, 2, 13, 120)):
+    """Create slice PNGs with a distinct solid color per hole."""
+    plate = directory / "EB10000001"
+    plate.mkdir()
+    slice_files = []
+    for hole_number in holes:
+        path = plate / f"hole_{hole_number}.png"
+        Image.new('RGB', (90, 90), (hole_number * 2, 100, 200)).save(path)
+        slice_files.append({'filepath': str(path), 'hole_number': hole_number,
+                            'panoramic_id': 'EB10000001'})
+    return slice_files
+
+
+@pytest.fixture
+def service():
+    service = PanoramicImageService(ImageConfig(cache_bytes=64 * 1024 * 1024, atlas_workers=1))
+    yield service
+    service.shutdown()
+
+
+class TestThumbnailAtlas:
+    """Test cases for ThumbnailAtlasBuilder and PanoramicImageService.get_thumbnail_atlas."""
+
+    def test_downsample_image_size(self):
+        """Test that reduce + resize yields exactly the requested size."""
+        image = Image.new('RGB', (1000, 700), 'red')
+        assert downsample_image(image, (50, 50)).size == (50, 50)
+        assert downsample_image(image, (1000, 700)) is image
+
+    def test_tiles_and_placeholders(self, service, tmp_path):
+        """Test tile placement, the hole index and placeholder tiles."""
+        slice_files = make_plate(tmp_path)
+        atlas = service.get_thumbnail_atlas(slice_files)
+
+        assert atlas.image.size == (600, 500)
+        assert atlas.tiles[1] == (0, 0, 50, 50)
+        assert atlas.tiles[13] == (0, 50, 50, 50)
+        assert atlas.tiles[120] == (550, 450, 50, 50)
+        assert atlas.get_tile(13).getpixel((25, 25)) == (26, 100, 200)
+        assert atlas.get_tile(3).getpixel((25, 25)) == (211, 211, 211)
+        assert atlas.missing == [h for h in range(1, 121) if h not in (1, 2, 13, 120)]
+        assert atlas.hole_at(560, 460) == 120
+        assert atlas.hole_at(600, 0) is None
+
+        index = atlas.to_index()
+        assert index['atlas_size'] == [600, 500]
+        assert index['tiles']['2'] == [50, 0, 50, 50]
+
+    def test_create_thumbnail_grid_returns_atlas_image(self, service, tmp_path):
+        """Test that the legacy entry point returns the atlas image."""
+        slice_files = make_plate(tmp_path)
+        grid = service.create_thumbnail_grid(slice_files)
+        assert grid.size == (600, 500)
+        assert grid.getpixel((75, 25)) == (4, 100, 200)
+
+    def test_atlas_is_cached(self, service, tmp_path):
+        """Test that a second request is served from the memory cache."""
+        slice_files = make_plate(tmp_path)
+        first = service.get_thumbnail_atlas(slice_files)
+        second = service.get_thumbnail_atlas(slice_files)
+        assert second.image is first.image
+        assert second.missing == first.missing
+
+    def test_atlas_restored_from_disk_cache(self, tmp_path):
+        """Test that a new service instance reuses the persisted atlas."""
+        slice_files = make_plate(tmp_path)
+        first_service = PanoramicImageService(ImageConfig(atlas_workers=1))
+        first_service.enable_disk_cache(str(tmp_path))
+        expected = np.asarray(first_service.get_thumbnail_atlas(slice_files).image)
+        first_service.shutdown()
+
+        second_service = PanoramicImageService(ImageConfig(atlas_workers=1))
+        second_service.enable_disk_cache(str(tmp_path))
+        second_service._get_atlas_builder = None  # fail if the atlas is rebuilt
+        atlas = second_service.get_thumbnail_atlas(slice_files)
+        assert np.array_equal(np.asarray(atlas.image), expected)
+        assert 120 not in atlas.missing
+        second_service.shutdown()
+
+    def test_failed_slice_uses_placeholder(self, service, tmp_path):
+        """Test that an unreadable slice is reported and shown as a placeholder."""
+        slice_files = make_plate(tmp_path)
+        with open(slice_files[0]['filepath'], 'wb') as f:
+            f.write(b'not an image')
+
+        atlas = service.get_thumbnail_atlas(slice_files)
+        assert 1 in atlas.missing
+        assert atlas.get_tile(1).getpixel((0, 0)) == (211, 211, 211)
+
+    def test_process_pool_matches_in_process(self, tmp_path):
+        """Test that the process pool produces the same atlas as in-process rendering."""
+        slice_files = make_plate(tmp_path)
+        tiles = {f['hole_number']: ((f['hole_number'] - 1) % 12 * 20, (f['hole_number'] - 1) // 12 * 20, 20, 20)
+                 for f in slice_files}
+        sources = {f['hole_number']: f['filepath'] for f in slice_files}
+
+        serial = ThumbnailAtlasBuilder(1).build(tiles, sources, thumbnail_size=(20, 20))
+        pool_builder = ThumbnailAtlasBuilder(2)
+        try:
+            pooled = pool_builder.build(tiles, sources, thumbnail_size=(20, 20))
+        finally:
+            pool_builder.shutdown()
+
+        assert np.array_equal(np.asarray(serial.image), np.asarray(pooled.image))
+        assert serial.missing == pooled.missing == []
+
+    def test_virtual_plate(self, tmp_path):
+        """Test that virtual slices are downsampled from the panorama views."""
+        pixels = np.zeros((2064, 3088, 3), dtype=np.uint8)
+        pixels[..., 1] = 180
+        Image.fromarray(pixels).save(tmp_path / "EB10000000.bmp")
+
+        service = PanoramicImageService(ImageConfig(atlas_workers=1))
+        try:
+            slice_files = service.get_slice_files_from_directory(str(tmp_path), str(tmp_path))
+            atlas = service.get_thumbnail_atlas(slice_files)
+            assert atlas.missing == []
+            assert atlas.get_tile(60).getpixel((25, 25)) == (0, 180, 0)
+        finally:
+            service.shutdown()
@@ -0,0 +1,114 @@
+"""
+Tests for virtual slices cropped directly from the panorama.
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.ui.hole_manager import HoleManager
+
+PANORAMIC_SIZE = (3088, 2064)
+
+
+def make_panoramic(path, seed=0):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 255, size=(PANORAMIC_SIZE[1], PANORAMIC_SIZE[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+    return pixels
+
+
+def expected_crop(pixels, hole_number):
+    x, y, w, h = HoleManager().get_hole_coordinates(hole_number)
+    return pixels[max(y, 0):y + h, max(x, 0):x + w]
+
+
+@pytest.fixture
+def plate_directory(tmp_path):
+    """One panorama without slice PNGs and one with two PNG slices."""
+    virtual_pixels = make_panoramic(tmp_path / "EB10000000.bmp", seed=1)
+    make_panoramic(tmp_path / "EB10000001.bmp", seed=2)
+    (tmp_path / "EB10000001").mkdir()
+    for hole_number in (1, 2, 3):
+        Image.new('RGB', (90, 90), (hole_number, 0, 0)).save(tmp_path / "EB10000001" / f"hole_{hole_number}.png")
+    return tmp_path, virtual_pixels
+
+
+@pytest.fixture
+def service():
+    return PanoramicImageService(ImageConfig(cache_bytes=256 * 1024 * 1024))
+
+
+class TestVirtualSlices:
+    """Test cases for the virtual slice source."""
+
+    def test_scan_adds_virtual_records(self, service, plate_directory):
+        """Test that panoramas without slice PNGs get one virtual record per hole."""
+        directory, _ = plate_directory
+        slice_files = service.get_slice_files_from_directory(str(directory), str(directory))
+
+        virtual = [f for f in slice_files if f['panoramic_id'] == 'EB10000000']
+        real = [f for f in slice_files if f['panoramic_id'] == 'EB10000001']
+
+        assert [f['hole_number'] for f in virtual] == list(range(1, 121))
+        assert all(f['structure_type'] == 'virtual' for f in virtual)
+        assert virtual[0]['filepath'] == os.path.join(str(directory), "EB10000000", "hole_1.png")
+        assert [f['structure_type'] for f in real] == ['subdirectory'] * 3
+
+    def test_virtual_slice_matches_crop(self, service, plate_directory):
+        """Test that a virtual slice equals the hole crop of the panorama."""
+        directory, pixels = plate_directory
+        slice_path = os.path.join(str(directory), "EB10000000", "hole_25.png")
+
+        image = service.load_slice_image(slice_path)
+
+        assert np.array_equal(np.array(image), expected_crop(pixels, 25))
+
+    def test_hole_view_shares_panoramic_array(self, service, plate_directory):
+        """Test that hole views are read-only views of a single decoded array."""
+        directory, _ = plate_directory
+        panoramic_path = str(directory / "EB10000000.bmp")
+
+        first = service.get_hole_view(panoramic_path, 1)
+        second = service.get_hole_view(panoramic_path, 120)
+        array = service.get_panoramic_array(panoramic_path)
+
+        assert np.shares_memory(first, array) and np.shares_memory(second, array)
+        assert not array.flags.writeable
+
+    def test_png_overrides_crop(self, service, plate_directory):
+        """Test that an existing slice PNG is read instead of the crop."""
+        directory, _ = plate_directory
+        override = directory / "EB10000000" / "hole_5.png"
+        override.parent.mkdir()
+        Image.new('RGB', (90, 90), (7, 8, 9)).save(override)
+
+        image = service.load_slice_image(str(override))
+
+        assert image.getpixel((0, 0)) == (7, 8, 9)
+
+    def test_enhanced_virtual_slice_cached(self, service, plate_directory):
+        """Test enhancement and caching of virtual slices."""
+        directory, _ = plate_directory
+        slice_path = os.path.join(str(directory), "EB10000000", "hole_10.png")
+
+        assert not service.is_cached('enhanced_slice', slice_path)
+        enhanced = service.get_enhanced_slice_image(slice_path)
+
+        assert enhanced.size == (90, 90)
+        assert service.is_cached('enhanced_slice', slice_path)
+        assert service.get_enhanced_slice_image(slice_path) is enhanced
+
+    def test_disabled(self, plate_directory):
+        """Test that disabling virtual slices restores PNG-only behaviour."""
+        directory, _ = plate_directory
+        service = PanoramicImageService(ImageConfig(virtual_slices=False))
+
+        slice_files = service.get_slice_files_from_directory(str(directory), str(directory))
+
+        assert {f['panoramic_id'] for f in slice_files} == {'EB10000001'}
+        assert service.get_virtual_slice_source(
+            os.path.join(str(directory), "EB10000000", "hole_1.png")) is None
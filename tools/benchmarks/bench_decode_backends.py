@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+解码后端基准测试
+按扩展名比较 PIL / OpenCV / BMP内存映射 解码全景图尺寸图像的耗时，
+并给出启动时自动选择（小尺寸样本测速）会选中的后端
+
+用法:
+    python tools/benchmarks/bench_decode_backends.py --width 3088 --height 2064 --repeat 5
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.services.decode_backends import (
+    BACKENDS, benchmark_backends, choose_backends, make_sample_pixels
+)
+
+SAMPLES = [('.bmp', 'BMP'), ('.png', 'PNG'), ('.jpg', 'JPEG'), ('.tif', 'TIFF')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解码后端基准测试")
+    parser.add_argument("--width", type=int, default=3088, help="图像宽度")
+    parser.add_argument("--height", type=int, default=2064, help="图像高度")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    pixels = make_sample_pixels(args.width, args.height)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"图像尺寸: {args.width}x{args.height}")
+        print(f"{'格式':<8}{'后端':<10}{'中位数(ms)':>12}{'最小(ms)':>12}")
+        for extension, sample_format in SAMPLES:
+            path = str(Path(tmp) / f"plate{extension}")
+            Image.fromarray(pixels).save(path, format=sample_format)
+            for name, backend in BACKENDS.items():
+                if not backend.supports(path):
+                    continue
+                times = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    backend.decode_image(path)
+                    times.append((time.perf_counter() - start) * 1000)
+                print(f"{extension:<8}{name:<10}{statistics.median(times):>12.1f}{min(times):>12.1f}")
+
+    start = time.perf_counter()
+    choices = choose_backends(benchmark_backends([extension for extension, _ in SAMPLES]))
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"启动时自动选择 ({elapsed:.0f}ms): "
+          + ", ".join(f"{extension}={name}" for extension, name in sorted(choices.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+解码进程池基准测试
+模拟切换全景图时的主线程：同步模式在主线程中解码并渲染覆盖层；
+进程池模式提交后台解码，主线程每5ms处理一次“事件循环”直到解码完成，再渲染覆盖层。
+统计每次导航主线程被阻塞的时间（同步调用耗时 + 事件循环中超出5ms的延迟）
+
+用法:
+    python tools/benchmarks/bench_decode_service.py --plates 6 --workers 2
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+TICK_MS = 5.0
+DISPLAY_SIZE = (1220, 750)
+
+
+def navigate_sync(service, panoramic_files):
+    """同步模式：返回 [(阻塞ms, 导航总耗时ms)]"""
+    results = []
+    for panoramic_file in panoramic_files:
+        start = time.perf_counter()
+        service.load_panoramic_image(panoramic_file)
+        service.render_panoramic_overlay(panoramic_file, 1, {}, *DISPLAY_SIZE)
+        elapsed = (time.perf_counter() - start) * 1000
+        results.append((elapsed, elapsed))
+    return results
+
+
+def navigate_pool(service, panoramic_files):
+    """进程池模式：返回 [(阻塞ms, 导航总耗时ms)]"""
+    results = []
+    for panoramic_file in panoramic_files:
+        start = time.perf_counter()
+        service.load_panoramic_image(panoramic_file)
+        future = service.decode_async('panoramic', panoramic_file)
+        blocked = (time.perf_counter() - start) * 1000
+
+        # 模拟Tk事件循环：每个tick超出预期的部分视为主线程被阻塞
+        while future is not None and not future.done():
+            tick_start = time.perf_counter()
+            time.sleep(TICK_MS / 1000.0)
+            blocked += max(0.0, (time.perf_counter() - tick_start) * 1000 - TICK_MS)
+
+        render_start = time.perf_counter()
+        service.render_panoramic_overlay(panoramic_file, 1, {}, *DISPLAY_SIZE)
+        end = time.perf_counter()
+        blocked += (end - render_start) * 1000
+        results.append((blocked, (end - start) * 1000))
+    return results
+
+
+def report(label, results):
+    blocked = [item[0] for item in results]
+    total = [item[1] for item in results]
+    print(f"{label:<14}{statistics.median(blocked):>14.1f}{max(blocked):>12.1f}"
+          f"{statistics.median(total):>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解码进程池基准测试")
+    parser.add_argument("--plates", type=int, default=6, help="全景图数量")
+    parser.add_argument("--workers", type=int, default=2, help="解码进程数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        panoramic_ids = make_plate_directory(directory, args.plates, with_slices=False)
+        panoramic_files = [str(directory / f"{panoramic_id}.bmp") for panoramic_id in panoramic_ids]
+
+        sync_service = PanoramicImageService(ImageConfig(disk_cache_enabled=False, decode_workers=0))
+        sync_results = navigate_sync(sync_service, panoramic_files)
+
+        pool_service = PanoramicImageService(ImageConfig(disk_cache_enabled=False,
+                                                         decode_workers=args.workers))
+        pool_service.get_decode_service().warm_up(wait=True)
+        pool_results = navigate_pool(pool_service, panoramic_files)
+        pool_service.shutdown()
+
+        print(f"全景图数: {len(panoramic_files)}, 显示尺寸: {DISPLAY_SIZE[0]}x{DISPLAY_SIZE[1]}, "
+              f"解码进程数: {args.workers}")
+        print(f"{'模式':<14}{'阻塞中位数(ms)':>14}{'阻塞最大(ms)':>12}{'导航耗时(ms)':>14}")
+        report('主线程同步解码', sync_results)
+        report('解码进程池', pool_results)
+
+
+if __name__ == '__main__':
+    main()
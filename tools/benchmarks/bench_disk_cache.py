@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+磁盘缓存基准测试
+在合成全景图目录上比较冷会话（无磁盘缓存）与热会话（磁盘缓存已填充）的耗时。
+每个会话对每张全景图获取显示层级并增强全部120个切片。
+
+用法:
+    python tools/benchmarks/bench_disk_cache.py --plates 200 --scale 0.5
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import PANORAMIC_SIZE, make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def run_session(directory: str, display_size=(1220, 750)):
+    """模拟一次新会话：全新的内存缓存，共享磁盘缓存目录"""
+    service = PanoramicImageService(ImageConfig())
+    service.enable_disk_cache(directory)
+    slice_files = service.get_slice_files_from_directory(directory, directory)
+
+    start = time.perf_counter()
+    current_id = None
+    for slice_info in slice_files:
+        if slice_info['panoramic_id'] != current_id:
+            current_id = slice_info['panoramic_id']
+            panoramic_file = service.find_panoramic_image(f"{current_id}/hole_1.png", directory)
+            service.get_panoramic_preview(panoramic_file, *display_size)
+        service.get_enhanced_slice_image(slice_info['filepath'])
+    elapsed = time.perf_counter() - start
+
+    # 后台写入不计入会话耗时，但需在下一会话前完成
+    service.shutdown()
+    return elapsed, len(slice_files), service.disk_cache.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="磁盘缓存冷/热会话基准测试")
+    parser.add_argument("--plates", type=int, default=200, help="合成全景图数量")
+    parser.add_argument("--scale", type=float, default=0.5,
+                        help="全景图尺寸相对3088x2064的比例（1.0为生产尺寸，约19MB/张）")
+    args = parser.parse_args()
+
+    size = (int(PANORAMIC_SIZE[0] * args.scale), int(PANORAMIC_SIZE[1] * args.scale))
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        print(f"生成 {args.plates} 张 {size[0]}x{size[1]} 合成全景图...")
+        make_plate_directory(directory, args.plates, size=size)
+
+        for label in ("冷会话", "热会话"):
+            elapsed, slices, stats = run_session(str(directory))
+            print(f"{label}: {elapsed:8.2f}s  {args.plates / elapsed:7.1f} 全景图/s  "
+                  f"{slices / elapsed:8.1f} 切片/s  磁盘缓存 命中={stats['hits']} 写入={stats['writes']}")
+
+
+if __name__ == '__main__':
+    main()
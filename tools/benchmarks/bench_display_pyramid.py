@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+显示金字塔基准测试
+比较从原图缩放与从金字塔层级缩放的全景图显示耗时（含孔位覆盖层绘制）
+
+用法:
+    python tools/benchmarks/bench_display_pyramid.py --repeat 10
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+CANVAS_SIZES = [(800, 500), (1220, 750), (1600, 1000), (2400, 1600)]
+
+
+def time_full_path(service, image, width, height):
+    """原有路径：在原图上绘制覆盖层后整体缩放"""
+    start = time.perf_counter()
+    overlay = service.create_panoramic_overlay(image, 25, {1: 'negative', 2: 'positive'})
+    service.resize_image_for_display(overlay, width, height, fill_mode='fit')
+    return (time.perf_counter() - start) * 1000
+
+
+def time_pyramid_path(service, panoramic_file, width, height):
+    """金字塔路径：在最近的较大层级上绘制覆盖层后缩放"""
+    start = time.perf_counter()
+    pyramid = service.get_panoramic_pyramid(panoramic_file)
+    level, scale = service.select_display_level(pyramid, width, height, fill_mode='fit')
+    overlay = service.create_panoramic_overlay(level, 25, {1: 'negative', 2: 'positive'}, scale=scale)
+    service.resize_image_for_display(overlay, width, height, fill_mode='fit')
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="显示金字塔基准测试")
+    parser.add_argument("--repeat", type=int, default=10, help="每个画布尺寸的重复次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        panoramic_id = make_plate_directory(directory, 1, with_slices=False)[0]
+        panoramic_file = str(directory / f"{panoramic_id}.bmp")
+
+        service = PanoramicImageService(ImageConfig())
+        image = service.load_panoramic_image(panoramic_file)
+
+        start = time.perf_counter()
+        service.get_panoramic_pyramid(panoramic_file)
+        print(f"金字塔构建耗时: {(time.perf_counter() - start) * 1000:.2f}ms (每张全景图一次)")
+
+        print(f"{'画布尺寸':<12}{'原图路径(ms)':>14}{'金字塔路径(ms)':>16}{'加速比':>8}")
+        for width, height in CANVAS_SIZES:
+            full_times = [time_full_path(service, image, width, height) for _ in range(args.repeat)]
+            pyramid_times = [time_pyramid_path(service, panoramic_file, width, height)
+                             for _ in range(args.repeat)]
+            full_ms = statistics.median(full_times)
+            pyramid_ms = statistics.median(pyramid_times)
+            print(f"{f'{width}x{height}':<12}{full_ms:>14.2f}{pyramid_ms:>16.2f}{full_ms / pyramid_ms:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
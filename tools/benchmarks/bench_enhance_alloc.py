@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+切片增强内存分配基准测试
+比较原有实现（每一步分配新数组）与复用缓冲区实现增强1000个切片的吞吐量和 tracemalloc 峰值内存
+
+用法:
+    python tools/benchmarks/bench_enhance_alloc.py --slices 1000 --size 90 --repeat 5
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.services.enhancement_service import (
+    EnhanceBufferPool, enhance_array, get_thread_clahe
+)
+from src.services.panoramic_image_service import PanoramicImageService
+
+PARAMS = PanoramicImageService.ENHANCE_PARAMS
+
+
+def enhance_legacy_array(img_array: np.ndarray) -> np.ndarray:
+    """原有实现：LAB转换、亮度通道、CLAHE、转回RGB、高斯滤波各分配一次"""
+    lab = cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB)
+    lab[:, :, 0] = get_thread_clahe(PARAMS).apply(lab[:, :, 0])
+    enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+    return cv2.GaussianBlur(enhanced, tuple(PARAMS['blur_kernel']), PARAMS['blur_sigma'])
+
+
+def enhance_legacy(image: Image.Image) -> Image.Image:
+    """原有的 enhance_slice_image：np.array 复制输入后逐步分配"""
+    return Image.fromarray(enhance_legacy_array(np.array(image)))
+
+
+def measure(func, inputs, repeat):
+    """返回 (吞吐量 切片/秒，取多轮中最快的一轮, tracemalloc峰值字节)"""
+    func(inputs[0])
+
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in inputs:
+            func(item)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for item in inputs:
+        func(item)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return len(inputs) / elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="切片增强内存分配基准测试")
+    parser.add_argument("--slices", type=int, default=1000, help="切片数量")
+    parser.add_argument("--size", type=int, default=90, help="切片边长")
+    parser.add_argument("--repeat", type=int, default=5, help="计时轮数")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    arrays = [rng.integers(0, 255, size=(args.size, args.size, 3), dtype=np.uint8) for _ in range(args.slices)]
+    images = [Image.fromarray(array) for array in arrays]
+    service = PanoramicImageService()
+    clahe = get_thread_clahe(PARAMS)
+    pool = EnhanceBufferPool()
+
+    results = [
+        ('原实现(PIL输入输出)', measure(enhance_legacy, images, args.repeat)),
+        ('复用缓冲区(PIL输入输出)', measure(service.enhance_slice_image, images, args.repeat)),
+        ('原实现(仅数组)', measure(enhance_legacy_array, arrays, args.repeat)),
+        ('复用缓冲区(仅数组)', measure(lambda array: enhance_array(array, clahe, PARAMS, pool), arrays, args.repeat)),
+    ]
+
+    print(f"切片数: {args.slices}, 切片尺寸: {args.size}x{args.size}")
+    print(f"{'实现':<26}{'吞吐量(切片/秒)':>16}{'峰值内存(KB)':>14}")
+    for name, (throughput, peak) in results:
+        print(f"{name:<26}{throughput:>16.0f}{peak / 1024:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
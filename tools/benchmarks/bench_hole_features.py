@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+孔位特征基准测试
+比较逐个打开120个切片文件调用 get_image_statistics，与整板向量化特征提取的耗时
+
+用法:
+    python tools/benchmarks/bench_hole_features.py --repeat 5
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def timed(func, repeat):
+    """返回每次调用的耗时(ms)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="孔位特征基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        panoramic_id = make_plate_directory(directory, 1)[0]
+        panoramic_file = str(directory / f"{panoramic_id}.bmp")
+        slice_paths = [str(directory / panoramic_id / f"hole_{hole}.png") for hole in range(1, 121)]
+
+        service = PanoramicImageService(ImageConfig(disk_cache_enabled=False))
+
+        def per_slice_statistics():
+            for slice_path in slice_paths:
+                with Image.open(slice_path) as image:
+                    service.get_image_statistics(image)
+
+        def vectorized_features():
+            service.image_cache.clear()
+            service.get_hole_features(panoramic_file)
+
+        layout = service.get_plate_layout(panoramic_file)
+
+        def extract_only():
+            service.feature_extractor.extract(service.get_panoramic_array(panoramic_file), layout)
+
+        results = [
+            ('逐切片统计(120个文件)', timed(per_slice_statistics, args.repeat)),
+            ('整板特征(含映射全景图)', timed(vectorized_features, args.repeat)),
+            ('整板特征(仅计算)', timed(extract_only, args.repeat)),
+            ('整板特征(缓存命中)', timed(lambda: service.get_hole_features(panoramic_file), args.repeat)),
+        ]
+
+        print(f"孔位数: {service.hole_manager.total_holes}, 特征数: {len(service.feature_extractor.feature_names)}")
+        print(f"{'计算方式':<24}{'中位数(ms)':>12}{'最小(ms)':>12}")
+        for name, times in results:
+            print(f"{name:<24}{statistics.median(times):>12.2f}{min(times):>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+图像元数据索引基准测试
+在合成目录（N 张全景图 × 120 个切片）上测量：
+- 扫描增加的开销：关闭/开启 image_metadata_on_scan 的扫描耗时，以及索引已存在时的重新扫描耗时
+- 减少的解码：加载全景图时完整解码（load_panoramic_image）与只取元数据（load_panoramic_metadata）的耗时，
+  以及切片尺寸查询由索引回答的次数
+
+用法:
+    python tools/benchmarks/bench_image_metadata.py --plates 50
+    python tools/benchmarks/bench_image_metadata.py --plates 200 --sample 20
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def timed_scan(directory: Path, metadata_on_scan: bool):
+    """新建服务扫描一次目录，返回 (服务, 耗时秒)"""
+    service = PanoramicImageService(ImageConfig(decode_workers=0, image_metadata_on_scan=metadata_on_scan))
+    start = time.perf_counter()
+    service.get_slice_files_from_directory(str(directory), str(directory))
+    return service, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图像元数据索引基准测试")
+    parser.add_argument("--plates", type=int, default=50, help="合成全景图数（每张120个切片）")
+    parser.add_argument("--sample", type=int, default=10, help="全景图加载对比的抽样板数")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_image_metadata_"))
+    try:
+        start = time.perf_counter()
+        panoramic_ids = make_plate_directory(root, args.plates)
+        print(f"生成 {args.plates} 张合成全景图及切片: {time.perf_counter() - start:.1f}s")
+
+        _, plain_seconds = timed_scan(root, False)
+        _, cold_seconds = timed_scan(root, True)
+        service, warm_seconds = timed_scan(root, True)
+        files = args.plates * 121
+        print(f"扫描（不建元数据索引）: {plain_seconds * 1000:.0f}ms")
+        print(f"扫描 + 首次建立索引（读取 {files} 个文件头）: {cold_seconds * 1000:.0f}ms, "
+              f"增加 {(cold_seconds - plain_seconds) * 1000:.0f}ms "
+              f"({(cold_seconds - plain_seconds) / files * 1e6:.0f}µs/文件)")
+        print(f"扫描 + 索引已存在（只stat）: {warm_seconds * 1000:.0f}ms, "
+              f"增加 {(warm_seconds - plain_seconds) * 1000:.0f}ms")
+
+        sample = [str(root / f"{panoramic_id}.bmp") for panoramic_id in panoramic_ids[:args.sample]]
+        start = time.perf_counter()
+        for path in sample:
+            service.load_panoramic_image(path)
+        decode_seconds = (time.perf_counter() - start) / len(sample)
+        start = time.perf_counter()
+        for path in sample:
+            service.load_panoramic_metadata(path)
+        metadata_seconds = (time.perf_counter() - start) / len(sample)
+        print(f"加载全景图（抽样 {len(sample)} 张）: 完整解码 {decode_seconds * 1000:.1f}ms/张, "
+              f"只取元数据 {metadata_seconds * 1000:.2f}ms/张")
+
+        start = time.perf_counter()
+        for panoramic_id in panoramic_ids:
+            for hole_number in range(1, service.hole_manager.total_holes + 1):
+                service.get_image_metadata(str(root / panoramic_id / f"hole_{hole_number}.png"))
+        lookup_seconds = time.perf_counter() - start
+        stats = service.metadata_stats
+        print(f"切片尺寸查询 {files - args.plates} 次: {lookup_seconds * 1000:.0f}ms, "
+              f"累计索引命中 {stats['indexed']} 次（含全景图，均未解码）, 读取文件头 {stats['probed']} 次")
+        service.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+覆盖层渲染基准测试
+将当前孔位高亮依次移过全部120个孔位，比较每次移动的渲染耗时：
+原图绘制、金字塔层级绘制、增量式分层渲染
+
+用法:
+    python tools/benchmarks/bench_overlay.py --width 1220 --height 750
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+ANNOTATED_HOLES = {hole: ('negative' if hole % 3 else 'positive') for hole in range(1, 41)}
+
+
+def sweep(render_move, total_holes):
+    """依次高亮每个孔位，返回每次移动的耗时(ms)"""
+    times = []
+    for hole_number in range(1, total_holes + 1):
+        start = time.perf_counter()
+        render_move(hole_number)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="覆盖层渲染基准测试")
+    parser.add_argument("--width", type=int, default=1220, help="显示宽度")
+    parser.add_argument("--height", type=int, default=750, help="显示高度")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        panoramic_id = make_plate_directory(directory, 1, with_slices=False)[0]
+        panoramic_file = str(directory / f"{panoramic_id}.bmp")
+
+        service = PanoramicImageService(ImageConfig())
+        image = service.load_panoramic_image(panoramic_file)
+        service.get_panoramic_pyramid(panoramic_file)
+        total_holes = service.hole_manager.total_holes
+
+        def full_move(hole_number):
+            overlay = service.create_panoramic_overlay(image, hole_number, ANNOTATED_HOLES)
+            service.resize_image_for_display(overlay, args.width, args.height, fill_mode='fit')
+
+        def pyramid_move(hole_number):
+            level, scale = service.get_panoramic_preview(panoramic_file, args.width, args.height)
+            overlay = service.create_panoramic_overlay(level, hole_number, ANNOTATED_HOLES, scale=scale)
+            service.resize_image_for_display(overlay, args.width, args.height, fill_mode='fit')
+
+        def layered_move(hole_number):
+            service.render_panoramic_overlay(panoramic_file, hole_number, ANNOTATED_HOLES,
+                                             args.width, args.height)
+
+        # 首次渲染构建底图层（每张全景图/显示尺寸一次）
+        start = time.perf_counter()
+        layered_move(total_holes)
+        base_ms = (time.perf_counter() - start) * 1000
+
+        results = [
+            ('原图绘制+缩放', sweep(full_move, total_holes)),
+            ('金字塔层级绘制', sweep(pyramid_move, total_holes)),
+            ('增量分层渲染', sweep(layered_move, total_holes)),
+        ]
+
+        print(f"显示尺寸: {args.width}x{args.height}, 孔位数: {total_holes}")
+        print(f"底图层构建耗时: {base_ms:.2f}ms")
+        print(f"{'渲染方式':<16}{'中位数(ms)':>12}{'p95(ms)':>10}{'总计(ms)':>12}")
+        for name, times in results:
+            p95 = sorted(times)[int(len(times) * 0.95) - 1]
+            print(f"{name:<16}{statistics.median(times):>12.2f}{p95:>10.2f}{sum(times):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
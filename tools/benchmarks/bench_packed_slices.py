@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+切片打包格式基准测试
+比较切片PNG目录（每张全景图120个 hole_<N>.png）与打包格式（slices.npy + slices.json）的加载时间：
+- 首板：扫描目录后读取第一张全景图的全部切片
+- 全目录：扫描目录后读取所有全景图的全部切片
+每次测量使用新的服务实例（内存缓存为空，操作系统页缓存为热）；
+网络共享和冷磁盘上每次文件打开的延迟更高，PNG布局的差距会更大
+
+用法:
+    python tools/benchmarks/bench_packed_slices.py --plates 10 --repeat 3
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.packed_slices import pack_directory
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def load(directory: Path, plates: int):
+    """扫描目录并读取前 plates 张全景图的全部切片，返回 (耗时秒, 切片数)"""
+    service = PanoramicImageService(ImageConfig(disk_cache_enabled=False, virtual_slices=False))
+    start = time.perf_counter()
+    slice_files = service.get_slice_files_from_directory(str(directory), str(directory))
+    panoramic_ids = sorted({slice_info['panoramic_id'] for slice_info in slice_files})[:plates]
+    selected = [slice_info for slice_info in slice_files if slice_info['panoramic_id'] in panoramic_ids]
+    for slice_info in selected:
+        service.load_slice_image(slice_info['filepath'])
+    return time.perf_counter() - start, len(selected)
+
+
+def measure(directory: Path, plates: int, repeat: int):
+    """取多轮中最快的一轮"""
+    return min((load(directory, plates) for _ in range(repeat)), key=lambda result: result[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="切片打包格式基准测试")
+    parser.add_argument("--plates", type=int, default=10, help="全景图数量")
+    parser.add_argument("--repeat", type=int, default=3, help="测量轮数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        png_dir = Path(tmp) / "png"
+        make_plate_directory(png_dir, args.plates)
+        packed_dir = Path(tmp) / "packed"
+        shutil.copytree(png_dir, packed_dir)
+
+        start = time.perf_counter()
+        packed, errors = pack_directory(str(packed_dir), remove_sources=True)
+        pack_seconds = time.perf_counter() - start
+        if errors:
+            print(f"打包失败: {errors}")
+            return
+
+        print(f"全景图数: {args.plates}, 打包 {sum(packed.values())} 个切片耗时 {pack_seconds:.2f}s")
+        print(f"{'布局':<14}{'首板(ms)':>12}{'全目录(ms)':>14}{'切片数':>10}")
+        for label, directory in (('PNG文件', png_dir), ('打包', packed_dir)):
+            first_seconds, _ = measure(directory, 1, args.repeat)
+            all_seconds, count = measure(directory, args.plates, args.repeat)
+            print(f"{label:<14}{first_seconds * 1000:>12.1f}{all_seconds * 1000:>14.1f}{count:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+全景图无损转码基准测试
+在合成目录（N 张BMP全景图）的副本上分别转码为 PNG（多个压缩级别）和 TIFF，测量：
+- 转码吞吐（文件/秒、源数据MB/秒）和体积减少比例
+- 各格式全景图的加载耗时（PanoramicImageService，内存缓存已清空）；
+  --cold 时每次读取前用 posix_fadvise 把文件逐出页缓存，模拟从归档磁盘冷读
+
+用法:
+    python tools/benchmarks/bench_panorama_transcode.py --plates 8
+    python tools/benchmarks/bench_panorama_transcode.py --plates 20 --workers 4 --levels 1 6 9 --cold
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def evict_from_page_cache(path: str) -> None:
+    """尽量把文件逐出页缓存（仅支持 posix_fadvise 的平台）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def time_loads(service, paths, repeat: int, cold: bool):
+    """逐个加载全景图并取得像素，返回每次加载的耗时（毫秒）"""
+    times = []
+    for _ in range(repeat):
+        for path in paths:
+            service.clear_cache()
+            if cold:
+                evict_from_page_cache(path)
+            start = time.perf_counter()
+            image = service.load_panoramic_image(path)
+            np.asarray(image).sum(dtype=np.uint64)
+            times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全景图无损转码基准测试")
+    parser.add_argument("--plates", type=int, default=8, help="合成全景图数")
+    parser.add_argument("--workers", type=int, default=0, help="转码进程数，0表示使用CPU核数")
+    parser.add_argument("--levels", type=int, nargs='+', default=[1, 6], help="测试的PNG压缩级别")
+    parser.add_argument("--repeat", type=int, default=3, help="加载测试重复次数")
+    parser.add_argument("--cold", action="store_true", help="每次加载前把文件逐出页缓存")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_panorama_transcode_"))
+    try:
+        source_dir = root / "bmp"
+        start = time.perf_counter()
+        panoramic_ids = make_plate_directory(source_dir, args.plates, with_slices=False)
+        print(f"生成 {args.plates} 张合成BMP全景图: {time.perf_counter() - start:.1f}s")
+
+        service = PanoramicImageService(ImageConfig(decode_workers=0, disk_cache_enabled=False))
+        workers = args.workers or os.cpu_count() or 1
+        variants = [('bmp', source_dir, '.bmp')]
+        for fmt, level in [('png', level) for level in args.levels] + [('tiff', None)]:
+            label = f"png-{level}" if fmt == 'png' else fmt
+            target_dir = root / label
+            shutil.copytree(source_dir, target_dir)
+            log, stats = service.transcode_directory_panoramas(str(target_dir), fmt, level or 0,
+                                                               max_workers=workers)
+            source_mb = stats['source_bytes'] / 1024 / 1024
+            print(f"{label:<8} 转码 {stats['files']} 个文件 {stats['seconds']:.2f}s "
+                  f"({stats['files'] / stats['seconds']:.2f} 文件/秒, {source_mb / stats['seconds']:.1f} MB/s, "
+                  f"{workers} 进程), 体积减少 {(1 - stats['target_bytes'] / stats['source_bytes']) * 100:.1f}%"
+                  + (f", 失败 {stats['failed']} 个" if stats['failed'] else ""))
+            variants.append((label, target_dir, '.png' if fmt == 'png' else '.tiff'))
+
+        print(f"\n加载全景图（{'冷读' if args.cold else '页缓存命中'}，每格式 {args.plates * args.repeat} 次）")
+        print(f"{'格式':<10}{'单张大小(MB)':>14}{'中位数(ms)':>12}{'最小(ms)':>12}")
+        for label, directory, extension in variants:
+            paths = [str(directory / f"{panoramic_id}{extension}") for panoramic_id in panoramic_ids]
+            size_mb = statistics.mean(os.path.getsize(path) for path in paths) / 1024 / 1024
+            times = time_loads(service, paths, args.repeat, args.cold)
+            print(f"{label:<10}{size_mb:>14.2f}{statistics.median(times):>12.1f}{min(times):>12.1f}")
+        service.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+感知哈希重复检测基准测试
+- 哈希计算：合成目录中每个切片计算 dHash + pHash 的耗时，按百万切片换算
+- 重复查询：合成的百万级哈希集合（含植入的完全相同和近似重复切片），比较
+  全量两两比较（按抽样换算）与分段索引 find_duplicate_groups 的耗时，以及索引保存/读取耗时
+
+用法:
+    python tools/benchmarks/bench_perceptual_hash.py --plates 4 --entries 1000000 --max-distance 4
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.perceptual_hash import HashIndex, popcount64
+
+
+def bench_hashing(plates: int):
+    """返回 (切片数, 每切片耗时ms)"""
+    root = Path(tempfile.mkdtemp(prefix="bench_phash_"))
+    try:
+        make_plate_directory(root, plates)
+        service = PanoramicImageService(ImageConfig(decode_workers=0, disk_cache_enabled=False,
+                                                    virtual_slices=False))
+        slice_files = service.get_slice_files_from_directory(str(root), str(root))
+        start = time.perf_counter()
+        index = service.update_hash_index(slice_files, str(root))
+        elapsed = time.perf_counter() - start
+        service.shutdown()
+        return len(index), elapsed * 1000 / len(index)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def make_corpus(entries: int, max_distance: int) -> HashIndex:
+    """随机哈希，约1%为完全相同的复制，约1%为翻转1到max_distance位的近似重复"""
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, np.iinfo(np.int64).max, size=entries, dtype=np.int64).astype(np.uint64)
+    hashes ^= rng.integers(0, 2, size=entries, dtype=np.uint64) << np.uint64(63)
+    planted = rng.choice(entries, size=entries // 50, replace=False)
+    sources = rng.choice(entries, size=len(planted), replace=False)
+    hashes[planted[::2]] = hashes[sources[::2]]
+    for target, source in zip(planted[1::2], sources[1::2]):
+        bits = rng.choice(64, size=rng.integers(1, max_distance + 1), replace=False)
+        hashes[target] = hashes[source] ^ np.uint64(sum(1 << int(bit) for bit in bits))
+    paths = [os.path.join(f"EB{10000000 + position // 120}", f"hole_{position % 120 + 1}.png")
+             for position in range(entries)]
+    return HashIndex("/data/plates", paths, np.zeros(entries, dtype=np.int64), hashes, hashes)
+
+
+def brute_force_seconds(hashes: np.ndarray, max_distance: int, sample: int = 200) -> float:
+    """全量两两比较：每个哈希与其余全部比较，抽样 sample 行后按比例换算"""
+    start = time.perf_counter()
+    for position in range(sample):
+        np.flatnonzero(popcount64(hashes[position + 1:] ^ hashes[position]) <= max_distance)
+    per_row = (time.perf_counter() - start) / sample
+    # 前 sample 行各比较约 N 个哈希，全部行平均比较 N/2 个
+    return per_row * len(hashes) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="感知哈希重复检测基准测试")
+    parser.add_argument("--plates", type=int, default=4, help="哈希计算使用的合成全景图数")
+    parser.add_argument("--entries", type=int, default=1000000, help="重复查询的哈希条目数")
+    parser.add_argument("--max-distance", type=int, default=4, help="最大汉明距离")
+    args = parser.parse_args()
+
+    count, per_slice_ms = bench_hashing(args.plates)
+    print(f"哈希计算: {count} 个切片, 每切片 {per_slice_ms:.2f}ms, "
+          f"百万切片约 {per_slice_ms * 1e6 / 1000 / 60:.1f} 分钟")
+
+    corpus = make_corpus(args.entries, args.max_distance)
+    temp_dir = tempfile.mkdtemp(prefix="bench_phash_index_")
+    try:
+        index_path = os.path.join(temp_dir, "phash_index.npz")
+        start = time.perf_counter()
+        corpus.save(index_path)
+        save_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        corpus = HashIndex.load(index_path)
+        load_ms = (time.perf_counter() - start) * 1000
+        size_mb = os.path.getsize(index_path) / 1024 / 1024
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    print(f"索引: {len(corpus)} 条, 文件 {size_mb:.1f}MB, 保存 {save_ms:.0f}ms, 读取 {load_ms:.0f}ms")
+
+    start = time.perf_counter()
+    corpus.query(int(corpus.hashes['phash'][0]), args.max_distance)
+    print(f"单个哈希查询: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    brute_seconds = brute_force_seconds(corpus.hashes['phash'], args.max_distance)
+    start = time.perf_counter()
+    groups = corpus.find_duplicate_groups(args.max_distance)
+    grouped_seconds = time.perf_counter() - start
+    print(f"全量两两比较（换算）: {brute_seconds:.1f}s")
+    print(f"分段索引分组: {grouped_seconds:.2f}s, {len(groups)} 组 / {sum(map(len, groups))} 个切片")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+整板光照归一化基准测试
+合成一张光照不均的全景图（亮度从右到左线性衰减到 --falloff，所有孔位内容相同），比较
+逐切片CLAHE与整板光照归一化处理整板120个孔位的耗时（整板归一化分别计入和不计入模型估计），
+以及处理后孔位间的一致性：各孔位平均亮度和孔内对比度（亮度标准差）在孔位间的方差
+
+用法:
+    python tools/benchmarks/bench_plate_normalization.py --repeat 5 --falloff 0.55
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import PANORAMIC_SIZE
+from src.services.enhancement_service import EnhanceBufferPool, create_clahe, enhance_array
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.plate_normalization import PlateNormalizer
+from src.ui.hole_manager import HoleManager
+
+
+def make_plate(hole_manager: HoleManager, falloff: float) -> np.ndarray:
+    """所有孔位为同一带条纹的纹理，背景和孔位都乘以水平光照衰减"""
+    width, height = PANORAMIC_SIZE
+    rng = np.random.default_rng(0)
+    pixels = np.full((height, width, 3), (110, 105, 100), dtype=np.float32)
+    well = None
+    for hole_number in range(1, hole_manager.total_holes + 1):
+        x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+        if well is None:
+            well = np.empty((h, w, 3), dtype=np.float32)
+            well[:] = (190, 170, 150)
+            well[:, ::5] = (120, 100, 90)
+            well += rng.normal(0, 4, size=well.shape)
+        region = pixels[max(y, 0):y + h, max(x, 0):x + w]
+        region[:] = well[:region.shape[0], :region.shape[1]]
+    illumination = np.linspace(falloff, 1.0, width, dtype=np.float32)
+    return np.clip(pixels * illumination[None, :, None], 0, 255).astype(np.uint8)
+
+
+def hole_crops(pixels: np.ndarray, hole_manager: HoleManager):
+    crops = []
+    for hole_number in range(1, hole_manager.total_holes + 1):
+        x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+        crops.append(pixels[max(y, 0):y + h, max(x, 0):x + w])
+    return crops
+
+
+def consistency(outputs):
+    """(孔位平均亮度的方差, 孔内亮度标准差的方差)"""
+    gray = [cv2.cvtColor(np.ascontiguousarray(output), cv2.COLOR_RGB2GRAY) for output in outputs]
+    return float(np.var([g.mean() for g in gray])), float(np.var([g.std() for g in gray]))
+
+
+def timed(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="整板光照归一化基准测试")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument("--falloff", type=float, default=0.55, help="左边缘相对右边缘的亮度")
+    args = parser.parse_args()
+
+    hole_manager = HoleManager()
+    hole_manager.set_layout_params(*PANORAMIC_SIZE)
+    pixels = make_plate(hole_manager, args.falloff)
+    crops = hole_crops(pixels, hole_manager)
+
+    params = PanoramicImageService.ENHANCE_PARAMS
+    clahe = create_clahe(params)
+    pool = EnhanceBufferPool()
+    normalizer = PlateNormalizer(hole_manager)
+
+    def run_clahe():
+        return [enhance_array(crop, clahe, params, pool).copy() for crop in crops]
+
+    def run_plate(model=None):
+        model = model or normalizer.estimate(pixels)
+        return [model.apply(crop, hole_number) for hole_number, crop in enumerate(crops, 1)]
+
+    model = normalizer.estimate(pixels)
+    clahe_ms = timed(run_clahe, args.repeat)
+    plate_ms = timed(run_plate, args.repeat)
+    apply_ms = timed(lambda: run_plate(model), args.repeat)
+    estimate_ms = timed(lambda: normalizer.estimate(pixels), args.repeat)
+
+    print(f"整板 {len(crops)} 个孔位，光照衰减到 {args.falloff:.0%}")
+    print(f"{'方法':<24}{'耗时(ms)':>10}{'亮度方差':>12}{'对比度方差':>12}")
+    for label, elapsed, outputs in (("原图", 0.0, crops),
+                                    ("逐切片CLAHE", clahe_ms, run_clahe()),
+                                    ("整板归一化（含估计）", plate_ms, run_plate()),
+                                    ("整板归一化（模型已缓存）", apply_ms, run_plate(model))):
+        brightness, contrast = consistency(outputs)
+        print(f"{label:<24}{elapsed:>10.1f}{brightness:>12.2f}{contrast:>12.2f}")
+    print(f"其中模型估计: {estimate_ms:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+整板报告渲染基准测试
+在合成全景图目录上比较两种生成标注总览图的方式（板/秒）：
+- 覆盖层路径：原图分辨率解码 + create_panoramic_overlay 绘制 + 缩小到输出宽度后保存（抽样换算）
+- 报告渲染：按输出分辨率解码并直接绘制，进程池并行、逐板写盘（全部全景图）
+
+用法:
+    python tools/benchmarks/bench_plate_reports.py --plates 500 --width 1024
+    python tools/benchmarks/bench_plate_reports.py --plates 500 --workers 4 --sample 20
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.plate_report import GROWTH_LEVELS, PlateReportRenderer, _render_task
+
+
+def make_labels(panoramic_ids, total_holes: int, disagreement_rate: float = 0.05):
+    """每张板全部孔位随机标注，模型预测按比例与标注不一致"""
+    rng = np.random.default_rng(0)
+    labels, predictions = {}, {}
+    for panoramic_id in panoramic_ids:
+        levels = rng.integers(0, len(GROWTH_LEVELS), size=total_holes)
+        flipped = np.where(rng.random(total_holes) < disagreement_rate, (levels + 1) % len(GROWTH_LEVELS), levels)
+        labels[panoramic_id] = {number: GROWTH_LEVELS[level] for number, level in enumerate(levels, 1)}
+        predictions[panoramic_id] = {number: GROWTH_LEVELS[level] for number, level in enumerate(flipped, 1)}
+    return labels, predictions
+
+
+def bench_overlay_path(service, panoramic_files, labels, output_dir: Path, width: int) -> float:
+    """界面覆盖层路径，返回每板耗时（秒）"""
+    start = time.perf_counter()
+    for panoramic_path in panoramic_files:
+        panoramic_id = Path(panoramic_path).stem
+        with Image.open(panoramic_path) as image:
+            full = image.convert('RGB')
+        overlay = service.create_panoramic_overlay(full, 0, labels[panoramic_id])
+        height = round(overlay.height * width / overlay.width)
+        overlay.resize((width, height), Image.Resampling.LANCZOS).save(output_dir / f"{panoramic_id}.png",
+                                                                          compress_level=1)
+    return (time.perf_counter() - start) / len(panoramic_files)
+
+
+def bench_stages(renderer, panoramic_files, labels, predictions, output_dir: Path):
+    """单进程逐板渲染，返回每板耗时（秒）"""
+    start = time.perf_counter()
+    for panoramic_path in panoramic_files:
+        panoramic_id = Path(panoramic_path).stem
+        _render_task((panoramic_path, str(output_dir / f"{panoramic_id}.png"), renderer,
+                      labels[panoramic_id], predictions[panoramic_id], 1))
+    return (time.perf_counter() - start) / len(panoramic_files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="整板报告渲染基准测试")
+    parser.add_argument("--plates", type=int, default=500, help="合成全景图数")
+    parser.add_argument("--width", type=int, default=1024, help="报告图宽度")
+    parser.add_argument("--workers", type=int, default=0, help="渲染进程数，0表示使用CPU核数")
+    parser.add_argument("--sample", type=int, default=20, help="覆盖层路径和单进程渲染的抽样板数")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="bench_plate_reports_"))
+    try:
+        start = time.perf_counter()
+        panoramic_ids = make_plate_directory(root / "plates", args.plates, with_slices=False)
+        print(f"生成 {args.plates} 张合成全景图: {time.perf_counter() - start:.1f}s")
+
+        service = PanoramicImageService(ImageConfig(decode_workers=0, disk_cache_enabled=False,
+                                                    report_width=args.width))
+        labels, predictions = make_labels(panoramic_ids, service.hole_manager.total_holes)
+        panoramic_files = service.list_panoramic_files(str(root / "plates"))
+        sample = panoramic_files[-args.sample:]
+        sizes = {service.get_image_metadata(path).size for path in panoramic_files}
+        renderer = PlateReportRenderer.from_hole_manager(service.hole_manager, sizes, max_width=args.width)
+
+        overlay_dir = root / "overlay"
+        overlay_dir.mkdir()
+        overlay_seconds = bench_overlay_path(service, sample, labels, overlay_dir, args.width)
+        print(f"覆盖层路径（抽样 {len(sample)} 张）: 每板 {overlay_seconds * 1000:.0f}ms, "
+              f"{1 / overlay_seconds:.1f} 板/秒")
+
+        stage_dir = root / "single"
+        stage_dir.mkdir()
+        single_seconds = bench_stages(renderer, sample, labels, predictions, stage_dir)
+        print(f"报告渲染单进程（抽样 {len(sample)} 张）: 每板 {single_seconds * 1000:.0f}ms, "
+              f"{1 / single_seconds:.1f} 板/秒")
+
+        output_dir = root / "reports"
+        start = time.perf_counter()
+        summaries, errors = service.render_plate_reports(str(root / "plates"), str(output_dir), labels,
+                                                         predictions, max_workers=args.workers or None)
+        elapsed = time.perf_counter() - start
+        output_mb = sum(os.path.getsize(output_dir / name) for name in os.listdir(output_dir)) / 1024 / 1024
+        disagreements = sum(len(summary['disagreements']) for summary in summaries.values())
+        print(f"报告渲染进程池（{args.workers or os.cpu_count()} 进程, {len(summaries)} 张）: {elapsed:.1f}s, "
+              f"{len(summaries) / elapsed:.1f} 板/秒, 输出 {output_mb:.0f}MB, 不一致孔位 {disagreements} 个"
+              + (f", 失败 {len(errors)} 张" if errors else ""))
+        service.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+预取基准测试
+比较开启/关闭后台预取时“下一孔位”导航延迟
+
+用法:
+    python tools/benchmarks/bench_prefetch.py --plates 3 --steps 60 --think-ms 30
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.prefetch_service import SlicePrefetcher
+
+
+def navigate(directory: str, depth: int, steps: int, start_index: int, think_ms: float):
+    """模拟逐孔导航，返回每次导航的延迟（毫秒）"""
+    service = PanoramicImageService(ImageConfig())
+    prefetcher = SlicePrefetcher(service, depth=depth, max_workers=2)
+    slice_files = service.get_slice_files_from_directory(directory, directory)
+
+    latencies = []
+    try:
+        for index in range(start_index, min(start_index + steps, len(slice_files))):
+            slice_info = slice_files[index]
+            start = time.perf_counter()
+            service.load_slice_image(slice_info['filepath'])
+            service.get_enhanced_slice_image(slice_info['filepath'])
+            panoramic_file = service.find_panoramic_image(
+                f"{slice_info['panoramic_id']}/hole_1.png", directory)
+            service.load_panoramic_image(panoramic_file)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            prefetcher.schedule(slice_files, index, directory)
+            # 模拟标注员在每个孔位停留的时间
+            time.sleep(think_ms / 1000.0)
+    finally:
+        prefetcher.shutdown(wait=True)
+
+    return latencies, prefetcher.get_stats()
+
+
+def report(label: str, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if ordered else 0.0
+    print(f"{label:<12} 次数={len(latencies):<4} 平均={statistics.mean(latencies):8.2f}ms "
+          f"中位数={statistics.median(latencies):8.2f}ms p95={p95:8.2f}ms "
+          f"最大={max(latencies):8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预取导航延迟基准测试")
+    parser.add_argument("--plates", type=int, default=3, help="合成全景图数量")
+    parser.add_argument("--steps", type=int, default=60, help="导航步数")
+    parser.add_argument("--depth", type=int, default=3, help="预取深度")
+    parser.add_argument("--think-ms", type=float, default=30.0, help="每个孔位停留时间（毫秒）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        print(f"生成 {args.plates} 张合成全景图...")
+        make_plate_directory(directory, args.plates)
+
+        # 从第一张全景图末尾开始，导航会跨越全景图边界
+        start_index = 100
+        for label, depth in (("预取关闭", 0), (f"预取深度{args.depth}", args.depth)):
+            latencies, stats = navigate(str(directory), depth, args.steps, start_index, args.think_ms)
+            report(label, latencies)
+            if depth:
+                print(f"{'':<12} 预取统计: {stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+渐进式渲染基准测试
+模拟按住方向键快速导航：每张全景图连续浏览若干孔位，在最后一个孔位停下。
+原方式每一帧都用LANCZOS缩放切片和全景图底图；渐进式每一帧先快速重采样显示，
+只在停下时做一次高质量重绘。统计首像素时间（切片和全景图交给画布前的耗时）的中位数和p95。
+切片增强结果和全景图缩小层级预先缓存（与预取命中时一致），只比较显示路径本身
+
+用法:
+    python tools/benchmarks/bench_progressive_render.py --plates 6 --holes 20
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+from src.services.progressive_render import RenderTimings
+
+DISPLAY_SIZE = (1220, 750)
+SLICE_CANVAS = (300, 300)
+
+
+def show_frame(service, slice_path, panoramic_file, hole_number, fast):
+    """生成一帧的切片和全景图显示图像，返回切片的高质量重绘参数"""
+    enhanced = service.get_enhanced_slice_image(slice_path)
+    size = service.compute_slice_display_size(enhanced.width, enhanced.height, *SLICE_CANVAS)
+    resample = Image.Resampling.BILINEAR if fast else Image.Resampling.LANCZOS
+    enhanced.resize(size, resample)
+    service.render_panoramic_overlay(panoramic_file, hole_number, {}, *DISPLAY_SIZE, fast=fast)
+    return enhanced, size
+
+
+def navigate(service, plates, holes, fast):
+    """按全景图依次快速浏览孔位，返回耗时统计"""
+    timings = RenderTimings()
+    for panoramic_file, slice_paths in plates:
+        for hole_number, slice_path in enumerate(slice_paths[:holes], start=1):
+            start = time.perf_counter()
+            enhanced, size = show_frame(service, slice_path, panoramic_file, hole_number, fast)
+            timings.record('preview', (time.perf_counter() - start) * 1000)
+
+        if fast:
+            # 在最后一个孔位停下：空闲时高质量重绘
+            start = time.perf_counter()
+            enhanced.resize(size, Image.Resampling.LANCZOS)
+            service.render_panoramic_overlay(panoramic_file, hole_number, {}, *DISPLAY_SIZE)
+            timings.record('refine', (time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="渐进式渲染基准测试")
+    parser.add_argument("--plates", type=int, default=6, help="全景图数量")
+    parser.add_argument("--holes", type=int, default=20, help="每张全景图浏览的孔位数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        panoramic_ids = make_plate_directory(directory, args.plates)
+        plates = [(str(directory / f"{panoramic_id}.bmp"),
+                   [str(directory / panoramic_id / f"hole_{hole}.png") for hole in range(1, 121)])
+                  for panoramic_id in panoramic_ids]
+
+        results = []
+        for label, fast in (('原方式(LANCZOS)', False), ('渐进式', True)):
+            service = PanoramicImageService(ImageConfig(decode_workers=0, disk_cache_enabled=False))
+            # 预热缓存：缩小层级和增强切片（预取命中的情形）
+            for panoramic_file, slice_paths in plates:
+                service.get_panoramic_pyramid(panoramic_file)
+                for slice_path in slice_paths[:args.holes]:
+                    service.get_enhanced_slice_image(slice_path)
+            results.append((label, navigate(service, plates, args.holes, fast)))
+
+        print(f"全景图数: {args.plates}, 每张浏览孔位数: {args.holes}, "
+              f"显示尺寸: {DISPLAY_SIZE[0]}x{DISPLAY_SIZE[1]}")
+        print(f"{'方式':<18}{'首像素中位数(ms)':>16}{'首像素p95(ms)':>15}{'停下后重绘(ms)':>15}")
+        for label, timings in results:
+            summary = timings.summary()
+            refine = f"{summary['refine']['median_ms']:.1f}" if summary['refine']['count'] else '-'
+            print(f"{label:<18}{summary['preview']['median_ms']:>16.2f}"
+                  f"{summary['preview']['p95_ms']:>15.2f}{refine:>15}")
+
+
+if __name__ == '__main__':
+    main()
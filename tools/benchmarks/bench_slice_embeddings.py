@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+相似孔位查询基准测试
+- 嵌入计算：合成切片每个计算 compute_embedding 的耗时
+- 查询：合成的单位向量矩阵（100k / 1M 行），比较 float32 全量相乘 + argsort 与
+  uint8 量化存储、分片相乘 + argpartition（EmbeddingIndex.search）的 top-k 查询延迟（中位数）、
+  矩阵内存和前 k 个结果与精确结果的重合率
+
+用法:
+    python tools/benchmarks/bench_slice_embeddings.py --sizes 100000 1000000 --k 20 --repeat 10
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_panoramic_array
+from src.services.slice_embeddings import EMBEDDING_DIM, EmbeddingIndex, compute_embedding, quantize_embedding
+
+
+def median_ms(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def make_vectors(count: int) -> np.ndarray:
+    """非负的单位向量（与直方图嵌入相同的取值范围），分块生成以控制峰值内存"""
+    rng = np.random.default_rng(0)
+    vectors = np.empty((count, EMBEDDING_DIM), dtype=np.float32)
+    for start in range(0, count, 100000):
+        block = np.abs(rng.normal(size=(min(100000, count - start), EMBEDDING_DIM))).astype(np.float32)
+        vectors[start:start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    return vectors
+
+
+def full_sort(matrix: np.ndarray, query: np.ndarray, k: int) -> np.ndarray:
+    """对照实现：全量相乘后完整排序"""
+    return np.argsort(-(matrix @ query))[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="相似孔位查询基准测试")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100000, 1000000], help="切片数")
+    parser.add_argument("--k", type=int, default=20, help="返回的相似切片数")
+    parser.add_argument("--shard-size", type=int, default=65536, help="分片行数")
+    parser.add_argument("--repeat", type=int, default=10, help="每种查询的重复次数")
+    args = parser.parse_args()
+
+    panoramic = make_panoramic_array(0)
+    wells = [panoramic[y:y + 80, x:x + 80] for y in range(0, 800, 100) for x in range(0, 1200, 100)]
+    per_slice = median_ms(lambda: [compute_embedding(well) for well in wells], 5) / len(wells)
+    print(f"嵌入计算: 每切片 {per_slice:.3f}ms（{EMBEDDING_DIM} 维）")
+
+    print(f"{'切片数':>9}  {'实现':<22}{'内存(MB)':>10}{'查询(ms)':>11}{'重合率':>8}")
+    for count in args.sizes:
+        dense = make_vectors(count)
+        query = dense[count // 2]
+        dense_ms = median_ms(lambda: full_sort(dense, query, args.k), args.repeat)
+        exact = set(full_sort(dense, query, args.k).tolist())
+
+        index = EmbeddingIndex('', [''] * count, np.zeros(count, dtype=np.int64), quantize_embedding(dense))
+        dense_bytes = dense.nbytes
+        del dense
+        sharded_ms = median_ms(lambda: index.search(query, args.k, args.shard_size), args.repeat)
+        recall = len(exact & set(index.search(query, args.k, args.shard_size)[0].tolist())) / args.k
+
+        print(f"{count:>9}  {'float32 全量 + argsort':<22}{dense_bytes / 1024 / 1024:>10.1f}{dense_ms:>11.1f}"
+              f"{1.0:>8.2f}")
+        print(f"{'':>9}  {'uint8 分片 top-k':<22}{index.vectors.nbytes / 1024 / 1024:>10.1f}{sharded_ms:>11.1f}"
+              f"{recall:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+切片索引基准测试
+比较原有的切片字典列表与 SliceIndex（结构化数组 + 字符串驻留）在不同切片数下的
+内存占用（tracemalloc 统计构建后仍存活的字节数）、排序耗时和按 (全景ID, 孔位编号) 查找的耗时。
+记录为合成的子目录模式切片（每张全景图120个孔位），按随机顺序追加，与并行扫描的产出顺序相当
+
+用法:
+    python tools/benchmarks/bench_slice_index.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.services.slice_index import SliceIndexBuilder
+
+ROOT = os.path.join(os.sep, "data", "plates")
+LOOKUPS = 1000
+
+
+def make_rows(count: int):
+    """生成 (全景ID, 孔位编号) 列表，顺序随机"""
+    rows = [(f"EB{10000000 + position // 120}", position % 120 + 1) for position in range(count)]
+    random.Random(0).shuffle(rows)
+    return rows
+
+
+def build_dicts(rows):
+    """原有实现：每个切片一个六键字典"""
+    slice_files = []
+    for panoramic_id, hole_number in rows:
+        filename = f"hole_{hole_number}.png"
+        slice_files.append({
+            'filename': filename,
+            'filepath': os.path.join(ROOT, panoramic_id, filename),
+            'panoramic_id': panoramic_id,
+            'hole_number': hole_number,
+            'relative_path': os.path.join(panoramic_id, filename),
+            'structure_type': 'subdirectory'
+        })
+    return slice_files
+
+
+def build_index(rows):
+    builder = SliceIndexBuilder(ROOT)
+    for panoramic_id, hole_number in rows:
+        builder.add(panoramic_id, hole_number, os.path.join(panoramic_id, f"hole_{hole_number}.png"),
+                    'subdirectory')
+    return builder.build()
+
+
+def measure_memory(build, rows):
+    """返回 (构建结果, 构建后仍存活的字节数)"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = build(rows)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return result, retained
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="切片索引基准测试")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[10000, 100000, 1000000], help="切片数")
+    args = parser.parse_args()
+
+    print(f"{'切片数':>9}  {'实现':<10}{'内存(MB)':>10}{'排序(ms)':>11}{'查找' + str(LOOKUPS) + '次(ms)':>16}")
+    for count in args.sizes:
+        rows = make_rows(count)
+        targets = random.Random(1).sample(rows, min(LOOKUPS, count))
+
+        slice_files, dict_bytes = measure_memory(build_dicts, rows)
+        dict_sort = timed(lambda: slice_files.sort(key=lambda x: (x['panoramic_id'], x['hole_number'])))
+        # 原有GUI按 (全景ID, 孔位编号) 线性查找，这里只查找前10次并按比例换算
+        sample = targets[:10]
+        dict_find = timed(lambda: [next(i for i, f in enumerate(slice_files)
+                                        if f['panoramic_id'] == panoramic_id and f['hole_number'] == hole)
+                                   for panoramic_id, hole in sample]) * len(targets) / len(sample)
+        del slice_files
+
+        slice_index, index_bytes = measure_memory(build_index, rows)
+        index_sort = timed(slice_index.sort)
+        index_find = timed(lambda: [slice_index.find(panoramic_id, hole) for panoramic_id, hole in targets])
+
+        print(f"{count:>9}  {'字典列表':<10}{dict_bytes / 1024 / 1024:>10.1f}{dict_sort:>11.1f}{dict_find:>16.1f}")
+        print(f"{'':>9}  {'SliceIndex':<10}{index_bytes / 1024 / 1024:>10.1f}{index_sort:>11.1f}{index_find:>16.1f}")
+
+
+if __name__ == '__main__':
+    main()
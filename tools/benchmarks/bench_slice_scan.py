@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+切片目录扫描基准测试
+在 全景图数 x 120 切片 的合成目录树上比较原有的 iterdir预计数 + rglob 检测 + rglob 遍历流程
+与单次 scandir 并行扫描（首次扫描 / 无变化重扫 / 新增一张全景图后重扫）的耗时
+
+切片为空文件，扫描只依赖目录条目，不读取文件内容
+
+用法:
+    python tools/benchmarks/bench_slice_scan.py --plates 1000 --workers 8
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+IMAGE_EXTENSIONS = {'.bmp', '.png', '.jpg', '.jpeg', '.tiff', '.tif'}
+
+
+def make_tree(root: Path, plates: int, holes: int = 120, start: int = 0) -> None:
+    """生成空文件组成的子目录模式目录树"""
+    root.mkdir(parents=True, exist_ok=True)
+    for index in range(start, start + plates):
+        panoramic_id = f"EB{10000000 + index}"
+        (root / f"{panoramic_id}.bmp").touch()
+        plate_dir = root / panoramic_id
+        plate_dir.mkdir()
+        for hole_number in range(1, holes + 1):
+            (plate_dir / f"hole_{hole_number}.png").touch()
+
+
+def legacy_scan(service: PanoramicImageService, root: Path) -> int:
+    """原有流程: GUI中的iterdir预计数，rglob检测目录结构，再逐个子目录rglob"""
+    # load_data 中的预计数
+    image_files = []
+    for item in root.iterdir():
+        if item.is_file() and item.suffix.lower() in IMAGE_EXTENSIONS:
+            image_files.append(item)
+        elif item.is_dir() and not item.name.startswith('.'):
+            for sub_item in item.iterdir():
+                if sub_item.is_file() and sub_item.suffix.lower() in IMAGE_EXTENSIONS:
+                    image_files.append(sub_item)
+
+    # _detect_directory_structure: 独立路径检测遍历整棵树
+    independent = 0
+    for file_path in root.rglob('*'):
+        if (file_path.is_file() and file_path.suffix.lower() in IMAGE_EXTENSIONS and
+                service._is_slice_filename(file_path.name)):
+            independent += 1
+            if independent >= 3:
+                break
+    found = 0
+    for subdir in root.iterdir():
+        if subdir.is_dir():
+            for file_path in subdir.rglob('hole_*.png'):
+                if file_path.is_file():
+                    found += 1
+                    if found >= 3:
+                        break
+        if found >= 3:
+            break
+
+    # _get_slice_files_subdirectory
+    slice_files = []
+    for subdir in list(root.iterdir()):
+        if subdir.is_dir() and not subdir.name.startswith('.'):
+            for file_path in list(subdir.rglob('hole_*.png')):
+                if file_path.is_file():
+                    slice_files.append({
+                        'filename': file_path.name,
+                        'filepath': str(file_path),
+                        'panoramic_id': subdir.name,
+                        'hole_number': service._parse_hole_number_from_filename(file_path.name),
+                        'relative_path': str(file_path.relative_to(root)),
+                        'structure_type': 'subdirectory'
+                    })
+    slice_files.sort(key=lambda x: (x['panoramic_id'], x['hole_number']))
+    return len(slice_files)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="切片目录扫描基准测试")
+    parser.add_argument("--plates", type=int, default=1000, help="全景图数量")
+    parser.add_argument("--workers", type=int, default=8, help="扫描线程数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "plates"
+        make_tree(root, args.plates)
+
+        legacy_service = PanoramicImageService(ImageConfig(disk_cache_enabled=False))
+        legacy_count, legacy_ms = timed(lambda: legacy_scan(legacy_service, root))
+
+        def scan():
+            service = PanoramicImageService(ImageConfig(scan_workers=args.workers))
+            files = service.get_slice_files_from_directory(str(root), str(root))
+            return len(files), service.get_slice_scanner(str(root)).stats
+
+        (cold_count, cold_stats), cold_ms = timed(scan)
+        (warm_count, warm_stats), warm_ms = timed(scan)
+        make_tree(root, 1, start=args.plates)
+        (added_count, added_stats), added_ms = timed(scan)
+
+        assert legacy_count == cold_count == warm_count == added_count - 120
+
+        print(f"目录树: {args.plates} 张全景图 x 120 切片, 扫描线程数: {args.workers}")
+        print(f"{'扫描方式':<20}{'切片数':>10}{'scandir目录数':>16}{'耗时(ms)':>12}")
+        print(f"{'原有 rglob 流程':<20}{legacy_count:>10}{'-':>16}{legacy_ms:>12.1f}")
+        for name, count, stats, ms in (('scandir 首次扫描', cold_count, cold_stats, cold_ms),
+                                       ('无变化重扫', warm_count, warm_stats, warm_ms),
+                                       ('新增1张后重扫', added_count, added_stats, added_ms)):
+            print(f"{name:<20}{count:>10}{stats['dirs_scanned']:>16}{ms:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
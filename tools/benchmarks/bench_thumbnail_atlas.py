@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+缩略图图集基准测试
+比较原有逐个打开切片并LANCZOS缩放的串行网格生成，与进程池并行图集（1/4/8个工作进程）的整板耗时
+
+用法:
+    python tools/benchmarks/bench_thumbnail_atlas.py --plates 4 --workers 1 4 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def legacy_grid(service, slice_files, grid_size=(10, 12), thumbnail_size=(50, 50)):
+    """原有实现：串行打开每个切片，LANCZOS缩放后粘贴"""
+    rows, cols = grid_size
+    thumb_width, thumb_height = thumbnail_size
+    grid_image = Image.new('RGB', (cols * thumb_width, rows * thumb_height), 'white')
+    slice_dict = {f['hole_number']: f for f in slice_files}
+    for hole_number in range(1, rows * cols + 1):
+        row, col = service.hole_manager.number_to_position(hole_number)
+        x, y = col * thumb_width, row * thumb_height
+        if hole_number in slice_dict:
+            with Image.open(slice_dict[hole_number]['filepath']) as image:
+                thumbnail = image.resize(thumbnail_size, Image.Resampling.LANCZOS)
+        else:
+            thumbnail = Image.new('RGB', thumbnail_size, 'lightgray')
+        grid_image.paste(thumbnail, (x, y))
+    return grid_image
+
+
+def time_plates(build, plates):
+    """返回每张全景图的耗时(ms)"""
+    times = []
+    for slice_files in plates:
+        start = time.perf_counter()
+        build(slice_files)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缩略图图集基准测试")
+    parser.add_argument("--plates", type=int, default=4, help="全景图数量")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 4, 8], help="工作进程数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp) / "plates"
+        make_plate_directory(directory, args.plates)
+
+        service = PanoramicImageService(ImageConfig(disk_cache_enabled=False))
+        slice_files = service.get_slice_files_from_directory(str(directory), str(directory))
+        plates = {}
+        for file_info in slice_files:
+            plates.setdefault(file_info['panoramic_id'], []).append(file_info)
+        plates = list(plates.values())
+
+        results = [('串行LANCZOS网格', time_plates(lambda files: legacy_grid(service, files), plates))]
+        for workers in args.workers:
+            def build(files, workers=workers):
+                service.image_cache.clear()
+                service.get_thumbnail_atlas(files, max_workers=workers)
+            # 预热进程池，不计入进程启动开销
+            build(plates[0])
+            results.append((f'并行图集 x{workers}', time_plates(build, plates)))
+        # 先为每张全景图生成一次图集，再计时缓存命中
+        time_plates(lambda files: service.get_thumbnail_atlas(files), plates)
+        warm = time_plates(lambda files: service.get_thumbnail_atlas(files), plates)
+        results.append(('图集缓存命中', warm))
+        service.shutdown()
+
+        print(f"全景图数: {len(plates)}, 每板切片数: {len(plates[0])}, CPU核数: {os.cpu_count()}")
+        print(f"{'生成方式':<16}{'每板中位数(ms)':>16}{'总计(ms)':>12}")
+        for name, times in results:
+            print(f"{name:<16}{statistics.median(times):>16.2f}{sum(times):>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
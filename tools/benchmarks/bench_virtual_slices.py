@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+虚拟切片基准测试
+比较切片PNG模式与虚拟切片模式（从全景图裁剪孔位）每张全景图的I/O和导航延迟
+
+I/O 为打开的文件数，以及 /proc/self/io 的读调用次数(syscr)和读取字节数(rchar)（仅Linux可用）；
+导航延迟为依次浏览全部孔位时每个孔位 load_slice_image + get_enhanced_slice_image 的耗时。
+虚拟切片模式在首孔解码整张全景图（未压缩BMP为内存映射，缺页读入不计入 rchar），之后的孔位只裁剪数组
+
+用法:
+    python tools/benchmarks/bench_virtual_slices.py --plates 3
+"""
+
+import argparse
+import builtins
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from tools.benchmarks.synthetic_data import make_plate_directory
+from src.core.config import ImageConfig
+from src.services.panoramic_image_service import PanoramicImageService
+
+
+def read_io_counters():
+    """读取当前进程的 (读调用次数, 读取字节数)，不可用时返回None"""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['syscr']), int(fields['rchar'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def browse_plate(service, slice_files):
+    """依次浏览一张全景图的全部孔位，返回 (每孔耗时ms列表, 打开文件数, 读调用次数, 读取字节数)"""
+    opened = []
+    original_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        opened.append(file)
+        return original_open(file, *args, **kwargs)
+
+    before = read_io_counters()
+    builtins.open = counting_open
+    try:
+        times = []
+        for slice_info in slice_files:
+            start = time.perf_counter()
+            service.load_slice_image(slice_info['filepath'])
+            service.get_enhanced_slice_image(slice_info['filepath'])
+            times.append((time.perf_counter() - start) * 1000)
+    finally:
+        builtins.open = original_open
+    after = read_io_counters()
+    if before is None or after is None:
+        return times, len(opened), None, None
+    return times, len(opened), after[0] - before[0], after[1] - before[1]
+
+
+def run_mode(directory, with_slices, plates):
+    make_plate_directory(directory, plates, with_slices=with_slices)
+    # 禁用磁盘缓存，只比较切片来源本身
+    service = PanoramicImageService(ImageConfig(disk_cache_enabled=False))
+    slice_files = service.get_slice_files_from_directory(str(directory), str(directory))
+
+    by_plate = {}
+    for slice_info in slice_files:
+        by_plate.setdefault(slice_info['panoramic_id'], []).append(slice_info)
+
+    first_ms, rest_ms, opens, syscalls, read_bytes = [], [], [], [], []
+    for plate_slices in by_plate.values():
+        times, plate_opens, plate_syscalls, plate_bytes = browse_plate(service, plate_slices)
+        first_ms.append(times[0])
+        rest_ms.extend(times[1:])
+        opens.append(plate_opens)
+        if plate_syscalls is not None:
+            syscalls.append(plate_syscalls)
+            read_bytes.append(plate_bytes)
+    return {
+        'structure': slice_files[0]['structure_type'],
+        'slices': len(slice_files),
+        'first_ms': statistics.median(first_ms),
+        'median_ms': statistics.median(rest_ms),
+        'p95_ms': sorted(rest_ms)[int(len(rest_ms) * 0.95) - 1],
+        'opens': statistics.median(opens),
+        'syscalls': statistics.median(syscalls) if syscalls else None,
+        'read_mb': statistics.median(read_bytes) / (1024 * 1024) if read_bytes else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="虚拟切片基准测试")
+    parser.add_argument("--plates", type=int, default=3, help="全景图数量")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            ('切片PNG', run_mode(Path(tmp) / "png", True, args.plates)),
+            ('虚拟切片', run_mode(Path(tmp) / "virtual", False, args.plates)),
+        ]
+
+    print(f"每种模式 {args.plates} 张全景图，依次浏览全部孔位（每张全景图取中位数）")
+    print(f"{'模式':<10}{'记录类型':>14}{'首孔(ms)':>10}{'中位数(ms)':>12}{'p95(ms)':>10}"
+          f"{'打开文件/板':>12}{'读调用/板':>12}{'读取MB/板':>12}")
+    for name, result in results:
+        syscalls = f"{result['syscalls']:.0f}" if result['syscalls'] is not None else 'n/a'
+        read_mb = f"{result['read_mb']:.1f}" if result['read_mb'] is not None else 'n/a'
+        print(f"{name:<10}{result['structure']:>14}{result['first_ms']:>10.2f}{result['median_ms']:>12.3f}"
+              f"{result['p95_ms']:>10.3f}{result['opens']:>12.0f}{syscalls:>12}{read_mb:>12}")
+
+
+if __name__ == '__main__':
+    main()
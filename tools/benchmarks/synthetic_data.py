@@ -0,0 +1,73 @@
+"""
+基准测试用合成数据
+生成子目录模式的全景图目录: <目录>/<全景ID>.bmp 和 <目录>/<全景ID>/hole_<N>.png
+"""
+
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+from PIL import Image
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from src.ui.hole_manager import HoleManager
+
+PANORAMIC_SIZE = (3088, 2064)
+
+
+def make_panoramic_array(seed: int, size: Tuple[int, int] = PANORAMIC_SIZE) -> np.ndarray:
+    """生成带孔位图案的合成全景图像素数组 (H, W, 3)"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    # 低频背景 + 噪声，避免PNG压缩结果失真地小
+    yy, xx = np.mgrid[0:height, 0:width]
+    background = (96 + 32 * np.sin(xx / 180.0 + seed) * np.cos(yy / 240.0)).astype(np.int16)
+    noise = rng.integers(-12, 12, size=(height, width), dtype=np.int16)
+    gray = np.clip(background + noise, 0, 255).astype(np.uint8)
+    pixels = np.stack([gray, gray, gray], axis=-1)
+
+    hole_manager = HoleManager()
+    hole_manager.set_layout_params(width, height)
+    for hole_number in range(1, hole_manager.total_holes + 1):
+        x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+        value = int(rng.integers(120, 240))
+        pixels[max(y, 0):y + h, max(x, 0):x + w] = (value, value - 20, value - 40)
+    return pixels
+
+
+def make_plate_directory(root: Path, plates: int, size: Tuple[int, int] = PANORAMIC_SIZE,
+                         with_slices: bool = True, prefix: str = "EB",
+                         panoramic_ext: str = ".bmp") -> List[str]:
+    """
+    生成合成全景图目录
+
+    Returns:
+        全景ID列表
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    hole_manager = HoleManager()
+    hole_manager.set_layout_params(*size)
+    panoramic_ids = []
+
+    template = make_panoramic_array(0, size)
+    for index in range(plates):
+        panoramic_id = f"{prefix}{10000000 + index}"
+        panoramic_ids.append(panoramic_id)
+        # 复用模板并做轻微扰动，避免每个全景图都重新生成
+        pixels = np.roll(template, index * 7, axis=1)
+        Image.fromarray(pixels).save(root / f"{panoramic_id}{panoramic_ext}")
+
+        if with_slices:
+            slice_dir = root / panoramic_id
+            slice_dir.mkdir(exist_ok=True)
+            for hole_number in range(1, hole_manager.total_holes + 1):
+                x, y, w, h = hole_manager.get_hole_coordinates(hole_number)
+                crop = pixels[max(y, 0):y + h, max(x, 0):x + w]
+                Image.fromarray(crop).save(slice_dir / f"hole_{hole_number}.png")
+
+    return panoramic_ids
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+磁盘缓存管理工具
+查看和清理全景图目录下的显示派生图像缓存（.annotation_cache）
+clear 只删除派生图像，缓存目录下的扫描状态和索引文件保留
+
+用法:
+    python tools/cache_manager.py stats <全景图目录>
+    python tools/cache_manager.py prune <全景图目录> --max-mb 500
+    python tools/cache_manager.py clear <全景图目录>
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+def get_cache(panoramic_dir: str):
+    """获取全景图目录对应的磁盘缓存"""
+    from src.core.config import ImageConfig
+    from src.services.disk_cache import DiskImageCache
+
+    return DiskImageCache(str(Path(panoramic_dir) / ImageConfig().disk_cache_dir))
+
+
+def show_stats(panoramic_dir: str):
+    """显示缓存状态"""
+    cache = get_cache(panoramic_dir)
+    if not cache.cache_dir.exists():
+        print(f"📭 缓存目录不存在: {cache.cache_dir}")
+        return True
+
+    print(f"📋 缓存目录: {cache.cache_dir}")
+    for kind_dir in sorted(p for p in cache.cache_dir.iterdir() if p.is_dir()):
+        files = list(kind_dir.rglob('*.png'))
+        size = sum(f.stat().st_size for f in files)
+        print(f"  {kind_dir.name}: {len(files)} 个文件, {size / 1024 / 1024:.1f} MB")
+    print(f"  总计: {cache.get_size() / 1024 / 1024:.1f} MB")
+    return True
+
+
+def prune_cache(panoramic_dir: str, max_mb: float):
+    """清理缓存到指定大小"""
+    cache = get_cache(panoramic_dir)
+    removed, freed = cache.prune(int(max_mb * 1024 * 1024))
+    print(f"✅ 已删除 {removed} 个文件, 释放 {freed / 1024 / 1024:.1f} MB")
+    print(f"  当前大小: {cache.get_size() / 1024 / 1024:.1f} MB (上限 {max_mb} MB)")
+    return True
+
+
+def clear_cache(panoramic_dir: str):
+    """删除全部派生图像"""
+    cache = get_cache(panoramic_dir)
+    if not cache.cache_dir.exists():
+        print(f"📭 缓存目录不存在: {cache.cache_dir}")
+        return True
+    removed, freed = cache.clear()
+    print(f"✅ 已删除 {removed} 个派生图像, 释放 {freed / 1024 / 1024:.1f} MB: {cache.cache_dir}")
+    return True
+
+
+def main():
+    """主函数"""
+    from src.core.config import ImageConfig
+
+    default_max_mb = ImageConfig().disk_cache_max_size / 1024 / 1024
+
+    parser = argparse.ArgumentParser(description="磁盘缓存管理工具")
+    subparsers = parser.add_subparsers(dest="command", help="可用命令")
+
+    stats_parser = subparsers.add_parser("stats", help="显示缓存状态")
+    stats_parser.add_argument("panoramic_dir", help="全景图目录")
+
+    prune_parser = subparsers.add_parser("prune", help="按最近使用时间清理缓存到指定大小")
+    prune_parser.add_argument("panoramic_dir", help="全景图目录")
+    prune_parser.add_argument("--max-mb", type=float, default=default_max_mb,
+                              help=f"缓存大小上限（MB），默认 {default_max_mb:.0f}")
+
+    clear_parser = subparsers.add_parser("clear", help="删除全部派生图像（保留扫描状态和索引文件）")
+    clear_parser.add_argument("panoramic_dir", help="全景图目录")
+
+    args = parser.parse_args()
+
+    if not args.command:
+        parser.print_help()
+        return
+
+    if args.command == "stats":
+        show_stats(args.panoramic_dir)
+    elif args.command == "prune":
+        prune_cache(args.panoramic_dir, args.max_mb)
+    elif args.command == "clear":
+        clear_cache(args.panoramic_dir)
+
+
+if __name__ == '__main__':
+    main()
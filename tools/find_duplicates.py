@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+重复切片检测工具
+扫描一个或多个全景图目录（如多个批次目录），计算或复用各目录的切片感知哈希索引
+（<全景图目录>/.annotation_cache/phash_index.npz），报告整个数据集中的重复和近似重复切片
+
+用法:
+    python tools/find_duplicates.py <全景图目录> [<全景图目录> ...]
+    python tools/find_duplicates.py batch1 batch2 --max-distance 6 --hash dhash
+    python tools/find_duplicates.py batch1 batch2 --json duplicates.json
+"""
+
+import sys
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+def build_indexes(directories):
+    """扫描各目录并更新哈希索引"""
+    from src.core.config import ImageConfig
+    from src.services.panoramic_image_service import PanoramicImageService
+
+    service = PanoramicImageService(ImageConfig(decode_workers=0))
+    indexes = []
+    for directory in directories:
+        start = time.perf_counter()
+        slice_files = service.get_slice_files_from_directory(directory, directory)
+
+        def progress(done, total, message):
+            print(f"\r  {message}", end='', flush=True)
+
+        index = service.update_hash_index(slice_files, directory, progress)
+        print(f"\r📋 {directory}: {len(index)} 个切片, 耗时 {time.perf_counter() - start:.1f}s")
+        indexes.append(index)
+    service.shutdown()
+    return indexes
+
+
+def report(directories, max_distance: int, kind: str, json_path: str = None, limit: int = 20):
+    """输出重复切片报告"""
+    from src.services.perceptual_hash import HashIndex, hamming_distance
+
+    indexes = build_indexes(directories)
+    corpus = HashIndex.merge(indexes)
+    start = time.perf_counter()
+    groups = corpus.find_duplicate_groups(max_distance, kind)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    # 每个条目所属的目录，用于区分跨目录重复
+    owners = [directory for directory, index in zip(directories, indexes) for _ in range(len(index))]
+    cross = [group for group in groups if len({owners[position] for position in group}) > 1]
+    duplicated = sum(len(group) for group in groups)
+
+    print(f"\n{'=' * 60}")
+    print(f"切片总数: {len(corpus)}, 哈希: {kind}, 最大汉明距离: {max_distance}, 查询耗时 {query_ms:.1f}ms")
+    print(f"重复分组: {len(groups)} 组 / {duplicated} 个切片, 其中跨目录 {len(cross)} 组")
+    for number, group in enumerate(sorted(groups, key=len, reverse=True)[:limit], 1):
+        reference = int(corpus.hashes[kind][group[0]])
+        distances = hamming_distance(corpus.hashes[kind][group], reference)
+        print(f"\n#{number} ({len(group)} 个切片)")
+        for position, distance in zip(group, distances.tolist()):
+            print(f"  [{distance:>2}] {corpus.paths[position]}")
+    if len(groups) > limit:
+        print(f"\n... 另有 {len(groups) - limit} 组未显示")
+
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'directories': [os.path.abspath(directory) for directory in directories],
+                'hash': kind,
+                'max_distance': max_distance,
+                'groups': [[corpus.paths[position] for position in group] for group in groups]
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n✅ 报告已写入: {json_path}")
+    return True
+
+
+def main():
+    """主函数"""
+    from src.core.config import ImageConfig
+    from src.services.perceptual_hash import HASH_KINDS
+
+    parser = argparse.ArgumentParser(description="重复切片检测工具")
+    parser.add_argument("directories", nargs='+', help="全景图目录")
+    parser.add_argument("--max-distance", type=int, default=ImageConfig().duplicate_max_distance,
+                        help="视为近似重复的最大汉明距离（0-15），0表示只报告完全相同的哈希")
+    parser.add_argument("--hash", choices=HASH_KINDS, default='phash', help="使用的感知哈希")
+    parser.add_argument("--json", help="将完整分组写入JSON文件")
+    parser.add_argument("--limit", type=int, default=20, help="最多显示的分组数")
+    args = parser.parse_args()
+
+    if not 0 <= args.max_distance <= 15:
+        parser.error("--max-distance 必须在0-15之间")
+    report(args.directories, args.max_distance, args.hash, args.json, args.limit)
+
+
+if __name__ == '__main__':
+    main()
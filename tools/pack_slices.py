@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+切片打包工具
+将全景图目录下每个切片子目录的 hole_<N>.png 打包为 slices.npy + slices.json，
+各子目录在进程池中并行处理；打包文件已是最新（不早于任何PNG）的子目录跳过
+
+用法:
+    python tools/pack_slices.py <全景图目录>
+    python tools/pack_slices.py <全景图目录> --workers 4 --remove-png
+    python tools/pack_slices.py <全景图目录> --force
+"""
+
+import sys
+import argparse
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+def pack(panoramic_dir: str, workers: int, remove_png: bool, force: bool):
+    """打包目录下的全部切片子目录"""
+    from src.services.packed_slices import pack_directory
+
+    def progress(done, total, message):
+        print(f"\r  {message}", end='', flush=True)
+
+    start = time.perf_counter()
+    packed, errors = pack_directory(panoramic_dir, workers or None, remove_png, force, progress)
+    print()
+
+    converted = {slice_dir: count for slice_dir, count in packed.items() if count}
+    print(f"✅ 已打包 {len(converted)} 个子目录, 共 {sum(converted.values())} 个切片, "
+          f"跳过 {len(packed) - len(converted)} 个（无切片或已是最新）, "
+          f"耗时 {time.perf_counter() - start:.1f}s")
+    for slice_dir, error in sorted(errors.items()):
+        print(f"❌ {slice_dir}: {error}")
+    return not errors
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="切片打包工具")
+    parser.add_argument("panoramic_dir", help="全景图目录")
+    parser.add_argument("--workers", type=int, default=0, help="工作进程数，0表示使用CPU核数")
+    parser.add_argument("--remove-png", action="store_true", help="打包成功后删除源PNG文件")
+    parser.add_argument("--force", action="store_true", help="打包文件已是最新时也重新打包")
+    args = parser.parse_args()
+
+    if not pack(args.panoramic_dir, args.workers, args.remove_png, args.force):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+整板标注报告工具
+为全景图目录下的每张板渲染标注总览PNG（孔位按最终标注着色，模型预测与人工标注不一致的孔位打叉），
+各板在进程池中并行渲染，输出 <输出目录>/<全景ID>.png 和统计汇总 summary.csv
+
+用法:
+    python tools/render_plate_reports.py <全景图目录> --annotations annotations.json --output reports
+    python tools/render_plate_reports.py <全景图目录> --annotations a.json b.json --predictions model.json --output reports
+    python tools/render_plate_reports.py <全景图目录> --annotations a.json --output reports --width 1544 --workers 4
+"""
+
+import sys
+import argparse
+import os
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+def load_labels(json_paths):
+    """合并多个标注文件，后面的文件覆盖前面文件中的同一孔位"""
+    from src.services.plate_report import load_hole_labels
+
+    merged = {}
+    for json_path in json_paths or []:
+        for panoramic_id, holes in load_hole_labels(json_path).items():
+            merged.setdefault(panoramic_id, {}).update(holes)
+    return merged
+
+
+def render(panoramic_dir: str, output_dir: str, annotation_paths, prediction_paths, width: int, workers: int):
+    """渲染目录下全部全景图的报告"""
+    from src.core.config import ImageConfig
+    from src.services.panoramic_image_service import PanoramicImageService
+    from src.services.plate_report import write_report_summary
+
+    labels = load_labels(annotation_paths)
+    predictions = load_labels(prediction_paths)
+    print(f"📋 人工标注 {sum(map(len, labels.values()))} 个孔位, "
+          f"模型预测 {sum(map(len, predictions.values()))} 个孔位")
+
+    def progress(done, total, message):
+        print(f"\r  {message}", end='', flush=True)
+
+    service = PanoramicImageService(ImageConfig(decode_workers=0, report_width=width, report_workers=workers))
+    start = time.perf_counter()
+    summaries, errors = service.render_plate_reports(panoramic_dir, output_dir, labels, predictions,
+                                                     progress_callback=progress)
+    elapsed = time.perf_counter() - start
+    service.shutdown()
+    print()
+
+    summary_path = os.path.join(output_dir, 'summary.csv')
+    write_report_summary(summary_path, summaries)
+    disagreements = sum(len(summary['disagreements']) for summary in summaries.values())
+    print(f"✅ 已渲染 {len(summaries)} 张板, 耗时 {elapsed:.1f}s "
+          f"({len(summaries) / max(elapsed, 1e-9):.1f} 板/秒), 不一致孔位 {disagreements} 个")
+    print(f"📄 统计汇总: {summary_path}")
+    for panoramic_id, error in sorted(errors.items()):
+        print(f"❌ {panoramic_id}: {error}")
+    return not errors
+
+
+def main():
+    """主函数"""
+    from src.core.config import ImageConfig
+
+    parser = argparse.ArgumentParser(description="整板标注报告工具")
+    parser.add_argument("panoramic_dir", help="全景图目录")
+    parser.add_argument("--annotations", nargs='+', help="人工标注文件（最终标注）")
+    parser.add_argument("--predictions", nargs='+', help="模型预测文件，用于标出不一致的孔位")
+    parser.add_argument("--output", required=True, help="报告输出目录")
+    parser.add_argument("--width", type=int, default=ImageConfig().report_width, help="报告图宽度（像素）")
+    parser.add_argument("--workers", type=int, default=0, help="渲染进程数，0表示使用CPU核数")
+    args = parser.parse_args()
+
+    if args.width <= 0:
+        parser.error("--width 必须大于0")
+    if not render(args.panoramic_dir, args.output, args.annotations, args.predictions, args.width, args.workers):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
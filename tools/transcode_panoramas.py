@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+全景图无损转码工具
+在进程池中把全景图目录下未压缩的BMP全景图转码为无损PNG（压缩级别可调）或TIFF（deflate），
+逐像素比对一致后原子替换并删除BMP（--keep-originals 保留）。进度记入
+<全景图目录>/.annotation_state/transcode_log.jsonl，中断（Ctrl+C）后重新运行从断点继续
+
+用法:
+    python tools/transcode_panoramas.py <全景图目录>
+    python tools/transcode_panoramas.py <全景图目录> --format tiff --workers 4
+    python tools/transcode_panoramas.py <全景图目录> --level 1 --keep-originals
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+def transcode(panoramic_dir: str, fmt: str, level: int, workers: int, keep_originals: bool,
+              limit: int = 50):
+    """转码目录并输出吞吐和体积变化"""
+    from src.core.config import ImageConfig
+    from src.services.panoramic_image_service import PanoramicImageService
+
+    service = PanoramicImageService(ImageConfig(decode_workers=0, transcode_workers=workers))
+    log_path = service.get_transcode_log_path(panoramic_dir)
+
+    def progress(done, total, message):
+        print(f"\r  {message}", end='', flush=True)
+
+    try:
+        log, stats = service.transcode_directory_panoramas(panoramic_dir, fmt, level, keep_originals,
+                                                           progress_callback=progress)
+    except KeyboardInterrupt:
+        print(f"\n⏸️ 已中断，进度已保存到 {log_path}，重新运行将从断点继续")
+        return False
+    finally:
+        service.shutdown()
+    print()
+
+    elapsed = max(stats['seconds'], 1e-9)
+    source_mb = stats['source_bytes'] / 1024 / 1024
+    target_mb = stats['target_bytes'] / 1024 / 1024
+    print(f"✅ 转码 {stats['files']} 个文件, 耗时 {stats['seconds']:.1f}s "
+          f"({stats['files'] / elapsed:.2f} 文件/秒, {source_mb / elapsed:.1f} MB/s), "
+          f"跳过已完成的 {stats['skipped']} 个文件")
+    if stats['source_bytes']:
+        print(f"📦 {source_mb:.1f} MB -> {target_mb:.1f} MB "
+              f"(减少 {(1 - stats['target_bytes'] / stats['source_bytes']) * 100:.1f}%)")
+    print(f"📄 进度日志: {log_path}")
+    if not stats['failed']:
+        return True
+    failed = sorted(source for source, entry in log.entries.items() if entry['error'] is not None)
+    print(f"❌ 转码失败 {len(failed)} 个文件（原文件保留）:")
+    for source in failed[:limit]:
+        print(f"  {source}: {log.entries[source]['error']}")
+    if len(failed) > limit:
+        print(f"  ... 另有 {len(failed) - limit} 个文件未显示")
+    return False
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="全景图无损转码工具")
+    parser.add_argument("panoramic_dir", help="全景图目录")
+    parser.add_argument("--format", choices=['png', 'tiff'], default='png', help="输出格式")
+    parser.add_argument("--level", type=int, default=6, help="PNG压缩级别（0-9），TIFF忽略")
+    parser.add_argument("--workers", type=int, default=0, help="转码进程数，0表示使用CPU核数")
+    parser.add_argument("--keep-originals", action="store_true", help="转码成功后保留BMP文件")
+    parser.add_argument("--limit", type=int, default=50, help="最多显示的转码失败文件数")
+    args = parser.parse_args()
+
+    if args.workers < 0:
+        parser.error("--workers 不能为负数")
+    if not 0 <= args.level <= 9:
+        parser.error("--level 必须在0-9之间")
+    if not transcode(args.panoramic_dir, args.format, args.level, args.workers, args.keep_originals,
+                     args.limit):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+图像完整性校验工具
+在进程池中完整解码全景图目录下的全景图和切片文件，解码失败的文件（截断的PNG、复制到一半的BMP等）
+记入隔离清单 <全景图目录>/.annotation_state/quarantine.json，标注工具加载目录时跳过这些文件。
+上次校验后未变化的文件不再解码，中断（Ctrl+C）后重新运行从断点继续
+
+用法:
+    python tools/verify_images.py <全景图目录>
+    python tools/verify_images.py <全景图目录> --workers 4
+    python tools/verify_images.py <全景图目录> --rescan
+"""
+
+import sys
+import argparse
+import os
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+
+def verify(panoramic_dir: str, workers: int, rescan: bool, limit: int = 50):
+    """校验目录并输出隔离的文件"""
+    from src.core.config import ImageConfig
+    from src.services.panoramic_image_service import PanoramicImageService
+
+    service = PanoramicImageService(ImageConfig(decode_workers=0, verify_workers=workers))
+    manifest_path = service.get_quarantine_manifest_path(panoramic_dir)
+    if rescan and os.path.exists(manifest_path):
+        os.remove(manifest_path)
+        print(f"🗑️ 已删除旧的隔离清单: {manifest_path}")
+
+    def progress(done, total, message):
+        print(f"\r  {message}", end='', flush=True)
+
+    start = time.perf_counter()
+    try:
+        manifest, checked = service.verify_directory_images(panoramic_dir, progress_callback=progress)
+    except KeyboardInterrupt:
+        print(f"\n⏸️ 已中断，进度已保存到 {manifest_path}，重新运行将从断点继续")
+        return False
+    finally:
+        service.shutdown()
+    elapsed = time.perf_counter() - start
+    print()
+
+    print(f"✅ 本次解码 {checked} 个文件, 耗时 {elapsed:.1f}s ({checked / max(elapsed, 1e-9):.1f} 文件/秒), "
+          f"已校验 {len(manifest.verified) + len(manifest)} 个文件")
+    print(f"📄 隔离清单: {manifest_path}")
+    if not len(manifest):
+        return True
+    print(f"❌ 解码失败 {len(manifest)} 个文件:")
+    for path in sorted(manifest.quarantined)[:limit]:
+        print(f"  {path}: {manifest.quarantined[path]['error']}")
+    if len(manifest) > limit:
+        print(f"  ... 另有 {len(manifest) - limit} 个文件未显示")
+    return False
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="图像完整性校验工具")
+    parser.add_argument("panoramic_dir", help="全景图目录")
+    parser.add_argument("--workers", type=int, default=0, help="校验进程数，0表示使用CPU核数")
+    parser.add_argument("--rescan", action="store_true", help="忽略上次的校验结果，重新解码全部文件")
+    parser.add_argument("--limit", type=int, default=50, help="最多显示的解码失败文件数")
+    args = parser.parse_args()
+
+    if args.workers < 0:
+        parser.error("--workers 不能为负数")
+    if not verify(args.panoramic_dir, args.workers, args.rescan, args.limit):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()